@@ -4,14 +4,16 @@ Punto de entrada del servidor Backend (API REST).
 
 Características:
     - Conexión dual: Azure (nube) con fallback automático a SQLite (local)
+      y réplicas de lectura opcionales
     - Panel de administración de BD accesible en /admin
     - API REST completa en /api/
 
 Ejecución:
-    python app.py
+    python app.py        (servidor de desarrollo; FLASK_DEBUG=1 activa el modo debug)
+    python servidor.py   (producción: varios procesos e hilos, ver gunicorn.conf.py)
 """
-import os
-from flask import Flask, send_from_directory, jsonify
+import time
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from config import Config
 from models import db
@@ -19,77 +21,134 @@ from routes.duenos import duenosBlueprint
 from routes.mascotas import mascotasBlueprint
 from routes.citas import citasBlueprint
 from routes.historial import historialBlueprint
+from routes.dashboard import dashboardBlueprint
+from routes.analitica import analiticaBlueprint
+from routes.cambios import cambiosBlueprint
+from routes.eventos import eventosBlueprint
+from services.exportacion import FORMATOS, exportarTabla
+from services.migraciones import sincronizarEsquema
+from services.cache import configurarCache
+from services.metricas import configurarMetricas, registroMetricas
+from services.serializacion import configurarSerializacion
+from services.estaticos import servirFrontend
+from services.motor import registrarPragmasSqlite
+from services.enrutador import configurarEnrutamiento
+from services.derivados import completarDerivados
+from services.eventos import configurarEventos
+from services.sincronizacion import configurarSincronizacion
+from services.hubEventos import iniciarHubLocal
+from services.estadosCitas import barredorInasistencias
+from services.eliminacion import reanudarPurga
 
 # Importar modelos para que SQLAlchemy los registre al crear tablas
 from models.dueno import Dueno        # noqa: F401
 from models.mascota import Mascota    # noqa: F401
 from models.cita import Cita          # noqa: F401
 from models.historial import HistorialClinico  # noqa: F401
+from models.resumen import ResumenMascota      # noqa: F401
+from models.analitica import AnaliticaPeso     # noqa: F401
+from models.cambios import Eliminacion, SecuenciaCambios  # noqa: F401
 
 
-# Variable global para rastrear el tipo de conexión activa
-conexionActiva = "Desconocida"
+def _prepararEsquema(motor=None):
+    """
+    Conecta a la BD y, solo si el esquema de los modelos cambió desde el
+    último arranque, crea las tablas e índices que falten (ver
+    services/migraciones.py).
+    """
+    creados = sincronizarEsquema(motor)
+    if creados is None:
+        return
+    print("  Esquema revisado contra los modelos")
+    if creados:
+        print(f"  Indices creados: {', '.join(creados)}")
+    # Con el esquema nuevo puede haber historial sin sus datos derivados
+    # (tabla recién creada, ver services/derivados.py)
+    for tabla, filas in completarDerivados(motor or db.engine).items():
+        print(f"  {tabla}: {filas} filas calculadas")
+
+
+def _iniciarBd(app):
+    """
+    Crea los motores con el perfil de su tipo de conexión (pool, reciclaje,
+    pre-ping; ver Config.opcionesMotor): el de la URI configurada y, como
+    binds, el respaldo SQLite y las réplicas de lectura. A los que son SQLite
+    les registra sus PRAGMA (WAL, synchronous, mmap, caché, busy_timeout).
+    """
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = Config.opcionesMotor(uri)
+    app.config["SQLALCHEMY_BINDS"] = Config.bindsEnrutamiento(uri)
+    db.init_app(app)
+    with app.app_context():
+        for motor in db.engines.values():
+            registrarPragmasSqlite(motor, Config.pragmasSqlite())
 
 
 def crearApp():
     """
     Factory pattern para crear la aplicación Flask.
-    Implementa fallback automático: si Azure falla, usa SQLite.
+    Implementa fallback automático: si Azure falla, usa SQLite, y vuelve a
+    Azure cuando responde (ver services/enrutador.py).
     """
-    global conexionActiva
-
+    inicio = time.perf_counter()
     app = Flask(__name__, static_folder=None)
     app.config.from_object(Config)
     CORS(app)
-    db.init_app(app)
+    _iniciarBd(app)
+    configurarCache(app)
+    configurarSerializacion(app)
+    configurarMetricas(app)
+    configurarEventos(app)
+    configurarSincronizacion(app)
 
     # --- LÓGICA DE FALLBACK AUTOMÁTICO ---
+    # La conexión a la nube tiene un tiempo máximo (DB_CONNECT_TIMEOUT): si el
+    # servidor no responde, el respaldo se activa en segundos
     with app.app_context():
+        enrutador = configurarEnrutamiento(app, Config.obtenerTipoConexion())
         try:
             # Intentar conectar a la BD configurada (Azure u otra)
-            with db.engine.connect() as conn:
-                conn.execute(db.text("SELECT 1"))
-            db.create_all()
-            conexionActiva = Config.obtenerTipoConexion()
-            print(f"  BD conectada: {conexionActiva}")
+            _prepararEsquema()
         except Exception as errorConexion:
+            if enrutador.respaldo is None:
+                raise
             # Si falla, cambiar automáticamente a SQLite local
             print(f"  Conexion principal fallo: {errorConexion}")
             print("  Activando fallback automatico a SQLite local...")
-            app.config["SQLALCHEMY_DATABASE_URI"] = Config.SQLITE_FALLBACK_URI
-            db.init_app(app)
-            with app.app_context():
-                db.create_all()
-            conexionActiva = "SQLite (Local - Fallback)"
-            print(f"  BD conectada: {conexionActiva}")
+            enrutador.usarRespaldo(errorConexion)
+            _prepararEsquema(enrutador.respaldo.motor)
+        print(f"  BD conectada: {enrutador.descripcion()}")
+        if enrutador.replicas:
+            print(f"  Replicas de lectura: {len(enrutador.replicas)}")
 
     # Registrar Blueprints (rutas de la API)
     app.register_blueprint(duenosBlueprint)
     app.register_blueprint(mascotasBlueprint)
     app.register_blueprint(citasBlueprint)
     app.register_blueprint(historialBlueprint)
+    app.register_blueprint(dashboardBlueprint)
+    app.register_blueprint(analiticaBlueprint)
+    app.register_blueprint(cambiosBlueprint)
+    app.register_blueprint(eventosBlueprint)
 
     # =============================================
     # RUTAS DEL FRONTEND
+    # (versión empaquetada de Frontend/dist si existe, ver services/estaticos.py)
     # =============================================
-    frontendDir = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "..", "Frontend"
-    )
-
     @app.route("/")
     def servirIndex():
         """Sirve la pagina principal del Frontend."""
-        return send_from_directory(frontendDir, "index.html")
+        return servirFrontend("index.html")
 
     @app.route("/admin")
     def servirAdmin():
         """Sirve el panel de administracion de base de datos."""
-        return send_from_directory(frontendDir, "admin.html")
+        return servirFrontend("admin.html")
 
     @app.route("/<path:filename>")
     def servirArchivosEstaticos(filename):
         """Sirve archivos estaticos del Frontend (CSS, JS, imagenes)."""
-        return send_from_directory(frontendDir, filename)
+        return servirFrontend(filename)
 
     # =============================================
     # ENDPOINT DE ESTADO (con info de conexión)
@@ -101,7 +160,7 @@ def crearApp():
             "estado": "activo",
             "aplicacion": "Huellitas Vet API",
             "version": "1.0.0",
-            "baseDeDatos": conexionActiva
+            "baseDeDatos": enrutador.descripcion()
         }), 200
 
     # =============================================
@@ -112,7 +171,9 @@ def crearApp():
         """Retorna información general de la base de datos para el panel admin."""
         try:
             return jsonify({
-                "conexion": conexionActiva,
+                "conexion": enrutador.descripcion(),
+                "enrutamiento": enrutador.estado(),
+                "serializacion": app.json.backend.nombre,
                 "tablas": [
                     {"nombre": "duenos", "registros": Dueno.query.count()},
                     {"nombre": "mascotas", "registros": Mascota.query.count()},
@@ -125,7 +186,11 @@ def crearApp():
 
     @app.route("/api/admin/tabla/<nombreTabla>")
     def adminTabla(nombreTabla):
-        """Retorna todos los registros de una tabla para inspección del evaluador."""
+        """
+        Retorna todos los registros de una tabla para inspección del evaluador.
+        Con ?formato=ndjson o ?formato=csv la tabla se exporta en streaming
+        (memoria constante, ver services/exportacion.py).
+        """
         tablas = {
             "duenos": Dueno,
             "mascotas": Mascota,
@@ -137,6 +202,15 @@ def crearApp():
             return jsonify({"error": f"Tabla '{nombreTabla}' no encontrada"}), 404
 
         modelo = tablas[nombreTabla]
+
+        formato = request.args.get("formato")
+        if formato is not None:
+            if formato not in FORMATOS:
+                return jsonify({
+                    "error": f"Formato inválido. Opciones: {', '.join(FORMATOS)}"
+                }), 400
+            return exportarTabla(modelo, formato)
+
         registros = modelo.query.all()
         columnas = [col.name for col in modelo.__table__.columns]
 
@@ -155,6 +229,20 @@ def crearApp():
             "total": len(datos)
         }), 200
 
+    @app.route("/api/admin/metrics")
+    def adminMetricas():
+        """
+        Métricas de este proceso por ruta: histograma de latencia, consultas SQL,
+        tiempo en BD y las sentencias más lentas (ver services/metricas.py).
+        Con ?formato=prometheus responde en formato de texto de Prometheus.
+        """
+        if request.args.get("formato") == "prometheus":
+            return Response(
+                registroMetricas.comoPrometheus(),
+                mimetype="text/plain; version=0.0.4"
+            )
+        return jsonify(registroMetricas.comoDict()), 200
+
     @app.route("/api/admin/estructura")
     def adminEstructura():
         """
@@ -181,10 +269,10 @@ def crearApp():
         return jsonify({
             "estructura": estructura,
             "totalTablas": len(estructura),
-            "conexion": conexionActiva
+            "conexion": enrutador.descripcion()
         }), 200
 
-    print("  Inicializacion completada.")
+    print(f"  Inicializacion completada en {(time.perf_counter() - inicio) * 1000:.0f} ms.")
     return app
 
 
@@ -192,7 +280,13 @@ def crearApp():
 if __name__ == "__main__":
     app = crearApp()
     print(f"\n  Clinica Veterinaria Huellitas")
-    print(f"  Servidor:    http://localhost:5000")
-    print(f"  Panel Admin: http://localhost:5000/admin")
-    print(f"  Base datos:  {conexionActiva}\n")
-    app.run(debug=True, port=5000)
+    print(f"  Servidor:    http://localhost:{Config.PUERTO}")
+    print(f"  Panel Admin: http://localhost:{Config.PUERTO}/admin")
+    print(f"  Base datos:  {app.extensions['enrutadorBd'].descripcion()}")
+    # Con FLASK_DEBUG=1 el recargador relanza este script: el primer proceso
+    # que toma el puerto atiende el flujo y el otro solo publica
+    iniciarHubLocal()
+    barredorInasistencias.iniciar(app)
+    reanudarPurga(app)
+    print()
+    app.run(debug=Config.DEBUG, port=Config.PUERTO)
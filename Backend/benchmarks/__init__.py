@@ -0,0 +1,6 @@
+"""
+Benchmarks de rendimiento del Backend.
+Cada módulo es un script independiente que se ejecuta desde la carpeta Backend:
+    python -m benchmarks.<modulo> --help
+Usan una base de datos SQLite temporal, nunca la de trabajo (huellitas.db).
+"""
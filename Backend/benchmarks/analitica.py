@@ -0,0 +1,161 @@
+"""
+Benchmark de la analítica de peso (services/analitica.py).
+
+Genera un volumen sintético en una BD SQLite temporal (python seed.py
+--duenos N) y compara dos formas de calcular lo mismo: la serie de cada
+mascota (pendiente en kg/mes y mayor cambio entre consultas) y los
+percentiles de peso por cohorte (especie, raza y grupo de edad):
+    por objeto   - recorrer las mascotas con el ORM, cargar el historial de
+                   cada una y calcular con ciclos de Python
+    vectorizado  - recalcularAnalitica() y cohortes(): una consulta por
+                   cálculo y arreglos de numpy (sin escribir: se hace
+                   rollback)
+
+Verifica además que ambas formas den los mismos resultados.
+
+Ejecución (desde la carpeta Backend):
+    python -m benchmarks.analitica --duenos 5000 --repeticiones 3
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# La URI debe fijarse antes de importar config/app
+_carpeta = tempfile.mkdtemp()
+_archivoTemporal = os.path.join(_carpeta, "benchmark_analitica.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_archivoTemporal}"
+
+from app import crearApp  # noqa: E402
+from models import db  # noqa: E402
+from models.analitica import AnaliticaPeso  # noqa: E402
+from models.mascota import Mascota  # noqa: E402
+from services.analitica import (  # noqa: E402
+    DIAS_POR_MES, GRUPOS_EDAD, LIMITES_EDAD, PERCENTILES, cohortes, recalcularAnalitica
+)
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentil(ordenados, p):
+    """Interpolación lineal, igual que numpy."""
+    posicion = (len(ordenados) - 1) * p / 100
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
+
+
+def porObjeto():
+    """Cálculo con objetos ORM y ciclos de Python. Retorna (series, cohortes)."""
+    series = {}
+    grupos = defaultdict(list)
+    for mascota in Mascota.query.all():
+        registros = sorted(
+            (registro for registro in mascota.historiales if registro.pesoEnConsulta is not None),
+            key=lambda registro: (registro.fecha, registro.id)
+        )
+        peso = registros[-1].pesoEnConsulta if registros else mascota.peso
+        if registros:
+            x = [(registro.fecha - registros[0].fecha).days for registro in registros]
+            y = [registro.pesoEnConsulta for registro in registros]
+            n = len(x)
+            denominador = n * sum(v * v for v in x) - sum(x) ** 2
+            pendiente = (
+                (n * sum(a * b for a, b in zip(x, y)) - sum(x) * sum(y)) / denominador * DIAS_POR_MES
+                if denominador > 0 else None
+            )
+            cambios = [(y[i] - y[i - 1]) / y[i - 1] * 100 for i in range(1, n) if y[i - 1]]
+            # A igual magnitud, el cambio más reciente (como services/analitica.py)
+            series[mascota.id] = (pendiente, max(reversed(cambios), key=abs) if cambios else None)
+        if peso is not None:
+            edad = mascota.edadAnios
+            grupo = sum(edad >= limite for limite in LIMITES_EDAD)
+            grupos[(mascota.especie, mascota.raza, GRUPOS_EDAD[grupo])].append(peso)
+
+    resultado = {
+        clave: [_percentil(sorted(pesos), p) for p in PERCENTILES]
+        for clave, pesos in grupos.items()
+    }
+    return series, resultado
+
+
+def vectorizado():
+    """Cálculo de services/analitica.py. Retorna (series, cohortes)."""
+    recalcularAnalitica(db.session)
+    series = {
+        fila.mascotaId: (fila.kgPorMes, fila.cambioMaximo)
+        for fila in AnaliticaPeso.query.all()
+    }
+    resultado = {
+        (cohorte["especie"], cohorte["raza"], cohorte["grupoEdad"]): list(cohorte["percentiles"].values())
+        for cohorte in cohortes(porRaza=True)
+    }
+    db.session.rollback()
+    return series, resultado
+
+
+def _diferencias(referencia, calculado):
+    """Cantidad de series y cohortes que no coinciden (con el redondeo de la tabla)."""
+    def distinto(a, b, tolerancia):
+        if a is None or b is None:
+            return (a is None) != (b is None)
+        return abs(a - b) > tolerancia
+
+    series = sum(
+        distinto(pendiente, calculado[0].get(mascotaId, (None, None))[0], 0.001)
+        or distinto(cambio, calculado[0].get(mascotaId, (None, None))[1], 0.051)
+        for mascotaId, (pendiente, cambio) in referencia[0].items()
+    ) + abs(len(referencia[0]) - len(calculado[0]))
+    cohortesDistintas = sum(
+        any(distinto(a, b, 0.006) for a, b in zip(valores, calculado[1].get(clave, [None] * 5)))
+        for clave, valores in referencia[1].items()
+    ) + abs(len(referencia[1]) - len(calculado[1]))
+    return series, cohortesDistintas
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        db.session.expire_all()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la analítica de peso")
+    parser.add_argument("--duenos", type=int, default=5000, help="Dueños sintéticos a generar")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por forma (mediana)")
+    argumentos = parser.parse_args()
+
+    print(f"\n  Generando datos: {argumentos.duenos} dueños...")
+    subprocess.run(
+        [sys.executable, "seed.py", "--duenos", str(argumentos.duenos)],
+        cwd=DIRECTORIO, env=os.environ, check=True, stdout=subprocess.DEVNULL
+    )
+    app = crearApp()
+    with app.app_context():
+        mascotas = Mascota.query.count()
+        msObjeto, referencia = medir(porObjeto, argumentos.repeticiones)
+        msVector, calculado = medir(vectorizado, argumentos.repeticiones)
+        series, cohortesDistintas = _diferencias(referencia, calculado)
+
+    print(f"  Mascotas: {mascotas} | series con peso: {len(referencia[0])} | "
+          f"cohortes: {len(referencia[1])}\n")
+    print(f"  {'forma':14} {'ms':>10}")
+    print(f"  {'por objeto':14} {msObjeto:10.1f}")
+    print(f"  {'vectorizado':14} {msVector:10.1f}")
+    print(f"\n  x{msObjeto / msVector:.1f} | diferencias: {series} series, {cohortesDistintas} cohortes")
+    shutil.rmtree(_carpeta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
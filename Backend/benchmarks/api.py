@@ -0,0 +1,508 @@
+"""
+Benchmark HTTP de la API REST con línea base y detección de regresiones.
+
+Genera un volumen sintético (seed.generarDatosSinteticos) en una BD SQLite
+temporal y recorre TODAS las rutas de los blueprints y de app.py (admin,
+estado y Frontend) con los cuerpos de la colección Postman de DT/. Por cada
+endpoint reporta latencia p50/p95/p99, solicitudes por segundo, consultas SQL
+por solicitud y, en modo cliente, el pico de memoria de una solicitud
+(tracemalloc; con HTTP real lo dominan los búferes del socket).
+
+Modos:
+    cliente   - Cliente de pruebas de Flask (sin red, mide solo la aplicación)
+    servidor  - Servidor WSGI real de Werkzeug en localhost (incluye HTTP)
+    --url     - Un servidor ya en ejecución (por ejemplo el de producción),
+                cargado antes con: python seed.py --duenos N
+
+Línea base:
+    --guardar base.json   guarda los resultados
+    --comparar base.json  compara y termina con código 1 si algún endpoint
+                          empeora más allá de la tolerancia
+
+Ejecución (desde la carpeta Backend):
+    python -m benchmarks.api --duenos 500 --guardar base_api.json
+    python -m benchmarks.api --duenos 500 --comparar base_api.json
+    python -m benchmarks.api --modo servidor --concurrencia 8
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+# La URI y la caché deben fijarse antes de importar config/app
+_archivoTemporal = os.path.join(tempfile.mkdtemp(), "benchmark_api.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_archivoTemporal}"
+if "--sin-cache" in sys.argv:
+    os.environ["CACHE_HABILITADA"] = "0"
+
+from sqlalchemy import event  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+from app import crearApp  # noqa: E402
+from models import db  # noqa: E402
+from seed import generarDatosSinteticos  # noqa: E402
+
+# Diferencias menores a estos umbrales se consideran ruido de medición
+UMBRAL_MS = 2.0
+UMBRAL_MEMORIA_KB = 256
+
+
+class Escenario:
+    """
+    Una solicitud a medir.
+
+    Atributos:
+        nombre  - Identificador en el reporte y en la línea base
+        metodo  - GET, POST, PUT o DELETE
+        ruta    - Texto o función(i) -> ruta (i = número de repetición)
+        cuerpo  - None, dict o función(i) -> dict/texto
+        estado  - Código HTTP esperado
+        tipo    - Content-Type del cuerpo (por defecto JSON)
+    """
+
+    def __init__(self, nombre, metodo, ruta, cuerpo=None, estado=200, tipo="application/json"):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.ruta = ruta
+        self.cuerpo = cuerpo
+        self.estado = estado
+        self.tipo = tipo
+
+    def solicitud(self, i):
+        """(ruta, cuerpo en bytes o None) para la repetición i."""
+        ruta = self.ruta(i) if callable(self.ruta) else self.ruta
+        cuerpo = self.cuerpo(i) if callable(self.cuerpo) else self.cuerpo
+        if cuerpo is not None and not isinstance(cuerpo, (str, bytes)):
+            cuerpo = json.dumps(cuerpo)
+        if isinstance(cuerpo, str):
+            cuerpo = cuerpo.encode("utf-8")
+        return ruta, cuerpo
+
+
+# =============================================
+# ESCENARIOS (colección Postman de DT/)
+# =============================================
+def crearEscenarios(totales):
+    """
+    Lecturas primero y escrituras al final, para que los GET se midan sobre
+    los datos generados. Los DELETE usan ids distintos en cada repetición.
+    """
+    cantidadDuenos = totales["duenos"]
+    cantidadMascotas = totales["mascotas"]
+    cantidadCitas = totales["citas"]
+    cantidadHistorial = totales["historial_clinico"]
+    duenoId = cantidadDuenos // 2
+    mascotaId = cantidadMascotas // 2
+    # Citas nuevas desde un lunes a 60+ días (después de la agenda del generador)
+    futura = date.today() + timedelta(days=60)
+    lunes = futura + timedelta(days=(7 - futura.weekday()) % 7)
+    contador = itertools.count()
+
+    def unico(_):
+        """Número único por solicitud (también entre hilos)."""
+        return next(contador)
+
+    def nuevoDueno(i):
+        return {"nombre": "Pedro", "apellido": "Sánchez", "documento": f"9{unico(i):09d}",
+                "telefono": "3001112233", "correo": "pedro.sanchez@email.com"}
+
+    def nuevaCita(i):
+        """Una franja libre distinta por solicitud: 20 por día, de lunes a sábado."""
+        n = unico(i)
+        semana, dia = divmod(n // 20, 6)
+        return {"mascotaId": 1 + n % cantidadMascotas,
+                "fecha": (lunes + timedelta(weeks=semana, days=dia)).isoformat(),
+                "hora": f"{8 + n % 20 // 2:02d}:{n % 2 * 30:02d}",
+                "motivo": "Vacunación anual"}
+
+    def lote(fabrica, cantidad=50):
+        return lambda i: [fabrica(i) for _ in range(cantidad)]
+
+    def desdeElFinal(prefijo, total):
+        """Ruta con un id distinto en cada repetición, empezando por el último."""
+        secuencia = itertools.count()
+        return lambda i: f"{prefijo}/{total - next(secuencia)}"
+
+    nuevaMascota = {"nombre": "Toby", "especie": "Perro", "raza": "Poodle",
+                    "fechaNacimiento": "2022-05-10", "peso": 6.5, "duenoId": duenoId}
+    nuevoRegistro = {"mascotaId": mascotaId, "fecha": "2025-02-10",
+                     "diagnostico": "Control rutinario", "tratamiento": "Ninguno",
+                     "veterinario": "Dra. Valentina Restrepo", "pesoEnConsulta": 28.1}
+
+    return [
+        # --- Aplicación y Frontend ---
+        Escenario("estado", "GET", "/api/estado"),
+        Escenario("dashboard", "GET", "/api/dashboard"),
+        Escenario("frontend index", "GET", "/"),
+        Escenario("frontend admin", "GET", "/admin"),
+        Escenario("frontend estatico", "GET", "/js/api.js"),
+        # --- Dueños ---
+        Escenario("duenos listar", "GET", "/api/duenos"),
+        Escenario("duenos pagina", "GET", "/api/duenos?limit=50"),
+        Escenario("duenos campos", "GET", "/api/duenos?limit=200&fields=id,nombre,apellido"),
+        Escenario("duenos detalle", "GET", f"/api/duenos/{duenoId}"),
+        Escenario("duenos buscar nombre", "GET", "/api/duenos/buscar?q=mart"),
+        Escenario("duenos buscar documento", "GET", f"/api/duenos/buscar?q={1000000000 + duenoId}"),
+        # --- Mascotas ---
+        Escenario("mascotas listar", "GET", "/api/mascotas"),
+        Escenario("mascotas pagina", "GET", "/api/mascotas?limit=50"),
+        Escenario("mascotas detalle", "GET", f"/api/mascotas/{mascotaId}"),
+        Escenario("mascotas buscar", "GET", "/api/mascotas/buscar?q=Firulais"),
+        Escenario("mascotas buscar documento", "GET", f"/api/mascotas/buscar?q={1000000000 + duenoId}"),
+        # --- Citas ---
+        Escenario("citas listar", "GET", "/api/citas"),
+        Escenario("citas pagina", "GET", "/api/citas?limit=50"),
+        Escenario("citas detalle", "GET", f"/api/citas/{cantidadCitas // 2}"),
+        Escenario("citas disponibilidad", "GET",
+                  f"/api/citas/disponibilidad?fecha={date.today() + timedelta(days=7)}"),
+        # --- Historial ---
+        Escenario("historial listar", "GET", "/api/historial"),
+        Escenario("historial pagina", "GET", "/api/historial?limit=50"),
+        Escenario("historial detalle", "GET", f"/api/historial/{cantidadHistorial // 2}"),
+        Escenario("historial por mascota", "GET", f"/api/historial/mascota/{mascotaId}"),
+        Escenario("historial linea de tiempo", "GET",
+                  f"/api/historial/mascota/{mascotaId}/linea-tiempo?limit=20"),
+        # --- Analítica ---
+        Escenario("analitica cohortes", "GET", "/api/analitica/peso/cohortes?agrupar=raza"),
+        Escenario("analitica mascota", "GET", f"/api/analitica/peso/mascota/{mascotaId}"),
+        Escenario("analitica anomalias", "GET", "/api/analitica/peso/anomalias"),
+        # --- Sincronización incremental ---
+        Escenario("cambios token", "GET", "/api/cambios"),
+        Escenario("cambios desde el inicio", "GET", "/api/cambios?since=0"),
+        Escenario("eventos", "GET", "/api/eventos", estado=307),
+        # --- Administración ---
+        Escenario("admin info", "GET", "/api/admin/info"),
+        Escenario("admin estructura", "GET", "/api/admin/estructura"),
+        Escenario("admin tabla", "GET", "/api/admin/tabla/duenos"),
+        Escenario("admin exportar ndjson", "GET", "/api/admin/tabla/citas?formato=ndjson"),
+        Escenario("admin metricas", "GET", "/api/admin/metrics"),
+        Escenario("admin metricas prometheus", "GET", "/api/admin/metrics?formato=prometheus"),
+        # --- Escrituras ---
+        Escenario("duenos crear", "POST", "/api/duenos", nuevoDueno, estado=201),
+        Escenario("duenos actualizar", "PUT", f"/api/duenos/{duenoId}",
+                  {"telefono": "3009999999", "correo": "carlos.nuevo@email.com"}),
+        Escenario("duenos validacion", "POST", "/api/duenos",
+                  {"nombre": "", "apellido": "", "documento": "", "telefono": ""}, estado=400),
+        Escenario("mascotas crear", "POST", "/api/mascotas", nuevaMascota, estado=201),
+        Escenario("mascotas actualizar", "PUT", f"/api/mascotas/{mascotaId}",
+                  {"peso": 30.2, "observaciones": "Alergia a pollo. Vacunas al día."}),
+        Escenario("citas crear", "POST", "/api/citas", nuevaCita, estado=201),
+        Escenario("citas actualizar", "PUT", f"/api/citas/{cantidadCitas // 2}", {"estado": "Completada"}),
+        Escenario("citas cambiar estado", "POST", "/api/citas/estado",
+                  lambda i: {"estado": "Completada", "ids": list(range(1 + 20 * i, 21 + 20 * i))}),
+        Escenario("historial crear", "POST", "/api/historial", nuevoRegistro, estado=201),
+        Escenario("historial actualizar", "PUT", f"/api/historial/{cantidadHistorial // 2}",
+                  {"observaciones": "Actualizado: seguimiento en 3 meses"}),
+        Escenario("duenos importar", "POST", "/api/duenos/bulk", lote(nuevoDueno)),
+        Escenario("mascotas importar", "POST", "/api/mascotas/bulk",
+                  lambda i: [nuevaMascota] * 50),
+        Escenario("citas importar", "POST", "/api/citas/bulk", lote(nuevaCita)),
+        Escenario("historial importar", "POST", "/api/historial/bulk",
+                  lambda i: [nuevoRegistro] * 50),
+        # --- Eliminaciones (ids desde el final, uno distinto por repetición) ---
+        Escenario("historial eliminar", "DELETE", desdeElFinal("/api/historial", cantidadHistorial)),
+        Escenario("citas eliminar", "DELETE", desdeElFinal("/api/citas", cantidadCitas)),
+        Escenario("mascotas eliminar", "DELETE", desdeElFinal("/api/mascotas", cantidadMascotas)),
+        Escenario("duenos eliminar", "DELETE", desdeElFinal("/api/duenos", cantidadDuenos)),
+    ]
+
+
+def rutasSinEscenario(app, escenarios):
+    """Reglas de la aplicación que ningún escenario ejercita (para no olvidar endpoints)."""
+    adaptador = app.url_map.bind("localhost")
+    cubiertas = set()
+    for escenario in escenarios:
+        ruta = escenario.solicitud(0)[0].split("?")[0]
+        cubiertas.add(adaptador.match(ruta, method=escenario.metodo)[0])
+    return sorted(
+        regla.rule for regla in app.url_map.iter_rules()
+        if regla.endpoint not in cubiertas and regla.endpoint != "static"
+    )
+
+
+# =============================================
+# CLIENTES
+# =============================================
+class ClientePruebas:
+    """Solicitudes con el cliente de pruebas de Flask (sin red)."""
+
+    def __init__(self, app):
+        self._app = app
+        self._local = threading.local()
+
+    def enviar(self, metodo, ruta, cuerpo=None, tipo=None):
+        """Retorna (código de estado, cuerpo)."""
+        cliente = getattr(self._local, "cliente", None)
+        if cliente is None:
+            cliente = self._local.cliente = self._app.test_client()
+        respuesta = cliente.open(ruta, method=metodo, data=cuerpo,
+                                 content_type=tipo if cuerpo is not None else None)
+        return respuesta.status_code, respuesta.get_data()
+
+
+class ClienteHttp:
+    """Solicitudes HTTP reales con conexiones keep-alive (una por hilo)."""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self._anfitrion = partes.hostname
+        self._puerto = partes.port or 80
+        self._local = threading.local()
+        self._conexiones = []
+
+    def enviar(self, metodo, ruta, cuerpo=None, tipo=None):
+        """Retorna (código de estado, cuerpo)."""
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = http.client.HTTPConnection(self._anfitrion, self._puerto, timeout=60)
+            self._local.conexion = conexion
+            self._conexiones.append(conexion)
+        encabezados = {"Content-Type": tipo} if cuerpo is not None else {}
+        try:
+            conexion.request(metodo, ruta, body=cuerpo, headers=encabezados)
+            respuesta = conexion.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # El servidor cerró la conexión: se reintenta una vez con una nueva
+            conexion.close()
+            conexion.request(metodo, ruta, body=cuerpo, headers=encabezados)
+            respuesta = conexion.getresponse()
+        return respuesta.status, respuesta.read()
+
+    def cerrar(self):
+        """Cierra las conexiones keep-alive de todos los hilos."""
+        for conexion in self._conexiones:
+            conexion.close()
+
+
+# =============================================
+# MEDICIÓN
+# =============================================
+class ContadorConsultas:
+    """Cuenta las sentencias SQL ejecutadas por el motor (solo en el mismo proceso)."""
+
+    def __init__(self, motor):
+        self.total = 0
+        self._bloqueo = threading.Lock()
+        event.listen(motor, "before_cursor_execute", self._contar)
+
+    def _contar(self, *argumentos):
+        with self._bloqueo:
+            self.total += 1
+
+
+def _percentiles(latencias):
+    """p50, p95 y p99 en milisegundos."""
+    if len(latencias) < 2:
+        return latencias[0], latencias[0], latencias[0]
+    cortes = statistics.quantiles(latencias, n=100, method="inclusive")
+    return cortes[49], cortes[94], cortes[98]
+
+
+def medirEscenario(escenario, cliente, repeticiones, calentamiento, concurrencia,
+                   contador, medirMemoria):
+    """Ejecuta el escenario y retorna sus métricas."""
+    errores = []
+
+    def ejecutar(i):
+        ruta, cuerpo = escenario.solicitud(i)
+        inicio = time.perf_counter()
+        estado, _ = cliente.enviar(escenario.metodo, ruta, cuerpo, escenario.tipo)
+        duracion = (time.perf_counter() - inicio) * 1000
+        if estado != escenario.estado:
+            errores.append(f"{escenario.metodo} {ruta} -> {estado}")
+        return duracion
+
+    for i in range(calentamiento):
+        ejecutar(i)
+
+    consultasAntes = contador.total if contador else 0
+    inicio = time.perf_counter()
+    if concurrencia > 1:
+        with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+            latencias = list(hilos.map(ejecutar, range(repeticiones)))
+    else:
+        latencias = [ejecutar(i) for i in range(repeticiones)]
+    segundos = time.perf_counter() - inicio
+
+    memoriaKB = None
+    if medirMemoria:
+        tracemalloc.start()
+        ejecutar(repeticiones)
+        memoriaKB = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+    p50, p95, p99 = _percentiles(latencias)
+    return {
+        "p50": round(p50, 3),
+        "p95": round(p95, 3),
+        "p99": round(p99, 3),
+        "rps": round(repeticiones / segundos, 1),
+        "consultas": (
+            round((contador.total - consultasAntes) / repeticiones, 2) if contador else None
+        ),
+        "memoriaKB": memoriaKB,
+        "errores": errores[:3]
+    }
+
+
+# =============================================
+# LÍNEA BASE
+# =============================================
+def compararConBase(resultados, base, tolerancia):
+    """Lista de regresiones (texto) respecto a la línea base."""
+    for clave in ("modo", "duenos", "concurrencia", "cache"):
+        if base["meta"].get(clave) != resultados["meta"][clave]:
+            print(f"  Aviso: la línea base usa {clave}={base['meta'].get(clave)} "
+                  f"y esta ejecución {resultados['meta'][clave]}")
+
+    regresiones = []
+    for nombre, actual in resultados["endpoints"].items():
+        anterior = base["endpoints"].get(nombre)
+        if anterior is None:
+            continue
+        for metrica in ("p50", "p95"):
+            if (actual[metrica] > anterior[metrica] * (1 + tolerancia)
+                    and actual[metrica] - anterior[metrica] > UMBRAL_MS):
+                regresiones.append(
+                    f"{nombre}: {metrica} {anterior[metrica]:.2f} -> {actual[metrica]:.2f} ms"
+                )
+        if (actual["consultas"] is not None and anterior.get("consultas") is not None
+                and actual["consultas"] > anterior["consultas"] + 0.5):
+            regresiones.append(
+                f"{nombre}: consultas {anterior['consultas']} -> {actual['consultas']}"
+            )
+        if (actual["memoriaKB"] is not None and anterior.get("memoriaKB") is not None
+                and actual["memoriaKB"] > anterior["memoriaKB"] * (1 + tolerancia)
+                and actual["memoriaKB"] - anterior["memoriaKB"] > UMBRAL_MEMORIA_KB):
+            regresiones.append(
+                f"{nombre}: memoria {anterior['memoriaKB']} -> {actual['memoriaKB']} KB"
+            )
+    return regresiones
+
+
+def imprimirTabla(resultados):
+    """Tabla de resultados por endpoint."""
+    print(f"\n  {'endpoint':28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'req/s':>8} {'SQL/req':>8} {'mem KB':>9}")
+    for nombre, metricas in resultados["endpoints"].items():
+        consultas = "-" if metricas["consultas"] is None else f"{metricas['consultas']:.1f}"
+        memoria = "-" if metricas["memoriaKB"] is None else f"{metricas['memoriaKB']:.0f}"
+        print(f"  {nombre:28} {metricas['p50']:8.2f} {metricas['p95']:8.2f} "
+              f"{metricas['p99']:8.2f} {metricas['rps']:8.1f} {consultas:>8} {memoria:>9}")
+        for error in metricas["errores"]:
+            print(f"    ! respuesta inesperada: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP de la API")
+    parser.add_argument("--duenos", type=int, default=500, help="Dueños sintéticos a generar")
+    parser.add_argument("--repeticiones", type=int, default=30, help="Solicitudes medidas por endpoint")
+    parser.add_argument("--calentamiento", type=int, default=3, help="Solicitudes previas sin medir")
+    parser.add_argument("--modo", choices=["cliente", "servidor"], default="cliente")
+    parser.add_argument("--url", help="Servidor externo ya cargado con seed.py (ignora --modo)")
+    parser.add_argument("--concurrencia", type=int, default=1, help="Solicitudes simultáneas")
+    parser.add_argument("--sin-cache", action="store_true", help="Desactiva la caché de respuestas")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir memoria (tracemalloc)")
+    parser.add_argument("--solo", help="Solo los endpoints cuyo nombre contenga este texto")
+    parser.add_argument("--guardar", help="Guarda los resultados como línea base (JSON)")
+    parser.add_argument("--comparar", help="Línea base contra la que se compara")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Empeoramiento relativo permitido (0.25 = 25%%)")
+    argumentos = parser.parse_args()
+
+    app = crearApp()
+    servidor = None
+    contador = None
+    with app.app_context():
+        if argumentos.url is None:
+            print(f"\n  Generando datos: {argumentos.duenos} dueños...")
+            generarDatosSinteticos(argumentos.duenos)
+            contador = ContadorConsultas(db.engine)
+
+    if argumentos.url:
+        cliente = ClienteHttp(argumentos.url)
+        modo = f"externo ({argumentos.url})"
+    elif argumentos.modo == "servidor":
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        servidor = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        cliente = ClienteHttp(f"http://127.0.0.1:{servidor.server_port}")
+        modo = "servidor (werkzeug, localhost)"
+    else:
+        cliente = ClientePruebas(app)
+        modo = "cliente de pruebas"
+
+    # Los ids de los escenarios se derivan de los totales reales de la BD
+    respuesta = json.loads(cliente.enviar("GET", "/api/admin/info")[1])
+    totales = {tabla["nombre"]: tabla["registros"] for tabla in respuesta["tablas"]}
+    escenarios = crearEscenarios(totales)
+
+    faltantes = rutasSinEscenario(app, escenarios)
+    if faltantes:
+        print(f"  Aviso: rutas sin escenario: {', '.join(faltantes)}")
+    if argumentos.solo:
+        escenarios = [e for e in escenarios if argumentos.solo in e.nombre]
+
+    print(f"  Modo: {modo} | repeticiones: {argumentos.repeticiones} | "
+          f"concurrencia: {argumentos.concurrencia} | totales: {totales}")
+
+    resultados = {
+        "meta": {
+            "fecha": date.today().isoformat(),
+            "modo": modo,
+            "duenos": argumentos.duenos,
+            "repeticiones": argumentos.repeticiones,
+            "concurrencia": argumentos.concurrencia,
+            "cache": not argumentos.sin_cache,
+            "python": platform.python_version()
+        },
+        "endpoints": {}
+    }
+    for escenario in escenarios:
+        resultados["endpoints"][escenario.nombre] = medirEscenario(
+            escenario, cliente, argumentos.repeticiones, argumentos.calentamiento,
+            argumentos.concurrencia, contador,
+            medirMemoria=not argumentos.sin_memoria and isinstance(cliente, ClientePruebas)
+        )
+
+    if servidor is not None:
+        servidor.shutdown()
+
+    imprimirTabla(resultados)
+    codigoSalida = 0
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        regresiones = compararConBase(resultados, base, argumentos.tolerancia)
+        if regresiones:
+            print(f"\n  REGRESIONES respecto a {argumentos.comparar}:")
+            for regresion in regresiones:
+                print(f"    - {regresion}")
+            codigoSalida = 1
+        else:
+            print(f"\n  Sin regresiones respecto a {argumentos.comparar} "
+                  f"(tolerancia {argumentos.tolerancia:.0%})")
+
+    if argumentos.guardar:
+        with open(argumentos.guardar, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        print(f"\n  Línea base guardada en {argumentos.guardar}")
+
+    os.remove(_archivoTemporal)
+    return codigoSalida
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark de arranque en frío: lo que paga cada proceso al crear la aplicación.
+
+Ejecuta crearApp() en procesos nuevos (como un worker sin preload, el
+recargador de 'python app.py', seed.py o importar.py) sobre una BD SQLite
+temporal, y mide el tiempo de importación, el de crearApp() y las sentencias
+SQL que se ejecutan al arrancar:
+    BD nueva          - primer arranque: create_all, índices y versión
+    sin versión       - lo que hacía cada arranque antes: create_all y la
+                        revisión de índices (se vacía esquema_version antes
+                        de cada ejecución)
+    esquema al día    - arranque normal: una sola consulta a esquema_version
+
+Contra una BD en la nube cada sentencia es un viaje de red: con --latencia
+se estima el arranque sumando ese tiempo por sentencia.
+
+Ejecución (desde la carpeta Backend):
+    python -m benchmarks.arranque --repeticiones 5 --latencia 30
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en cada proceso medido; la última línea de la salida es el resultado
+CODIGO_MEDICION = """
+import json, time
+inicio = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+sentencias = []
+event.listen(Engine, "before_cursor_execute", lambda *argumentos: sentencias.append(1))
+from app import crearApp
+importado = time.perf_counter()
+crearApp()
+fin = time.perf_counter()
+print(json.dumps({
+    "importar": (importado - inicio) * 1000,
+    "crearApp": (fin - importado) * 1000,
+    "sentencias": len(sentencias)
+}))
+"""
+
+def _arrancar(entorno):
+    """Arranca la aplicación en un proceso nuevo y retorna sus mediciones."""
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, "-c", CODIGO_MEDICION], cwd=DIRECTORIO, env=entorno,
+        check=True, capture_output=True, text=True
+    ).stdout
+    resultado = json.loads(salida.strip().splitlines()[-1])
+    resultado["proceso"] = (time.perf_counter() - inicio) * 1000
+    return resultado
+
+
+def _borrarBd(archivoBd):
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(archivoBd + sufijo):
+            os.remove(archivoBd + sufijo)
+
+
+def _vaciarVersion(archivoBd):
+    conexion = sqlite3.connect(archivoBd)
+    conexion.execute("DELETE FROM esquema_version")
+    conexion.commit()
+    conexion.close()
+
+
+def medirFase(entorno, repeticiones, antes=None):
+    """Mediana de varias ejecuciones; 'antes' prepara la BD antes de cada una."""
+    ejecuciones = []
+    for _ in range(repeticiones):
+        if antes:
+            antes()
+        ejecuciones.append(_arrancar(entorno))
+    return {
+        clave: statistics.median(ejecucion[clave] for ejecucion in ejecuciones)
+        for clave in ("importar", "crearApp", "sentencias", "proceso")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Arranques por fase (mediana)")
+    parser.add_argument("--latencia", type=float, default=30,
+                        help="Milisegundos por viaje de red para estimar una BD en la nube")
+    argumentos = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    archivoBd = os.path.join(carpeta, "benchmark_arranque.db")
+    entorno = {**os.environ, "DATABASE_URL": f"sqlite:///{archivoBd}"}
+
+    print(f"\n  Arranques por fase: {argumentos.repeticiones} (mediana)")
+    resultados = {
+        "BD nueva": medirFase(entorno, argumentos.repeticiones, antes=lambda: _borrarBd(archivoBd)),
+        "sin versión": medirFase(
+            entorno, argumentos.repeticiones, antes=lambda: _vaciarVersion(archivoBd)
+        ),
+        "esquema al día": medirFase(entorno, argumentos.repeticiones)
+    }
+
+    print(f"\n  {'fase':16} {'importar ms':>12} {'crearApp ms':>12} {'proceso ms':>11} "
+          f"{'sentencias':>11} {'nube ~ms':>9}")
+    for nombre, metricas in resultados.items():
+        estimado = metricas["crearApp"] + metricas["sentencias"] * argumentos.latencia
+        print(f"  {nombre:16} {metricas['importar']:12.0f} {metricas['crearApp']:12.1f} "
+              f"{metricas['proceso']:11.0f} {metricas['sentencias']:11.0f} {estimado:9.0f}")
+    print(f"  (nube ~ms: crearApp + sentencias x {argumentos.latencia:g} ms de latencia)")
+
+
+    _borrarBd(archivoBd)
+    os.rmdir(carpeta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Benchmark del motor de búsqueda (services/busqueda.py).
+
+Carga dueños y mascotas sintéticos en una BD SQLite temporal, construye el
+índice y mide la latencia de búsquedas típicas de recepción (prefijos,
+nombres con tilde, errores de escritura, documentos). Compara contra la
+búsqueda anterior con ilike('%texto%').
+
+Ejecución (desde la carpeta Backend):
+    python -m benchmarks.busqueda --duenos 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+# La URI debe fijarse antes de importar config/app
+_archivoTemporal = os.path.join(tempfile.mkdtemp(), "benchmark_busqueda.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_archivoTemporal}"
+
+from app import crearApp  # noqa: E402
+from models import db  # noqa: E402
+from models.dueno import Dueno  # noqa: E402
+from models.mascota import Mascota  # noqa: E402
+from services.busqueda import motorBusqueda  # noqa: E402
+
+NOMBRES = ["Carlos", "María", "Andrés", "Laura", "José", "Lucía", "Sebastián", "Valentina",
+           "Juan", "Camila", "Óscar", "Daniela", "Julián", "Sofía", "Tomás", "Mónica"]
+APELLIDOS = ["Ramírez", "González", "López", "Martínez", "Pérez", "Gómez", "Díaz", "Muñoz",
+             "Rodríguez", "Hernández", "Cárdenas", "Restrepo", "Peñalosa", "Álvarez", "Quintero"]
+MASCOTAS = ["Firulais", "Michi", "Rocky", "Luna", "Max", "Coco", "Toby", "Lola", "Simón",
+            "Canela", "Bruno", "Nala", "Zeus", "Kira", "Thor", "Mía"]
+
+CONSULTAS = ["mart", "martinez", "Martínez", "martines", "gonzales lucia", "carl ramirez",
+             "1000012", "firulais", "firulai", "penalosa", "rodrigues", "zz"]
+
+
+def poblar(cantidadDuenos):
+    """Inserta dueños y mascotas con INSERT masivos."""
+    aleatorio = random.Random(7)
+    db.session.execute(db.insert(Dueno), [
+        {
+            "id": i, "nombre": aleatorio.choice(NOMBRES),
+            "apellido": f"{aleatorio.choice(APELLIDOS)} {aleatorio.choice(APELLIDOS)}",
+            "documento": str(1000000000 + i), "telefono": "3000000000"
+        }
+        for i in range(1, cantidadDuenos + 1)
+    ])
+    db.session.execute(db.insert(Mascota), [
+        {
+            "nombre": aleatorio.choice(MASCOTAS), "especie": "Perro", "raza": "Criollo",
+            "fechaNacimiento": date.today() - timedelta(days=aleatorio.randint(60, 5000)),
+            "duenoId": aleatorio.randint(1, cantidadDuenos)
+        }
+        for _ in range(cantidadDuenos * 2)
+    ])
+    db.session.commit()
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) de una lista de valores."""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def medir(funcion, repeticiones):
+    """Latencias en milisegundos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def busquedaIlike(termino):
+    """Búsqueda anterior: OR de ilike sobre tres columnas (recorrido completo)."""
+    return db.session.execute(
+        db.select(Dueno.id).where(db.or_(
+            Dueno.nombre.ilike(f"%{termino}%"),
+            Dueno.apellido.ilike(f"%{termino}%"),
+            Dueno.documento.ilike(f"%{termino}%")
+        ))
+    ).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de búsqueda")
+    parser.add_argument("--duenos", type=int, default=100000, help="Cantidad de dueños sintéticos")
+    parser.add_argument("--repeticiones", type=int, default=50, help="Repeticiones por consulta")
+    argumentos = parser.parse_args()
+
+    app = crearApp()
+    with app.app_context():
+        poblar(argumentos.duenos)
+
+        inicio = time.perf_counter()
+        motorBusqueda.reconstruir()
+        print(f"\n  Construcción del índice: {(time.perf_counter() - inicio) * 1000:.0f} ms "
+              f"({len(motorBusqueda.duenos)} dueños, {len(motorBusqueda.mascotas)} mascotas)\n")
+
+        print(f"  {'consulta':18} {'resultados':>10} {'p50 ms':>8} {'p95 ms':>8} {'ilike p50':>10}")
+        for consulta in CONSULTAS:
+            _, resultados = motorBusqueda.buscarDuenos(consulta, 50)
+            tiempos = medir(lambda: motorBusqueda.buscarDuenos(consulta, 50), argumentos.repeticiones)
+            tiemposIlike = medir(lambda: busquedaIlike(consulta), 5)
+            print(f"  {consulta:18} {resultados:>10} {statistics.median(tiempos):8.2f} "
+                  f"{percentil(tiempos, 95):8.2f} {statistics.median(tiemposIlike):10.2f}")
+
+    os.remove(_archivoTemporal)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Benchmark de concurrencia en SQLite: configuración por defecto contra el perfil ajustado.
+
+Carga un volumen sintético en una BD SQLite temporal (python seed.py --duenos N)
+y, sobre una copia nueva del archivo para cada perfil, ejecuta durante unos
+segundos hilos lectores y escritores a la vez:
+    lectores   - consultas calientes de la API: agenda de un día (citas con
+                 mascota y dueño), mascotas de un dueño, historial de una mascota
+    escritores - registro de una consulta: INSERT en historial_clinico y
+                 UPDATE de la cita, en una sola transacción
+
+Perfiles:
+    predeterminado - lo que había antes: opciones por defecto de create_engine y
+                     los valores de fábrica de SQLite (journal_mode=DELETE,
+                     synchronous=FULL)
+    ajustado       - Config.opcionesMotor() y Config.pragmasSqlite() (WAL,
+                     synchronous=NORMAL, mmap, caché y busy_timeout)
+
+Reporta operaciones por segundo, latencias p50/p95 y errores ("database is
+locked") de lecturas y escrituras.
+
+Ejecución (desde la carpeta Backend):
+    python -m benchmarks.concurrencia --duenos 2000 --lectores 8 --escritores 2
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.exc import OperationalError
+
+from config import Config
+from models.cita import Cita
+from models.dueno import Dueno
+from models.historial import HistorialClinico
+from models.mascota import Mascota
+from services.motor import pragmasActuales, registrarPragmasSqlite
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Valores de fábrica de SQLite, explícitos para que la copia no herede el WAL
+# que el generador deja guardado en el archivo
+PRAGMAS_PREDETERMINADOS = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+PRAGMAS_REPORTADOS = ("journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout")
+
+citas, mascotas, duenos, historial = (
+    Cita.__table__, Mascota.__table__, Dueno.__table__, HistorialClinico.__table__
+)
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def _totales(motor):
+    with motor.connect() as conexion:
+        return {
+            "mascotas": conexion.scalar(select(func.max(mascotas.c.id))),
+            "duenos": conexion.scalar(select(func.max(duenos.c.id))),
+            "citas": conexion.scalar(select(func.max(citas.c.id)))
+        }
+
+
+def _lectura(conexion, aleatorio, totales):
+    """Una de las consultas calientes de la API, al azar."""
+    opcion = aleatorio.randrange(3)
+    if opcion == 0:
+        dia = date.today() + timedelta(days=aleatorio.randint(-30, 30))
+        consulta = (
+            select(citas.c.id, citas.c.hora, citas.c.estado, mascotas.c.nombre, duenos.c.nombre)
+            .join(mascotas, mascotas.c.id == citas.c.mascotaId)
+            .join(duenos, duenos.c.id == mascotas.c.duenoId)
+            .where(citas.c.fecha == dia)
+            .order_by(citas.c.hora)
+        )
+    elif opcion == 1:
+        consulta = select(mascotas).where(mascotas.c.duenoId == aleatorio.randint(1, totales["duenos"]))
+    else:
+        consulta = (
+            select(historial)
+            .where(historial.c.mascotaId == aleatorio.randint(1, totales["mascotas"]))
+            .order_by(historial.c.fecha.desc())
+        )
+    conexion.execute(consulta).all()
+
+
+def _escritura(conexion, aleatorio, totales):
+    """Registro de una consulta: nueva entrada de historial y cita actualizada."""
+    conexion.execute(historial.insert().values(
+        fecha=date.today(), diagnostico="Control de concurrencia", tratamiento="Ninguno",
+        veterinario="Dra. Prueba", pesoEnConsulta=round(aleatorio.uniform(2, 40), 1),
+        mascotaId=aleatorio.randint(1, totales["mascotas"])
+    ))
+    conexion.execute(
+        update(citas)
+        .where(citas.c.id == aleatorio.randint(1, totales["citas"]))
+        .values(motivo="Control de concurrencia")
+    )
+
+
+def _trabajador(motor, operacion, escribe, limite, semilla, totales, resultado):
+    """Repite la operación hasta el límite de tiempo; cada una en su propia transacción."""
+    aleatorio = random.Random(semilla)
+    while time.perf_counter() < limite:
+        inicio = time.perf_counter()
+        try:
+            if escribe:
+                with motor.begin() as conexion:
+                    operacion(conexion, aleatorio, totales)
+            else:
+                with motor.connect() as conexion:
+                    operacion(conexion, aleatorio, totales)
+        except OperationalError:
+            resultado["errores"] += 1
+            continue
+        resultado["latencias"].append((time.perf_counter() - inicio) * 1000)
+
+
+def medirPerfil(nombre, archivoOrigen, opciones, pragmas, argumentos):
+    """Copia la BD, crea el motor del perfil y ejecuta lectores y escritores a la vez."""
+    archivo = os.path.join(os.path.dirname(archivoOrigen), f"concurrencia_{nombre}.db")
+    shutil.copyfile(archivoOrigen, archivo)
+    motor = create_engine(f"sqlite:///{archivo}", **opciones)
+    registrarPragmasSqlite(motor, pragmas)
+
+    with motor.connect() as conexion:
+        vigentes = pragmasActuales(conexion, PRAGMAS_REPORTADOS)
+    totales = _totales(motor)
+
+    lecturas = {"latencias": [], "errores": 0}
+    escrituras = {"latencias": [], "errores": 0}
+    limite = time.perf_counter() + argumentos.segundos
+    hilos = [
+        threading.Thread(target=_trabajador, args=(
+            motor, _lectura, False, limite, i, totales, lecturas
+        ))
+        for i in range(argumentos.lectores)
+    ] + [
+        threading.Thread(target=_trabajador, args=(
+            motor, _escritura, True, limite, 1000 + i, totales, escrituras
+        ))
+        for i in range(argumentos.escritores)
+    ]
+    # Cada hilo agrega a una lista compartida: list.append es atómico con el GIL
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    motor.dispose()
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(archivo + sufijo):
+            os.remove(archivo + sufijo)
+
+    print(f"  {nombre}: " + ", ".join(f"{clave}={valor}" for clave, valor in vigentes.items()))
+    return {
+        tipo: {
+            "ops": len(datos["latencias"]) / argumentos.segundos,
+            "p50": percentil(datos["latencias"], 50),
+            "p95": percentil(datos["latencias"], 95),
+            "errores": datos["errores"]
+        }
+        for tipo, datos in (("lecturas", lecturas), ("escrituras", escrituras))
+    }
+
+
+def imprimirComparacion(resultados):
+    print(f"\n  {'perfil':16} {'tipo':11} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errores':>8}")
+    for nombre, porTipo in resultados.items():
+        for tipo, metricas in porTipo.items():
+            print(f"  {nombre:16} {tipo:11} {metricas['ops']:9.1f} {metricas['p50']:8.2f} "
+                  f"{metricas['p95']:8.2f} {metricas['errores']:8d}")
+
+    antes, despues = resultados["predeterminado"], resultados["ajustado"]
+    print()
+    for tipo in ("lecturas", "escrituras"):
+        factor = despues[tipo]["ops"] / antes[tipo]["ops"] if antes[tipo]["ops"] else float("inf")
+        print(f"  {tipo.capitalize()}: {antes[tipo]['ops']:.1f} -> {despues[tipo]['ops']:.1f} ops/s "
+              f"(x{factor:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concurrencia en SQLite")
+    parser.add_argument("--duenos", type=int, default=2000, help="Dueños sintéticos a generar")
+    parser.add_argument("--lectores", type=int, default=8, help="Hilos lectores")
+    parser.add_argument("--escritores", type=int, default=2, help="Hilos escritores")
+    parser.add_argument("--segundos", type=float, default=10, help="Duración de cada perfil")
+    argumentos = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    archivoBd = os.path.join(carpeta, "benchmark_concurrencia.db")
+    print(f"\n  Generando datos: {argumentos.duenos} dueños...")
+    subprocess.run(
+        [sys.executable, "seed.py", "--duenos", str(argumentos.duenos)],
+        cwd=DIRECTORIO, env={**os.environ, "DATABASE_URL": f"sqlite:///{archivoBd}"},
+        check=True, stdout=subprocess.DEVNULL
+    )
+    # Vuelca el WAL del generador al archivo principal antes de copiarlo
+    conexion = sqlite3.connect(archivoBd)
+    conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conexion.close()
+
+    print(f"  Lectores: {argumentos.lectores} | escritores: {argumentos.escritores} | "
+          f"{argumentos.segundos:g} s por perfil\n")
+    urlBd = f"sqlite:///{archivoBd}"
+    resultados = {
+        "predeterminado": medirPerfil("predeterminado", archivoBd, {}, PRAGMAS_PREDETERMINADOS, argumentos),
+        "ajustado": medirPerfil(
+            "ajustado", archivoBd, Config.opcionesMotor(urlBd), Config.pragmasSqlite(), argumentos
+        )
+    }
+    imprimirComparacion(resultados)
+    shutil.rmtree(carpeta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Benchmark del hub de eventos en vivo (services/hubEventos.py).
+
+Levanta el hub como proceso aparte (python -m services.hubEventos, como lo
+hace gunicorn.conf.py), le conecta N clientes SSE inactivos y publica
+eventos por UDP como lo hacen los workers. Para cada cantidad de clientes
+reporta, leyendo /proc del proceso del hub (Linux):
+    rss MB        - Memoria residente con los clientes conectados
+    hilos         - Hilos del proceso
+    cpu inactivo  - ms de CPU en ESPERA segundos sin eventos (solo latidos)
+    cpu/evento    - ms de CPU por evento difundido a todos los clientes
+    p50/p95 ms    - Latencia de entrega (publicación -> recepción en cada cliente)
+
+Con --comparar-hilos repite la medición con un servidor SSE de un hilo por
+conexión (lo que costaría servir el flujo desde los hilos de gunicorn o
+waitress).
+
+Ejecución (desde la carpeta Backend, Linux):
+    python -m benchmarks.eventos --clientes 0,100,500,1000 --eventos 50
+    python -m benchmarks.eventos --clientes 100,1000 --comparar-hilos
+"""
+import argparse
+import json
+import os
+import queue
+import resource
+import selectors
+import socket
+import socketserver
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from services.hubEventos import formatoDatagrama
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Segundos sin eventos en los que se mide el CPU de los clientes inactivos
+ESPERA = 2.0
+
+# Segundos máximos para recibir todos los eventos publicados
+ESPERA_ENTREGA = 30.0
+
+
+# =============================================
+# SERVIDOR DE COMPARACIÓN: UN HILO POR CONEXIÓN
+# =============================================
+class _ServidorHilos(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+def servidorHilos(puerto):
+    """Flujo SSE con un hilo bloqueado por cliente; recibe eventos por UDP como el hub."""
+    colas = set()
+    candado = threading.Lock()
+
+    class Manejador(socketserver.BaseRequestHandler):
+        def handle(self):
+            self.request.recv(8192)
+            self.request.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n\r\n")
+            cola = queue.Queue()
+            with candado:
+                colas.add(cola)
+            try:
+                while True:
+                    self.request.sendall(cola.get())
+            except OSError:
+                pass
+            finally:
+                with candado:
+                    colas.discard(cola)
+
+    receptor = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receptor.bind(("127.0.0.1", puerto))
+
+    def recibir():
+        while True:
+            datos = receptor.recv(65535)
+            cabecera, _, cuerpo = datos.partition(b"\n")
+            identificador, nombre = cabecera.split(b" ", 1)
+            trama = b"id: %s\nevent: %s\ndata: %s\n\n" % (identificador, nombre, cuerpo)
+            with candado:
+                for cola in colas:
+                    cola.put(trama)
+
+    threading.Thread(target=recibir, daemon=True).start()
+    _ServidorHilos(("127.0.0.1", puerto), Manejador).serve_forever()
+
+
+# =============================================
+# MEDICIÓN
+# =============================================
+def _puertoLibre():
+    with socket.socket() as prueba:
+        prueba.bind(("127.0.0.1", 0))
+        return prueba.getsockname()[1]
+
+
+def _procesoHub(modo, puerto):
+    if modo == "hub":
+        comando = [sys.executable, "-m", "services.hubEventos"]
+    else:
+        comando = [sys.executable, "-m", "benchmarks.eventos", "--servidor-hilos", str(puerto)]
+    entorno = {
+        **os.environ, "EVENTOS_PUERTO": str(puerto), "EVENTOS_HOST": "127.0.0.1",
+        "EVENTOS_LATIDO_SEGUNDOS": "1", "EVENTOS_MAX_CLIENTES": "100000"
+    }
+    proceso = subprocess.Popen(comando, cwd=DIRECTORIO, env=entorno, stdout=subprocess.DEVNULL)
+    limite = time.monotonic() + 10
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=1).close()
+            return proceso
+        except OSError:
+            time.sleep(0.05)
+    proceso.kill()
+    raise RuntimeError("El servidor de eventos no respondió")
+
+
+def _estadoProceso(pid):
+    """(RSS en MB, hilos, segundos de CPU) desde /proc."""
+    with open(f"/proc/{pid}/status") as archivo:
+        campos = dict(linea.split(":", 1) for linea in archivo)
+    with open(f"/proc/{pid}/stat") as archivo:
+        partes = archivo.read().rsplit(")", 1)[1].split()
+    cpu = (int(partes[11]) + int(partes[12])) / os.sysconf("SC_CLK_TCK")
+    return int(campos["VmRSS"].split()[0]) / 1024, int(campos["Threads"]), cpu
+
+
+def _conectar(puerto, cantidad):
+    clientes = []
+    for _ in range(cantidad):
+        conexion = socket.create_connection(("127.0.0.1", puerto))
+        conexion.sendall(b"GET /api/eventos HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+        clientes.append(conexion)
+    for conexion in clientes:
+        conexion.settimeout(10)
+        recibido = b""
+        while b"\r\n\r\n" not in recibido:
+            recibido += conexion.recv(4096)
+        conexion.setblocking(False)
+    return clientes
+
+
+def _recibirEventos(clientes, esperados, latencias):
+    """Lee todos los sockets hasta que cada cliente reciba los eventos esperados."""
+    selector = selectors.DefaultSelector()
+    pendientes = {}
+    for conexion in clientes:
+        selector.register(conexion, selectors.EVENT_READ)
+        pendientes[conexion] = [b"", 0]
+    limite = time.monotonic() + ESPERA_ENTREGA
+    completos = 0
+    while completos < len(clientes) and time.monotonic() < limite:
+        for clave, _ in selector.select(timeout=0.5):
+            conexion = clave.fileobj
+            estado = pendientes[conexion]
+            try:
+                datos = conexion.recv(65536)
+            except BlockingIOError:
+                continue
+            ahora = time.time()
+            estado[0] += datos
+            *tramas, estado[0] = estado[0].split(b"\n\n")
+            for trama in tramas:
+                for linea in trama.split(b"\n"):
+                    if linea.startswith(b"data: "):
+                        latencias.append((ahora - json.loads(linea[6:])["t"]) * 1000)
+                        estado[1] += 1
+                        if estado[1] == esperados:
+                            completos += 1
+    selector.close()
+    return completos
+
+
+def medir(modo, cantidad, eventos, tamano):
+    puerto = _puertoLibre()
+    proceso = _procesoHub(modo, puerto)
+    clientes = []
+    try:
+        clientes = _conectar(puerto, cantidad)
+        time.sleep(0.5)
+        _, _, cpuInicio = _estadoProceso(proceso.pid)
+        time.sleep(ESPERA)
+        rss, hilos, cpuInactivo = _estadoProceso(proceso.pid)
+
+        # Publicación: un hilo envía los datagramas mientras este lee los sockets
+        publicador = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        def publicar():
+            for numero in range(1, eventos + 1):
+                datos = json.dumps({"t": time.time(), "relleno": "x" * tamano}).encode("ascii")
+                publicador.sendto(formatoDatagrama(numero, "cambios", datos), ("127.0.0.1", puerto))
+                time.sleep(0.02)
+
+        latencias = []
+        hilo = threading.Thread(target=publicar)
+        hilo.start()
+        completos = _recibirEventos(clientes, eventos, latencias) if clientes else 0
+        hilo.join()
+        _, _, cpuFin = _estadoProceso(proceso.pid)
+        return {
+            "rss": rss, "hilos": hilos,
+            "cpuInactivo": (cpuInactivo - cpuInicio) * 1000,
+            "cpuEvento": (cpuFin - cpuInactivo) * 1000 / eventos,
+            "p50": statistics.median(latencias) if latencias else None,
+            "p95": statistics.quantiles(latencias, n=20)[18] if len(latencias) > 1 else None,
+            "completos": completos
+        }
+    finally:
+        for conexion in clientes:
+            conexion.close()
+        proceso.kill()
+        proceso.wait()
+
+
+def _ms(valor):
+    return f"{valor:8.1f}" if valor is not None else f"{'-':>8}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del hub de eventos en vivo (SSE)")
+    parser.add_argument("--clientes", default="0,100,500,1000", help="Cantidades de clientes, separadas por coma")
+    parser.add_argument("--eventos", type=int, default=50, help="Eventos publicados por medición")
+    parser.add_argument("--tamano", type=int, default=1000, help="Bytes de relleno por evento")
+    parser.add_argument("--comparar-hilos", action="store_true",
+                        help="Medir también un servidor de un hilo por conexión")
+    parser.add_argument("--servidor-hilos", type=int, help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+
+    if argumentos.servidor_hilos:
+        servidorHilos(argumentos.servidor_hilos)
+        return 0
+
+    cantidades = [int(valor) for valor in argumentos.clientes.split(",")]
+    # Cada cliente usa dos descriptores (el del benchmark y el del servidor)
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    necesarios = max(cantidades) + 64
+    if blando < necesarios:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(necesarios, duro), duro))
+        if duro < necesarios:
+            print(f"  Aviso: el límite de archivos abiertos ({duro}) no alcanza para {max(cantidades)} clientes")
+
+    modos = ["hub", "hilos"] if argumentos.comparar_hilos else ["hub"]
+    print(f"\n  {argumentos.eventos} eventos de ~{argumentos.tamano} bytes por medición")
+    print(f"  {'servidor':8} {'clientes':>8} {'rss MB':>8} {'hilos':>6} {'cpu inactivo':>13} "
+          f"{'cpu/evento':>11} {'p50 ms':>8} {'p95 ms':>8}  entregados")
+    for modo in modos:
+        for cantidad in cantidades:
+            resultado = medir(modo, cantidad, argumentos.eventos, argumentos.tamano)
+            print(f"  {modo:8} {cantidad:8d} {resultado['rss']:8.1f} {resultado['hilos']:6d} "
+                  f"{resultado['cpuInactivo']:10.0f} ms {resultado['cpuEvento']:8.2f} ms "
+                  f"{_ms(resultado['p50'])} {_ms(resultado['p95'])}  "
+                  f"{resultado['completos']}/{cantidad}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Benchmark de índices: planes de consulta y tiempos antes/después de la migración.
+
+Crea una BD SQLite temporal con datos sintéticos, elimina los índices declarados
+en los modelos ("antes"), mide las consultas críticas, ejecuta crearIndices()
+("después") y vuelve a medir. Muestra el plan (EXPLAIN) de cada consulta.
+
+Ejecución (desde la carpeta Backend):
+    python -m benchmarks.indices --duenos 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, time as hora, timedelta
+
+# La URI debe fijarse antes de importar config/app
+_archivoTemporal = os.path.join(tempfile.mkdtemp(), "benchmark_indices.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_archivoTemporal}"
+
+from app import crearApp  # noqa: E402
+from models import db  # noqa: E402
+from models.dueno import Dueno  # noqa: E402
+from models.mascota import Mascota  # noqa: E402
+from models.cita import Cita  # noqa: E402
+from models.historial import HistorialClinico  # noqa: E402
+from services.consultas import consultarCitas, consultarHistorial  # noqa: E402
+from services.migraciones import crearIndices, eliminarIndices  # noqa: E402
+
+
+def poblar(cantidadDuenos):
+    """Inserta datos sintéticos con INSERT masivos (core), sin pasar por el ORM."""
+    aleatorio = random.Random(42)
+    hoy = date.today()
+
+    db.session.execute(db.insert(Dueno), [
+        {
+            "id": i, "nombre": f"Nombre{aleatorio.randint(0, 5000)}", "apellido": f"Apellido{i}",
+            "documento": str(1000000000 + i), "telefono": "3000000000"
+        }
+        for i in range(1, cantidadDuenos + 1)
+    ])
+    cantidadMascotas = cantidadDuenos * 2
+    db.session.execute(db.insert(Mascota), [
+        {
+            "id": i, "nombre": f"Mascota{aleatorio.randint(0, 5000)}", "especie": "Perro",
+            "raza": "Criollo", "fechaNacimiento": hoy - timedelta(days=aleatorio.randint(60, 5000)),
+            "duenoId": aleatorio.randint(1, cantidadDuenos)
+        }
+        for i in range(1, cantidadMascotas + 1)
+    ])
+    db.session.execute(db.insert(Cita), [
+        {
+            "fecha": hoy + timedelta(days=aleatorio.randint(-700, 60)),
+            "hora": hora(aleatorio.randint(8, 17), aleatorio.choice([0, 30])),
+            # Completada: fechas y horas al azar se repiten, y ux_citas_agenda
+            # admite una sola cita Programada por franja
+            "motivo": "Control", "estado": "Completada",
+            "mascotaId": aleatorio.randint(1, cantidadMascotas)
+        }
+        for _ in range(cantidadMascotas * 3)
+    ])
+    db.session.execute(db.insert(HistorialClinico), [
+        {
+            "fecha": hoy - timedelta(days=aleatorio.randint(0, 1800)),
+            "diagnostico": "Chequeo", "tratamiento": "Ninguno", "veterinario": "Dra. Prueba",
+            "pesoEnConsulta": round(aleatorio.uniform(2, 40), 1),
+            "mascotaId": aleatorio.randint(1, cantidadMascotas)
+        }
+        for _ in range(cantidadMascotas * 3)
+    ])
+    db.session.commit()
+    return cantidadMascotas
+
+
+def consultasCriticas(cantidadMascotas):
+    """Consultas calientes de la API que dependen de los índices."""
+    mascotaId = cantidadMascotas // 2
+    return {
+        "historial de una mascota": consultarHistorial()
+            .filter(HistorialClinico.mascotaId == mascotaId)
+            .order_by(HistorialClinico.fecha.desc()),
+        "agenda (primera página)": consultarCitas()
+            .order_by(Cita.fecha.asc(), Cita.hora.asc(), Cita.id.asc())
+            .limit(50),
+        "citas de una mascota (CASCADE)": Cita.query.filter(Cita.mascotaId == mascotaId),
+        "mascotas de un dueño (CASCADE)": Mascota.query.filter(Mascota.duenoId == mascotaId // 2),
+    }
+
+
+def planDeConsulta(consulta):
+    """Retorna el plan de ejecución de la consulta como texto."""
+    sql = str(consulta.statement.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={"literal_binds": True}
+    ))
+    prefijo = "EXPLAIN QUERY PLAN " if db.engine.dialect.name == "sqlite" else "EXPLAIN "
+    filas = db.session.execute(db.text(prefijo + sql)).all()
+    return "\n".join(f"      {fila[-1]}" for fila in filas)
+
+
+def medir(consulta, repeticiones):
+    """Tiempo promedio en milisegundos de ejecutar la consulta."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        consulta.all()
+        db.session.expunge_all()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+
+def ejecutarFase(nombre, cantidadMascotas, repeticiones):
+    """Mide y muestra el plan de todas las consultas críticas."""
+    # Conexiones nuevas: sqlite3 guarda en caché sentencias preparadas con el plan anterior
+    db.session.remove()
+    db.engine.dispose()
+
+    print(f"\n  ===== {nombre} =====")
+    resultados = {}
+    for titulo, consulta in consultasCriticas(cantidadMascotas).items():
+        resultados[titulo] = medir(consulta, repeticiones)
+        print(f"\n    {titulo}: {resultados[titulo]:.2f} ms")
+        print(planDeConsulta(consulta))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de índices (antes/después)")
+    parser.add_argument("--duenos", type=int, default=20000, help="Cantidad de dueños sintéticos")
+    parser.add_argument("--repeticiones", type=int, default=20, help="Repeticiones por consulta")
+    argumentos = parser.parse_args()
+
+    app = crearApp()
+    with app.app_context():
+        cantidadMascotas = poblar(argumentos.duenos)
+        eliminarIndices()
+        antes = ejecutarFase("ANTES (sin índices)", cantidadMascotas, argumentos.repeticiones)
+        crearIndices()
+        despues = ejecutarFase("DESPUÉS (crearIndices)", cantidadMascotas, argumentos.repeticiones)
+
+    print("\n  ===== RESUMEN =====")
+    for titulo in antes:
+        mejora = antes[titulo] / despues[titulo] if despues[titulo] else float("inf")
+        print(f"    {titulo:34} {antes[titulo]:9.2f} ms -> {despues[titulo]:8.2f} ms  (x{mejora:.1f})")
+
+    os.remove(_archivoTemporal)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark de la serialización de los listados (services/serializacion.py).
+
+Genera un volumen sintético en una BD SQLite temporal (python seed.py
+--duenos N) y, para cada listado completo (dueños, mascotas, citas e
+historial), compara tres formas de producir el cuerpo JSON:
+    toDict       - objetos del ORM, toDict() por fila y json de Flask
+                   (como se hacía antes)
+    estandar     - filas de columnas y Codificador con la biblioteca estándar
+    orjson       - filas de columnas y Codificador con orjson (si está instalado)
+
+Verifica además que los tres cuerpos representen el mismo JSON (y que el de
+la biblioteca estándar sea idéntico byte a byte al de toDict).
+
+Ejecución (desde la carpeta Backend):
+    python -m benchmarks.serializacion --duenos 5000 --repeticiones 3
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# La URI debe fijarse antes de importar config/app
+_carpeta = tempfile.mkdtemp()
+_archivoTemporal = os.path.join(_carpeta, "benchmark_serializacion.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_archivoTemporal}"
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from app import crearApp  # noqa: E402
+from models import db  # noqa: E402
+from services.consultas import (  # noqa: E402
+    LISTADO_CITAS, LISTADO_DUENOS, LISTADO_HISTORIAL, LISTADO_MASCOTAS
+)
+from services.paginacion import filasListado, _ordenarPor  # noqa: E402
+from services.serializacion import elegirBackend, orjson  # noqa: E402
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LISTADOS = {
+    "duenos": LISTADO_DUENOS,
+    "mascotas": LISTADO_MASCOTAS,
+    "citas": LISTADO_CITAS,
+    "historial": LISTADO_HISTORIAL,
+}
+
+
+def porObjeto(app, listado):
+    """Consulta ORM + toDict() + json de Flask (compacto, como jsonify)."""
+    filas = listado.consulta().order_by(*_ordenarPor(listado.orden)).all()
+    proveedor = DefaultJSONProvider(app)
+    return proveedor.dumps(listado.serializar(filas), separators=(",", ":")).encode("ascii")
+
+
+def porFilas(backend, listado):
+    """Filas de columnas + Codificador con el backend indicado."""
+    return backend.codificarFilas(listado.codificador(), filasListado(listado))
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        db.session.expire_all()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        db.session.rollback()
+    return statistics.median(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la serialización de los listados")
+    parser.add_argument("--duenos", type=int, default=5000, help="Dueños sintéticos a generar")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por forma (mediana)")
+    argumentos = parser.parse_args()
+
+    print(f"\n  Generando datos: {argumentos.duenos} dueños...")
+    subprocess.run(
+        [sys.executable, "seed.py", "--duenos", str(argumentos.duenos)],
+        cwd=DIRECTORIO, env=os.environ, check=True, stdout=subprocess.DEVNULL
+    )
+    app = crearApp()
+    formas = {"estandar": elegirBackend("estandar")}
+    if orjson is not None:
+        formas["orjson"] = elegirBackend("orjson")
+
+    print(f"\n  {'listado':10} {'filas':>7} {'toDict ms':>10} "
+          + " ".join(f"{nombre + ' ms':>18}" for nombre in formas) + "  iguales")
+    with app.app_context():
+        for nombre, listado in LISTADOS.items():
+            msObjeto, referencia = medir(lambda: porObjeto(app, listado), argumentos.repeticiones)
+            datos = json.loads(referencia)
+            columnas = []
+            iguales = True
+            for forma, backend in formas.items():
+                ms, cuerpo = medir(lambda: porFilas(backend, listado), argumentos.repeticiones)
+                columnas.append(f"{ms:10.1f} (x{msObjeto / ms:.1f})")
+                iguales = iguales and json.loads(cuerpo) == datos
+                if forma == "estandar":
+                    iguales = iguales and cuerpo == referencia
+            print(f"  {nombre:10} {len(datos):7d} {msObjeto:10.1f} {' '.join(columnas)}  "
+                  f"{'sí' if iguales else 'NO'}")
+
+    shutil.rmtree(_carpeta)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Prueba de carga: servidor de desarrollo de Flask contra el de producción.
+
+Carga un volumen sintético en una BD SQLite temporal (python seed.py --duenos N),
+levanta cada servidor como un proceso aparte sobre esa BD y lo somete a
+solicitudes concurrentes por HTTP real con los escenarios de lectura de
+benchmarks/api.py:
+    desarrollo - python app.py con FLASK_DEBUG=1 (como se ejecutaba antes:
+                 un proceso, recarga automática y depurador)
+    produccion - python servidor.py (gunicorn: workers e hilos de gunicorn.conf.py)
+
+Las escrituras se omiten para que ambos servidores lean exactamente los
+mismos datos. Al final se detiene cada servidor con SIGTERM (apagado ordenado).
+
+Ejecución (desde la carpeta Backend, Linux/macOS):
+    python -m benchmarks.servidores --duenos 2000 --concurrencia 16
+    python -m benchmarks.servidores --workers 4 --hilos 8
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.api import ClienteHttp, crearEscenarios, medirEscenario
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Escenarios que leen tablas completas: dominan el tiempo total sin decir
+# nada del servidor
+EXCLUIDOS = {"admin tabla", "admin exportar ndjson"}
+
+# Segundos máximos de espera para que un servidor responda /api/estado
+ESPERA_ARRANQUE = 60
+
+
+def _esperarServidor(url, proceso):
+    """Espera a que el servidor responda o falla si el proceso terminó."""
+    limite = time.monotonic() + ESPERA_ARRANQUE
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al arrancar (código {proceso.returncode})")
+        try:
+            with urllib.request.urlopen(f"{url}/api/estado", timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {ESPERA_ARRANQUE} s")
+
+
+def _detener(proceso):
+    """SIGTERM al grupo de procesos (incluye el recargador o los workers) y espera."""
+    inicio = time.perf_counter()
+    os.killpg(proceso.pid, signal.SIGTERM)
+    try:
+        proceso.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        os.killpg(proceso.pid, signal.SIGKILL)
+        proceso.wait()
+    return time.perf_counter() - inicio
+
+
+def medirServidor(nombre, comando, entorno, puerto, argumentos):
+    """Levanta un servidor, mide los escenarios de lectura y lo detiene."""
+    url = f"http://127.0.0.1:{puerto}"
+    registro = open(os.path.join(tempfile.gettempdir(), f"huellitas_{nombre}.log"), "w")
+    proceso = subprocess.Popen(
+        comando, cwd=DIRECTORIO, env={**entorno, "PORT": str(puerto)},
+        stdout=registro, stderr=subprocess.STDOUT, start_new_session=True
+    )
+    try:
+        _esperarServidor(url, proceso)
+        cliente = ClienteHttp(url)
+        respuesta = json.loads(cliente.enviar("GET", "/api/admin/info")[1])
+        totales = {tabla["nombre"]: tabla["registros"] for tabla in respuesta["tablas"]}
+        escenarios = [
+            escenario for escenario in crearEscenarios(totales)
+            if escenario.metodo == "GET" and escenario.nombre not in EXCLUIDOS
+        ]
+
+        resultados = {}
+        for escenario in escenarios:
+            # Calentamiento concurrente: llega a todos los workers, y cada uno
+            # tiene sus propias cachés e índices en memoria
+            medirEscenario(escenario, cliente, argumentos.calentamiento, 0,
+                           argumentos.concurrencia, contador=None, medirMemoria=False)
+            resultados[escenario.nombre] = medirEscenario(
+                escenario, cliente, argumentos.repeticiones, 0,
+                argumentos.concurrencia, contador=None, medirMemoria=False
+            )
+            for error in resultados[escenario.nombre]["errores"]:
+                print(f"    ! {nombre}: respuesta inesperada: {error}")
+        # Una conexión keep-alive abierta retrasa el apagado de gunicorn
+        # hasta graceful_timeout
+        cliente.cerrar()
+    finally:
+        segundosApagado = _detener(proceso)
+        registro.close()
+    print(f"  {nombre}: apagado en {segundosApagado:.1f} s (código {proceso.returncode})")
+    return resultados
+
+
+def imprimirComparacion(desarrollo, produccion):
+    """Tabla lado a lado y totales de rendimiento."""
+    print(f"\n  {'endpoint':26} {'dev p50':>8} {'dev p95':>8} {'dev req/s':>10} "
+          f"{'prod p50':>9} {'prod p95':>9} {'prod req/s':>11} {'x':>6}")
+    for nombre, dev in desarrollo.items():
+        prod = produccion[nombre]
+        print(f"  {nombre:26} {dev['p50']:8.2f} {dev['p95']:8.2f} {dev['rps']:10.1f} "
+              f"{prod['p50']:9.2f} {prod['p95']:9.2f} {prod['rps']:11.1f} "
+              f"{prod['rps'] / dev['rps']:6.2f}")
+
+    # Media armónica de req/s = solicitudes totales / tiempo total
+    def rendimiento(resultados):
+        return len(resultados) / sum(1 / metricas["rps"] for metricas in resultados.values())
+
+    rpsDev, rpsProd = rendimiento(desarrollo), rendimiento(produccion)
+    print(f"\n  Rendimiento global: desarrollo {rpsDev:.1f} req/s | "
+          f"producción {rpsProd:.1f} req/s (x{rpsProd / rpsDev:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga: desarrollo vs producción")
+    parser.add_argument("--duenos", type=int, default=2000, help="Dueños sintéticos a generar")
+    parser.add_argument("--repeticiones", type=int, default=300, help="Solicitudes medidas por endpoint")
+    parser.add_argument("--calentamiento", type=int, default=50,
+                        help="Solicitudes previas sin medir (concurrentes)")
+    parser.add_argument("--concurrencia", type=int, default=16, help="Solicitudes simultáneas")
+    parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY de producción (por defecto según CPUs)")
+    parser.add_argument("--hilos", type=int, help="GUNICORN_THREADS de producción")
+    parser.add_argument("--puerto", type=int, default=5301, help="Puerto del primer servidor")
+    argumentos = parser.parse_args()
+
+    if os.name == "nt":
+        print("  gunicorn no funciona en Windows: ejecute esta prueba en Linux/macOS")
+        return 1
+
+    archivoBd = os.path.join(tempfile.mkdtemp(), "benchmark_servidores.db")
+    entorno = {**os.environ, "DATABASE_URL": f"sqlite:///{archivoBd}"}
+    entorno.pop("FLASK_DEBUG", None)
+
+    print(f"\n  Generando datos: {argumentos.duenos} dueños...")
+    subprocess.run(
+        [sys.executable, "seed.py", "--duenos", str(argumentos.duenos)],
+        cwd=DIRECTORIO, env=entorno, check=True, stdout=subprocess.DEVNULL
+    )
+
+    entornoProduccion = dict(entorno)
+    if argumentos.workers:
+        entornoProduccion["WEB_CONCURRENCY"] = str(argumentos.workers)
+    if argumentos.hilos:
+        entornoProduccion["GUNICORN_THREADS"] = str(argumentos.hilos)
+
+    print(f"  Concurrencia: {argumentos.concurrencia} | repeticiones: {argumentos.repeticiones}")
+    desarrollo = medirServidor(
+        "desarrollo", [sys.executable, "app.py"], {**entorno, "FLASK_DEBUG": "1"},
+        argumentos.puerto, argumentos
+    )
+    produccion = medirServidor(
+        "produccion", [sys.executable, "servidor.py"], entornoProduccion,
+        argumentos.puerto + 1, argumentos
+    )
+
+    imprimirComparacion(desarrollo, produccion)
+    os.remove(archivoBd)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -33,18 +33,134 @@ class Config:
     )
 
     # Ruta de respaldo SQLite (se usa si la conexión principal falla)
-    SQLITE_FALLBACK_URI = f"sqlite:///{os.path.join(BASE_DIR, 'huellitas.db')}"
+    SQLITE_FALLBACK_URI = os.environ.get(
+        "DATABASE_FALLBACK_URL",
+        f"sqlite:///{os.path.join(BASE_DIR, 'huellitas.db')}"
+    )
+
+    # --- RÉPLICAS DE LECTURA Y FAILOVER (ver services/enrutador.py) ---
+    # URIs separadas por coma: las solicitudes GET leen de ellas
+    REPLICAS_URIS = [
+        uri.strip() for uri in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if uri.strip()
+    ]
+    # Cada cuánto se verifica (SELECT 1) la primaria, el respaldo y las réplicas
+    BD_SALUD_SEGUNDOS = int(os.environ.get("BD_SALUD_SEGUNDOS", "10"))
+    # Tras escribir, los GET de ese cliente leen de la primaria durante estos
+    # segundos (debe superar el retraso normal de las réplicas)
+    BD_LECTURA_PROPIA_SEGUNDOS = int(os.environ.get("BD_LECTURA_PROPIA_SEGUNDOS", "5"))
+    # 1: si la primaria cae con la app corriendo, las escrituras pasan al
+    # respaldo SQLite (y vuelven al recuperarse). Lo escrito allí no se copia
+    # a la primaria, así que por defecto las escrituras fallan durante la caída
+    BD_RESPALDO_ESCRITURA = os.environ.get("BD_RESPALDO_ESCRITURA", "0") == "1"
+
+    # Modo debug (recarga automática y depurador interactivo) solo en desarrollo:
+    # FLASK_DEBUG=1. El servidor de producción (servidor.py) siempre lo desactiva.
+    DEBUG = os.environ.get("FLASK_DEBUG", "0") == "1"
+
+    # Puerto HTTP del servidor (desarrollo y producción)
+    PUERTO = int(os.environ.get("PORT", "5000"))
 
     # Desactivar seguimiento de modificaciones (mejora rendimiento)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # --- POOL DE CONEXIONES (ver opcionesMotor) ---
+    # Conexiones por proceso: con gunicorn cada worker tiene su propio pool, así
+    # que el máximo en el servidor de BD es WEB_CONCURRENCY x (tamaño + desborde)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "5"))
+    # Segundos de espera por una conexión libre antes de fallar
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    # Las BD en la nube cortan conexiones inactivas (Azure: ~30 min en el gateway):
+    # se reemplazan antes de ese límite y se verifican (pre-ping) al tomarlas del pool
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    # Segundos máximos para abrir una conexión a la BD en la nube: acota lo que
+    # tarda el arranque en pasar al respaldo SQLite si el servidor no responde
+    DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", "5"))
+
+    # --- PRAGMAS DE SQLITE (ver services/motor.py) ---
+    # WAL: los lectores no se bloquean mientras alguien escribe, y un commit es
+    # una sola escritura secuencial al final del registro
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    # NORMAL con WAL: sin fsync en cada commit (solo en los checkpoints); un
+    # corte de luz puede perder los últimos commits, nunca corromper el archivo
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", "256"))
+    SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", "64"))
+    # Milisegundos que una escritura espera al bloqueo antes de "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
     # Configuración de CORS para permitir peticiones del Frontend
     CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "*")
 
+    # --- CACHÉ DE RESPUESTAS GET (ver services/cache.py) ---
+    # CACHE_URL vacío: caché en memoria de cada proceso.
+    # CACHE_URL=redis://host:6379/0: caché compartida entre workers.
+    CACHE_HABILITADA = os.environ.get("CACHE_HABILITADA", "1") == "1"
+    CACHE_URL = os.environ.get("CACHE_URL", "")
+    CACHE_MAX_ENTRADAS = int(os.environ.get("CACHE_MAX_ENTRADAS", "512"))
+    CACHE_TTL_SEGUNDOS = int(os.environ.get("CACHE_TTL_SEGUNDOS", "60"))
+
+    # Varios procesos sobre la misma BD (gunicorn.conf.py lo activa con más de
+    # un worker): antes de cada solicitud se aplican a las cachés e índices en
+    # memoria los commits de los demás (ver services/sincronizacion.py)
+    SINCRONIZAR_PROCESOS = os.environ.get("SINCRONIZAR_PROCESOS", "0") == "1"
+
+    # Cada cuánto se reconstruye el índice de búsqueda en memoria (services/busqueda.py)
+    # para incorporar cambios hechos por otros procesos del servidor
+    BUSQUEDA_RECONSTRUIR_SEGUNDOS = int(os.environ.get("BUSQUEDA_RECONSTRUIR_SEGUNDOS", "300"))
+
+    # --- AGENDA DE CITAS (ver services/agenda.py) ---
+    # Horario de atención, duración de cada franja y días de atención (lunes = 0)
+    AGENDA_HORA_APERTURA = os.environ.get("AGENDA_HORA_APERTURA", "08:00")
+    AGENDA_HORA_CIERRE = os.environ.get("AGENDA_HORA_CIERRE", "18:00")
+    AGENDA_DURACION_MINUTOS = int(os.environ.get("AGENDA_DURACION_MINUTOS", "30"))
+    AGENDA_DIAS_ATENCION = os.environ.get("AGENDA_DIAS_ATENCION", "0,1,2,3,4,5")
+    # Cada cuánto se reconstruye el índice de la agenda para incorporar
+    # las reservas hechas por otros procesos del servidor
+    AGENDA_RECONSTRUIR_SEGUNDOS = int(os.environ.get("AGENDA_RECONSTRUIR_SEGUNDOS", "60"))
+
+    # Backend JSON de las respuestas (services/serializacion.py): auto usa orjson
+    # si está instalado; estandar genera el mismo texto que jsonify()
+    JSON_BACKEND = os.environ.get("JSON_BACKEND", "auto")
+
+    # Instrumentación por solicitud: Server-Timing y /api/admin/metrics (services/metricas.py)
+    METRICAS_HABILITADAS = os.environ.get("METRICAS_HABILITADAS", "1") == "1"
+
+    # --- ELIMINACIÓN DIFERIDA (ver services/eliminacion.py) ---
+    # Un dueño o mascota con más citas y registros clínicos que este número se
+    # oculta al instante y se borra en segundo plano (0: siempre al instante)
+    ELIMINACION_DIFERIDA_FILAS = int(os.environ.get("ELIMINACION_DIFERIDA_FILAS", "5000"))
+    # Filas por transacción de la purga: entre lotes la BD atiende otras escrituras
+    ELIMINACION_LOTE = int(os.environ.get("ELIMINACION_LOTE", "1000"))
+
+    # --- INASISTENCIAS (ver services/estadosCitas.py) ---
+    # Cada cuántos minutos se marcan 'No asistió' las citas Programadas
+    # vencidas (0 lo desactiva) y minutos de espera desde la hora de la cita
+    INASISTENCIAS_INTERVALO_MINUTOS = int(os.environ.get("INASISTENCIAS_INTERVALO_MINUTOS", "15"))
+    INASISTENCIAS_GRACIA_MINUTOS = int(os.environ.get("INASISTENCIAS_GRACIA_MINUTOS", "60"))
+    # Citas por transacción: en SQLite cada lote bloquea las escrituras muy poco
+    INASISTENCIAS_LOTE = int(os.environ.get("INASISTENCIAS_LOTE", "500"))
+
+    # --- EVENTOS EN VIVO (SSE, ver services/hubEventos.py) ---
+    # Puerto del hub de eventos (0, por defecto, los desactiva; p. ej. 5001).
+    # Los procesos de la app le publican por UDP en 127.0.0.1 en ese puerto
+    EVENTOS_PUERTO = int(os.environ.get("EVENTOS_PUERTO", "0"))
+    EVENTOS_HOST = os.environ.get("EVENTOS_HOST", "0.0.0.0")
+    # URL pública del flujo (el proxy publica el hub en una ruta propia).
+    # Obligatoria fuera de localhost; vacía: /api/eventos redirige a
+    # localhost:EVENTOS_PUERTO
+    EVENTOS_URL = os.environ.get("EVENTOS_URL", "")
+    EVENTOS_LATIDO_SEGUNDOS = int(os.environ.get("EVENTOS_LATIDO_SEGUNDOS", "15"))
+    EVENTOS_MAX_CLIENTES = int(os.environ.get("EVENTOS_MAX_CLIENTES", "2000"))
+
     @staticmethod
-    def obtenerTipoConexion():
-        """Retorna una descripción legible del tipo de conexión activa."""
-        dbUrl = os.environ.get("DATABASE_URL", "")
+    def obtenerTipoConexion(dbUrl=None):
+        """
+        Retorna una descripción legible del tipo de conexión activa.
+        Sin argumento usa DATABASE_URL; con dbUrl describe esa URI.
+        """
+        if dbUrl is None:
+            dbUrl = os.environ.get("DATABASE_URL", "")
         if "mysql" in dbUrl:
             return "MySQL (Azure/Nube)"
         elif "postgresql" in dbUrl:
@@ -54,3 +170,62 @@ class Config:
         else:
             return "SQLite (Local)"
 
+    @staticmethod
+    def opcionesMotor(dbUrl):
+        """
+        Perfil del motor según el tipo de conexión (SQLALCHEMY_ENGINE_OPTIONS).
+            - Nube: pool acotado, reciclaje y pre-ping (la red corta conexiones)
+              y tiempo máximo para conectar (DB_CONNECT_TIMEOUT)
+            - SQLite en archivo: pool acotado, sin pre-ping ni reciclaje (no hay red)
+            - SQLite en memoria: Flask-SQLAlchemy usa un pool de una sola conexión
+        """
+        tipo = Config.obtenerTipoConexion(dbUrl)
+        if tipo != "SQLite (Local)":
+            # Cada driver nombra distinto el límite de conexión (pyodbc: timeout de login)
+            parametroTimeout = "timeout" if tipo.startswith("SQL Server") else "connect_timeout"
+            return {
+                "pool_size": Config.DB_POOL_SIZE,
+                "max_overflow": Config.DB_MAX_OVERFLOW,
+                "pool_timeout": Config.DB_POOL_TIMEOUT,
+                "pool_recycle": Config.DB_POOL_RECYCLE,
+                "pool_pre_ping": True,
+                "connect_args": {parametroTimeout: Config.DB_CONNECT_TIMEOUT}
+            }
+        if dbUrl in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in dbUrl:
+            return {}
+        return {
+            "pool_size": Config.DB_POOL_SIZE,
+            "max_overflow": Config.DB_MAX_OVERFLOW,
+            "pool_timeout": Config.DB_POOL_TIMEOUT
+        }
+
+    @staticmethod
+    def bindsEnrutamiento(dbUrl):
+        """
+        SQLALCHEMY_BINDS del enrutador: el respaldo SQLite (si la primaria no es
+        ese mismo archivo) y una entrada por réplica, cada una con su perfil.
+        """
+        binds = {}
+        if dbUrl != Config.SQLITE_FALLBACK_URI:
+            binds["respaldo"] = {
+                "url": Config.SQLITE_FALLBACK_URI,
+                **Config.opcionesMotor(Config.SQLITE_FALLBACK_URI)
+            }
+        for numero, uri in enumerate(Config.REPLICAS_URIS, start=1):
+            binds[f"replica{numero}"] = {"url": uri, **Config.opcionesMotor(uri)}
+        return binds
+
+    @staticmethod
+    def pragmasSqlite():
+        """PRAGMA que se aplican a cada conexión SQLite nueva, en orden."""
+        return {
+            "journal_mode": Config.SQLITE_JOURNAL_MODE,
+            "synchronous": Config.SQLITE_SYNCHRONOUS,
+            "mmap_size": Config.SQLITE_MMAP_MB * 1024 * 1024,
+            # Negativo: tamaño en KiB en lugar de páginas
+            "cache_size": -Config.SQLITE_CACHE_MB * 1024,
+            "busy_timeout": Config.SQLITE_BUSY_TIMEOUT_MS,
+            # SQLite no aplica las llaves foráneas (ni su ON DELETE CASCADE) si
+            # no se activan en cada conexión; los demás motores siempre lo hacen
+            "foreign_keys": "ON"
+        }
@@ -0,0 +1,191 @@
+"""
+Empaqueta el Frontend para producción en Frontend/dist/.
+
+Por cada página (index.html, admin.html):
+    1. Une sus scripts locales (<script src="js/...">) en un solo archivo,
+       en el mismo orden, y sus hojas de estilo locales en otro
+    2. Minifica JS y CSS (rjsmin / rcssmin)
+    3. Agrega al nombre los primeros 10 caracteres del SHA-256 del contenido
+       (js/index.3f2a91c0de.js) y reescribe las etiquetas de la página
+    4. Guarda variantes .gz y .br (si está instalado 'brotli') de cada
+       archivo, comprimidas una sola vez con el nivel máximo
+
+Los scripts del Frontend son clásicos (sin módulos) y comparten el ámbito
+global, así que unirlos no cambia su comportamiento.
+services/estaticos.py sirve el resultado. servidor.py vuelve a empaquetar
+al arrancar si algún archivo fuente cambió.
+
+Ejecución:
+    python empaquetar.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+import rcssmin
+import rjsmin
+from services.estaticos import ARCHIVO_MANIFIESTO, DIRECTORIO_DIST, DIRECTORIO_FRONTEND
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan variantes gzip
+    brotli = None
+
+# Etiquetas de recursos locales (las URLs absolutas, como Google Fonts, se dejan igual)
+_SCRIPT_LOCAL = re.compile(r'^[ \t]*<script src="(?!https?://)([^"]+)"></script>[ \t]*\n?', re.M)
+_ESTILO_LOCAL = re.compile(r'^[ \t]*<link rel="stylesheet" href="(?!https?://)([^"]+)">[ \t]*\n?', re.M)
+
+# Archivos más chicos que esto no se comprimen (el encabezado cuesta más de lo que ahorra)
+TAMANO_MINIMO_COMPRESION = 512
+
+
+def _huella(contenido):
+    return hashlib.sha256(contenido).hexdigest()[:10]
+
+
+def _leer(rutaRelativa):
+    with open(os.path.join(DIRECTORIO_FRONTEND, rutaRelativa), encoding="utf-8") as archivo:
+        return archivo.read()
+
+
+def _escribir(nombre, contenido, generados):
+    """Escribe un archivo de dist y sus variantes comprimidas."""
+    ruta = os.path.join(DIRECTORIO_DIST, nombre)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "wb") as archivo:
+        archivo.write(contenido)
+    generados.add(nombre)
+
+    if len(contenido) < TAMANO_MINIMO_COMPRESION:
+        return
+    variantes = [(".gz", gzip.compress(contenido, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.append((".br", brotli.compress(contenido, quality=11)))
+    for extension, comprimido in variantes:
+        if len(comprimido) < len(contenido):
+            with open(ruta + extension, "wb") as archivo:
+                archivo.write(comprimido)
+            generados.add(nombre + extension)
+
+
+def _empaquetarRecursos(html, patron, pagina, extension, minificar, separador, plantilla,
+                        generados, inmutables):
+    """
+    Une y minifica los recursos locales de un tipo y deja una sola etiqueta.
+    Retorna (html, rutas fuente, nombre del paquete o None).
+    """
+    rutas = patron.findall(html)
+    if not rutas:
+        return html, [], None
+
+    unido = separador.join(_leer(ruta) for ruta in rutas)
+    contenido = minificar(unido).encode("utf-8")
+    nombre = f"{extension}/{pagina}.{_huella(contenido)}.{extension}"
+    _escribir(nombre, contenido, generados)
+    inmutables.add(nombre)
+
+    # La etiqueta del paquete va donde estaba la primera; las demás se quitan
+    posicion = patron.search(html).start()
+    html = patron.sub("", html)
+    return html[:posicion] + plantilla.format(nombre) + html[posicion:], rutas, nombre
+
+
+def empaquetar():
+    """Genera Frontend/dist y su manifiesto. Retorna el manifiesto."""
+    generados, inmutables = set(), set()
+    paginas = sorted(
+        nombre for nombre in os.listdir(DIRECTORIO_FRONTEND) if nombre.endswith(".html")
+    )
+
+    recursos = {}
+    for pagina in paginas:
+        html = _leer(pagina)
+        base = pagina[:-len(".html")]
+        html, estilos, paqueteCss = _empaquetarRecursos(
+            html, _ESTILO_LOCAL, base, "css", rcssmin.cssmin, "\n",
+            '    <link rel="stylesheet" href="{}">\n', generados, inmutables
+        )
+        # Separador ';' por si un archivo no termina en punto y coma
+        html, scripts, paqueteJs = _empaquetarRecursos(
+            html, _SCRIPT_LOCAL, base, "js", rjsmin.jsmin, "\n;\n",
+            '    <script src="{}"></script>\n', generados, inmutables
+        )
+        _escribir(pagina, html.encode("utf-8"), generados)
+        recursos[pagina] = {
+            "fuentes": estilos + scripts,
+            "paquetes": [paquete for paquete in (paqueteCss, paqueteJs) if paquete]
+        }
+
+    manifiesto = {
+        "generado": datetime.now().isoformat(timespec="seconds"),
+        "paginas": recursos,
+        "inmutables": sorted(inmutables)
+    }
+    with open(os.path.join(DIRECTORIO_DIST, ARCHIVO_MANIFIESTO), "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, indent=2)
+
+    # Los paquetes de empaquetados anteriores se eliminan al final, cuando
+    # las páginas nuevas ya apuntan a los archivos nuevos
+    for carpeta, _, archivos in os.walk(DIRECTORIO_DIST):
+        for archivo in archivos:
+            ruta = os.path.join(carpeta, archivo)
+            relativa = os.path.relpath(ruta, DIRECTORIO_DIST).replace(os.sep, "/")
+            if relativa != ARCHIVO_MANIFIESTO and relativa not in generados:
+                os.remove(ruta)
+    return manifiesto
+
+
+def frontendDesactualizado():
+    """True si no hay empaquetado o algún archivo fuente es más nuevo que él."""
+    try:
+        generado = os.path.getmtime(os.path.join(DIRECTORIO_DIST, ARCHIVO_MANIFIESTO))
+    except OSError:
+        return True
+    for carpeta, subcarpetas, archivos in os.walk(DIRECTORIO_FRONTEND):
+        subcarpetas[:] = [
+            nombre for nombre in subcarpetas if os.path.join(carpeta, nombre) != DIRECTORIO_DIST
+        ]
+        if any(os.path.getmtime(os.path.join(carpeta, archivo)) > generado for archivo in archivos):
+            return True
+    return False
+
+
+def _tamano(ruta):
+    return os.path.getsize(ruta) if os.path.exists(ruta) else None
+
+
+def main():
+    manifiesto = empaquetar()
+    print(f"\n  Frontend empaquetado en {DIRECTORIO_DIST}")
+    for nombre in list(manifiesto["paginas"]) + manifiesto["inmutables"]:
+        ruta = os.path.join(DIRECTORIO_DIST, nombre)
+        tamanos = [f"{_tamano(ruta) / 1024:7.1f} KB"]
+        for extension in (".gz", ".br"):
+            if _tamano(ruta + extension):
+                tamanos.append(f"{extension[1:]} {_tamano(ruta + extension) / 1024:6.1f} KB")
+        print(f"    {nombre:32} {' | '.join(tamanos)}")
+
+    # Peso de la carga inicial de cada página: fuentes sin comprimir contra
+    # el paquete con la mejor compresión disponible
+    print("\n  Carga inicial (archivos locales):")
+    for pagina, detalle in manifiesto["paginas"].items():
+        antes = [os.path.join(DIRECTORIO_FRONTEND, ruta) for ruta in [pagina] + detalle["fuentes"]]
+        despues = [os.path.join(DIRECTORIO_DIST, ruta) for ruta in [pagina] + detalle["paquetes"]]
+        pesoAntes = sum(_tamano(ruta) for ruta in antes)
+        pesoDespues = sum(
+            min(tamano for tamano in (_tamano(ruta), _tamano(ruta + ".gz"), _tamano(ruta + ".br")) if tamano)
+            for ruta in despues
+        )
+        print(f"    {pagina:12} {len(antes)} archivos, {pesoAntes / 1024:.1f} KB -> "
+              f"{len(despues)} archivos, {pesoDespues / 1024:.1f} KB")
+
+    if brotli is None:
+        print("  Aviso: 'brotli' no está instalado; solo se generaron variantes gzip")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Configuración de gunicorn para producción (Linux/macOS).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    (o simplemente: python servidor.py)
+
+Procesos e hilos:
+    - Workers: uno por CPU disponible más uno (WEB_CONCURRENCY lo fija a
+      mano). Cada worker es un proceso con su propio GIL, así el trabajo de
+      CPU (serialización JSON, plantillas de respuesta) escala con los núcleos.
+    - Hilos por worker (GUNICORN_THREADS, por defecto 4, worker gthread): cubren
+      las esperas de E/S (consultas a la BD, clientes lentos) sin más procesos.
+    - Con SQLite (en modo WAL, ver Config.pragmasSqlite) las lecturas no
+      esperan, pero las escrituras se serializan en el archivo: conviene pocos
+      workers (WEB_CONCURRENCY=2). Los motores en la nube no tienen ese límite.
+
+Cada worker tiene sus propias cachés en memoria (respuestas, índice de
+búsqueda, agenda). Con más de un worker se activa SINCRONIZAR_PROCESOS:
+antes de cada solicitud el worker lee el contador de cambios compartido de
+la BD y aplica los commits de los demás (services/sincronizacion.py).
+
+Después del fork:
+    La aplicación se carga en el maestro (preload_app) y los workers heredan
+    su pool de conexiones. Compartir un socket de BD entre procesos corrompe
+    el protocolo, así que cada worker descarta el pool heredado sin cerrarlo
+    (dispose(close=False)) y abre conexiones propias en su primera consulta.
+
+Eventos en vivo (SSE):
+    Cada conexión SSE abierta ocuparía un hilo de un worker gthread, así que
+    el flujo lo atiende el hub de services/hubEventos.py en un proceso aparte
+    (EVENTOS_PUERTO, desactivado por defecto), que gunicorn inicia al arrancar
+    y detiene al salir. Los workers le publican los cambios por UDP.
+
+Eliminación diferida:
+    Si el servidor anterior se detuvo a mitad de una purga, el maestro lo
+    detecta al arrancar e inicia purgar.py en un proceso aparte (un hilo del
+    maestro se heredaría a medias en cada fork).
+
+Inasistencias:
+    Cada worker inicia su hilo de barrido después del fork (un hilo creado en
+    el maestro no sobreviviría al fork). Ver services/estadosCitas.py.
+
+Apagado ordenado:
+    Con SIGTERM (o SIGINT) gunicorn deja de aceptar conexiones y espera hasta
+    graceful_timeout segundos a que terminen las solicitudes en curso; luego
+    cada worker cierra sus conexiones a la BD.
+"""
+import os
+import subprocess
+import sys
+
+
+def _cpusDisponibles():
+    """CPUs que el proceso puede usar (respeta los límites de contenedores/afinidad)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", _cpusDisponibles() + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+# Se define antes de cargar la app (preload_app lee config.py después)
+os.environ.setdefault("SINCRONIZAR_PROCESOS", "1" if workers > 1 else "0")
+worker_class = "gthread"
+preload_app = True
+
+# Exportaciones e importaciones masivas pueden tardar: no matar al worker antes
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Registro: errores a stderr; el log de accesos se activa con GUNICORN_ACCESSLOG=-
+errorlog = "-"
+accesslog = os.environ.get("GUNICORN_ACCESSLOG") or None
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def _motores():
+    """Motores de SQLAlchemy de la aplicación (uno por bind)."""
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        return list(db.engines.values())
+
+
+def post_fork(server, worker):
+    """Cada worker abandona el pool heredado del maestro y abre conexiones propias."""
+    for motor in _motores():
+        motor.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """Inicia el barrido de inasistencias del worker (INASISTENCIAS_INTERVALO_MINUTOS=0 lo omite)."""
+    from wsgi import app
+    from services.estadosCitas import barredorInasistencias
+    barredorInasistencias.iniciar(app)
+
+
+def worker_exit(server, worker):
+    """Cierra las conexiones del worker al terminar (apagado ordenado)."""
+    for motor in _motores():
+        motor.dispose()
+
+
+# Procesos auxiliares que inicia when_ready: hub de eventos y purga pendiente
+_auxiliares = []
+
+
+def when_ready(server):
+    """
+    Inicia el hub de eventos SSE en su propio proceso (EVENTOS_PUERTO=0 lo
+    omite) y, si quedó una eliminación diferida a medias, la purga.
+    """
+    from config import Config
+    from wsgi import app
+    from services.eliminacion import purgaPendiente
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    if Config.EVENTOS_PUERTO:
+        _auxiliares.append(subprocess.Popen([sys.executable, "-m", "services.hubEventos"], cwd=directorio))
+    if purgaPendiente(app):
+        _auxiliares.append(subprocess.Popen([sys.executable, "purgar.py"], cwd=directorio))
+
+
+def on_exit(server):
+    """Detiene los procesos auxiliares junto con gunicorn (la purga se retoma al volver)."""
+    for proceso in _auxiliares:
+        if proceso.poll() is None:
+            proceso.terminate()
+            proceso.wait(timeout=graceful_timeout)
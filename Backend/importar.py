@@ -0,0 +1,75 @@
+"""
+Importación masiva desde la línea de comandos.
+
+Usa el mismo proceso por lotes que POST /api/<recurso>/bulk
+(services/importacion.py) pero lee el archivo directamente, sin pasar por HTTP.
+El formato se deduce de la extensión (.json, .ndjson/.jsonl, .csv).
+
+Ejecución:
+    python importar.py duenos legado/duenos.csv
+    python importar.py mascotas legado/mascotas.ndjson --lote 2000
+    python importar.py citas legado/citas.json --historico
+"""
+import argparse
+import os
+import sys
+from app import crearApp
+from services.importacion import (
+    IMPORTACIONES, FORMATOS_IMPORTACION, TAMANO_LOTE, ImportacionInterrumpida, importarRegistros,
+    leerRegistros
+)
+
+# Extensión del archivo -> formato
+EXTENSIONES = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+# Errores que se muestran en consola (el resto se cuenta)
+ERRORES_EN_CONSOLA = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva de datos")
+    parser.add_argument("recurso", choices=list(IMPORTACIONES), help="Tabla destino")
+    parser.add_argument("archivo", help="Archivo JSON, NDJSON o CSV")
+    parser.add_argument("--formato", choices=list(FORMATOS_IMPORTACION),
+                        help="Formato del archivo (por defecto según la extensión)")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por transacción")
+    parser.add_argument("--historico", action="store_true",
+                        help="Citas: aceptar fechas pasadas (migración)")
+    argumentos = parser.parse_args()
+
+    formato = argumentos.formato or EXTENSIONES.get(os.path.splitext(argumentos.archivo)[1].lower())
+    if formato is None:
+        parser.error("No se pudo deducir el formato: use --formato")
+
+    app = crearApp()
+    interrumpida = False
+    with app.app_context(), open(argumentos.archivo, "rb") as archivo:
+        try:
+            resumen = importarRegistros(
+                IMPORTACIONES[argumentos.recurso],
+                leerRegistros(archivo, formato),
+                tamanoLote=argumentos.lote,
+                historico=argumentos.historico
+            )
+        except ImportacionInterrumpida as error:
+            # Los lotes anteriores ya se confirmaron: se informa lo que se alcanzó a importar
+            print(f"  Error: {error}")
+            resumen = error.resumen
+            interrumpida = True
+        except ValueError as error:
+            print(f"  Error: {error}")
+            return 1
+
+    print(f"\n  Registros leídos:    {resumen['total']}")
+    print(f"  Insertados:          {resumen['insertados']}")
+    print(f"  Rechazados:          {resumen['rechazados']}")
+    for error in resumen["errores"][:ERRORES_EN_CONSOLA]:
+        print(f"    fila {error['fila']}: {error['error']}")
+    if resumen["rechazados"] > ERRORES_EN_CONSOLA:
+        print(f"    ... y {resumen['rechazados'] - ERRORES_EN_CONSOLA} errores más")
+
+    return 0 if resumen["rechazados"] == 0 and not interrumpida else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
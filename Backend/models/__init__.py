@@ -3,6 +3,8 @@ Inicialización de la base de datos con SQLAlchemy.
 Este módulo centraliza la instancia de la BD para evitar importaciones circulares.
 """
 from flask_sqlalchemy import SQLAlchemy
+from services.enrutador import SesionEnrutada
 
-# Instancia global de SQLAlchemy, se inicializa en app.py
-db = SQLAlchemy()
+# Instancia global de SQLAlchemy, se inicializa en app.py.
+# La sesión reparte las consultas entre primaria, réplicas y respaldo.
+db = SQLAlchemy(session_options={"class_": SesionEnrutada})
@@ -0,0 +1,60 @@
+"""
+Modelo de Analítica de Peso.
+Serie de pesos en consulta de cada mascota ya analizada: extremos, ritmo de
+cambio (pendiente de mínimos cuadrados) y el mayor cambio entre dos consultas
+seguidas. Se recalcula al escribir (services/analitica.py); las cohortes por
+especie, raza y edad se calculan al leer a partir de esta tabla.
+Relación: cada mascota con al menos un peso registrado tiene una fila (1:1).
+"""
+from models import db
+
+
+class AnaliticaPeso(db.Model):
+    """Tabla 'analitica_peso' - Serie de peso analizada por mascota."""
+
+    __tablename__ = "analitica_peso"
+
+    mascotaId = db.Column(
+        db.Integer,
+        db.ForeignKey("mascotas.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    cantidadPesos = db.Column(db.Integer, nullable=False)
+    primeraFecha = db.Column(db.Date, nullable=False)
+    ultimaFecha = db.Column(db.Date, nullable=False)
+    pesoInicial = db.Column(db.Float, nullable=False)
+    pesoActual = db.Column(db.Float, nullable=False)
+    pesoMinimo = db.Column(db.Float, nullable=False)
+    pesoMaximo = db.Column(db.Float, nullable=False)
+    kgPorMes = db.Column(db.Float, nullable=True)  # pendiente de la recta de mínimos cuadrados (30 días)
+
+    # Mayor cambio porcentual entre dos consultas seguidas (con signo) y su fecha
+    cambioMaximo = db.Column(db.Float, nullable=True)
+    fechaCambioMaximo = db.Column(db.Date, nullable=True)
+    cambioBrusco = db.Column(db.Boolean, nullable=False, default=False)
+
+    actualizado = db.Column(db.DateTime, nullable=False)
+
+    # Índice: listado de cambios bruscos sin recorrer toda la tabla
+    __table_args__ = (
+        db.Index("ix_analitica_peso_cambioBrusco", cambioBrusco),
+    )
+
+    def toDict(self):
+        """Serializa el modelo a diccionario para respuesta JSON."""
+        return {
+            "mascotaId": self.mascotaId,
+            "cantidadPesos": self.cantidadPesos,
+            "primeraFecha": self.primeraFecha.isoformat(),
+            "ultimaFecha": self.ultimaFecha.isoformat(),
+            "pesoInicial": self.pesoInicial,
+            "pesoActual": self.pesoActual,
+            "pesoMinimo": self.pesoMinimo,
+            "pesoMaximo": self.pesoMaximo,
+            "kgPorMes": self.kgPorMes,
+            "cambioMaximo": self.cambioMaximo,
+            "fechaCambioMaximo": (
+                self.fechaCambioMaximo.isoformat() if self.fechaCambioMaximo else None
+            ),
+            "cambioBrusco": self.cambioBrusco
+        }
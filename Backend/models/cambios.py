@@ -0,0 +1,79 @@
+"""
+Modelos del registro de cambios (sincronización incremental).
+Cada escritura sobre duenos, mascotas, citas o historial_clinico avanza un
+contador global; las filas guardan en 'version' el valor del contador de la
+transacción que las modificó y los borrados dejan una marca en 'eliminaciones'.
+Así /api/cambios?since=<token> devuelve solo lo que cambió desde el token.
+Lo mantiene services/cambios.py; no se edita desde la API.
+"""
+from models import db
+
+
+class SecuenciaCambios(db.Model):
+    """Tabla 'secuencia_cambios' - Contador global de cambios (una sola fila, id=1)."""
+
+    __tablename__ = "secuencia_cambios"
+
+    id = db.Column(db.Integer, primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+
+    # Token mínimo que todavía se puede sincronizar: los clientes con un token
+    # anterior deben recargar todo (p. ej. tras un DELETE masivo sin marcas)
+    reinicio = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Clave en Connection.info: versión de la transacción en curso en esa
+# conexión, o su marca provisional (negativa) si todavía no la tomó
+CLAVE_VERSION = "versionTransaccion"
+
+
+def avanzarContador(conexion):
+    """
+    Incrementa el contador en la transacción de la conexión (crea la fila si
+    falta) y retorna el valor nuevo. Bloquea la fila hasta el COMMIT.
+    """
+    secuencia = SecuenciaCambios.__table__
+    avance = db.update(secuencia).where(secuencia.c.id == 1).values(valor=secuencia.c.valor + 1)
+    version = None
+    if conexion.dialect.update_returning:
+        version = conexion.execute(avance.returning(secuencia.c.valor)).scalar()
+    elif conexion.execute(avance).rowcount:
+        version = conexion.scalar(db.select(secuencia.c.valor).where(secuencia.c.id == 1))
+    if version is None:
+        conexion.execute(db.insert(secuencia).values(id=1, valor=1, reinicio=0))
+        version = 1
+    return version
+
+
+def versionDeLaTransaccion(contexto):
+    """
+    Default y onupdate de las columnas 'version'. Vale la versión que tomó la
+    transacción (services/cambios.py) o, antes de tomarla, una marca
+    provisional que se corrige antes del COMMIT. Una escritura que la sesión
+    no registró (INSERT/UPDATE de Core sobre la conexión) avanza el contador
+    ella misma: con el valor actual, un cliente que ya tiene ese token no la
+    vería nunca.
+    """
+    conexion = contexto.connection
+    version = conexion.info.get(CLAVE_VERSION)
+    if version is None:
+        # services/cambios.py lo quita de la conexión al confirmar o revertir
+        version = conexion.info[CLAVE_VERSION] = avanzarContador(conexion)
+    return version
+
+
+class Eliminacion(db.Model):
+    """Tabla 'eliminaciones' - Marca de cada registro borrado (tombstone)."""
+
+    __tablename__ = "eliminaciones"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    tabla = db.Column(db.String(30), nullable=False)
+    registroId = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=versionDeLaTransaccion)
+
+    # Índices: el feed lee las marcas por rango de versión
+    __table_args__ = (
+        db.Index("ix_eliminaciones_version", version),
+    )
+
@@ -5,6 +5,7 @@ Relación: Cada cita pertenece a una mascota (N:1).
 """
 from datetime import datetime
 from models import db
+from models.cambios import versionDeLaTransaccion
 
 
 class Cita(db.Model):
@@ -20,7 +21,7 @@ class Cita(db.Model):
         db.String(20),
         nullable=False,
         default="Programada"
-    )  # Programada, Completada, Cancelada
+    )  # Programada, Completada, Cancelada, No asistió
 
     # Llave foránea: referencia a la mascota
     mascotaId = db.Column(
@@ -29,6 +30,30 @@ class Cita(db.Model):
         nullable=False
     )
 
+    # Versión del último cambio (ver services/cambios.py): la usa /api/cambios
+    version = db.Column(
+        db.Integer, nullable=False, server_default="0",
+        default=versionDeLaTransaccion, onupdate=versionDeLaTransaccion
+    )
+
+    # Índices: FK (citas por mascota y CASCADE) y agenda ordenada por fecha y hora.
+    # ux_citas_agenda: una sola cita Programada por fecha y hora (índice único
+    # parcial). Evita que dos workers reserven la misma franja al mismo tiempo.
+    # MySQL no admite índices parciales: ahí solo aplica la verificación de
+    # services/agenda.py.
+    __table_args__ = (
+        db.Index("ix_citas_mascotaId", mascotaId),
+        db.Index("ix_citas_fecha_hora", fecha, hora),
+        db.Index("ix_citas_version", version),
+        db.Index(
+            "ux_citas_agenda", fecha, hora,
+            unique=True,
+            sqlite_where=estado == "Programada",
+            postgresql_where=estado == "Programada",
+            mssql_where=estado == "Programada"
+        ).ddl_if(dialect=("sqlite", "postgresql", "mssql")),
+    )
+
     @staticmethod
     def validarFechaFutura(fecha, hora):
         """
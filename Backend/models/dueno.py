@@ -4,6 +4,7 @@ Representa al propietario de una o varias mascotas.
 Relación: Un dueño puede tener muchas mascotas (1:N).
 """
 from models import db
+from models.cambios import versionDeLaTransaccion
 
 
 class Dueno(db.Model):
@@ -19,16 +20,42 @@ class Dueno(db.Model):
     correo = db.Column(db.String(150), nullable=True)
     direccion = db.Column(db.String(200), nullable=True)
 
-    # Relación con mascotas: cascade elimina mascotas si se borra el dueño
+    # Versión del último cambio (ver services/cambios.py): la usa /api/cambios
+    version = db.Column(
+        db.Integer, nullable=False, server_default="0",
+        default=versionDeLaTransaccion, onupdate=versionDeLaTransaccion
+    )
+
+    # Eliminación diferida (ver services/eliminacion.py): desde este momento el
+    # dueño y todo lo suyo quedan ocultos hasta que la purga en segundo plano
+    # los borre
+    eliminadoEn = db.Column(db.DateTime, nullable=True)
+
+    # Índices: el listado y la búsqueda ordenan por nombre
+    __table_args__ = (
+        db.Index("ix_duenos_nombre", nombre),
+        db.Index("ix_duenos_version", version),
+        db.Index("ix_duenos_eliminadoEn", eliminadoEn),
+    )
+
+    # Relación con mascotas: al borrar el dueño el ON DELETE CASCADE de la BD
+    # elimina sus mascotas (passive_deletes: sin cargarlas ni un DELETE por objeto)
     mascotas = db.relationship(
         "Mascota",
         backref="dueno",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         lazy=True
     )
 
-    def toDict(self):
-        """Serializa el modelo a diccionario para respuesta JSON."""
+    def toDict(self, cantidadMascotas=None):
+        """
+        Serializa el modelo a diccionario para respuesta JSON.
+        Si se recibe el conteo precalculado (ver services/consultas.py)
+        se evita cargar la colección de mascotas solo para contarla.
+        """
+        if cantidadMascotas is None:
+            cantidadMascotas = len(self.mascotas)
         return {
             "id": self.id,
             "nombre": self.nombre,
@@ -37,5 +64,5 @@ class Dueno(db.Model):
             "telefono": self.telefono,
             "correo": self.correo,
             "direccion": self.direccion,
-            "cantidadMascotas": len(self.mascotas)
+            "cantidadMascotas": cantidadMascotas
         }
@@ -7,6 +7,7 @@ un evento médico que YA ocurrió (diagnóstico, tratamiento, resultado).
 """
 from datetime import date
 from models import db
+from models.cambios import versionDeLaTransaccion
 
 
 class HistorialClinico(db.Model):
@@ -30,6 +31,20 @@ class HistorialClinico(db.Model):
         nullable=False
     )
 
+    # Versión del último cambio (ver services/cambios.py): la usa /api/cambios
+    version = db.Column(
+        db.Integer, nullable=False, server_default="0",
+        default=versionDeLaTransaccion, onupdate=versionDeLaTransaccion
+    )
+
+    # Índices: historial de una mascota (más reciente primero) y listado general por fecha.
+    # El compuesto (mascotaId, fecha DESC) también sirve para la FK y el CASCADE.
+    __table_args__ = (
+        db.Index("ix_historial_mascotaId_fecha", mascotaId, fecha.desc()),
+        db.Index("ix_historial_fecha", fecha),
+        db.Index("ix_historial_version", version),
+    )
+
     def toDict(self):
         """Serializa el modelo a diccionario para respuesta JSON."""
         return {
@@ -4,7 +4,75 @@ Representa a un paciente de la clínica veterinaria.
 Relación: Cada mascota pertenece a un dueño (N:1) y puede tener muchas citas (1:N).
 """
 from datetime import date, datetime
+from functools import lru_cache
+import numpy as np
 from models import db
+from models.cambios import versionDeLaTransaccion
+
+
+@lru_cache(maxsize=1024)
+def _textoEdad(anios, meses):
+    """Texto de la edad; hay pocas combinaciones de (años, meses), así que se memoriza."""
+    if anios > 0:
+        return f"{anios} año{'s' if anios != 1 else ''} y {meses} mes{'es' if meses != 1 else ''}"
+    else:
+        return f"{meses} mes{'es' if meses != 1 else ''}"
+
+
+@lru_cache(maxsize=16384)
+def _aniosDecimales(dias):
+    """Días de vida a años decimales (redondeo de Python, memorizado por cantidad de días)."""
+    return round(dias / 365.25, 1)
+
+
+def calcularEdad(fechaNacimiento, hoy=None):
+    """
+    Retorna la edad como texto descriptivo (años y meses).
+    Se expone como función para poder calcularla también sobre columnas
+    proyectadas, sin instanciar el modelo.
+    """
+    hoy = hoy or date.today()
+    anios = hoy.year - fechaNacimiento.year
+    meses = hoy.month - fechaNacimiento.month
+
+    # Ajuste si aún no ha pasado el mes/día de cumpleaños
+    if hoy.day < fechaNacimiento.day:
+        meses -= 1
+    if meses < 0:
+        anios -= 1
+        meses += 12
+
+    return _textoEdad(anios, meses)
+
+
+def calcularEdadAnios(fechaNacimiento, hoy=None):
+    """Retorna la edad en años decimales para cálculos."""
+    hoy = hoy or date.today()
+    return _aniosDecimales((hoy - fechaNacimiento).days)
+
+
+def calcularEdades(fechasNacimiento, hoy=None):
+    """
+    calcularEdad y calcularEdadAnios de muchas fechas a la vez, con una sola
+    fecha de hoy y aritmética de arreglos (numpy) en lugar de una llamada por
+    mascota. Retorna (edades, edadesAnios): dos listas en el orden recibido,
+    con los mismos valores que las funciones individuales.
+    """
+    hoy = hoy or date.today()
+    dias = hoy.toordinal() - np.fromiter(
+        map(date.toordinal, fechasNacimiento), dtype=np.int64, count=len(fechasNacimiento)
+    )
+    nacimientos = np.datetime64(hoy, "D") - dias.astype("timedelta64[D]")
+    mesNacimiento = nacimientos.astype("datetime64[M]")
+    diaNacimiento = (nacimientos - mesNacimiento).astype(np.int64) + 1
+
+    # Meses cumplidos: se descuenta uno si aún no llega el día del mes
+    meses = (np.datetime64(hoy, "M") - mesNacimiento).astype(np.int64) - (hoy.day < diaNacimiento)
+    anios, meses = np.divmod(meses, 12)
+    return (
+        list(map(_textoEdad, anios.tolist(), meses.tolist())),
+        list(map(_aniosDecimales, dias.tolist()))
+    )
 
 
 class Mascota(db.Model):
@@ -27,19 +95,40 @@ class Mascota(db.Model):
         nullable=False
     )
 
-    # Relación con citas: cascade elimina citas si se borra la mascota
+    # Versión del último cambio (ver services/cambios.py): la usa /api/cambios
+    version = db.Column(
+        db.Integer, nullable=False, server_default="0",
+        default=versionDeLaTransaccion, onupdate=versionDeLaTransaccion
+    )
+
+    # Eliminación diferida (ver services/eliminacion.py): oculta la mascota,
+    # sus citas y su historial hasta que la purga en segundo plano los borre
+    eliminadoEn = db.Column(db.DateTime, nullable=True)
+
+    # Índices: FK (consultas por dueño y CASCADE) y ordenamiento por nombre
+    __table_args__ = (
+        db.Index("ix_mascotas_duenoId", duenoId),
+        db.Index("ix_mascotas_nombre", nombre),
+        db.Index("ix_mascotas_version", version),
+        db.Index("ix_mascotas_eliminadoEn", eliminadoEn),
+    )
+
+    # Relación con citas: al borrar la mascota el ON DELETE CASCADE de la BD
+    # elimina sus citas (passive_deletes: sin cargarlas en la sesión)
     citas = db.relationship(
         "Cita",
         backref="mascota",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         lazy=True
     )
 
-    # Relación con historial clínico: cascade elimina registros si se borra la mascota
+    # Relación con historial clínico: mismo CASCADE de la BD que las citas
     historiales = db.relationship(
         "HistorialClinico",
         backref="mascota",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         lazy=True
     )
 
@@ -49,43 +138,40 @@ class Mascota(db.Model):
         Calcula la edad automáticamente a partir de la fecha de nacimiento.
         Retorna un string descriptivo (años y meses).
         """
-        hoy = date.today()
-        anios = hoy.year - self.fechaNacimiento.year
-        meses = hoy.month - self.fechaNacimiento.month
-
-        # Ajuste si aún no ha pasado el mes/día de cumpleaños
-        if hoy.day < self.fechaNacimiento.day:
-            meses -= 1
-        if meses < 0:
-            anios -= 1
-            meses += 12
-
-        if anios > 0:
-            return f"{anios} año{'s' if anios != 1 else ''} y {meses} mes{'es' if meses != 1 else ''}"
-        else:
-            return f"{meses} mes{'es' if meses != 1 else ''}"
+        return calcularEdad(self.fechaNacimiento)
 
     @property
     def edadAnios(self):
         """Retorna la edad en años decimales para cálculos."""
-        hoy = date.today()
-        diferencia = hoy - self.fechaNacimiento
-        return round(diferencia.days / 365.25, 1)
+        return calcularEdadAnios(self.fechaNacimiento)
 
-    def toDict(self):
-        """Serializa el modelo a diccionario para respuesta JSON."""
+    def toDict(self, cantidadCitas=None, cantidadHistoriales=None, edad=None, edadAnios=None):
+        """
+        Serializa el modelo a diccionario para respuesta JSON.
+        Los conteos pueden llegar precalculados desde services/consultas.py
+        para no cargar las colecciones completas de citas e historiales, y la
+        edad calculada para todo el listado a la vez (calcularEdades).
+        """
+        if edad is None:
+            edad = self.edad
+        if edadAnios is None:
+            edadAnios = self.edadAnios
+        if cantidadCitas is None:
+            cantidadCitas = len(self.citas)
+        if cantidadHistoriales is None:
+            cantidadHistoriales = len(self.historiales)
         return {
             "id": self.id,
             "nombre": self.nombre,
             "especie": self.especie,
             "raza": self.raza,
             "fechaNacimiento": self.fechaNacimiento.isoformat(),
-            "edad": self.edad,
-            "edadAnios": self.edadAnios,
+            "edad": edad,
+            "edadAnios": edadAnios,
             "peso": self.peso,
             "observaciones": self.observaciones,
             "duenoId": self.duenoId,
             "duenoNombre": f"{self.dueno.nombre} {self.dueno.apellido}" if self.dueno else None,
-            "cantidadCitas": len(self.citas),
-            "cantidadHistoriales": len(self.historiales)
+            "cantidadCitas": cantidadCitas,
+            "cantidadHistoriales": cantidadHistoriales
         }
@@ -0,0 +1,77 @@
+"""
+Modelo de Resumen Clínico de una mascota.
+Datos derivados del historial clínico, precalculados al escribir para que la
+línea de tiempo no recorra todos los registros en cada lectura.
+Relación: cada mascota con historial tiene un resumen (1:1).
+Lo mantiene services/lineaTiempo.py; no se edita desde la API.
+"""
+from datetime import date
+from models import db
+
+# Días desde la consulta en que se recetaron para considerar activos los medicamentos
+DIAS_TRATAMIENTO_ACTIVO = 30
+
+
+class ResumenMascota(db.Model):
+    """Tabla 'resumen_mascota' - Resumen del historial clínico por mascota."""
+
+    __tablename__ = "resumen_mascota"
+
+    mascotaId = db.Column(
+        db.Integer,
+        db.ForeignKey("mascotas.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    cantidadVisitas = db.Column(db.Integer, nullable=False, default=0)
+    primeraVisita = db.Column(db.Date, nullable=True)
+    ultimaVisita = db.Column(db.Date, nullable=True)
+
+    # Últimos pesos registrados en consulta, del más antiguo al más reciente:
+    # [["2025-01-10", 12.4], ...]
+    pesos = db.Column(db.JSON, nullable=False, default=list)
+    ultimoPeso = db.Column(db.Float, nullable=True)
+    variacionPeso = db.Column(db.Float, nullable=True)  # kg entre el primer y el último peso de 'pesos'
+    tendenciaPeso = db.Column(db.String(10), nullable=True)  # subiendo, bajando, estable
+
+    # Últimas recetas, de la más reciente a la más antigua:
+    # [{"fecha": "2025-01-10", "medicamentos": "...", "registroId": 7}, ...]
+    medicamentos = db.Column(db.JSON, nullable=False, default=list)
+
+    actualizado = db.Column(db.DateTime, nullable=False)
+
+    def toDict(self, hoy=None):
+        """
+        Serializa el resumen para respuesta JSON. Los medicamentos activos y
+        los días desde la última visita dependen de la fecha actual, así que
+        se derivan aquí (de unos pocos elementos) y no se guardan.
+        """
+        hoy = hoy or date.today()
+        activos = [
+            receta for receta in self.medicamentos or []
+            if (hoy - date.fromisoformat(receta["fecha"])).days <= DIAS_TRATAMIENTO_ACTIVO
+        ]
+        return {
+            "cantidadVisitas": self.cantidadVisitas,
+            "primeraVisita": self.primeraVisita.isoformat() if self.primeraVisita else None,
+            "ultimaVisita": self.ultimaVisita.isoformat() if self.ultimaVisita else None,
+            "diasDesdeUltimaVisita": (hoy - self.ultimaVisita).days if self.ultimaVisita else None,
+            "peso": {
+                "actual": self.ultimoPeso,
+                "variacion": self.variacionPeso,
+                "tendencia": self.tendenciaPeso,
+                "registros": [{"fecha": fecha, "peso": peso} for fecha, peso in self.pesos or []]
+            },
+            "medicamentosActivos": activos
+        }
+
+    @staticmethod
+    def vacio():
+        """Resumen de una mascota sin registros clínicos."""
+        return {
+            "cantidadVisitas": 0,
+            "primeraVisita": None,
+            "ultimaVisita": None,
+            "diasDesdeUltimaVisita": None,
+            "peso": {"actual": None, "variacion": None, "tendencia": None, "registros": []},
+            "medicamentosActivos": []
+        }
@@ -0,0 +1,32 @@
+"""
+Purga de las eliminaciones diferidas pendientes desde la línea de comandos.
+
+Borra por lotes los dueños y mascotas que quedaron ocultos (con sus citas e
+historial) cuando el proceso que los purgaba terminó antes de acabar. Es lo
+mismo que hace el hilo de purga (services/eliminacion.py); gunicorn.conf.py
+lo ejecuta al arrancar si hay algo pendiente.
+
+Ejecución:
+    python purgar.py
+    python purgar.py --lote 500
+"""
+import argparse
+import sys
+from app import crearApp
+from services.eliminacion import purgarOcultos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purga de eliminaciones diferidas")
+    parser.add_argument("--lote", type=int, help="Filas por transacción (por defecto ELIMINACION_LOTE)")
+    argumentos = parser.parse_args()
+
+    app = crearApp()
+    with app.app_context():
+        borradas = purgarOcultos(argumentos.lote or app.config.get("ELIMINACION_LOTE", 1000))
+    print("  Purga completada: " + ", ".join(f"{tabla} {filas}" for tabla, filas in borradas.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Rutas de la API para la Analítica de peso.
+Valor agregado: curvas de peso por paciente y comparación con las mascotas de
+la misma especie, raza y edad, para detectar a tiempo bajas o subidas de peso.
+
+Endpoints:
+    GET    /api/analitica/peso/cohortes          - Percentiles de peso por cohorte
+                                                   (?agrupar=especie|raza&especie=)
+    GET    /api/analitica/peso/mascota/<id>      - Serie, ritmo de cambio y posición
+                                                   en su cohorte (?agrupar=)
+    GET    /api/analitica/peso/anomalias         - Cambios bruscos y pesos atípicos
+                                                   (?agrupar=&especie=&limit=)
+"""
+from flask import Blueprint, request, jsonify
+from models.mascota import Mascota
+from services.analitica import analisisMascota, anomalias, cohortes
+from services.cache import cacheRespuesta
+
+analiticaBlueprint = Blueprint("analitica", __name__, url_prefix="/api/analitica")
+
+# Tablas de las que dependen las respuestas (la edad de las mascotas avanza
+# sin escrituras: la vigencia de la caché acota ese desfase)
+TABLAS_ANALITICA = ("mascotas", "analitica_peso", "historial_clinico")
+
+AGRUPACIONES = ("especie", "raza")
+
+# Cantidad de anomalías por defecto y máxima
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+
+def _leerAgrupacion():
+    """Lee ?agrupar= (especie por defecto). Retorna True si se agrupa también por raza."""
+    agrupar = request.args.get("agrupar", "especie")
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f"El parámetro 'agrupar' debe ser uno de: {', '.join(AGRUPACIONES)}")
+    return agrupar == "raza"
+
+
+@analiticaBlueprint.route("/peso/cohortes", methods=["GET"])
+@cacheRespuesta(*TABLAS_ANALITICA)
+def cohortesPeso():
+    """
+    Percentiles (p10 a p90) del peso actual por especie y grupo de edad
+    (y raza con ?agrupar=raza), con el ritmo de cambio mediano en kg/mes y
+    la cantidad de cambios bruscos y pesos atípicos de cada cohorte.
+    """
+    try:
+        porRaza = _leerAgrupacion()
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    return jsonify(cohortes(porRaza=porRaza, especie=request.args.get("especie"))), 200
+
+
+@analiticaBlueprint.route("/peso/mascota/<int:mascotaId>", methods=["GET"])
+@cacheRespuesta(*TABLAS_ANALITICA)
+def analisisPesoMascota(mascotaId):
+    """Serie de pesos de la mascota, su análisis y su posición dentro de la cohorte."""
+    try:
+        porRaza = _leerAgrupacion()
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    mascota = Mascota.query.get(mascotaId)
+    if not mascota:
+        return jsonify({"error": "Mascota no encontrada"}), 404
+
+    return jsonify({
+        "mascotaId": mascota.id,
+        "nombre": mascota.nombre,
+        "especie": mascota.especie,
+        "raza": mascota.raza,
+        "edadAnios": mascota.edadAnios,
+        **analisisMascota(mascota, porRaza=porRaza)
+    }), 200
+
+
+@analiticaBlueprint.route("/peso/anomalias", methods=["GET"])
+@cacheRespuesta(*TABLAS_ANALITICA)
+def anomaliasPeso():
+    """
+    Mascotas con un cambio de peso brusco entre dos consultas seguidas o un
+    peso atípico para su cohorte, de la más llamativa a la menos.
+    """
+    try:
+        porRaza = _leerAgrupacion()
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    try:
+        limite = int(request.args.get("limit", LIMITE_POR_DEFECTO))
+    except ValueError:
+        return jsonify({"error": "El parámetro 'limit' debe ser un número entero"}), 400
+    if limite < 1:
+        return jsonify({"error": "El parámetro 'limit' debe ser mayor que cero"}), 400
+
+    return jsonify(anomalias(
+        porRaza=porRaza, especie=request.args.get("especie"), limite=min(limite, LIMITE_MAXIMO)
+    )), 200
@@ -0,0 +1,44 @@
+"""
+Rutas de la API para la sincronización incremental.
+Valor agregado: tras una alta, edición o baja el Frontend pide solo las filas
+que cambiaron desde su último token, en lugar de volver a descargar cada tabla
+(ver services/cambios.py y Frontend/js/api.js).
+
+Endpoints:
+    GET    /api/cambios              - Token actual: {"token": n}
+    GET    /api/cambios?since=<n>    - Filas modificadas y eliminadas desde el token:
+                                       {"token", "reiniciar", "duenos", "mascotas",
+                                        "citas", "historial", "eliminados"}
+"""
+from flask import Blueprint, request, jsonify
+from services.cambios import TABLAS_VERSIONADAS, cambiosDesde, codificarCambios, estadoSecuencia
+from services.cache import cacheRespuesta
+from services.serializacion import respuestaJson
+
+cambiosBlueprint = Blueprint("cambios", __name__, url_prefix="/api/cambios")
+
+# Tablas de las que dependen las respuestas
+TABLAS_CAMBIOS = (*TABLAS_VERSIONADAS, "eliminaciones", "secuencia_cambios")
+
+
+@cambiosBlueprint.route("", methods=["GET"])
+@cacheRespuesta(*TABLAS_CAMBIOS)
+def obtenerCambios():
+    """
+    Sin ?since= retorna el token actual (se pide antes de la carga completa).
+    Con ?since= retorna, con los mismos campos que los listados, las filas
+    modificadas o creadas y los ids eliminados desde ese token, más el token
+    para la siguiente llamada. Con "reiniciar": true el token ya no sirve y
+    el cliente debe recargar todo (y seguir desde el token nuevo).
+    """
+    texto = request.args.get("since")
+    if texto is None:
+        return jsonify({"token": estadoSecuencia()[0]}), 200
+    try:
+        desde = int(texto)
+    except ValueError:
+        return jsonify({"error": "El parámetro 'since' debe ser un token numérico"}), 400
+    if desde < 0:
+        return jsonify({"error": "El parámetro 'since' no puede ser negativo"}), 400
+
+    return respuestaJson(codificarCambios(*cambiosDesde(desde))), 200
@@ -1,35 +1,73 @@
 """
 Rutas de la API para gestión de Citas.
 Endpoints:
-    GET    /api/citas          - Listar todas las citas
+    GET    /api/citas          - Listar citas (?limit=&cursor=&fields=)
     GET    /api/citas/<id>     - Obtener una cita por ID
+    GET    /api/citas/disponibilidad?fecha=YYYY-MM-DD - Franjas libres del día
     POST   /api/citas          - Agendar nueva cita
+    POST   /api/citas/bulk     - Importación masiva (JSON, NDJSON o CSV)
+    POST   /api/citas/estado   - Cambio de estado en bloque (por ids o filtro)
     PUT    /api/citas/<id>     - Actualizar cita existente
     DELETE /api/citas/<id>     - Cancelar/eliminar cita
 """
 from datetime import datetime
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from models import db
 from models.cita import Cita
 from models.mascota import Mascota
+from services.consultas import LISTADO_CITAS
+from services.paginacion import filasListado, responderListado
+from services.serializacion import codificarFila, respuestaJson
+from services.cache import cacheRespuesta
+from services.importacion import IMPORTACION_CITAS, responderImportacion
+from services.agenda import ConflictoAgenda, motorAgenda
+from services.estadosCitas import transicionarCitas
+from services.validaciones import ESTADOS_CITA, ErrorValidacion, validarCita, validarTransicionCitas
 
 citasBlueprint = Blueprint("citas", __name__, url_prefix="/api/citas")
 
+# Respuesta cuando otro worker reservó la franja entre la verificación y el COMMIT
+MENSAJE_FRANJA_TOMADA = "La franja acaba de ser reservada por otra solicitud. Elija otro horario"
+
+
+def _respuestaConflicto(conflicto):
+    """409 con los horarios libres del mismo día."""
+    return jsonify({"error": conflicto.mensaje, "alternativas": conflicto.alternativas}), 409
+
 
 @citasBlueprint.route("", methods=["GET"])
+@cacheRespuesta("citas", "mascotas", "duenos")
 def listarCitas():
-    """Obtiene la lista de citas ordenadas por fecha (más próximas primero)."""
-    citas = Cita.query.order_by(Cita.fecha.asc(), Cita.hora.asc()).all()
-    return jsonify([cita.toDict() for cita in citas]), 200
+    """
+    Obtiene la lista de citas ordenadas por fecha (más próximas primero).
+    Admite ?limit=, ?cursor= y ?fields= (ver services/paginacion.py).
+    """
+    return responderListado(LISTADO_CITAS)
+
+
+@citasBlueprint.route("/disponibilidad", methods=["GET"])
+def disponibilidadCitas():
+    """
+    Franjas del día con su estado (libre u ocupada) según el horario de la
+    clínica y las citas Programadas (ver services/agenda.py).
+    No se guarda en caché: depende también de la hora actual.
+    """
+    try:
+        fecha = datetime.strptime(request.args.get("fecha", ""), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "Indique ?fecha= con formato YYYY-MM-DD"}), 400
+    return jsonify(motorAgenda.disponibilidad(fecha)), 200
 
 
 @citasBlueprint.route("/<int:id>", methods=["GET"])
+@cacheRespuesta("citas", "mascotas", "duenos")
 def obtenerCita(id):
     """Obtiene una cita específica por su ID."""
-    cita = Cita.query.get(id)
-    if not cita:
+    filas = filasListado(LISTADO_CITAS, Cita.id == id)
+    if not filas:
         return jsonify({"error": "Cita no encontrada"}), 404
-    return jsonify(cita.toDict()), 200
+    return respuestaJson(codificarFila(LISTADO_CITAS.codificador(), filas[0])), 200
 
 
 @citasBlueprint.route("", methods=["POST"])
@@ -40,49 +78,35 @@ def crearCita():
         - Campos obligatorios: fecha, hora, motivo, mascotaId
         - La mascota debe existir
         - La fecha/hora debe ser futura (regla de negocio)
+        - Si queda Programada: dentro del horario, en una franja y sin
+          cruzarse con otra cita (409 con horarios alternativos)
     """
-    datos = request.get_json()
-
-    # Validar campos obligatorios
-    camposRequeridos = ["fecha", "hora", "motivo", "mascotaId"]
-    for campo in camposRequeridos:
-        if not datos.get(campo):
-            return jsonify({"error": f"El campo '{campo}' es obligatorio"}), 400
-
-    # Validar que el motivo no esté vacío
-    if not datos["motivo"].strip():
-        return jsonify({"error": "El motivo de la cita no puede estar vacío"}), 400
+    try:
+        valores = validarCita(request.get_json())
+    except ErrorValidacion as error:
+        return jsonify({"error": error.mensaje}), error.codigo
 
     # Validar que la mascota exista (integridad referencial)
-    mascota = Mascota.query.get(datos["mascotaId"])
+    mascota = Mascota.query.get(valores["mascotaId"])
     if not mascota:
         return jsonify({"error": "La mascota especificada no existe"}), 404
 
-    # Parsear fecha y hora
-    try:
-        fecha = datetime.strptime(datos["fecha"], "%Y-%m-%d").date()
-        hora = datetime.strptime(datos["hora"], "%H:%M").time()
-    except ValueError:
-        return jsonify({
-            "error": "Formato inválido. Fecha: YYYY-MM-DD, Hora: HH:MM"
-        }), 400
-
-    # Validar que la cita sea en el futuro (regla de negocio clave)
-    if not Cita.validarFechaFutura(fecha, hora):
-        return jsonify({
-            "error": "No se permite agendar citas en fechas u horas pasadas"
-        }), 400
-
-    nuevaCita = Cita(
-        fecha=fecha,
-        hora=hora,
-        motivo=datos["motivo"].strip(),
-        estado=datos.get("estado", "Programada"),
-        mascotaId=datos["mascotaId"]
-    )
+    if valores["estado"] == "Programada":
+        try:
+            motorAgenda.verificar(valores["fecha"], valores["hora"])
+        except ConflictoAgenda as conflicto:
+            return _respuestaConflicto(conflicto)
+        except ErrorValidacion as error:
+            return jsonify({"error": error.mensaje}), error.codigo
+
+    nuevaCita = Cita(**valores)
 
     db.session.add(nuevaCita)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": MENSAJE_FRANJA_TOMADA}), 409
 
     return jsonify({
         "mensaje": "Cita agendada exitosamente",
@@ -90,6 +114,37 @@ def crearCita():
     }), 201
 
 
+@citasBlueprint.route("/bulk", methods=["POST"])
+def importarCitas():
+    """
+    Importa citas en lote desde un arreglo JSON, NDJSON o CSV
+    (Content-Type o ?formato=). Aplica las mismas validaciones del POST y
+    responde el resumen con los errores por fila (ver services/importacion.py).
+    Con ?historico=1 acepta citas en fechas pasadas (migración de datos).
+    """
+    return responderImportacion(IMPORTACION_CITAS)
+
+
+@citasBlueprint.route("/estado", methods=["POST"])
+def cambiarEstadoCitas():
+    """
+    Cambia el estado de varias citas con un solo UPDATE (cerrar el día,
+    cancelar las citas de una mascota). Cuerpo: {"estado", "ids"} o un
+    filtro: "fecha" o "desde"/"hasta", "mascotaId", "estadoActual".
+    Las citas que no admiten la transición se omiten (ver services/estadosCitas.py).
+    """
+    try:
+        valores = validarTransicionCitas(request.get_json())
+    except ErrorValidacion as error:
+        return jsonify({"error": error.mensaje}), error.codigo
+
+    resumen = transicionarCitas(valores)
+    return jsonify({
+        "mensaje": f"{resumen['actualizadas']} citas pasaron a '{valores['estado']}'",
+        **resumen
+    }), 200
+
+
 @citasBlueprint.route("/<int:id>", methods=["PUT"])
 def actualizarCita(id):
     """Actualiza una cita existente (reagendar o cambiar estado)."""
@@ -98,6 +153,7 @@ def actualizarCita(id):
         return jsonify({"error": "Cita no encontrada"}), 404
 
     datos = request.get_json()
+    nuevaFecha, nuevaHora, nuevoEstado = cita.fecha, cita.hora, cita.estado
 
     # Si se cambia la fecha/hora, validar que sea futura
     if "fecha" in datos or "hora" in datos:
@@ -120,8 +176,22 @@ def actualizarCita(id):
                 "error": "No se permite reagendar citas a fechas u horas pasadas"
             }), 400
 
-        cita.fecha = nuevaFecha
-        cita.hora = nuevaHora
+    if "estado" in datos:
+        if datos["estado"] not in ESTADOS_CITA:
+            return jsonify({
+                "error": f"Estado inválido. Opciones: {', '.join(ESTADOS_CITA)}"
+            }), 400
+        nuevoEstado = datos["estado"]
+
+    # Reagendar o reactivar una cita: verificar horario y choques (sin contarse a sí misma)
+    cambiaFranja = (nuevaFecha, nuevaHora, nuevoEstado) != (cita.fecha, cita.hora, cita.estado)
+    if nuevoEstado == "Programada" and cambiaFranja:
+        try:
+            motorAgenda.verificar(nuevaFecha, nuevaHora, excluirId=cita.id)
+        except ConflictoAgenda as conflicto:
+            return _respuestaConflicto(conflicto)
+        except ErrorValidacion as error:
+            return jsonify({"error": error.mensaje}), error.codigo
 
     # Validar mascota si se cambia
     if "mascotaId" in datos:
@@ -135,15 +205,16 @@ def actualizarCita(id):
         if not datos["motivo"].strip():
             return jsonify({"error": "El motivo no puede estar vacío"}), 400
         cita.motivo = datos["motivo"].strip()
-    if "estado" in datos:
-        estadosValidos = ["Programada", "Completada", "Cancelada"]
-        if datos["estado"] not in estadosValidos:
-            return jsonify({
-                "error": f"Estado inválido. Opciones: {', '.join(estadosValidos)}"
-            }), 400
-        cita.estado = datos["estado"]
 
-    db.session.commit()
+    cita.fecha = nuevaFecha
+    cita.hora = nuevaHora
+    cita.estado = nuevoEstado
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": MENSAJE_FRANJA_TOMADA}), 409
 
     return jsonify({
         "mensaje": "Cita actualizada exitosamente",
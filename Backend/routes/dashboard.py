@@ -0,0 +1,29 @@
+"""
+Rutas de la API para el Dashboard (pantalla de inicio).
+Endpoints:
+    GET    /api/dashboard      - Totales, especies, próximas citas y agenda del día
+"""
+from flask import Blueprint, request, jsonify
+from services.estadisticas import obtenerDashboard
+
+dashboardBlueprint = Blueprint("dashboard", __name__, url_prefix="/api/dashboard")
+
+# Cantidad de próximas citas por defecto y máxima
+LIMITE_POR_DEFECTO = 5
+LIMITE_MAXIMO = 50
+
+
+@dashboardBlueprint.route("", methods=["GET"])
+def resumenDashboard():
+    """
+    Retorna los agregados del dashboard en una sola consulta SQL (con caché).
+    Parámetro de consulta opcional: ?limit=N próximas citas (por defecto 5).
+    """
+    try:
+        limite = int(request.args.get("limit", LIMITE_POR_DEFECTO))
+    except ValueError:
+        return jsonify({"error": "El parámetro 'limit' debe ser un número entero"}), 400
+    if limite < 1:
+        return jsonify({"error": "El parámetro 'limit' debe ser mayor que cero"}), 400
+
+    return jsonify(obtenerDashboard(min(limite, LIMITE_MAXIMO))), 200
@@ -1,35 +1,48 @@
 """
 Rutas de la API para gestión de Dueños.
 Endpoints:
-    GET    /api/duenos          - Listar todos los dueños
+    GET    /api/duenos          - Listar dueños (?limit=&cursor=&fields=)
     GET    /api/duenos/<id>     - Obtener un dueño por ID
     POST   /api/duenos          - Registrar nuevo dueño
+    POST   /api/duenos/bulk     - Importación masiva (JSON, NDJSON o CSV)
     PUT    /api/duenos/<id>     - Actualizar dueño existente
-    DELETE /api/duenos/<id>     - Eliminar dueño
-    GET    /api/duenos/buscar   - Buscar dueño por documento
+    DELETE /api/duenos/<id>     - Eliminar dueño (202 si se borra en segundo plano)
+    GET    /api/duenos/buscar   - Buscar dueño por nombre o documento (?q=&limit=&cursor=)
 """
 from flask import Blueprint, request, jsonify
 from models import db
 from models.dueno import Dueno
+from services.consultas import LISTADO_DUENOS
+from services.paginacion import filasListado, responderBusqueda, responderListado
+from services.serializacion import codificarFila, respuestaJson
+from services.cache import cacheRespuesta
+from services.busqueda import motorBusqueda
+from services.importacion import IMPORTACION_DUENOS, responderImportacion
+from services.eliminacion import INCLUIR_OCULTOS, eliminarRegistro
+from services.validaciones import ErrorValidacion, validarDueno
 
 # Blueprint agrupa las rutas bajo el prefijo /api/duenos
 duenosBlueprint = Blueprint("duenos", __name__, url_prefix="/api/duenos")
 
 
 @duenosBlueprint.route("", methods=["GET"])
+@cacheRespuesta("duenos", "mascotas")
 def listarDuenos():
-    """Obtiene la lista completa de dueños registrados."""
-    duenos = Dueno.query.order_by(Dueno.nombre).all()
-    return jsonify([dueno.toDict() for dueno in duenos]), 200
+    """
+    Obtiene la lista de dueños registrados ordenada por nombre.
+    Admite ?limit=, ?cursor= y ?fields= (ver services/paginacion.py).
+    """
+    return responderListado(LISTADO_DUENOS)
 
 
 @duenosBlueprint.route("/<int:id>", methods=["GET"])
+@cacheRespuesta("duenos", "mascotas")
 def obtenerDueno(id):
     """Obtiene un dueño específico por su ID."""
-    dueno = Dueno.query.get(id)
-    if not dueno:
+    filas = filasListado(LISTADO_DUENOS, Dueno.id == id)
+    if not filas:
         return jsonify({"error": "Dueño no encontrado"}), 404
-    return jsonify(dueno.toDict()), 200
+    return respuestaJson(codificarFila(LISTADO_DUENOS.codificador(), filas[0])), 200
 
 
 @duenosBlueprint.route("", methods=["POST"])
@@ -40,28 +53,20 @@ def crearDueno():
         - Campos obligatorios: nombre, apellido, documento, telefono
         - Documento único (no duplicado)
     """
-    datos = request.get_json()
-
-    # Validar campos obligatorios (no permitir registros vacíos)
-    camposRequeridos = ["nombre", "apellido", "documento", "telefono"]
-    for campo in camposRequeridos:
-        if not datos.get(campo, "").strip():
-            return jsonify({"error": f"El campo '{campo}' es obligatorio"}), 400
-
-    # Validar que el documento no esté duplicado
-    duenoExistente = Dueno.query.filter_by(documento=datos["documento"].strip()).first()
+    try:
+        valores = validarDueno(request.get_json())
+    except ErrorValidacion as error:
+        return jsonify({"error": error.mensaje}), error.codigo
+
+    # Validar que el documento no esté duplicado (también entre los dueños en eliminación)
+    duenoExistente = Dueno.query.execution_options(**INCLUIR_OCULTOS).filter_by(
+        documento=valores["documento"]
+    ).first()
     if duenoExistente:
         return jsonify({"error": "Ya existe un dueño con ese documento"}), 409
 
     # Crear el nuevo registro
-    nuevoDueno = Dueno(
-        nombre=datos["nombre"].strip(),
-        apellido=datos["apellido"].strip(),
-        documento=datos["documento"].strip(),
-        telefono=datos["telefono"].strip(),
-        correo=datos.get("correo", "").strip() or None,
-        direccion=datos.get("direccion", "").strip() or None
-    )
+    nuevoDueno = Dueno(**valores)
 
     db.session.add(nuevoDueno)
     db.session.commit()
@@ -72,6 +77,16 @@ def crearDueno():
     }), 201
 
 
+@duenosBlueprint.route("/bulk", methods=["POST"])
+def importarDuenos():
+    """
+    Importa dueños en lote desde un arreglo JSON, NDJSON o CSV
+    (Content-Type o ?formato=). Aplica las mismas validaciones del POST y
+    responde el resumen con los errores por fila (ver services/importacion.py).
+    """
+    return responderImportacion(IMPORTACION_DUENOS)
+
+
 @duenosBlueprint.route("/<int:id>", methods=["PUT"])
 def actualizarDueno(id):
     """
@@ -92,7 +107,9 @@ def actualizarDueno(id):
 
     # Validar documento único si se está cambiando
     if "documento" in datos and datos["documento"] != dueno.documento:
-        existente = Dueno.query.filter_by(documento=datos["documento"].strip()).first()
+        existente = Dueno.query.execution_options(**INCLUIR_OCULTOS).filter_by(
+            documento=datos["documento"].strip()
+        ).first()
         if existente:
             return jsonify({"error": "Ya existe un dueño con ese documento"}), 409
 
@@ -123,14 +140,18 @@ def eliminarDueno(id):
     """
     Elimina un dueño y todas sus mascotas/citas asociadas (CASCADE).
     Ejemplo de integridad referencial en la defensa.
+    Con un historial muy grande responde 202: el dueño deja de verse ya y se
+    borra en segundo plano (ver services/eliminacion.py).
     """
     dueno = Dueno.query.get(id)
     if not dueno:
         return jsonify({"error": "Dueño no encontrado"}), 404
 
     nombreCompleto = f"{dueno.nombre} {dueno.apellido}"
-    db.session.delete(dueno)
-    db.session.commit()
+    if eliminarRegistro(dueno):
+        return jsonify({
+            "mensaje": f"Dueño '{nombreCompleto}' en eliminación junto con sus mascotas y citas"
+        }), 202
 
     return jsonify({
         "mensaje": f"Dueño '{nombreCompleto}' eliminado junto con sus mascotas y citas"
@@ -138,22 +159,14 @@ def eliminarDueno(id):
 
 
 @duenosBlueprint.route("/buscar", methods=["GET"])
+@cacheRespuesta("duenos", "mascotas")
 def buscarDueno():
     """
     Busca dueños por nombre, apellido o documento.
     Parámetro de consulta: ?q=texto_busqueda
+    Los resultados se ordenan por relevancia; ignora tildes y mayúsculas,
+    acepta prefijos, parte del documento y pequeños errores de escritura
+    (ver services/busqueda.py). Con ?limit= y ?cursor= responde por páginas
+    con el total (ver services/paginacion.py).
     """
-    termino = request.args.get("q", "").strip()
-    if not termino:
-        return jsonify({"error": "Debe proporcionar un término de búsqueda"}), 400
-
-    # Buscar coincidencias parciales en nombre, apellido o documento
-    resultados = Dueno.query.filter(
-        db.or_(
-            Dueno.nombre.ilike(f"%{termino}%"),
-            Dueno.apellido.ilike(f"%{termino}%"),
-            Dueno.documento.ilike(f"%{termino}%")
-        )
-    ).all()
-
-    return jsonify([dueno.toDict() for dueno in resultados]), 200
+    return responderBusqueda(LISTADO_DUENOS, motorBusqueda.buscarDuenos)
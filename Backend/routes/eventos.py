@@ -0,0 +1,58 @@
+"""
+Rutas de la API para los eventos en vivo (Server-Sent Events).
+Valor agregado: recepción y consultorio ven las citas y registros nuevos en
+cuanto se guardan, sin recargar ni consultar la API cada pocos segundos.
+
+El flujo no lo sirve Flask (cada conexión abierta ocuparía un hilo del
+servidor) sino el hub de services/hubEventos.py en EVENTOS_PUERTO, que
+atiende cientos de conexiones inactivas desde un solo hilo. Esta ruta solo
+redirige al hub para que el Frontend use siempre /api/eventos.
+
+Fuera de localhost el puerto del hub no es accesible (proxy HTTPS, Azure
+App Service): el proxy publica el hub en una ruta propia y EVENTOS_URL
+indica esa URL (ver README, "Eventos en vivo"). Sin EVENTOS_URL solo se
+redirige a solicitudes hechas a localhost.
+
+Endpoints:
+    GET    /api/eventos     - Redirección (307) al flujo text/event-stream del hub
+                              (503 si están desactivados o falta EVENTOS_URL).
+                              Eventos 'cambios': mismo JSON que /api/cambios?since=
+                              con los cambios de una transacción
+"""
+from flask import Blueprint, current_app, jsonify, redirect, request
+
+eventosBlueprint = Blueprint("eventos", __name__, url_prefix="/api/eventos")
+
+# Hosts desde los que el puerto del hub es accesible directamente
+HOSTS_LOCALES = {"localhost", "127.0.0.1", "[::1]"}
+
+
+def _urlHub():
+    """
+    EVENTOS_URL, o el mismo host de la solicitud en EVENTOS_PUERTO si es
+    localhost. None si no hay una URL a la que redirigir.
+    """
+    configurada = current_app.config.get("EVENTOS_URL")
+    if configurada:
+        return configurada
+    host = request.host
+    if host.startswith("["):
+        host = host[:host.index("]") + 1]   # IPv6: [::1]:5000
+    else:
+        host = host.split(":", 1)[0]
+    if host not in HOSTS_LOCALES:
+        return None
+    return f"{request.scheme}://{host}:{current_app.config['EVENTOS_PUERTO']}/api/eventos"
+
+
+@eventosBlueprint.route("", methods=["GET"])
+def obtenerEventos():
+    """Redirige al hub de eventos; 503 si están desactivados (EVENTOS_PUERTO=0) o falta EVENTOS_URL."""
+    if not current_app.config.get("EVENTOS_PUERTO"):
+        return jsonify({"error": "Los eventos en vivo están desactivados"}), 503
+    url = _urlHub()
+    if url is None:
+        return jsonify({
+            "error": "Los eventos en vivo requieren EVENTOS_URL fuera de localhost"
+        }), 503
+    return redirect(url, code=307)
@@ -4,10 +4,13 @@ Valor agregado: permite registrar diagnósticos, tratamientos y seguimiento
 médico por cada mascota, complementando la gestión de citas.
 
 Endpoints:
-    GET    /api/historial                    - Listar todos los registros
+    GET    /api/historial                    - Listar registros (?limit=&cursor=&fields=)
     GET    /api/historial/<id>               - Obtener un registro por ID
     GET    /api/historial/mascota/<mascotaId> - Historial de una mascota específica
+    GET    /api/historial/mascota/<mascotaId>/linea-tiempo - Citas y registros paginados
+                                                  con el resumen clínico (?limit=&cursor=&fields=)
     POST   /api/historial                    - Crear nuevo registro clínico
+    POST   /api/historial/bulk               - Importación masiva (JSON, NDJSON o CSV)
     PUT    /api/historial/<id>               - Actualizar registro
     DELETE /api/historial/<id>               - Eliminar registro
 """
@@ -16,48 +19,84 @@ from flask import Blueprint, request, jsonify
 from models import db
 from models.historial import HistorialClinico
 from models.mascota import Mascota
+from services.consultas import LISTADO_HISTORIAL, LISTADO_MASCOTAS
+from services.paginacion import filasListado, paginarListado, responderListado
+from services.serializacion import (
+    Fragmento, codificarFila, codificarFilas, codificarObjeto, respuestaJson
+)
+from services.lineaTiempo import encabezadoMascota, listadoLineaTiempo, obtenerResumen
+from services.cache import cacheRespuesta
+from services.importacion import IMPORTACION_HISTORIAL, responderImportacion
+from services.validaciones import ErrorValidacion, validarRegistro
 
 historialBlueprint = Blueprint("historial", __name__, url_prefix="/api/historial")
 
 
 @historialBlueprint.route("", methods=["GET"])
+@cacheRespuesta("historial_clinico", "mascotas", "duenos")
 def listarHistorial():
-    """Obtiene todos los registros clínicos ordenados por fecha (más recientes primero)."""
-    registros = HistorialClinico.query.order_by(HistorialClinico.fecha.desc()).all()
-    return jsonify([registro.toDict() for registro in registros]), 200
+    """
+    Obtiene los registros clínicos ordenados por fecha (más recientes primero).
+    Admite ?limit=, ?cursor= y ?fields= (ver services/paginacion.py).
+    """
+    return responderListado(LISTADO_HISTORIAL)
 
 
 @historialBlueprint.route("/<int:id>", methods=["GET"])
+@cacheRespuesta("historial_clinico", "mascotas", "duenos")
 def obtenerRegistro(id):
     """Obtiene un registro clínico específico por su ID."""
-    registro = HistorialClinico.query.get(id)
-    if not registro:
+    filas = filasListado(LISTADO_HISTORIAL, HistorialClinico.id == id)
+    if not filas:
         return jsonify({"error": "Registro clínico no encontrado"}), 404
-    return jsonify(registro.toDict()), 200
+    return respuestaJson(codificarFila(LISTADO_HISTORIAL.codificador(), filas[0])), 200
 
 
 @historialBlueprint.route("/mascota/<int:mascotaId>", methods=["GET"])
+@cacheRespuesta("mascotas", "duenos", "citas", "historial_clinico")
 def historialPorMascota(mascotaId):
     """
     Obtiene el historial clínico completo de una mascota específica.
     Ordenado por fecha descendente (más reciente primero).
     Este endpoint es clave para la consulta veterinaria en tiempo real.
     """
-    mascota = Mascota.query.get(mascotaId)
+    mascota = filasListado(LISTADO_MASCOTAS, Mascota.id == mascotaId)
     if not mascota:
         return jsonify({"error": "Mascota no encontrada"}), 404
 
-    registros = HistorialClinico.query.filter_by(
-        mascotaId=mascotaId
-    ).order_by(
-        HistorialClinico.fecha.desc()
-    ).all()
+    # Orden del listado: fecha descendente (y el registro más nuevo primero en el mismo día)
+    registros = filasListado(LISTADO_HISTORIAL, HistorialClinico.mascotaId == mascotaId)
 
-    return jsonify({
-        "mascota": mascota.toDict(),
-        "historial": [registro.toDict() for registro in registros],
+    return respuestaJson(codificarObjeto({
+        "mascota": Fragmento(codificarFila(LISTADO_MASCOTAS.codificador(), mascota[0])),
+        "historial": Fragmento(codificarFilas(LISTADO_HISTORIAL.codificador(), registros)),
         "totalRegistros": len(registros)
-    }), 200
+    })), 200
+
+
+@historialBlueprint.route("/mascota/<int:mascotaId>/linea-tiempo", methods=["GET"])
+@cacheRespuesta("mascotas", "duenos", "citas", "historial_clinico", "resumen_mascota")
+def lineaTiempoMascota(mascotaId):
+    """
+    Línea de tiempo clínica: citas y registros de la mascota en un solo flujo,
+    del más reciente al más antiguo, siempre paginado (?limit=, ?cursor=,
+    ?fields=). Incluye el resumen precalculado (última visita, cantidad de
+    visitas, tendencia del peso y medicamentos activos) solo en la primera
+    página. Ver services/lineaTiempo.py.
+    """
+    mascota = encabezadoMascota(mascotaId)
+    if mascota is None:
+        return jsonify({"error": "Mascota no encontrada"}), 404
+
+    try:
+        eventos, siguiente = paginarListado(listadoLineaTiempo(mascotaId), paginado=True)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    respuesta = {"mascota": mascota, "eventos": eventos, "next": siguiente}
+    if "cursor" not in request.args:
+        respuesta["resumen"] = obtenerResumen(mascotaId)
+    return jsonify(respuesta), 200
 
 
 @historialBlueprint.route("", methods=["POST"])
@@ -69,45 +108,17 @@ def crearRegistro():
         - La mascota debe existir
         - La fecha no puede ser futura (es un evento que ya ocurrió)
     """
-    datos = request.get_json()
-
-    # Validar campos obligatorios
-    camposRequeridos = ["diagnostico", "tratamiento", "veterinario", "mascotaId"]
-    for campo in camposRequeridos:
-        if not datos.get(campo):
-            return jsonify({"error": f"El campo '{campo}' es obligatorio"}), 400
-
-    # Validar textos no vacíos
-    if not datos["diagnostico"].strip():
-        return jsonify({"error": "El diagnóstico no puede estar vacío"}), 400
-    if not datos["tratamiento"].strip():
-        return jsonify({"error": "El tratamiento no puede estar vacío"}), 400
+    try:
+        valores = validarRegistro(request.get_json())
+    except ErrorValidacion as error:
+        return jsonify({"error": error.mensaje}), error.codigo
 
     # Validar que la mascota exista (integridad referencial)
-    mascota = Mascota.query.get(datos["mascotaId"])
+    mascota = Mascota.query.get(valores["mascotaId"])
     if not mascota:
         return jsonify({"error": "La mascota especificada no existe"}), 404
 
-    # Parsear fecha (por defecto es hoy)
-    fecha = None
-    if datos.get("fecha"):
-        try:
-            fecha = datetime.strptime(datos["fecha"], "%Y-%m-%d").date()
-        except ValueError:
-            return jsonify({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}), 400
-    else:
-        fecha = datetime.now().date()
-
-    nuevoRegistro = HistorialClinico(
-        fecha=fecha,
-        diagnostico=datos["diagnostico"].strip(),
-        tratamiento=datos["tratamiento"].strip(),
-        medicamentos=datos.get("medicamentos", "").strip() or None,
-        veterinario=datos["veterinario"].strip(),
-        observaciones=datos.get("observaciones", "").strip() or None,
-        pesoEnConsulta=datos.get("pesoEnConsulta"),
-        mascotaId=datos["mascotaId"]
-    )
+    nuevoRegistro = HistorialClinico(**valores)
 
     db.session.add(nuevoRegistro)
     db.session.commit()
@@ -118,6 +129,16 @@ def crearRegistro():
     }), 201
 
 
+@historialBlueprint.route("/bulk", methods=["POST"])
+def importarHistorial():
+    """
+    Importa registros clínicos en lote desde un arreglo JSON, NDJSON o CSV
+    (Content-Type o ?formato=). Aplica las mismas validaciones del POST y
+    responde el resumen con los errores por fila (ver services/importacion.py).
+    """
+    return responderImportacion(IMPORTACION_HISTORIAL)
+
+
 @historialBlueprint.route("/<int:id>", methods=["PUT"])
 def actualizarRegistro(id):
     """Actualiza un registro clínico existente."""
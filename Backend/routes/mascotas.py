@@ -1,36 +1,49 @@
 """
 Rutas de la API para gestión de Mascotas (Pacientes).
 Endpoints:
-    GET    /api/mascotas          - Listar todas las mascotas
+    GET    /api/mascotas          - Listar mascotas (?limit=&cursor=&fields=)
     GET    /api/mascotas/<id>     - Obtener una mascota por ID
     POST   /api/mascotas          - Registrar nueva mascota
+    POST   /api/mascotas/bulk     - Importación masiva (JSON, NDJSON o CSV)
     PUT    /api/mascotas/<id>     - Actualizar mascota existente
-    DELETE /api/mascotas/<id>     - Eliminar mascota
-    GET    /api/mascotas/buscar   - Buscar mascota por nombre o documento del dueño
+    DELETE /api/mascotas/<id>     - Eliminar mascota (202 si se borra en segundo plano)
+    GET    /api/mascotas/buscar   - Buscar mascota por nombre o documento del dueño (?q=&limit=&cursor=)
 """
 from datetime import date, datetime
 from flask import Blueprint, request, jsonify
 from models import db
 from models.mascota import Mascota
 from models.dueno import Dueno
+from services.consultas import LISTADO_MASCOTAS
+from services.paginacion import filasListado, responderBusqueda, responderListado
+from services.serializacion import codificarFila, respuestaJson
+from services.cache import cacheRespuesta
+from services.busqueda import motorBusqueda
+from services.importacion import IMPORTACION_MASCOTAS, responderImportacion
+from services.eliminacion import eliminarRegistro
+from services.validaciones import ErrorValidacion, validarMascota
 
 mascotasBlueprint = Blueprint("mascotas", __name__, url_prefix="/api/mascotas")
 
 
 @mascotasBlueprint.route("", methods=["GET"])
+@cacheRespuesta("mascotas", "duenos", "citas", "historial_clinico")
 def listarMascotas():
-    """Obtiene la lista completa de mascotas con datos del dueño."""
-    mascotas = Mascota.query.order_by(Mascota.nombre).all()
-    return jsonify([mascota.toDict() for mascota in mascotas]), 200
+    """
+    Obtiene la lista de mascotas con datos del dueño, ordenada por nombre.
+    Admite ?limit=, ?cursor= y ?fields= (ver services/paginacion.py).
+    """
+    return responderListado(LISTADO_MASCOTAS)
 
 
 @mascotasBlueprint.route("/<int:id>", methods=["GET"])
+@cacheRespuesta("mascotas", "duenos", "citas", "historial_clinico")
 def obtenerMascota(id):
     """Obtiene una mascota específica por su ID."""
-    mascota = Mascota.query.get(id)
-    if not mascota:
+    filas = filasListado(LISTADO_MASCOTAS, Mascota.id == id)
+    if not filas:
         return jsonify({"error": "Mascota no encontrada"}), 404
-    return jsonify(mascota.toDict()), 200
+    return respuestaJson(codificarFila(LISTADO_MASCOTAS.codificador(), filas[0])), 200
 
 
 @mascotasBlueprint.route("", methods=["POST"])
@@ -42,38 +55,17 @@ def crearMascota():
         - El dueño debe existir en la base de datos
         - La fecha de nacimiento no puede ser futura
     """
-    datos = request.get_json()
-
-    # Validar campos obligatorios
-    camposRequeridos = ["nombre", "especie", "raza", "fechaNacimiento", "duenoId"]
-    for campo in camposRequeridos:
-        if not datos.get(campo):
-            return jsonify({"error": f"El campo '{campo}' es obligatorio"}), 400
+    try:
+        valores = validarMascota(request.get_json())
+    except ErrorValidacion as error:
+        return jsonify({"error": error.mensaje}), error.codigo
 
     # Validar que el dueño exista (integridad referencial)
-    dueno = Dueno.query.get(datos["duenoId"])
+    dueno = Dueno.query.get(valores["duenoId"])
     if not dueno:
         return jsonify({"error": "El dueño especificado no existe"}), 404
 
-    # Parsear y validar fecha de nacimiento
-    try:
-        fechaNacimiento = datetime.strptime(datos["fechaNacimiento"], "%Y-%m-%d").date()
-    except ValueError:
-        return jsonify({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}), 400
-
-    # La fecha de nacimiento no puede ser futura
-    if fechaNacimiento > date.today():
-        return jsonify({"error": "La fecha de nacimiento no puede ser una fecha futura"}), 400
-
-    nuevaMascota = Mascota(
-        nombre=datos["nombre"].strip(),
-        especie=datos["especie"].strip(),
-        raza=datos["raza"].strip(),
-        fechaNacimiento=fechaNacimiento,
-        peso=datos.get("peso"),
-        observaciones=datos.get("observaciones", "").strip() or None,
-        duenoId=datos["duenoId"]
-    )
+    nuevaMascota = Mascota(**valores)
 
     db.session.add(nuevaMascota)
     db.session.commit()
@@ -84,6 +76,16 @@ def crearMascota():
     }), 201
 
 
+@mascotasBlueprint.route("/bulk", methods=["POST"])
+def importarMascotas():
+    """
+    Importa mascotas en lote desde un arreglo JSON, NDJSON o CSV
+    (Content-Type o ?formato=). Aplica las mismas validaciones del POST y
+    responde el resumen con los errores por fila (ver services/importacion.py).
+    """
+    return responderImportacion(IMPORTACION_MASCOTAS)
+
+
 @mascotasBlueprint.route("/<int:id>", methods=["PUT"])
 def actualizarMascota(id):
     """Actualiza la información de una mascota existente."""
@@ -136,14 +138,19 @@ def actualizarMascota(id):
 
 @mascotasBlueprint.route("/<int:id>", methods=["DELETE"])
 def eliminarMascota(id):
-    """Elimina una mascota y todas sus citas asociadas (CASCADE)."""
+    """
+    Elimina una mascota y todas sus citas asociadas (CASCADE).
+    Con un historial muy grande responde 202 y se borra en segundo plano.
+    """
     mascota = Mascota.query.get(id)
     if not mascota:
         return jsonify({"error": "Mascota no encontrada"}), 404
 
     nombreMascota = mascota.nombre
-    db.session.delete(mascota)
-    db.session.commit()
+    if eliminarRegistro(mascota):
+        return jsonify({
+            "mensaje": f"Mascota '{nombreMascota}' en eliminación junto con sus citas"
+        }), 202
 
     return jsonify({
         "mensaje": f"Mascota '{nombreMascota}' eliminada junto con sus citas"
@@ -151,24 +158,15 @@ def eliminarMascota(id):
 
 
 @mascotasBlueprint.route("/buscar", methods=["GET"])
+@cacheRespuesta("mascotas", "duenos", "citas", "historial_clinico")
 def buscarMascotas():
     """
     Busca mascotas por nombre o por documento del dueño.
     Parámetro de consulta: ?q=texto_busqueda
     Este endpoint cumple con el requerimiento del buscador solicitado.
+    Resultados por relevancia, sin distinguir tildes/mayúsculas y tolerantes
+    a errores de escritura (ver services/busqueda.py). Con ?limit= y ?cursor=
+    responde por páginas con el total (ver services/paginacion.py).
     """
-    termino = request.args.get("q", "").strip()
-    if not termino:
-        return jsonify({"error": "Debe proporcionar un término de búsqueda"}), 400
-
-    # Buscar por nombre de mascota O por documento/nombre del dueño
-    resultados = Mascota.query.join(Dueno).filter(
-        db.or_(
-            Mascota.nombre.ilike(f"%{termino}%"),
-            Dueno.documento.ilike(f"%{termino}%"),
-            Dueno.nombre.ilike(f"%{termino}%"),
-            Dueno.apellido.ilike(f"%{termino}%")
-        )
-    ).all()
-
-    return jsonify([mascota.toDict() for mascota in resultados]), 200
+    # Buscar por nombre de mascota y/o documento/nombre del dueño (índice en memoria)
+    return responderBusqueda(LISTADO_MASCOTAS, motorBusqueda.buscarMascotas)
@@ -2,10 +2,21 @@
 Script de datos semilla (seed) para la base de datos.
 Inserta registros de prueba para demostración y testing.
 
+Sin parámetros carga el conjunto de demostración (4 dueños, 6 mascotas).
+Con --duenos genera un volumen sintético similar al de producción:
+distribución realista de especies, estados de cita e historial clínico,
+determinista según --semilla e insertado con INSERT masivos (core).
+
 Ejecución:
     python seed.py
+    python seed.py --duenos 100000 --mascotas-por-dueno 2.3 --anios 5
 """
-from datetime import date, time, timedelta
+import argparse
+import math
+import random
+import time as reloj
+import unicodedata
+from datetime import date, datetime, time, timedelta
 from app import crearApp
 from models import db
 from models.dueno import Dueno
@@ -234,5 +245,289 @@ def poblarBaseDeDatos():
         print(f"    Historial:  {HistorialClinico.query.count()}\n")
 
 
+# =============================================
+# GENERADOR SINTÉTICO (volumen de producción)
+# =============================================
+NOMBRES = [
+    "Carlos", "María", "Andrés", "Laura", "José", "Lucía", "Sebastián", "Valentina",
+    "Juan", "Camila", "Óscar", "Daniela", "Julián", "Sofía", "Tomás", "Mónica",
+    "Santiago", "Isabella", "Felipe", "Mariana", "Alejandro", "Paula", "David", "Natalia"
+]
+APELLIDOS = [
+    "Ramírez", "González", "López", "Martínez", "Pérez", "Gómez", "Díaz", "Muñoz",
+    "Rodríguez", "Hernández", "Cárdenas", "Restrepo", "Peñalosa", "Álvarez", "Quintero",
+    "Ospina", "Betancur", "Zapata", "Arango", "Vélez", "Castaño", "Giraldo", "Montoya"
+]
+CIUDADES = ["Medellín", "Envigado", "Itagüí", "Bello", "Sabaneta", "La Estrella", "Rionegro"]
+NOMBRES_MASCOTA = [
+    "Firulais", "Michi", "Rocky", "Luna", "Max", "Coco", "Toby", "Lola", "Simón", "Canela",
+    "Bruno", "Nala", "Zeus", "Kira", "Thor", "Mía", "Manchas", "Pelusa", "Chispa", "Oreo",
+    "Tango", "Frida", "Milo", "Greta", "Bobby", "Princesa", "Pancho", "Sasha", "Copito", "Lupe"
+]
+
+# (especie, proporción, razas, (peso adulto mín, máx) en kg, esperanza de vida en años)
+ESPECIES = [
+    ("Perro", 0.55, ["Criollo", "Labrador Retriever", "Golden Retriever", "Bulldog Francés",
+                     "Poodle", "Pastor Alemán", "Beagle", "Schnauzer", "Shih Tzu", "Pinscher"],
+     (3.0, 40.0), 15),
+    ("Gato", 0.33, ["Criollo", "Siamés", "Persa", "Angora", "Bengalí", "Maine Coon"],
+     (2.5, 7.5), 18),
+    ("Ave", 0.05, ["Cocatiel", "Periquito", "Canario", "Loro"], (0.02, 0.5), 12),
+    ("Conejo", 0.04, ["Mini Lop", "Cabeza de León", "Criollo"], (1.0, 3.0), 10),
+    ("Hámster", 0.02, ["Sirio", "Ruso"], (0.03, 0.2), 3),
+    ("Tortuga", 0.01, ["Morrocoy", "Tortuga de agua"], (0.2, 5.0), 40),
+]
+PROPORCION_ESPECIES = [especie[1] for especie in ESPECIES]
+
+MOTIVOS = [
+    "Vacunación anual", "Control general", "Desparasitación", "Consulta por vómito",
+    "Control de peso", "Revisión dermatológica", "Limpieza dental", "Chequeo geriátrico",
+    "Cirugía programada", "Control postoperatorio"
+]
+# (diagnóstico, tratamiento, medicamentos)
+DIAGNOSTICOS = [
+    ("Paciente sano - control de rutina", "Sin tratamiento. Próximo control en 12 meses.", None),
+    ("Refuerzo de vacunación", "Aplicación de vacuna. Siguiente refuerzo en 12 meses.", "Vacuna polivalente"),
+    ("Parasitosis intestinal", "Desparasitación oral y repetir en 15 días.", "Praziquantel, Pirantel"),
+    ("Gastroenteritis leve", "Dieta blanda por 5 días e hidratación.", "Metoclopramida, Probióticos"),
+    ("Dermatitis alérgica", "Baño medicado cada 3 días por 2 semanas.", "Prednisolona, Shampoo clorhexidina"),
+    ("Otitis externa", "Limpieza de oídos y gotas óticas por 10 días.", "Gotas óticas con antibiótico"),
+    ("Sobrepeso", "Plan nutricional y aumento de actividad física.", None),
+    ("Enfermedad periodontal grado I", "Profilaxis dental bajo sedación.", "Clindamicina"),
+    ("Artrosis leve", "Suplemento articular y control en 3 meses.", "Glucosamina, Omega 3"),
+    ("Herida superficial", "Limpieza, sutura y control en 7 días.", "Cefalexina, Meloxicam"),
+]
+VETERINARIOS = [
+    "Dra. Valentina Restrepo", "Dr. Esteban Cárdenas", "Dra. Camila Ospina", "Dr. Julián Betancur"
+]
+
+# Visitas promedio por mascota y año, y horario de agenda (franjas de 30 minutos)
+VISITAS_POR_ANIO = 1.6
+FRANJAS_AGENDA = [time(h, m) for h in range(8, 18) for m in (0, 30)]
+# Días hacia el futuro con citas programadas
+DIAS_AGENDA_FUTURA = 45
+
+
+def _poisson(aleatorio, media):
+    """Muestra de una distribución de Poisson (algoritmo de Knuth, medias pequeñas)."""
+    limite = math.exp(-media)
+    cantidad, producto = 0, aleatorio.random()
+    while producto > limite:
+        cantidad += 1
+        producto *= aleatorio.random()
+    return cantidad
+
+
+def _sinTildes(texto):
+    """'Martínez' -> 'martinez' (para correos)."""
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii").lower()
+
+
+def _insertarConIds(modelo, filas):
+    """
+    INSERT masivo que retorna los ids generados en el orden de las filas.
+    Se usa la tabla (core) y no el modelo: el INSERT masivo del ORM agrupa y
+    procesa fila por fila y es varias veces más lento.
+    Si el motor no admite RETURNING en executemany (MySQL) se asignan ids explícitos.
+    """
+    if not filas:
+        return []
+    tabla = modelo.__table__
+    dialecto = db.session.get_bind().dialect
+    if dialecto.insert_executemany_returning_sort_by_parameter_order:
+        consulta = db.insert(tabla).returning(tabla.c.id, sort_by_parameter_order=True)
+        return list(db.session.execute(consulta, filas).scalars())
+
+    siguiente = (db.session.execute(db.select(db.func.max(tabla.c.id))).scalar() or 0) + 1
+    ids = list(range(siguiente, siguiente + len(filas)))
+    for idFila, fila in zip(ids, filas):
+        fila["id"] = idFila
+    db.session.execute(db.insert(tabla), filas)
+    return ids
+
+
+def _generarDuenos(aleatorio, inicio, cantidad):
+    """Filas de dueños; el documento es único por posición."""
+    filas = []
+    for posicion in range(inicio, inicio + cantidad):
+        nombre = aleatorio.choice(NOMBRES)
+        apellido = f"{aleatorio.choice(APELLIDOS)} {aleatorio.choice(APELLIDOS)}"
+        filas.append({
+            "nombre": nombre,
+            "apellido": apellido,
+            "documento": str(1000000000 + posicion),
+            "telefono": f"3{aleatorio.randint(0, 999999999):09d}",
+            "correo": (
+                f"{_sinTildes(nombre)}.{_sinTildes(apellido.split()[0])}{posicion}@email.com"
+                if aleatorio.random() < 0.8 else None
+            ),
+            "direccion": (
+                f"Cra {aleatorio.randint(1, 99)} # {aleatorio.randint(1, 99)}-"
+                f"{aleatorio.randint(1, 99)}, {aleatorio.choice(CIUDADES)}"
+            ) if aleatorio.random() < 0.7 else None
+        })
+    return filas
+
+
+def _generarMascota(aleatorio, duenoId, hoy):
+    """Una mascota con especie, raza, edad y peso adulto según su especie."""
+    especie, _, razas, (pesoMinimo, pesoMaximo), vida = aleatorio.choices(
+        ESPECIES, weights=PROPORCION_ESPECIES
+    )[0]
+    # Edades sesgadas hacia animales jóvenes, acotadas por la esperanza de vida
+    edadDias = int(min(vida, max(0.15, aleatorio.expovariate(1 / (vida / 3.5)))) * 365)
+    return {
+        "nombre": aleatorio.choice(NOMBRES_MASCOTA),
+        "especie": especie,
+        "raza": aleatorio.choice(razas),
+        "fechaNacimiento": hoy - timedelta(days=edadDias),
+        "peso": round(aleatorio.uniform(pesoMinimo, pesoMaximo), 2),
+        "observaciones": None,
+        "duenoId": duenoId
+    }
+
+
+def _pesoALaFecha(mascota, fecha, aleatorio):
+    """Peso en una consulta: crece el primer año y luego varía ±5% alrededor del adulto."""
+    edadAnios = (fecha - mascota["fechaNacimiento"]).days / 365
+    crecimiento = min(1.0, 0.3 + 0.7 * edadAnios)
+    return round(mascota["peso"] * crecimiento * aleatorio.uniform(0.95, 1.05), 2)
+
+
+def _generarEventos(aleatorio, mascota, mascotaId, inicioVentana, hoy, ahora, agendaOcupada):
+    """
+    Citas de una mascota en la ventana y un registro clínico por cada cita completada.
+    Una cita futura cuya franja ya está en 'agendaOcupada' queda Cancelada
+    (una sola cita Programada por franja, como exige services/agenda.py).
+    """
+    desde = max(inicioVentana, mascota["fechaNacimiento"] + timedelta(days=30))
+    hasta = hoy + timedelta(days=DIAS_AGENDA_FUTURA)
+    diasVentana = (hasta - desde).days
+    if diasVentana <= 0:
+        return [], []
+
+    citas, registros = [], []
+    for _ in range(_poisson(aleatorio, VISITAS_POR_ANIO * diasVentana / 365)):
+        fecha = desde + timedelta(days=aleatorio.randrange(diasVentana))
+        hora = aleatorio.choice(FRANJAS_AGENDA)
+        if datetime.combine(fecha, hora) > ahora:
+            estado = "Programada" if aleatorio.random() < 0.92 else "Cancelada"
+            if estado == "Programada" and (fecha, hora) in agendaOcupada:
+                estado = "Cancelada"
+            if estado == "Programada":
+                agendaOcupada.add((fecha, hora))
+        else:
+            estado = "Completada" if aleatorio.random() < 0.82 else "Cancelada"
+        motivo = aleatorio.choice(MOTIVOS)
+        citas.append({
+            "fecha": fecha, "hora": hora, "motivo": motivo,
+            "estado": estado, "mascotaId": mascotaId
+        })
+
+        if estado == "Completada" and aleatorio.random() < 0.9:
+            diagnostico, tratamiento, medicamentos = aleatorio.choice(DIAGNOSTICOS)
+            registros.append({
+                "fecha": fecha,
+                "diagnostico": diagnostico,
+                "tratamiento": tratamiento,
+                "medicamentos": medicamentos,
+                "veterinario": aleatorio.choice(VETERINARIOS),
+                "observaciones": f"Motivo de consulta: {motivo}.",
+                "pesoEnConsulta": _pesoALaFecha(mascota, fecha, aleatorio),
+                "mascotaId": mascotaId
+            })
+    return citas, registros
+
+
+def generarDatosSinteticos(cantidadDuenos, mascotasPorDueno=2.3, anios=5, semilla=42,
+                           tamanoLote=2000):
+    """
+    Genera e inserta datos sintéticos por lotes de dueños (memoria acotada).
+    Con la misma semilla produce los mismos datos (fechas relativas a hoy).
+    Debe llamarse dentro de un app_context. Retorna el conteo por tabla.
+    """
+    aleatorio = random.Random(semilla)
+    hoy = date.today()
+    ahora = datetime.now()
+    inicioVentana = hoy - timedelta(days=int(anios * 365))
+    conteo = {"duenos": 0, "mascotas": 0, "citas": 0, "historial": 0}
+    agendaOcupada = set()
+
+    for inicio in range(0, cantidadDuenos, tamanoLote):
+        cantidad = min(tamanoLote, cantidadDuenos - inicio)
+        idsDuenos = _insertarConIds(Dueno, _generarDuenos(aleatorio, inicio + 1, cantidad))
+
+        # Al menos una mascota por dueño; el resto sigue una Poisson
+        mascotas = []
+        for duenoId in idsDuenos:
+            adicionales = _poisson(aleatorio, max(0.0, mascotasPorDueno - 1))
+            mascotas.extend(
+                _generarMascota(aleatorio, duenoId, hoy) for _ in range(1 + adicionales)
+            )
+        # _insertarConIds puede agregar 'id' a las filas: se genera con copias
+        idsMascotas = _insertarConIds(Mascota, [dict(mascota) for mascota in mascotas])
+
+        citas, registros = [], []
+        for mascota, mascotaId in zip(mascotas, idsMascotas):
+            citasMascota, registrosMascota = _generarEventos(
+                aleatorio, mascota, mascotaId, inicioVentana, hoy, ahora, agendaOcupada
+            )
+            citas.extend(citasMascota)
+            registros.extend(registrosMascota)
+        if citas:
+            db.session.execute(db.insert(Cita.__table__), citas)
+        if registros:
+            db.session.execute(db.insert(HistorialClinico.__table__), registros)
+        db.session.commit()
+
+        conteo["duenos"] += len(idsDuenos)
+        conteo["mascotas"] += len(idsMascotas)
+        conteo["citas"] += len(citas)
+        conteo["historial"] += len(registros)
+        print(f"    {conteo['duenos']}/{cantidadDuenos} dueños...", end="\r", flush=True)
+
+    return conteo
+
+
+def poblarVolumen(cantidadDuenos, mascotasPorDueno, anios, semilla, tamanoLote):
+    """Limpia las tablas y carga el volumen sintético en la BD que elija crearApp."""
+    app = crearApp()
+
+    with app.app_context():
+        for modelo in (HistorialClinico, Cita, Mascota, Dueno):
+            db.session.execute(db.delete(modelo))
+        db.session.commit()
+
+        inicio = reloj.perf_counter()
+        conteo = generarDatosSinteticos(
+            cantidadDuenos, mascotasPorDueno, anios, semilla, tamanoLote
+        )
+        segundos = reloj.perf_counter() - inicio
+
+        total = sum(conteo.values())
+        print(f"\n  Datos sintéticos insertados en {segundos:.1f} s "
+              f"({total / segundos:,.0f} filas/s):")
+        print(f"    Dueños:     {conteo['duenos']}")
+        print(f"    Mascotas:   {conteo['mascotas']}")
+        print(f"    Citas:      {conteo['citas']}")
+        print(f"    Historial:  {conteo['historial']}\n")
+
+
 if __name__ == "__main__":
-    poblarBaseDeDatos()
+    parser = argparse.ArgumentParser(description="Datos semilla de Huellitas")
+    parser.add_argument("--duenos", "--owners", type=int,
+                        help="Genera N dueños sintéticos (sin este parámetro: datos de demostración)")
+    parser.add_argument("--mascotas-por-dueno", "--pets-per-owner", type=float, default=2.3,
+                        dest="mascotasPorDueno", help="Promedio de mascotas por dueño")
+    parser.add_argument("--anios", "--years", type=float, default=5,
+                        help="Años de historia de citas e historial clínico")
+    parser.add_argument("--semilla", "--seed", type=int, default=42,
+                        help="Semilla aleatoria (misma semilla, mismos datos)")
+    parser.add_argument("--lote", type=int, default=2000, help="Dueños por transacción")
+    argumentos = parser.parse_args()
+
+    if argumentos.duenos:
+        poblarVolumen(argumentos.duenos, argumentos.mascotasPorDueno, argumentos.anios,
+                      argumentos.semilla, argumentos.lote)
+    else:
+        poblarBaseDeDatos()
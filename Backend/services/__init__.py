@@ -0,0 +1,5 @@
+"""
+Módulo de servicios de la aplicación.
+Agrupa la lógica reutilizable por los Blueprints (consultas, utilidades)
+para mantener las rutas enfocadas en validar y responder.
+"""
@@ -0,0 +1,487 @@
+"""
+Motor de agenda: horario de la clínica, disponibilidad y choques de citas.
+
+Antes solo se validaba que la cita fuera futura: nada impedía dar la misma
+franja a dos mascotas ni agendar a las 3 de la mañana.
+
+Reglas (para citas en estado Programada):
+    - Solo en los días de atención y dentro del horario de la clínica
+      (AGENDA_HORA_APERTURA a AGENDA_HORA_CIERRE)
+    - La hora debe coincidir con el inicio de una franja de
+      AGENDA_DURACION_MINUTOS contada desde la apertura
+    - No puede solaparse con otra cita Programada del mismo día. Se compara
+      por intervalos (no solo por hora exacta) para que las citas antiguas
+      fuera de franja o un cambio de duración también se detecten.
+    La capacidad es de una cita por franja: las citas no tienen veterinario
+    ni consultorio asignado, así que la franja es el recurso que se reserva.
+
+Estructuras:
+    - Índice en memoria: por fecha, una lista ordenada de (minuto de inicio,
+      id de cita) con las citas Programadas de hoy en adelante. Un choque se
+      detecta con dos bisect, O(log n), sin consultar la BD.
+    - Un choque encontrado en memoria se confirma contra la BD (consulta por
+      id, muy barata) para no rechazar una cita por un dato desactualizado.
+    - Índice único parcial en la BD (ux_citas_agenda, models/cita.py): si dos
+      workers reservan la misma franja al mismo tiempo, el segundo COMMIT
+      falla y la API responde 409.
+
+Actualización del índice (mismo esquema que services/busqueda.py):
+    Los cambios hechos con el ORM se aplican al confirmar el commit, las
+    sentencias masivas marcan el índice para reconstruirse, las reservas de
+    otros procesos del servidor llegan por services/sincronizacion.py y
+    además se reconstruye cada AGENDA_RECONSTRUIR_SEGUNDOS.
+"""
+import bisect
+import threading
+import time
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.dueno import Dueno
+from models.mascota import Mascota
+from models.cita import Cita
+from services.validaciones import ErrorValidacion
+from services.eliminacion import esOculto, esPurga
+from services.enrutador import leerDelPrimario, suscribirCambioDeBd
+from services.sincronizacion import suscribirCambiosExternos
+
+# Días de la semana (lunes = 0) para los mensajes
+NOMBRES_DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábados", "domingos"]
+
+# Horarios libres que se sugieren cuando la franja pedida está ocupada
+MAX_ALTERNATIVAS = 5
+
+# Clave en session.info para los cambios pendientes de la transacción
+_CLAVE_PENDIENTES = "cambiosAgenda"
+
+# Tablas cuyas sentencias masivas pueden cambiar las citas (CASCADE incluido)
+_TABLAS_AGENDA = (Cita.__tablename__, Mascota.__tablename__, Dueno.__tablename__)
+
+# Opción de ejecución de las sentencias masivas que informan ellas mismas qué
+# citas dejan la agenda (liberarFranjas): no obligan a reconstruir el índice
+FRANJAS_ANOTADAS = {"franjasAnotadas": True}
+
+
+def minutosDelDia(hora):
+    """time(9, 30) -> 570."""
+    return hora.hour * 60 + hora.minute
+
+
+def formatoHora(minutos):
+    """570 -> '09:30'."""
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+class ConflictoAgenda(ErrorValidacion):
+    """La franja pedida ya está reservada. Incluye horarios libres del mismo día."""
+
+    def __init__(self, mensaje, alternativas):
+        super().__init__(mensaje, 409)
+        self.alternativas = alternativas
+
+
+# =============================================
+# HORARIO DE LA CLÍNICA
+# =============================================
+class Horario:
+    """Horario de atención y duración de las franjas (ver config.py)."""
+
+    def __init__(self, apertura, cierre, duracion, dias):
+        self.apertura = apertura
+        self.cierre = cierre
+        self.duracion = duracion
+        self.dias = dias
+
+    @classmethod
+    def desdeConfig(cls, config):
+        """Lee AGENDA_* de la configuración de Flask."""
+        def leerHora(clave):
+            return minutosDelDia(datetime.strptime(config[clave], "%H:%M").time())
+
+        dias = frozenset(
+            int(dia) for dia in str(config["AGENDA_DIAS_ATENCION"]).split(",") if dia.strip()
+        )
+        return cls(
+            leerHora("AGENDA_HORA_APERTURA"),
+            leerHora("AGENDA_HORA_CIERRE"),
+            int(config["AGENDA_DURACION_MINUTOS"]),
+            dias
+        )
+
+    def franjas(self, fecha):
+        """Minuto de inicio de cada franja del día (vacío si la clínica no atiende)."""
+        if fecha.weekday() not in self.dias:
+            return []
+        return list(range(self.apertura, self.cierre - self.duracion + 1, self.duracion))
+
+    def validar(self, fecha, minuto):
+        """Lanza ErrorValidacion si la hora no es el inicio de una franja de ese día."""
+        if fecha.weekday() not in self.dias:
+            raise ErrorValidacion(f"La clínica no atiende los {NOMBRES_DIAS[fecha.weekday()]}")
+        if minuto < self.apertura or minuto + self.duracion > self.cierre:
+            raise ErrorValidacion(
+                f"La hora debe estar dentro del horario de atención "
+                f"({formatoHora(self.apertura)} a {formatoHora(self.cierre)})"
+            )
+        if (minuto - self.apertura) % self.duracion:
+            raise ErrorValidacion(
+                f"Las citas se agendan en franjas de {self.duracion} minutos "
+                f"desde las {formatoHora(self.apertura)}"
+            )
+
+
+# =============================================
+# ÍNDICE DE INTERVALOS
+# =============================================
+class IndiceAgenda:
+    """Citas Programadas por fecha: lista ordenada de (minuto de inicio, id)."""
+
+    def __init__(self):
+        self._bloqueo = threading.RLock()
+        self._porFecha = {}
+        self._citas = {}
+
+    @classmethod
+    def construir(cls, filas):
+        """Crea el índice desde (id, fecha, minuto) ordenando cada día una sola vez."""
+        indice = cls()
+        for citaId, fecha, minuto in filas:
+            indice._citas[citaId] = (fecha, minuto)
+            indice._porFecha.setdefault(fecha, []).append((minuto, citaId))
+        for lista in indice._porFecha.values():
+            lista.sort()
+        return indice
+
+    def reemplazarCon(self, otro):
+        """Toma las estructuras de otro índice (reconstrucción sin bloquear consultas)."""
+        with self._bloqueo:
+            self._porFecha = otro._porFecha
+            self._citas = otro._citas
+
+    def agregar(self, citaId, fecha, minuto):
+        """Inserta o mueve una cita."""
+        with self._bloqueo:
+            self.quitar(citaId)
+            self._citas[citaId] = (fecha, minuto)
+            bisect.insort(self._porFecha.setdefault(fecha, []), (minuto, citaId))
+
+    def quitar(self, citaId):
+        """Quita una cita del índice (si está)."""
+        with self._bloqueo:
+            ubicacion = self._citas.pop(citaId, None)
+            if ubicacion is None:
+                return
+            fecha, minuto = ubicacion
+            lista = self._porFecha[fecha]
+            del lista[bisect.bisect_left(lista, (minuto, citaId))]
+            if not lista:
+                del self._porFecha[fecha]
+
+    def solapadas(self, fecha, minuto, duracion, excluirId=None):
+        """
+        Ids de las citas que empiezan a menos de 'duracion' minutos de 'minuto'
+        (todas duran lo mismo, así que son exactamente las que se solapan).
+        """
+        with self._bloqueo:
+            lista = self._porFecha.get(fecha)
+            if not lista:
+                return []
+            desde = bisect.bisect_left(lista, (minuto - duracion + 1,))
+            hasta = bisect.bisect_left(lista, (minuto + duracion,))
+            return [citaId for _, citaId in lista[desde:hasta] if citaId != excluirId]
+
+    def __len__(self):
+        return len(self._citas)
+
+
+# =============================================
+# MOTOR DE AGENDA
+# =============================================
+class MotorAgenda:
+    """Mantiene el índice de citas Programadas y responde disponibilidad y choques."""
+
+    def __init__(self):
+        self.indice = IndiceAgenda()
+        self._bloqueo = threading.RLock()
+        self._construido = False
+        self._pendienteReconstruir = False
+        self._ultimaConstruccion = 0.0
+        self._reconstruyendo = False
+
+    # ----- Construcción completa -----
+    def reconstruir(self):
+        """Lee las citas Programadas de hoy en adelante (una consulta de columnas)."""
+        with leerDelPrimario():
+            filas = db.session.execute(
+                db.select(Cita.id, Cita.fecha, Cita.hora)
+                .where(Cita.estado == "Programada", Cita.fecha >= date.today())
+            ).all()
+        nuevo = IndiceAgenda.construir(
+            (fila.id, fila.fecha, minutosDelDia(fila.hora)) for fila in filas
+        )
+        with self._bloqueo:
+            self.indice.reemplazarCon(nuevo)
+            self._construido = True
+            self._pendienteReconstruir = False
+            self._ultimaConstruccion = time.monotonic()
+
+    def _reconstruirEnSegundoPlano(self, app):
+        """Reconstruye en un hilo aparte para no frenar la solicitud actual."""
+        with self._bloqueo:
+            if self._reconstruyendo:
+                return
+            self._reconstruyendo = True
+
+        def tarea():
+            try:
+                with app.app_context():
+                    self.reconstruir()
+            finally:
+                self._reconstruyendo = False
+
+        threading.Thread(target=tarea, name="reconstruirAgenda", daemon=True).start()
+
+    def _asegurarIndice(self):
+        """Construye el índice la primera vez y programa la reconstrucción periódica."""
+        if not self._construido or self._pendienteReconstruir:
+            self.reconstruir()
+            return
+        intervalo = current_app.config.get("AGENDA_RECONSTRUIR_SEGUNDOS", 60)
+        if time.monotonic() - self._ultimaConstruccion > intervalo:
+            self._reconstruirEnSegundoPlano(current_app._get_current_object())
+
+    def invalidar(self):
+        """Marca el índice para reconstruirlo en la próxima consulta."""
+        with self._bloqueo:
+            self._pendienteReconstruir = True
+
+    # ----- Cambios incrementales -----
+    def aplicarCambios(self, cambios):
+        """Aplica los cambios de un commit: {id: (fecha, minuto) o None}."""
+        with self._bloqueo:
+            if not self._construido:
+                return
+            if cambios.get("masivo"):
+                self._pendienteReconstruir = True
+                return
+            for citaId, ubicacion in cambios.get("citas", {}).items():
+                if ubicacion is None:
+                    self.indice.quitar(citaId)
+                else:
+                    self.indice.agregar(citaId, *ubicacion)
+
+    def _confirmarEnBaseDeDatos(self, ids, fecha, minuto, duracion):
+        """
+        Revisa en la BD las citas que el índice reporta en conflicto y corrige
+        las que ya no están Programadas o cambiaron de hora (cambios de otro proceso).
+        Retorna las que siguen en conflicto.
+        """
+        filas = db.session.execute(
+            db.select(Cita.id, Cita.fecha, Cita.hora, Cita.estado).where(Cita.id.in_(ids))
+        ).all()
+        actuales = {fila.id: fila for fila in filas}
+
+        confirmadas = []
+        for citaId in ids:
+            fila = actuales.get(citaId)
+            if fila is None or fila.estado != "Programada":
+                self.indice.quitar(citaId)
+                continue
+            inicio = minutosDelDia(fila.hora)
+            if fila.fecha == fecha and abs(inicio - minuto) < duracion:
+                confirmadas.append(citaId)
+            else:
+                self.indice.agregar(citaId, fila.fecha, inicio)
+        return confirmadas
+
+    # ----- Consultas públicas -----
+    def horario(self):
+        """Horario vigente según la configuración de la aplicación."""
+        return Horario.desdeConfig(current_app.config)
+
+    def franjasLibres(self, fecha, horario=None):
+        """Minutos de inicio de las franjas sin reservar del día que aún no pasaron."""
+        horario = horario or self.horario()
+        self._asegurarIndice()
+        ahora = datetime.now()
+        minutoActual = minutosDelDia(ahora.time()) if fecha == ahora.date() else -1
+        if fecha < ahora.date():
+            return []
+        return [
+            minuto for minuto in horario.franjas(fecha)
+            if minuto > minutoActual
+            and not self.indice.solapadas(fecha, minuto, horario.duracion)
+        ]
+
+    def disponibilidad(self, fecha):
+        """Franjas del día con su estado, para GET /api/citas/disponibilidad."""
+        horario = self.horario()
+        libres = set(self.franjasLibres(fecha, horario))
+        franjas = [
+            {"hora": formatoHora(minuto), "disponible": minuto in libres}
+            for minuto in horario.franjas(fecha)
+        ]
+        return {
+            "fecha": fecha.isoformat(),
+            "atiende": fecha.weekday() in horario.dias,
+            "apertura": formatoHora(horario.apertura),
+            "cierre": formatoHora(horario.cierre),
+            "duracionMinutos": horario.duracion,
+            "franjas": franjas,
+            "disponibles": [franja["hora"] for franja in franjas if franja["disponible"]]
+        }
+
+    def verificar(self, fecha, hora, excluirId=None):
+        """
+        Valida una cita Programada nueva o reagendada.
+        Lanza ErrorValidacion (400) si está fuera del horario o de las franjas,
+        o ConflictoAgenda (409) si la franja ya está reservada.
+        """
+        horario = self.horario()
+        minuto = minutosDelDia(hora)
+        horario.validar(fecha, minuto)
+
+        self._asegurarIndice()
+        enConflicto = self.indice.solapadas(fecha, minuto, horario.duracion, excluirId)
+        if enConflicto and self._confirmarEnBaseDeDatos(enConflicto, fecha, minuto, horario.duracion):
+            alternativas = [
+                formatoHora(libre) for libre in self.franjasLibres(fecha, horario)
+            ][:MAX_ALTERNATIVAS]
+            raise ConflictoAgenda(
+                f"Ya hay una cita programada el {fecha.isoformat()} a las {formatoHora(minuto)}",
+                alternativas
+            )
+
+
+motorAgenda = MotorAgenda()
+
+# Al pasar entre primaria y respaldo el índice es de la otra BD
+suscribirCambioDeBd(motorAgenda.invalidar)
+
+
+@suscribirCambiosExternos
+def _aplicarCambiosExternos(cambios):
+    """Commits de otros procesos: las citas Programadas ocupan su franja."""
+    if cambios["masivo"]:
+        motorAgenda.invalidar()
+        return
+    citas = {
+        fila.id: (fila.fecha, minutosDelDia(fila.hora)) if fila.estado == "Programada" else None
+        for fila in cambios["filas"][Cita.__tablename__]
+    }
+    citas.update(dict.fromkeys(cambios["eliminados"].get(Cita.__tablename__, ())))
+    if citas:
+        motorAgenda.aplicarCambios({"citas": citas})
+
+
+# =============================================
+# IMPORTACIÓN MASIVA (services/importacion.py)
+# =============================================
+def verificarAgendaLote(validas, errores, historico=False):
+    """
+    Aplica las reglas de agenda a un lote de citas ya validadas.
+    Las reservas existentes se leen con UNA consulta por lote (las fechas del
+    lote) y las filas aceptadas se suman a un índice temporal, así también se
+    detectan choques entre filas de la misma importación.
+    Con historico solo se rechazan dos citas Programadas en la misma fecha y
+    hora exactas (lo que el índice único de la BD no admitiría).
+    """
+    programadas = [
+        (numeroFila, valores) for numeroFila, valores in validas
+        if valores["estado"] == "Programada"
+    ]
+    if not programadas:
+        return validas
+
+    horario = Horario.desdeConfig(current_app.config)
+    duracion = 1 if historico else horario.duracion
+    fechas = {valores["fecha"] for _, valores in programadas}
+    existentes = db.session.execute(
+        db.select(Cita.fecha, Cita.hora)
+        .where(Cita.estado == "Programada", Cita.fecha.in_(fechas))
+    ).all()
+    indice = IndiceAgenda.construir(
+        (-posicion, fila.fecha, minutosDelDia(fila.hora))
+        for posicion, fila in enumerate(existentes, start=1)
+    )
+
+    aceptadas = []
+    for numeroFila, valores in validas:
+        if valores["estado"] != "Programada":
+            aceptadas.append((numeroFila, valores))
+            continue
+        minuto = minutosDelDia(valores["hora"])
+        try:
+            if not historico:
+                horario.validar(valores["fecha"], minuto)
+            enConflicto = indice.solapadas(valores["fecha"], minuto, duracion)
+            if enConflicto:
+                otra = max(enConflicto)
+                origen = f"la fila {otra}" if otra > 0 else "una cita existente"
+                raise ErrorValidacion(f"El horario se cruza con {origen}")
+        except ErrorValidacion as error:
+            errores.append((numeroFila, error.mensaje))
+            continue
+        indice.agregar(numeroFila, valores["fecha"], minuto)
+        aceptadas.append((numeroFila, valores))
+    return aceptadas
+
+
+# =============================================
+# EVENTOS DE SESIÓN (mantienen el índice al día)
+# =============================================
+def _pendientes(sesion):
+    return sesion.info.setdefault(_CLAVE_PENDIENTES, {"citas": {}})
+
+
+def liberarFranjas(sesion, citaIds):
+    """Citas que una sentencia con FRANJAS_ANOTADAS sacó del estado Programada."""
+    pendientes = _pendientes(sesion)["citas"]
+    for citaId in citaIds:
+        pendientes[citaId] = None
+
+
+@event.listens_for(Session, "after_flush")
+def _capturarCambios(sesion, contextoFlush):
+    """Guarda fecha y minuto de cada cita Programada modificada (None si ya no ocupa franja)."""
+    for objeto in list(sesion.new) + list(sesion.dirty):
+        if isinstance(objeto, Cita):
+            _pendientes(sesion)["citas"][objeto.id] = (
+                (objeto.fecha, minutosDelDia(objeto.hora))
+                if objeto.estado == "Programada" else None
+            )
+    for objeto in sesion.deleted:
+        if isinstance(objeto, Cita):
+            _pendientes(sesion)["citas"][objeto.id] = None
+    # Dueño o mascota borrado (la BD elimina sus citas en cascada) u ocultado
+    if any(isinstance(objeto, (Dueno, Mascota)) for objeto in sesion.deleted) or any(
+        esOculto(objeto) for objeto in sesion.dirty
+    ):
+        _pendientes(sesion)["masivo"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _capturarSentenciaMasiva(estado):
+    """INSERT/UPDATE/DELETE directos sobre citas (o en CASCADE): reconstruir el índice."""
+    # La purga no toca citas Programadas (se liberan al ocultar); las
+    # sentencias con FRANJAS_ANOTADAS informan sus citas con liberarFranjas
+    if esPurga(estado) or estado.execution_options.get("franjasAnotadas", False):
+        return
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabla = getattr(estado.statement, "table", None)
+        if tabla is not None and tabla.name in _TABLAS_AGENDA:
+            _pendientes(estado.session)["masivo"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicarCambios(sesion):
+    cambios = sesion.info.pop(_CLAVE_PENDIENTES, None)
+    if cambios:
+        motorAgenda.aplicarCambios(cambios)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartarCambios(sesion):
+    sesion.info.pop(_CLAVE_PENDIENTES, None)
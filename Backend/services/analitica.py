@@ -0,0 +1,437 @@
+"""
+Analítica de peso: curvas por mascota y percentiles por cohorte.
+
+HistorialClinico.pesoEnConsulta y Mascota.peso se guardaban pero no se
+analizaban. Este módulo calcula:
+    - Por mascota (tabla analitica_peso, models/analitica.py): extremos de la
+      serie, ritmo de cambio en kg/mes (pendiente de mínimos cuadrados) y el
+      mayor cambio porcentual entre dos consultas seguidas. Si supera
+      UMBRAL_CAMBIO_BRUSCO la mascota queda marcada.
+    - Por cohorte (especie, opcionalmente raza, y grupo de edad según
+      edadAnios): percentiles del peso actual y ritmo de cambio mediano. Se
+      calculan al leer, porque la edad avanza sin que nada se escriba. Una
+      mascota es atípica en su cohorte si su z robusto (con la mediana y la
+      MAD) supera UMBRAL_ATIPICO.
+
+Cálculo vectorizado:
+    Cada cálculo trae las columnas que necesita con UNA consulta y las
+    convierte en arreglos de numpy. Las series de todas las mascotas del lote
+    se procesan juntas: los grupos son tramos contiguos de los arreglos
+    ordenados (np.add.reduceat, np.lexsort), sin un ciclo de Python por
+    mascota ni objetos ORM por registro.
+
+Actualización:
+    analitica_peso es una tabla derivada del historial (services/derivados.py):
+    se recalcula para las mascotas cuyo historial cambió, en la misma
+    transacción. Las respuestas de la API se guardan en la caché de
+    respuestas hasta que cambien las mascotas o la analítica.
+"""
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+from models import db
+from models.analitica import AnaliticaPeso
+from models.historial import HistorialClinico
+from models.mascota import Mascota, calcularEdades
+from services.derivados import lotesDeMascotas, registrarDerivado
+
+# Cambio entre dos consultas seguidas (en %) que se considera brusco
+UMBRAL_CAMBIO_BRUSCO = 10
+
+# |z robusto| a partir del cual el peso es atípico en su cohorte (Iglewicz y Hoaglin)
+UMBRAL_ATIPICO = 3.5
+
+# Mascotas mínimas en una cohorte para calcular atípicos
+MINIMO_COHORTE = 5
+
+# Grupos de edad: límites en años (edadAnios) y sus etiquetas
+LIMITES_EDAD = [1, 3, 7, 10]
+GRUPOS_EDAD = ["0-1", "1-3", "3-7", "7-10", "10+"]
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+DIAS_POR_MES = 30
+
+
+# =============================================
+# OPERACIONES POR GRUPO (tramos contiguos)
+# =============================================
+def _tramos(claves):
+    """Inicio y tamaño de cada tramo de claves iguales en un arreglo ordenado."""
+    inicio = np.flatnonzero(np.r_[True, claves[1:] != claves[:-1]])
+    return inicio, np.diff(np.r_[inicio, len(claves)])
+
+
+def _cuantiles(grupo, valores, cantidadGrupos, cuantiles):
+    """
+    Cuantiles (interpolación lineal, como np.quantile) de 'valores' dentro de
+    cada grupo (0..cantidadGrupos-1). Retorna (matriz grupos x cuantiles, rango
+    de cada valor dentro de su grupo, tamaño de cada grupo).
+    """
+    orden = np.lexsort((valores, grupo))
+    ordenados = valores[orden]
+    tamanos = np.bincount(grupo, minlength=cantidadGrupos)
+    inicio = np.r_[0, np.cumsum(tamanos)[:-1]]
+
+    resultado = np.empty((cantidadGrupos, len(cuantiles)))
+    for columna, cuantil in enumerate(cuantiles):
+        posicion = inicio + cuantil * np.maximum(tamanos - 1, 0)
+        abajo = np.floor(posicion).astype(np.int64)
+        arriba = np.ceil(posicion).astype(np.int64)
+        fraccion = posicion - abajo
+        valido = tamanos > 0
+        columnaResultado = np.full(cantidadGrupos, np.nan)
+        columnaResultado[valido] = (
+            ordenados[abajo[valido]]
+            + (ordenados[arriba[valido]] - ordenados[abajo[valido]]) * fraccion[valido]
+        )
+        resultado[:, columna] = columnaResultado
+
+    rango = np.empty(len(valores), dtype=np.int64)
+    rango[orden] = np.arange(len(valores)) - np.repeat(inicio, tamanos)
+    return resultado, rango, tamanos
+
+
+def _opcional(valores, decimales=2):
+    """Arreglo de floats -> lista con None en lugar de NaN, redondeada."""
+    return [None if valor != valor else round(valor, decimales) for valor in valores.tolist()]
+
+
+def _escalar(valor, decimales=2):
+    """Un float de numpy -> float redondeado, o None si es NaN."""
+    return None if np.isnan(valor) else round(float(valor), decimales)
+
+
+# =============================================
+# ANÁLISIS POR MASCOTA (tabla analitica_peso)
+# =============================================
+@lru_cache(maxsize=None)
+def _consultasSerie(porLote):
+    """Serie de pesos ordenada por mascota y fecha, y borrado; construidas una sola vez."""
+    tabla = AnaliticaPeso.__table__
+    ids = db.bindparam("ids", expanding=True)
+    serie = (
+        db.select(HistorialClinico.mascotaId, HistorialClinico.fecha, HistorialClinico.pesoEnConsulta)
+        .where(HistorialClinico.pesoEnConsulta.isnot(None))
+        .order_by(HistorialClinico.mascotaId, HistorialClinico.fecha, HistorialClinico.id)
+    )
+    borrado = db.delete(tabla)
+    if porLote:
+        serie = serie.where(HistorialClinico.mascotaId.in_(ids))
+        borrado = borrado.where(tabla.c.mascotaId.in_(ids))
+    return serie, borrado
+
+
+def analizarSeries(mascotaIds, fechas, pesos):
+    """
+    Analiza las series de varias mascotas a la vez. Los arreglos van
+    ordenados por mascota y fecha. Retorna un dict de columnas (un elemento
+    por mascota) con las claves de la tabla analitica_peso.
+    """
+    inicio, cantidad = _tramos(mascotaIds)
+    fin = inicio + cantidad - 1
+    dias = fechas.astype(np.int64)
+
+    # Pendiente de mínimos cuadrados de cada serie (x = días desde su primer peso)
+    x = (dias - np.repeat(dias[inicio], cantidad)).astype(float)
+    sumaX = np.add.reduceat(x, inicio)
+    sumaY = np.add.reduceat(pesos, inicio)
+    sumaXX = np.add.reduceat(x * x, inicio)
+    sumaXY = np.add.reduceat(x * pesos, inicio)
+    denominador = cantidad * sumaXX - sumaX * sumaX
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pendiente = np.where(
+            denominador > 0, (cantidad * sumaXY - sumaX * sumaY) / denominador, np.nan
+        )
+
+        # Cambio porcentual respecto de la consulta anterior de la misma mascota
+        anterior = np.r_[np.nan, pesos[:-1]]
+        cambio = (pesos - anterior) / anterior * 100
+    cambio[inicio] = np.nan
+    cambio[~np.isfinite(cambio)] = np.nan
+
+    # Mayor |cambio| de cada serie: último de su tramo al ordenar por (mascota, |cambio|);
+    # lexsort es estable, así que a igual magnitud queda el más reciente
+    grupo = np.repeat(np.arange(len(inicio)), cantidad)
+    magnitud = np.nan_to_num(np.abs(cambio), nan=-1.0)
+    posicionMaxima = np.lexsort((magnitud, grupo))[fin]
+    cambioMaximo = cambio[posicionMaxima]
+
+    return {
+        "mascotaId": mascotaIds[inicio],
+        "cantidadPesos": cantidad,
+        "primeraFecha": fechas[inicio],
+        "ultimaFecha": fechas[fin],
+        "pesoInicial": pesos[inicio],
+        "pesoActual": pesos[fin],
+        "pesoMinimo": np.minimum.reduceat(pesos, inicio),
+        "pesoMaximo": np.maximum.reduceat(pesos, inicio),
+        "kgPorMes": pendiente * DIAS_POR_MES,
+        "cambioMaximo": cambioMaximo,
+        "fechaCambioMaximo": np.where(
+            np.isnan(cambioMaximo), np.datetime64("NaT"), fechas[posicionMaxima]
+        ),
+        "cambioBrusco": np.nan_to_num(np.abs(cambioMaximo)) >= UMBRAL_CAMBIO_BRUSCO
+    }
+
+
+def _filasAnalitica(columnas, ahora):
+    """Columnas de analizarSeries -> filas para el INSERT."""
+    fechas = {
+        clave: columnas[clave].astype(object).tolist()  # NaT -> None
+        for clave in ("primeraFecha", "ultimaFecha", "fechaCambioMaximo")
+    }
+    listas = {
+        "mascotaId": columnas["mascotaId"].tolist(),
+        "cantidadPesos": columnas["cantidadPesos"].tolist(),
+        "pesoInicial": columnas["pesoInicial"].tolist(),
+        "pesoActual": columnas["pesoActual"].tolist(),
+        "pesoMinimo": columnas["pesoMinimo"].tolist(),
+        "pesoMaximo": columnas["pesoMaximo"].tolist(),
+        "kgPorMes": _opcional(columnas["kgPorMes"], 3),
+        "cambioMaximo": _opcional(columnas["cambioMaximo"], 1),
+        "cambioBrusco": columnas["cambioBrusco"].tolist(),
+        **fechas
+    }
+    claves = list(listas)
+    return [
+        {**dict(zip(claves, valores)), "actualizado": ahora}
+        for valores in zip(*(listas[clave] for clave in claves))
+    ]
+
+
+def recalcularAnalitica(ejecutor, mascotaIds=None):
+    """
+    Reemplaza las filas de analitica_peso de las mascotas indicadas (None =
+    todas). 'ejecutor' es una sesión o una conexión; no confirma la
+    transacción. Retorna la cantidad de filas escritas.
+    """
+    consultaSerie, borrado = _consultasSerie(mascotaIds is not None)
+    ahora = datetime.now()
+    escritos = 0
+    for parametros in lotesDeMascotas(mascotaIds):
+        filas = ejecutor.execute(consultaSerie, parametros).all()
+        ejecutor.execute(borrado, parametros)
+        if not filas:
+            continue
+        ids, fechas, pesos = zip(*filas)
+        columnas = analizarSeries(
+            np.array(ids, dtype=np.int64),
+            np.array(fechas, dtype="datetime64[D]"),
+            np.array(pesos, dtype=float)
+        )
+        nuevas = _filasAnalitica(columnas, ahora)
+        ejecutor.execute(db.insert(AnaliticaPeso.__table__), nuevas)
+        escritos += len(nuevas)
+    return escritos
+
+
+registrarDerivado(AnaliticaPeso.__table__, recalcularAnalitica)
+
+
+def serieDePeso(mascotaId):
+    """Pesos registrados en consulta de una mascota, del más antiguo al más reciente."""
+    filas = db.session.execute(
+        db.select(HistorialClinico.fecha, HistorialClinico.pesoEnConsulta)
+        .where(
+            HistorialClinico.mascotaId == mascotaId,
+            HistorialClinico.pesoEnConsulta.isnot(None)
+        )
+        .order_by(HistorialClinico.fecha, HistorialClinico.id)
+    )
+    return [{"fecha": fecha.isoformat(), "peso": peso} for fecha, peso in filas]
+
+
+# =============================================
+# COHORTES (especie, raza y grupo de edad)
+# =============================================
+def _poblacion(especie=None, raza=None):
+    """
+    Columnas de las mascotas con peso (el último en consulta o, si no tiene,
+    el registrado en la ficha), en UNA consulta. Retorna un dict de arreglos.
+    """
+    analitica = AnaliticaPeso.__table__
+    consulta = (
+        db.select(
+            Mascota.id, Mascota.especie, Mascota.raza, Mascota.fechaNacimiento,
+            db.func.coalesce(analitica.c.pesoActual, Mascota.peso),
+            analitica.c.kgPorMes, analitica.c.cambioMaximo, analitica.c.fechaCambioMaximo,
+            analitica.c.cambioBrusco
+        )
+        .outerjoin(analitica, analitica.c.mascotaId == Mascota.id)
+        .where(db.func.coalesce(analitica.c.pesoActual, Mascota.peso).isnot(None))
+    )
+    if especie is not None:
+        consulta = consulta.where(Mascota.especie == especie)
+    if raza is not None:
+        consulta = consulta.where(Mascota.raza == raza)
+
+    filas = db.session.execute(consulta).all()
+    columnas = list(zip(*filas)) if filas else [()] * 9
+    # Mismos valores que Mascota.edadAnios
+    edades = np.array(calcularEdades(columnas[3])[1], dtype=float)
+    return {
+        "id": np.array(columnas[0], dtype=np.int64),
+        "especie": np.array(columnas[1], dtype=object),
+        "raza": np.array(columnas[2], dtype=object),
+        "edadAnios": edades,
+        "grupoEdad": np.digitize(edades, LIMITES_EDAD),
+        "peso": np.array(columnas[4], dtype=float),
+        # Sin fila de analítica: None pasa a NaN (float) y a False (bool)
+        "kgPorMes": np.array(columnas[5], dtype=float),
+        "cambioMaximo": np.array(columnas[6], dtype=float),
+        "fechaCambioMaximo": np.array(columnas[7], dtype=object),
+        "cambioBrusco": np.array(columnas[8], dtype=bool)
+    }
+
+
+def _agrupar(poblacion, porRaza):
+    """
+    Código de cohorte de cada mascota y las claves de cada cohorte.
+    Retorna (grupo por mascota, especies, razas o None, grupos de edad).
+    """
+    especies, codigoEspecie = np.unique(poblacion["especie"], return_inverse=True)
+    codigo = codigoEspecie * len(GRUPOS_EDAD) + poblacion["grupoEdad"]
+    razas = None
+    if porRaza:
+        razas, codigoRaza = np.unique(poblacion["raza"], return_inverse=True)
+        codigo = (codigoEspecie * len(razas) + codigoRaza) * len(GRUPOS_EDAD) + poblacion["grupoEdad"]
+
+    cohortes, grupo = np.unique(codigo, return_inverse=True)
+    edadCohorte = cohortes % len(GRUPOS_EDAD)
+    if porRaza:
+        resto = cohortes // len(GRUPOS_EDAD)
+        return grupo, especies[resto // len(razas)], razas[resto % len(razas)], edadCohorte
+    return grupo, especies[cohortes // len(GRUPOS_EDAD)], None, edadCohorte
+
+
+def _estadisticasCohortes(poblacion, porRaza):
+    """Percentiles, ritmo mediano y z robusto por cohorte, todos vectorizados."""
+    grupo, especies, razas, edades = _agrupar(poblacion, porRaza)
+    cantidadGrupos = len(especies)
+    pesos = poblacion["peso"]
+
+    percentiles, rango, tamanos = _cuantiles(
+        grupo, pesos, cantidadGrupos, [p / 100 for p in PERCENTILES]
+    )
+    mediana = percentiles[:, PERCENTILES.index(50)]
+
+    # z robusto: 0.6745 (x - mediana) / MAD
+    desviacion = np.abs(pesos - mediana[grupo])
+    mad = _cuantiles(grupo, desviacion, cantidadGrupos, [0.5])[0][:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(mad[grupo] > 0, 0.6745 * (pesos - mediana[grupo]) / mad[grupo], np.nan)
+        percentilMascota = np.where(tamanos[grupo] > 1, rango / (tamanos[grupo] - 1) * 100, np.nan)
+    atipico = (np.nan_to_num(np.abs(z)) > UMBRAL_ATIPICO) & (tamanos[grupo] >= MINIMO_COHORTE)
+
+    # Ritmo de cambio mediano de la cohorte (solo mascotas con pendiente)
+    conRitmo = ~np.isnan(poblacion["kgPorMes"])
+    ritmo = _cuantiles(
+        grupo[conRitmo], poblacion["kgPorMes"][conRitmo], cantidadGrupos, [0.5]
+    )[0][:, 0]
+
+    return {
+        "grupo": grupo, "especies": especies, "razas": razas, "edades": edades,
+        "tamanos": tamanos, "percentiles": percentiles, "ritmo": ritmo,
+        "bruscos": np.bincount(grupo, weights=poblacion["cambioBrusco"], minlength=cantidadGrupos),
+        "atipicos": np.bincount(grupo, weights=atipico, minlength=cantidadGrupos),
+        "z": z, "percentilMascota": percentilMascota, "atipico": atipico
+    }
+
+
+def _cohorteDict(estadisticas, indice):
+    cohorte = {
+        "especie": estadisticas["especies"][indice],
+        "grupoEdad": GRUPOS_EDAD[estadisticas["edades"][indice]],
+        "cantidad": int(estadisticas["tamanos"][indice]),
+        "percentiles": dict(zip(
+            (f"p{p}" for p in PERCENTILES), _opcional(estadisticas["percentiles"][indice])
+        )),
+        "kgPorMesMediana": _escalar(estadisticas["ritmo"][indice], 3),
+        "cambiosBruscos": int(estadisticas["bruscos"][indice]),
+        "atipicos": int(estadisticas["atipicos"][indice])
+    }
+    if estadisticas["razas"] is not None:
+        cohorte["raza"] = estadisticas["razas"][indice]
+    return cohorte
+
+
+def cohortes(porRaza=False, especie=None):
+    """Estadísticas de peso de cada cohorte, ordenadas por especie, raza y edad."""
+    poblacion = _poblacion(especie=especie)
+    if not len(poblacion["id"]):
+        return []
+    estadisticas = _estadisticasCohortes(poblacion, porRaza)
+    return [_cohorteDict(estadisticas, indice) for indice in range(len(estadisticas["especies"]))]
+
+
+def analisisMascota(mascota, porRaza=False):
+    """
+    Serie, análisis guardado y posición de la mascota en su cohorte.
+    'mascota' es una instancia de Mascota.
+    """
+    analisis = db.session.get(AnaliticaPeso, mascota.id)
+    resultado = {
+        "serie": serieDePeso(mascota.id),
+        "analisis": analisis.toDict() if analisis else None,
+        "cohorte": None
+    }
+    poblacion = _poblacion(especie=mascota.especie, raza=mascota.raza if porRaza else None)
+    posicion = np.flatnonzero(poblacion["id"] == mascota.id)
+    if not len(posicion):
+        return resultado
+
+    estadisticas = _estadisticasCohortes(poblacion, porRaza)
+    indice = posicion[0]
+    resultado["cohorte"] = {
+        **_cohorteDict(estadisticas, estadisticas["grupo"][indice]),
+        "pesoMascota": float(poblacion["peso"][indice]),
+        "percentilMascota": _escalar(estadisticas["percentilMascota"][indice], 1),
+        "zRobusto": _escalar(estadisticas["z"][indice]),
+        "atipico": bool(estadisticas["atipico"][indice])
+    }
+    return resultado
+
+
+def anomalias(porRaza=False, especie=None, limite=50):
+    """
+    Mascotas con un cambio brusco entre consultas o un peso atípico en su
+    cohorte, de la más llamativa a la menos.
+    """
+    poblacion = _poblacion(especie=especie)
+    if not len(poblacion["id"]):
+        return []
+    estadisticas = _estadisticasCohortes(poblacion, porRaza)
+    marcadas = np.flatnonzero(poblacion["cambioBrusco"] | estadisticas["atipico"])
+
+    # Orden: mayor |z| y, a igualdad, mayor |cambio|
+    magnitudZ = np.nan_to_num(np.abs(estadisticas["z"][marcadas]))
+    magnitudCambio = np.nan_to_num(np.abs(poblacion["cambioMaximo"][marcadas]))
+    marcadas = marcadas[np.lexsort((-magnitudCambio, -magnitudZ))][:limite]
+
+    nombres = dict(db.session.execute(
+        db.select(Mascota.id, Mascota.nombre).where(Mascota.id.in_(poblacion["id"][marcadas].tolist()))
+    ).all())
+    resultado = []
+    for indice in marcadas.tolist():
+        mascotaId = int(poblacion["id"][indice])
+        motivos = []
+        if poblacion["cambioBrusco"][indice]:
+            motivos.append("cambioBrusco")
+        if estadisticas["atipico"][indice]:
+            motivos.append("atipicoEnCohorte")
+        fechaCambio = poblacion["fechaCambioMaximo"][indice]
+        resultado.append({
+            "mascotaId": mascotaId,
+            "nombre": nombres.get(mascotaId),
+            "especie": poblacion["especie"][indice],
+            "raza": poblacion["raza"][indice],
+            "edadAnios": float(poblacion["edadAnios"][indice]),
+            "grupoEdad": GRUPOS_EDAD[poblacion["grupoEdad"][indice]],
+            "peso": float(poblacion["peso"][indice]),
+            "motivos": motivos,
+            "cambioMaximo": _escalar(poblacion["cambioMaximo"][indice], 1),
+            "fechaCambioMaximo": fechaCambio.isoformat() if fechaCambio else None,
+            "zRobusto": _escalar(estadisticas["z"][indice])
+        })
+    return resultado
@@ -0,0 +1,507 @@
+"""
+Motor de búsqueda en memoria para dueños y mascotas.
+
+Reemplaza las búsquedas con ilike('%texto%'), que no pueden usar índices y
+recorren la tabla completa en cada tecla que se escribe en recepción.
+
+Características:
+    - Insensible a mayúsculas y tildes ("martinez" encuentra "Martínez").
+    - Coincidencia exacta, por prefijo ("carl" -> "Carlos") y tolerante a
+      errores de escritura mediante trigramas ("martines" -> "Martínez").
+    - Los números (documentos) se buscan exactos, por prefijo o en cualquier
+      parte ("4567" -> 1234567, como el antiguo ilike('%texto%')), también
+      con los trigramas; no se les aplica la tolerancia a errores.
+    - Resultados ordenados por relevancia, con el total de coincidencias y
+      la posibilidad de continuar después de un resultado (paginación).
+    - Funciona igual con SQLite y con los motores en la nube, porque el
+      índice vive en el proceso y no depende de extensiones de la BD.
+
+Estructuras (por índice):
+    - token -> ids de documentos que lo contienen
+    - vocabulario ordenado (búsqueda por prefijo con bisect, O(log n))
+    - trigrama -> tokens del vocabulario (candidatos para errores de escritura)
+    Los trigramas se calculan sobre el vocabulario (nombres distintos), no
+    sobre cada documento, así el costo no crece con la cantidad de registros.
+
+Actualización:
+    Los cambios hechos con el ORM se aplican al índice al confirmar el commit.
+    Las cargas masivas (INSERT/UPDATE directos) marcan el índice para
+    reconstruirse. Los commits de otros procesos del servidor llegan por
+    services/sincronizacion.py, y además se reconstruye en segundo plano cada
+    cierto tiempo.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.dueno import Dueno
+from models.mascota import Mascota
+from services.eliminacion import esOculto, esPurga
+from services.enrutador import leerDelPrimario, suscribirCambioDeBd
+from services.sincronizacion import suscribirCambiosExternos
+
+# Puntajes por tipo de coincidencia de cada término
+PUNTAJE_EXACTO = 1.0
+PUNTAJE_PREFIJO = 0.9
+PUNTAJE_INFIJO = 0.85
+PUNTAJE_DIFUSO = 0.8
+
+# Similitud mínima (Dice sobre trigramas) para aceptar un error de escritura
+SIMILITUD_MINIMA = 0.5
+
+# Máximo de tokens del vocabulario que puede expandir un prefijo
+MAXIMO_EXPANSION_PREFIJO = 500
+
+# Clave en session.info para los cambios pendientes de la transacción
+_CLAVE_PENDIENTES = "cambiosBusqueda"
+
+# Marcas diacríticas combinables (tildes, diéresis, virgulilla de la ñ)
+_DIACRITICOS = re.compile("[\u0300-\u036f]")
+_PALABRAS = re.compile(r"[^\W_]+")
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y separado en palabras alfanuméricas."""
+    if not texto:
+        return []
+    texto = texto.lower()
+    if not texto.isascii():
+        texto = _DIACRITICOS.sub("", unicodedata.normalize("NFKD", texto))
+    return _PALABRAS.findall(texto)
+
+
+def _ordenRelevancia(par):
+    """(id, puntaje) -> clave de orden: puntaje descendente, id ascendente."""
+    return -par[1], par[0]
+
+
+def trigramas(token):
+    """Trigramas del token con bordes marcados ('$ana$' -> $an, ana, na$)."""
+    marcado = f"${token}$"
+    return {marcado[i:i + 3] for i in range(len(marcado) - 2)}
+
+
+class IndiceBusqueda:
+    """Índice invertido de tokens con búsqueda exacta, por prefijo y difusa."""
+
+    def __init__(self):
+        self._bloqueo = threading.RLock()
+        self._documentos = {}
+        self._tokenDocs = {}
+        self._vocabulario = []
+        self._trigramas = defaultdict(set)
+
+    # ----- Mantenimiento -----
+    def _indexarTrigramas(self, token):
+        for trigrama in trigramas(token):
+            self._trigramas[trigrama].add(token)
+
+    def _agregarToken(self, token, idDoc):
+        documentos = self._tokenDocs.get(token)
+        if documentos is None:
+            self._tokenDocs[token] = {idDoc}
+            bisect.insort(self._vocabulario, token)
+            self._indexarTrigramas(token)
+        else:
+            documentos.add(idDoc)
+
+    def _quitarToken(self, token, idDoc):
+        documentos = self._tokenDocs.get(token)
+        if documentos is None:
+            return
+        documentos.discard(idDoc)
+        if not documentos:
+            del self._tokenDocs[token]
+            posicion = bisect.bisect_left(self._vocabulario, token)
+            del self._vocabulario[posicion]
+            for trigrama in trigramas(token):
+                self._trigramas[trigrama].discard(token)
+
+    def actualizar(self, idDoc, tokens):
+        """Inserta o reemplaza los tokens de un documento."""
+        tokens = tuple(dict.fromkeys(tokens))
+        with self._bloqueo:
+            self.eliminar(idDoc)
+            self._documentos[idDoc] = tokens
+            for token in tokens:
+                self._agregarToken(token, idDoc)
+
+    def eliminar(self, idDoc):
+        """Quita un documento del índice (si existe)."""
+        with self._bloqueo:
+            for token in self._documentos.pop(idDoc, ()):
+                self._quitarToken(token, idDoc)
+
+    def reemplazarCon(self, otro):
+        """Toma las estructuras de otro índice (reconstrucción sin bloquear búsquedas)."""
+        with self._bloqueo:
+            self._documentos = otro._documentos
+            self._tokenDocs = otro._tokenDocs
+            self._vocabulario = otro._vocabulario
+            self._trigramas = otro._trigramas
+
+    @classmethod
+    def construir(cls, pares):
+        """Crea un índice desde (id, tokens) ordenando el vocabulario una sola vez."""
+        indice = cls()
+        for idDoc, tokens in pares:
+            tokens = tuple(dict.fromkeys(tokens))
+            indice._documentos[idDoc] = tokens
+            for token in tokens:
+                indice._tokenDocs.setdefault(token, set()).add(idDoc)
+        indice._vocabulario = sorted(indice._tokenDocs)
+        for token in indice._vocabulario:
+            indice._indexarTrigramas(token)
+        return indice
+
+    def __len__(self):
+        return len(self._documentos)
+
+    # ----- Consulta -----
+    def _coincidenciasTermino(self, termino):
+        """Tokens del vocabulario que coinciden con el término y su puntaje."""
+        coincidencias = {}
+        if termino in self._tokenDocs:
+            coincidencias[termino] = PUNTAJE_EXACTO
+
+        # Prefijo: rango contiguo del vocabulario ordenado
+        if len(termino) >= 2:
+            inicio = bisect.bisect_left(self._vocabulario, termino)
+            for token in self._vocabulario[inicio:inicio + MAXIMO_EXPANSION_PREFIJO]:
+                if not token.startswith(termino):
+                    break
+                coincidencias.setdefault(token, PUNTAJE_PREFIJO)
+
+        # Números (documentos): el término en cualquier parte del token. Los
+        # candidatos contienen todos sus trigramas internos (sin bordes)
+        if len(termino) >= 3 and termino.isdigit():
+            internos = [
+                self._trigramas.get(trigrama, set())
+                for trigrama in trigramas(termino) if "$" not in trigrama
+            ]
+            internos.sort(key=len)
+            for token in internos[0].intersection(*internos[1:]):
+                if termino in token:
+                    coincidencias.setdefault(token, PUNTAJE_INFIJO)
+
+        # Errores de escritura: tokens que comparten suficientes trigramas.
+        # No aplica a números (documentos): ahí solo sirve exacto, prefijo o infijo.
+        elif len(termino) >= 3:
+            propios = trigramas(termino)
+            compartidos = defaultdict(int)
+            for trigrama in propios:
+                for token in self._trigramas.get(trigrama, ()):
+                    compartidos[token] += 1
+            for token, cantidad in compartidos.items():
+                if token in coincidencias or token.isdigit():
+                    continue
+                # Un token de n letras tiene n trigramas (contando los bordes)
+                similitud = 2 * cantidad / (len(propios) + len(token))
+                if similitud >= SIMILITUD_MINIMA:
+                    coincidencias[token] = PUNTAJE_DIFUSO * similitud
+        return coincidencias
+
+    def _documentosDe(self, tokens):
+        """Unión de los documentos de varios tokens (operación de conjuntos en C)."""
+        return set().union(*(self._tokenDocs[token] for token in tokens))
+
+    def _mejoresPorNivel(self, coincidencias, limite, despues):
+        """
+        Un solo término: todos los documentos de un mismo nivel de puntaje
+        empatan, así que basta recorrer los niveles de mayor a menor y tomar
+        los ids más bajos de cada uno, sin puntuar documento por documento.
+        """
+        niveles = defaultdict(list)
+        for token, puntaje in coincidencias.items():
+            niveles[puntaje].append(token)
+
+        resultado = []
+        vistos = set()
+        for puntaje in sorted(niveles, reverse=True):
+            documentos = self._documentosDe(niveles[puntaje]) - vistos
+            vistos |= documentos
+            # Niveles ya entregados en páginas anteriores
+            if despues is not None and puntaje >= despues[0]:
+                if puntaje > despues[0]:
+                    continue
+                documentos = {idDoc for idDoc in documentos if idDoc > despues[1]}
+            faltantes = len(documentos) if limite is None else limite - len(resultado)
+            if faltantes > 0:
+                resultado.extend((idDoc, puntaje) for idDoc in heapq.nsmallest(faltantes, documentos))
+        # El total necesita todos los niveles: por eso no se corta al llenar el límite
+        return resultado, len(vistos)
+
+    def buscar(self, texto, limite=None, despues=None):
+        """
+        Busca los documentos que coinciden con TODOS los términos, ordenados
+        por puntaje descendente (empate: id ascendente).
+        'despues' = (puntaje, id) del último resultado ya entregado.
+        Retorna ([(id, puntaje)] hasta 'limite' (None: todos), total de coincidencias).
+        """
+        terminos = normalizar(texto)
+        if not terminos:
+            return [], 0
+
+        with self._bloqueo:
+            coincidencias = [self._coincidenciasTermino(termino) for termino in terminos]
+            if not all(coincidencias):
+                return [], 0
+            if len(coincidencias) == 1:
+                return self._mejoresPorNivel(coincidencias[0], limite, despues)
+
+            # Varios términos: primero se intersectan los candidatos (rápido, en C)
+            # y solo se puntúan los documentos que contienen todos los términos
+            candidatos = self._documentosDe(coincidencias[0])
+            for porTermino in coincidencias[1:]:
+                candidatos &= self._documentosDe(porTermino)
+                if not candidatos:
+                    return [], 0
+
+            puntajes = {}
+            for idDoc in candidatos:
+                tokensDoc = self._documentos[idDoc]
+                puntajes[idDoc] = sum(
+                    max(porTermino.get(token, 0) for token in tokensDoc)
+                    for porTermino in coincidencias
+                )
+
+        pares = puntajes.items()
+        if despues is not None:
+            pares = [(idDoc, puntaje) for idDoc, puntaje in pares
+                     if (-puntaje, idDoc) > (-despues[0], despues[1])]
+        if limite is None:
+            mejores = sorted(pares, key=_ordenRelevancia)
+        else:
+            mejores = heapq.nsmallest(limite, pares, key=_ordenRelevancia)
+        return mejores, len(puntajes)
+
+
+class MotorBusqueda:
+    """
+    Coordina los índices de dueños y mascotas.
+    Los documentos de una mascota incluyen los datos de su dueño, así que
+    "firulais ramirez" o el documento del dueño encuentran a la mascota.
+    """
+
+    def __init__(self):
+        self.duenos = IndiceBusqueda()
+        self.mascotas = IndiceBusqueda()
+        self._tokensDueno = {}
+        self._duenoDeMascota = {}
+        self._tokensNombreMascota = {}
+        self._mascotasDeDueno = defaultdict(set)
+        self._bloqueo = threading.RLock()
+        self._construido = False
+        self._pendienteReconstruir = False
+        self._ultimaConstruccion = 0.0
+        self._reconstruyendo = False
+
+    # ----- Construcción completa -----
+    def reconstruir(self):
+        """Lee dueños y mascotas (dos consultas de columnas) y reemplaza los índices."""
+        with leerDelPrimario():
+            filasDuenos = db.session.execute(
+                db.select(Dueno.id, Dueno.nombre, Dueno.apellido, Dueno.documento)
+            ).all()
+            filasMascotas = db.session.execute(
+                db.select(Mascota.id, Mascota.nombre, Mascota.duenoId)
+            ).all()
+
+        tokensDueno = {
+            fila.id: normalizar(f"{fila.nombre} {fila.apellido} {fila.documento}")
+            for fila in filasDuenos
+        }
+        tokensNombreMascota = {fila.id: normalizar(fila.nombre) for fila in filasMascotas}
+        duenoDeMascota = {fila.id: fila.duenoId for fila in filasMascotas}
+        mascotasDeDueno = defaultdict(set)
+        for idMascota, idDueno in duenoDeMascota.items():
+            mascotasDeDueno[idDueno].add(idMascota)
+
+        nuevoDuenos = IndiceBusqueda.construir(tokensDueno.items())
+        nuevoMascotas = IndiceBusqueda.construir(
+            (idMascota, tokens + tokensDueno.get(duenoDeMascota[idMascota], []))
+            for idMascota, tokens in tokensNombreMascota.items()
+        )
+
+        with self._bloqueo:
+            self.duenos.reemplazarCon(nuevoDuenos)
+            self.mascotas.reemplazarCon(nuevoMascotas)
+            self._tokensDueno = tokensDueno
+            self._tokensNombreMascota = tokensNombreMascota
+            self._duenoDeMascota = duenoDeMascota
+            self._mascotasDeDueno = mascotasDeDueno
+            self._construido = True
+            self._pendienteReconstruir = False
+            self._ultimaConstruccion = time.monotonic()
+
+    def _reconstruirEnSegundoPlano(self, app):
+        """Reconstruye en un hilo aparte para no frenar la búsqueda actual."""
+        with self._bloqueo:
+            if self._reconstruyendo:
+                return
+            self._reconstruyendo = True
+
+        def tarea():
+            try:
+                with app.app_context():
+                    self.reconstruir()
+            finally:
+                self._reconstruyendo = False
+
+        threading.Thread(target=tarea, name="reconstruirBusqueda", daemon=True).start()
+
+    def _asegurarIndice(self):
+        """Construye el índice la primera vez y programa la reconstrucción periódica."""
+        if not self._construido or self._pendienteReconstruir:
+            self.reconstruir()
+            return
+        intervalo = current_app.config.get("BUSQUEDA_RECONSTRUIR_SEGUNDOS", 300)
+        if time.monotonic() - self._ultimaConstruccion > intervalo:
+            self._reconstruirEnSegundoPlano(current_app._get_current_object())
+
+    def invalidar(self):
+        """Marca el índice para reconstruirlo en la próxima consulta."""
+        with self._bloqueo:
+            self._pendienteReconstruir = True
+
+    # ----- Cambios incrementales -----
+    def _indexarMascota(self, idMascota):
+        tokens = self._tokensNombreMascota[idMascota] + self._tokensDueno.get(
+            self._duenoDeMascota[idMascota], []
+        )
+        self.mascotas.actualizar(idMascota, tokens)
+
+    def _eliminarMascota(self, idMascota):
+        idDueno = self._duenoDeMascota.pop(idMascota, None)
+        self._tokensNombreMascota.pop(idMascota, None)
+        self._mascotasDeDueno[idDueno].discard(idMascota)
+        self.mascotas.eliminar(idMascota)
+
+    def aplicarCambios(self, cambios):
+        """Aplica los cambios de un commit: primero dueños y luego mascotas."""
+        with self._bloqueo:
+            if not self._construido:
+                return
+            if cambios.get("masivo"):
+                self._pendienteReconstruir = True
+                return
+
+            for idDueno, datos in cambios.get("duenos", {}).items():
+                if datos is None:
+                    self._tokensDueno.pop(idDueno, None)
+                    self.duenos.eliminar(idDueno)
+                    # El CASCADE de la BD elimina sus mascotas
+                    for idMascota in list(self._mascotasDeDueno.pop(idDueno, ())):
+                        self._eliminarMascota(idMascota)
+                    continue
+                self._tokensDueno[idDueno] = normalizar(" ".join(datos))
+                self.duenos.actualizar(idDueno, self._tokensDueno[idDueno])
+                for idMascota in self._mascotasDeDueno.get(idDueno, ()):
+                    self._indexarMascota(idMascota)
+
+            for idMascota, datos in cambios.get("mascotas", {}).items():
+                if datos is None:
+                    self._eliminarMascota(idMascota)
+                    continue
+                nombre, idDueno = datos
+                anterior = self._duenoDeMascota.get(idMascota)
+                if anterior is not None:
+                    self._mascotasDeDueno[anterior].discard(idMascota)
+                self._duenoDeMascota[idMascota] = idDueno
+                self._mascotasDeDueno[idDueno].add(idMascota)
+                self._tokensNombreMascota[idMascota] = normalizar(nombre)
+                self._indexarMascota(idMascota)
+
+    # ----- Consultas públicas -----
+    def buscarDuenos(self, texto, limite=None, despues=None):
+        """Dueños por relevancia: ([(id, puntaje)], total). Ver IndiceBusqueda.buscar."""
+        self._asegurarIndice()
+        return self.duenos.buscar(texto, limite, despues)
+
+    def buscarMascotas(self, texto, limite=None, despues=None):
+        """Mascotas por relevancia: ([(id, puntaje)], total). Ver IndiceBusqueda.buscar."""
+        self._asegurarIndice()
+        return self.mascotas.buscar(texto, limite, despues)
+
+
+motorBusqueda = MotorBusqueda()
+
+# Al pasar entre primaria y respaldo el índice es de la otra BD
+suscribirCambioDeBd(motorBusqueda.invalidar)
+
+
+@suscribirCambiosExternos
+def _aplicarCambiosExternos(cambios):
+    """Commits de otros procesos: las filas actuales, salvo las borradas u ocultas."""
+    if cambios["masivo"]:
+        motorBusqueda.invalidar()
+        return
+    duenos = {
+        fila.id: None if fila.eliminadoEn else (fila.nombre, fila.apellido, fila.documento)
+        for fila in cambios["filas"][Dueno.__tablename__]
+    }
+    mascotas = {
+        fila.id: None if fila.eliminadoEn else (fila.nombre, fila.duenoId)
+        for fila in cambios["filas"][Mascota.__tablename__]
+    }
+    # Una marca de borrado gana (la mascota de un dueño oculto no cambia su fila)
+    duenos.update(dict.fromkeys(cambios["eliminados"].get(Dueno.__tablename__, ())))
+    mascotas.update(dict.fromkeys(cambios["eliminados"].get(Mascota.__tablename__, ())))
+    if duenos or mascotas:
+        motorBusqueda.aplicarCambios({"duenos": duenos, "mascotas": mascotas})
+
+
+# =============================================
+# EVENTOS DE SESIÓN (mantienen el índice al día)
+# =============================================
+def _pendientes(sesion):
+    return sesion.info.setdefault(_CLAVE_PENDIENTES, {"duenos": {}, "mascotas": {}})
+
+
+@event.listens_for(Session, "after_flush")
+def _capturarCambios(sesion, contextoFlush):
+    """Guarda una copia de los datos indexables de cada objeto modificado (None si se retira)."""
+    for objeto in list(sesion.new) + list(sesion.dirty):
+        if esOculto(objeto):
+            continue
+        if isinstance(objeto, Dueno):
+            _pendientes(sesion)["duenos"][objeto.id] = (
+                objeto.nombre, objeto.apellido, objeto.documento
+            )
+        elif isinstance(objeto, Mascota):
+            _pendientes(sesion)["mascotas"][objeto.id] = (objeto.nombre, objeto.duenoId)
+    for objeto in list(sesion.deleted) + [objeto for objeto in sesion.dirty if esOculto(objeto)]:
+        if isinstance(objeto, Dueno):
+            _pendientes(sesion)["duenos"][objeto.id] = None
+        elif isinstance(objeto, Mascota):
+            _pendientes(sesion)["mascotas"][objeto.id] = None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _capturarSentenciaMasiva(estado):
+    """INSERT/UPDATE/DELETE directos sobre dueños o mascotas: reconstruir el índice."""
+    if esPurga(estado):
+        return  # filas ya ocultas: salieron del índice al ocultarlas
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabla = getattr(estado.statement, "table", None)
+        if tabla is not None and tabla.name in (Dueno.__tablename__, Mascota.__tablename__):
+            _pendientes(estado.session)["masivo"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicarCambios(sesion):
+    cambios = sesion.info.pop(_CLAVE_PENDIENTES, None)
+    if cambios:
+        motorBusqueda.aplicarCambios(cambios)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartarCambios(sesion):
+    sesion.info.pop(_CLAVE_PENDIENTES, None)
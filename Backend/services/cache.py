@@ -0,0 +1,237 @@
+"""
+Caché de respuestas GET con invalidación por tabla y ETag.
+
+Cómo funciona:
+    - Cada tabla tiene un número de versión. Cuando un commit modifica una
+      tabla (ver services/observador.py) su versión se incrementa.
+    - La clave de cada respuesta incluye la ruta, los parámetros de consulta
+      y las versiones de las tablas de las que depende. Un cambio en esas
+      tablas produce una clave nueva, así que las entradas viejas dejan de
+      usarse solas y salen por LRU/TTL.
+    - Con réplicas de lectura la clave también indica si la solicitud lee
+      de una réplica o de la BD de escritura: una respuesta atrasada de una
+      réplica no se sirve a quien acaba de escribir (cookie huellitasEscritura).
+    - Se guarda el cuerpo ya serializado y su ETag fuerte (SHA-256). Si el
+      navegador envía If-None-Match con ese ETag se responde 304 sin cuerpo
+      y sin volver a consultar ni serializar.
+
+Backends:
+    - CacheMemoria: en el proceso (LRU + TTL). Cada worker tiene la suya:
+      los commits de los otros workers la invalidan al verlos en el
+      contador compartido (services/sincronizacion.py).
+    - CacheRedis:   compartida entre workers (CACHE_URL=redis://...). Las
+      versiones viven en Redis, así todos los procesos ven la invalidación.
+      Requiere el paquete opcional 'redis'.
+"""
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, g, make_response, request
+from services.enrutador import lecturaEnReplica, suscribirCambioDeBd
+from services.observador import suscribir
+from services.sincronizacion import suscribirCambiosExternos
+
+
+class CacheMemoria:
+    """Caché LRU con vencimiento por tiempo, local al proceso."""
+
+    compartida = False
+
+    def __init__(self, maxEntradas=512):
+        self.maxEntradas = maxEntradas
+        self._entradas = OrderedDict()
+        self._versiones = {}
+        self._bloqueo = threading.Lock()
+
+    def obtener(self, clave):
+        """Retorna la entrada vigente o None (y la marca como usada recientemente)."""
+        with self._bloqueo:
+            registro = self._entradas.get(clave)
+            if registro is None:
+                return None
+            vence, entrada = registro
+            if vence < time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave, entrada, segundos):
+        """Guarda una entrada; si se supera el máximo se descarta la menos usada."""
+        with self._bloqueo:
+            self._entradas[clave] = (time.monotonic() + segundos, entrada)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maxEntradas:
+                self._entradas.popitem(last=False)
+
+    def versiones(self, tablas):
+        """Versión actual de cada tabla, en el mismo orden recibido."""
+        with self._bloqueo:
+            return [self._versiones.get(tabla, 0) for tabla in tablas]
+
+    def invalidarTablas(self, tablas):
+        """Incrementa la versión de las tablas modificadas."""
+        with self._bloqueo:
+            for tabla in tablas:
+                self._versiones[tabla] = self._versiones.get(tabla, 0) + 1
+
+    def limpiar(self):
+        """Elimina todas las entradas."""
+        with self._bloqueo:
+            self._entradas.clear()
+
+
+class CacheRedis:
+    """
+    Caché compartida en Redis. El TTL lo aplica Redis (SETEX) y la política
+    LRU se configura en el servidor (maxmemory-policy allkeys-lru).
+    """
+
+    PREFIJO = "huellitas:"
+    compartida = True
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "CACHE_URL apunta a Redis pero el paquete 'redis' no está instalado "
+                "(pip install redis)"
+            )
+        self._cliente = redis.Redis.from_url(url)
+
+    def obtener(self, clave):
+        """Retorna la entrada guardada o None."""
+        datos = self._cliente.get(self.PREFIJO + "respuesta:" + clave)
+        if datos is None:
+            return None
+        entrada = json.loads(datos)
+        entrada["cuerpo"] = base64.b64decode(entrada["cuerpo"])
+        return entrada
+
+    def guardar(self, clave, entrada, segundos):
+        """Guarda la entrada con vencimiento automático."""
+        datos = dict(entrada, cuerpo=base64.b64encode(entrada["cuerpo"]).decode("ascii"))
+        self._cliente.setex(self.PREFIJO + "respuesta:" + clave, segundos, json.dumps(datos))
+
+    def versiones(self, tablas):
+        """Versión de cada tabla leída en un solo viaje (MGET)."""
+        valores = self._cliente.mget([self.PREFIJO + "version:" + tabla for tabla in tablas])
+        return [int(valor) if valor is not None else 0 for valor in valores]
+
+    def invalidarTablas(self, tablas):
+        """Incrementa atómicamente la versión de las tablas modificadas."""
+        tuberia = self._cliente.pipeline()
+        for tabla in tablas:
+            tuberia.incr(self.PREFIJO + "version:" + tabla)
+        tuberia.execute()
+
+    def limpiar(self):
+        """Elimina todas las respuestas guardadas (las versiones se conservan)."""
+        for clave in self._cliente.scan_iter(self.PREFIJO + "respuesta:*"):
+            self._cliente.delete(clave)
+
+
+# Backend activo (lo define configurarCache al crear la app) y vigencia de las entradas
+_backend = None
+_segundosVigencia = 60
+
+
+def configurarCache(app):
+    """Crea el backend de caché según la configuración de la aplicación."""
+    global _backend, _segundosVigencia
+
+    if not app.config.get("CACHE_HABILITADA", True):
+        _backend = None
+        return None
+
+    url = app.config.get("CACHE_URL", "")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        _backend = CacheRedis(url)
+    else:
+        _backend = CacheMemoria(app.config.get("CACHE_MAX_ENTRADAS", 512))
+    _segundosVigencia = app.config.get("CACHE_TTL_SEGUNDOS", 60)
+    return _backend
+
+
+@suscribir
+def _invalidarPorCommit(tablas):
+    """Cada commit con cambios invalida las respuestas que dependen de esas tablas."""
+    if _backend is not None:
+        _backend.invalidarTablas(sorted(tablas))
+
+
+@suscribirCambiosExternos
+def _invalidarPorOtroProceso(cambios):
+    """Commits de otros workers: en Redis ya subieron las versiones compartidas."""
+    if _backend is not None and not _backend.compartida:
+        _backend.invalidarTablas(sorted(cambios["tablas"]))
+
+
+@suscribirCambioDeBd
+def _limpiarPorCambioDeBd():
+    """Las respuestas guardadas son de la BD anterior (primaria o respaldo)."""
+    if _backend is not None:
+        _backend.limpiar()
+
+
+def _claveRespuesta(tablas):
+    """
+    Clave = ruta + parámetros ordenados + versiones de las tablas dependientes
+    + origen de la lectura (réplica o BD de escritura).
+    """
+    parametros = sorted(request.args.items(multi=True))
+    versiones = _backend.versiones(tablas)
+    origen = "replica" if lecturaEnReplica() else "escritura"
+    texto = json.dumps([request.path, parametros, list(zip(tablas, versiones)), origen])
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def cacheRespuesta(*tablas):
+    """
+    Decorador para rutas GET: guarda la respuesta 200 y la reutiliza hasta que
+    cambie alguna de las tablas indicadas. Agrega ETag y responde 304 cuando
+    el cliente ya tiene la versión vigente.
+    """
+    tablas = tuple(sorted(tablas))
+
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if _backend is None or request.method != "GET":
+                return vista(*args, **kwargs)
+
+            clave = _claveRespuesta(tablas)
+            entrada = _backend.obtener(clave)
+
+            if entrada is not None:
+                respuesta = Response(entrada["cuerpo"], mimetype=entrada["mimetype"])
+                respuesta.set_etag(entrada["etag"])
+                respuesta.headers["X-Cache"] = "HIT"
+                return respuesta.make_conditional(request)
+
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code != 200 or respuesta.is_streamed:
+                return respuesta
+
+            cuerpo = respuesta.get_data()
+            etag = hashlib.sha256(cuerpo).hexdigest()
+            # Leída de una réplica: vigencia acotada (ver services/enrutador.py)
+            segundos = min(_segundosVigencia, g.get("vigenciaMaximaCache", _segundosVigencia))
+            _backend.guardar(clave, {
+                "cuerpo": cuerpo,
+                "etag": etag,
+                "mimetype": respuesta.mimetype
+            }, segundos)
+
+            respuesta.set_etag(etag)
+            respuesta.headers["X-Cache"] = "MISS"
+            return respuesta.make_conditional(request)
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,436 @@
+"""
+Registro de cambios para la sincronización incremental (/api/cambios).
+
+Problema que resuelve:
+    Después de cada alta, edición o baja el Frontend volvía a descargar la
+    tabla completa. Con el registro de cambios el cliente guarda un token y
+    pide solo lo que cambió desde entonces.
+
+Cómo funciona:
+    - secuencia_cambios guarda un contador global. Una transacción que
+      escribe en duenos, mascotas, citas o historial_clinico lo incrementa
+      (UPDATE valor = valor + 1) al empezar before_commit, justo antes del
+      último flush. Ese UPDATE bloquea la fila hasta el COMMIT, así las
+      transacciones que escriben se confirman en el orden de su versión y un
+      lector nunca ve la versión N sin todos sus cambios; tomarlo al final
+      hace que el bloqueo dure solo lo que tarda el commit.
+    - La columna 'version' de cada fila toma la versión de la transacción
+      (default y onupdate = versionDeLaTransaccion), también en los
+      INSERT/UPDATE masivos. Lo que se escribe antes de tomarla (flush
+      intermedios, sentencias masivas) lleva una marca provisional negativa
+      que se reemplaza por la versión con un UPDATE por tabla.
+    - Los listados muestran datos de otras tablas (conteos de mascotas,
+      citas e historial; nombres de mascota y dueño). after_flush anota las
+      filas relacionadas que cambian de forma indirecta y before_commit les
+      sube la versión, junto con las marcas de los registros eliminados
+      (tabla eliminaciones). Si la transacción hace rollback no queda nada.
+    - Al borrar u ocultar un dueño o una mascota (services/eliminacion.py)
+      la BD elimina en cascada lo que depende de ellos sin pasar por la
+      sesión: before_flush deja antes sus marcas con un INSERT ... SELECT.
+    - Un DELETE masivo (o un INSERT/UPDATE masivo sin los datos necesarios
+      para saber qué filas relacionadas cambian) no deja marcas: mueve
+      'reinicio' y los clientes con un token anterior recargan todo.
+
+Mismo esquema de eventos que services/observador.py y services/derivados.py.
+"""
+import random
+from collections import defaultdict
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+from models import db
+from models.cambios import CLAVE_VERSION, Eliminacion, SecuenciaCambios, avanzarContador
+from models.dueno import Dueno
+from models.mascota import Mascota
+from models.cita import Cita
+from models.historial import HistorialClinico
+from services.consultas import LISTADO_CITAS, LISTADO_DUENOS, LISTADO_HISTORIAL, LISTADO_MASCOTAS
+from services.eliminacion import esOculto, esPurga, filasRetiradas
+from services.observador import marcarTablas
+from services.paginacion import filasListado
+from services.serializacion import Fragmento, codificarFilas, codificarObjeto
+
+# Tablas versionadas: nombre -> (modelo, recurso de la API, listado)
+TABLAS_VERSIONADAS = {
+    Dueno.__tablename__: (Dueno, "duenos", LISTADO_DUENOS),
+    Mascota.__tablename__: (Mascota, "mascotas", LISTADO_MASCOTAS),
+    Cita.__tablename__: (Cita, "citas", LISTADO_CITAS),
+    HistorialClinico.__tablename__: (HistorialClinico, "historial", LISTADO_HISTORIAL),
+}
+
+# Llave foránea de cada tabla hacia el padre que la cuenta en su listado
+_PADRES = {
+    "mascotas": ("duenoId", "duenos"),
+    "citas": ("mascotaId", "mascotas"),
+    "historial_clinico": ("mascotaId", "mascotas"),
+}
+
+# Campos que se muestran en los listados de otras tablas: tabla -> (campos,
+# [(tabla afectada, campo por el que se filtran sus filas)])
+_MOSTRADOS_EN = {
+    "duenos": ({"nombre", "apellido"}, [
+        ("mascotas", "duenoId"), ("citas", "duenoId"), ("historial_clinico", "duenoId")
+    ]),
+    "mascotas": ({"nombre", "duenoId"}, [
+        ("citas", "mascotaId"), ("historial_clinico", "mascotaId")
+    ]),
+}
+
+# Filas que se van con cada dueño o mascota (CASCADE de la BD o eliminación
+# diferida): tabla -> [(tabla dependiente, campo por el que se filtran sus filas)]
+_DEPENDIENTES = {tabla: afectadas for tabla, (_, afectadas) in _MOSTRADOS_EN.items()}
+
+# Claves en session.info: tablas escritas por la transacción / marca
+# provisional de sus filas / versión que tomó / cambios por aplicar
+_CLAVE_ABIERTA = "versionAbierta"
+_CLAVE_MARCA = "versionProvisional"
+_CLAVE_VERSION = "versionTomada"
+_CLAVE_PENDIENTES = "cambiosPendientes"
+
+# Ids por sentencia al subir versiones (límite de parámetros del IN)
+LOTE_IDS = 500
+
+
+class _Pendientes:
+    """Cambios indirectos de una transacción, aplicados en before_commit."""
+
+    def __init__(self):
+        self.toques = defaultdict(set)   # (tabla, campo) -> ids
+        self.eliminados = []             # (tabla, registroId)
+        self.reiniciar = False
+
+
+def _pendientes(sesion):
+    pendientes = sesion.info.get(_CLAVE_PENDIENTES)
+    if pendientes is None:
+        pendientes = sesion.info[_CLAVE_PENDIENTES] = _Pendientes()
+    return pendientes
+
+
+def _ejecutar(sesion, sentencia, parametros=None):
+    """
+    Ejecuta en la conexión de escritura de la sesión, sin pasar por
+    do_orm_execute (así no se vuelve a anotar como sentencia masiva).
+    """
+    conexion = sesion.connection(bind_arguments={"clause": sentencia})
+    return conexion.execute(sentencia, parametros)
+
+
+def _conexionEscritura(sesion):
+    """Conexión de la sesión a la BD de escritura (la de sus INSERT/UPDATE)."""
+    return sesion.connection(bind_arguments={"clause": db.update(SecuenciaCambios.__table__)})
+
+
+def _abrirVersion(sesion, *tablas):
+    """
+    Anota las tablas que escribe la transacción. Mientras no tome su versión
+    (_tomarVersion), las filas que escribe llevan una marca provisional.
+    """
+    escritas = sesion.info.get(_CLAVE_ABIERTA)
+    if escritas is None:
+        escritas = sesion.info[_CLAVE_ABIERTA] = set()
+        marca = -random.randint(1, 2 ** 31 - 1)
+        sesion.info[_CLAVE_MARCA] = marca
+        _conexionEscritura(sesion).info[CLAVE_VERSION] = marca
+    escritas.update(tablas)
+
+
+def _tomarVersion(sesion):
+    """
+    Incrementa el contador una vez por transacción (crea la fila si falta) y
+    corrige las filas escritas con la marca provisional. Retorna la versión.
+    """
+    version = sesion.info.get(_CLAVE_VERSION)
+    if version is not None:
+        return version
+    conexion = _conexionEscritura(sesion)
+    version = avanzarContador(conexion)
+    sesion.info[_CLAVE_VERSION] = conexion.info[CLAVE_VERSION] = version
+
+    escritas = sesion.info.setdefault(_CLAVE_ABIERTA, set())
+    marca = sesion.info.pop(_CLAVE_MARCA, None)
+    if marca is not None:
+        for tabla in sorted(escritas):
+            modelo = TABLAS_VERSIONADAS[tabla][0] if tabla in TABLAS_VERSIONADAS else Eliminacion
+            conexion.execute(
+                db.update(modelo.__table__).where(modelo.version == marca).values(version=version)
+            )
+    marcarTablas(sesion, SecuenciaCambios.__tablename__)
+    return version
+
+
+def versionTomada(sesion):
+    """Versión que tomó la transacción en curso, o None si todavía no la tomó."""
+    return sesion.info.get(_CLAVE_VERSION)
+
+
+def tablasDeLaVersion(sesion):
+    """
+    Tablas versionadas (y 'eliminaciones') que escribió la transacción en
+    curso, o None si no escribió ninguna. Completo recién después del
+    before_commit de este módulo.
+    """
+    escritas = sesion.info.get(_CLAVE_ABIERTA)
+    return None if escritas is None else set(escritas)
+
+
+def _condicionToque(tabla, campo, ids):
+    """Filas de 'tabla' relacionadas con los ids ('duenoId' en citas/historial: vía la mascota)."""
+    modelo = TABLAS_VERSIONADAS[tabla][0]
+    if campo == "duenoId" and modelo is not Mascota:
+        return modelo.mascotaId.in_(db.select(Mascota.id).where(Mascota.duenoId.in_(ids)))
+    return getattr(modelo, campo).in_(ids)
+
+
+def estadoSecuencia(ejecutor=None):
+    """(valor, reinicio) del contador; (0, 0) si aún no hubo escrituras."""
+    ejecutor = ejecutor or db.session
+    secuencia = SecuenciaCambios.__table__
+    fila = ejecutor.execute(
+        db.select(secuencia.c.valor, secuencia.c.reinicio).where(secuencia.c.id == 1)
+    ).first()
+    return (fila.valor, fila.reinicio) if fila else (0, 0)
+
+
+# =============================================
+# LECTURA DE CAMBIOS
+# =============================================
+def cambiosDesde(desde, tablas=None, hasta=None):
+    """
+    Cambios confirmados con versión mayor que 'desde' (solo de 'tablas', si
+    se indican: las demás van vacías; hasta la versión 'hasta', si se indica).
+    Retorna
+    (token, reiniciar, filas, eliminados):
+        token       - versión hasta la que llega la respuesta (el próximo 'since')
+        reiniciar   - True si el token no se puede continuar (es anterior a
+                      'reinicio' o posterior al contador): hay que recargar todo
+        filas       - recurso -> filas de columnas con los campos del listado
+                      (una consulta por tabla, por el índice de 'version')
+        eliminados  - recurso -> ids borrados
+    El token se lee antes que las filas y acota el rango: lo que se confirme
+    mientras tanto llega en la respuesta siguiente.
+    """
+    token, reinicio = estadoSecuencia()
+    if hasta is not None:
+        token = min(token, hasta)
+    if desde < reinicio or desde > token:
+        return token, True, {}, {}
+    filas = {}
+    eliminados = {}
+    for tabla, (modelo, recurso, listado) in TABLAS_VERSIONADAS.items():
+        filas[recurso] = (
+            filasListado(listado, modelo.version > desde, modelo.version <= token)
+            if tablas is None or tabla in tablas else []
+        )
+        eliminados[recurso] = []
+    if token > desde and (tablas is None or Eliminacion.__tablename__ in tablas):
+        marcas = db.session.execute(
+            db.select(Eliminacion.tabla, Eliminacion.registroId)
+            .where(Eliminacion.version > desde, Eliminacion.version <= token)
+            .order_by(Eliminacion.id)
+        )
+        for tabla, registroId in marcas:
+            if tabla in TABLAS_VERSIONADAS:
+                eliminados[TABLAS_VERSIONADAS[tabla][1]].append(registroId)
+        # Una fila borrada junto con su dueño puede tener dos marcas
+        eliminados = {recurso: list(dict.fromkeys(ids)) for recurso, ids in eliminados.items()}
+    return token, False, filas, eliminados
+
+
+def codificarCambios(token, reiniciar, filas, eliminados):
+    """Cuerpo JSON (bytes) de /api/cambios: las filas con el Codificador de cada listado."""
+    valores = {"token": token, "reiniciar": reiniciar, "eliminados": eliminados}
+    for _, recurso, listado in TABLAS_VERSIONADAS.values():
+        valores[recurso] = Fragmento(codificarFilas(listado.codificador(), filas.get(recurso, [])))
+    return codificarObjeto(valores)
+
+
+# =============================================
+# EVENTOS DE SESIÓN
+# =============================================
+def _versionadas(objetos):
+    return (
+        objeto for objeto in objetos
+        if getattr(objeto, "__tablename__", None) in TABLAS_VERSIONADAS
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _abrirVersionDelFlush(sesion, contextoFlush, instancias):
+    """Antes de escribir filas versionadas, la transacción anota sus tablas."""
+    tablas = {objeto.__tablename__ for objeto in _versionadas(chain(sesion.new, sesion.deleted, sesion.dirty))}
+    if tablas:
+        _abrirVersion(sesion, *tablas)
+    retiradas = filasRetiradas(sesion)
+    if retiradas:
+        _marcarDependientes(sesion, retiradas)
+
+
+def _marcarDependientes(sesion, retiradas):
+    """
+    Marcas de borrado de lo que depende de los dueños y mascotas que se borran
+    u ocultan: la BD lo elimina en cascada (o queda oculto) sin pasar por la
+    sesión. Un INSERT ... SELECT por tabla, antes de que el flush envíe el DELETE.
+    """
+    _abrirVersion(sesion, Eliminacion.__tablename__)
+    for tabla, ids in retiradas.items():
+        ids = sorted(ids)
+        for dependiente, campo in _DEPENDIENTES[tabla]:
+            modelo = TABLAS_VERSIONADAS[dependiente][0]
+            for inicio in range(0, len(ids), LOTE_IDS):
+                _ejecutar(sesion, db.insert(Eliminacion.__table__).from_select(
+                    ["tabla", "registroId"],
+                    db.select(db.literal(dependiente), modelo.id)
+                    .where(_condicionToque(dependiente, campo, ids[inicio:inicio + LOTE_IDS]))
+                ))
+    marcarTablas(sesion, Eliminacion.__tablename__)
+
+
+@event.listens_for(Session, "after_flush")
+def _capturarCambios(sesion, contextoFlush):
+    """Filas relacionadas que cambian de forma indirecta y registros eliminados."""
+    for objeto in _versionadas(chain(sesion.new, sesion.dirty, sesion.deleted)):
+        tabla = objeto.__tablename__
+        atributos = db.inspect(objeto).attrs
+        creado = objeto in sesion.new
+        # Ocultar (eliminación diferida) equivale a borrar para los clientes
+        eliminado = objeto in sesion.deleted or esOculto(objeto)
+        if eliminado:
+            _pendientes(sesion).eliminados.append((tabla, objeto.id))
+
+        # El padre cambia su conteo (y el anterior, si la fila cambió de padre)
+        if tabla in _PADRES:
+            campo, padre = _PADRES[tabla]
+            anteriores = atributos[campo].history.deleted
+            if creado or eliminado or anteriores:
+                _pendientes(sesion).toques[(padre, "id")].update(
+                    valor for valor in (getattr(objeto, campo), *anteriores) if valor is not None
+                )
+
+        # Los hijos muestran el nombre (o el dueño) que cambió
+        if tabla in _MOSTRADOS_EN and not (creado or eliminado):
+            campos, afectadas = _MOSTRADOS_EN[tabla]
+            if any(atributos[campo].history.has_changes() for campo in campos):
+                for afectada, campo in afectadas:
+                    _pendientes(sesion).toques[(afectada, campo)].add(objeto.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _capturarSentenciaMasiva(estado):
+    """
+    INSERT/UPDATE/DELETE masivos sobre tablas versionadas: se anotan en la
+    versión de la transacción. Un INSERT con la llave del padre en sus parámetros
+    sube la versión de los padres; un DELETE, o un INSERT/UPDATE del que no
+    se puede saber qué filas relacionadas cambian, obliga a recargar.
+    """
+    if not (estado.is_insert or estado.is_update or estado.is_delete) or esPurga(estado):
+        return
+    tabla = getattr(estado.statement, "table", None)
+    if tabla is None or tabla.name not in TABLAS_VERSIONADAS:
+        return
+    sesion = estado.session
+    _abrirVersion(sesion, tabla.name)
+
+    parametros = estado.parameters
+    if isinstance(parametros, dict):
+        parametros = [parametros]
+    parametros = parametros or []
+
+    if estado.is_delete:
+        _pendientes(sesion).reiniciar = True
+    elif estado.is_insert:
+        if tabla.name not in _PADRES:
+            return
+        campo, padre = _PADRES[tabla.name]
+        if parametros and all(campo in fila for fila in parametros):
+            _pendientes(sesion).toques[(padre, "id")].update(fila[campo] for fila in parametros)
+        else:
+            _pendientes(sesion).reiniciar = True
+    else:
+        asignados = set(estado.statement.compile().params).union(*parametros)
+        padre = _PADRES.get(tabla.name, (None,))[0]
+        mostrados = _MOSTRADOS_EN.get(tabla.name, (set(),))[0]
+        if padre in asignados or mostrados & asignados:
+            _pendientes(sesion).reiniciar = True
+
+
+@event.listens_for(Session, "before_commit", insert=True)
+def _tomarVersionDelCommit(sesion):
+    """
+    Primer before_commit, antes de los flush de los demás módulos: la
+    transacción que escribe toma aquí su versión, así las filas del último
+    flush ya la llevan y no hace falta corregirlas.
+    """
+    if sesion.info.get(_CLAVE_ABIERTA) is not None or any(
+        _versionadas(chain(sesion.new, sesion.deleted, sesion.dirty))
+    ):
+        _tomarVersion(sesion)
+
+
+@event.listens_for(Session, "before_commit")
+def _aplicarCambios(sesion):
+    """Sube la versión de las filas relacionadas y guarda las marcas de borrado."""
+    # El flush de commit() ocurre después de este evento: se adelanta para
+    # que los cambios aún no enviados también queden anotados
+    sesion.flush()
+    pendientes = sesion.info.pop(_CLAVE_PENDIENTES, None)
+    if pendientes is None and sesion.info.get(_CLAVE_ABIERTA) is None:
+        return
+    # Normalmente ya la tomó _tomarVersionDelCommit; corrige lo que quedó marcado
+    version = _tomarVersion(sesion)
+    if pendientes is None:
+        return
+    _abrirVersion(sesion, *(tabla for tabla, _ in pendientes.toques))
+    secuencia = SecuenciaCambios.__table__
+
+    if pendientes.reiniciar:
+        _ejecutar(sesion, db.update(secuencia).where(secuencia.c.id == 1).values(reinicio=secuencia.c.valor))
+
+    for (tabla, campo), ids in sorted(pendientes.toques.items()):
+        modelo = TABLAS_VERSIONADAS[tabla][0]
+        ids = sorted(ids)
+        for inicio in range(0, len(ids), LOTE_IDS):
+            _ejecutar(
+                sesion,
+                db.update(modelo.__table__)
+                .where(_condicionToque(tabla, campo, ids[inicio:inicio + LOTE_IDS]))
+                .values(version=version)
+            )
+        marcarTablas(sesion, tabla)
+
+    if pendientes.eliminados:
+        _abrirVersion(sesion, Eliminacion.__tablename__)
+        _ejecutar(sesion, db.insert(Eliminacion.__table__), [
+            {"tabla": tabla, "registroId": registroId} for tabla, registroId in pendientes.eliminados
+        ])
+        marcarTablas(sesion, Eliminacion.__tablename__)
+
+
+def _olvidarVersion(sesion):
+    for clave in (_CLAVE_ABIERTA, _CLAVE_MARCA, _CLAVE_VERSION, _CLAVE_PENDIENTES):
+        sesion.info.pop(clave, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _cerrarVersion(sesion):
+    _olvidarVersion(sesion)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartarCambios(sesion):
+    _olvidarVersion(sesion)
+
+
+# La versión (o la marca) anotada en la conexión vale solo para su transacción
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _olvidarVersionDeLaConexion(conexion):
+    conexion.info.pop(CLAVE_VERSION, None)
+
+
+@event.listens_for(Pool, "checkin")
+def _olvidarVersionAlDevolver(conexionDbapi, registro):
+    if registro is not None:
+        registro.info.pop(CLAVE_VERSION, None)
@@ -0,0 +1,243 @@
+"""
+Capa de consultas para los endpoints de listado.
+
+Problema que resuelve (N+1):
+    Serializar cada fila con toDict() dispara consultas perezosas (lazy)
+    para cargar la mascota, el dueño y las colecciones hijas solo para
+    contarlas. Con miles de citas eso son miles de SELECT por petición.
+
+Estrategia:
+    - Los nombres de mascota/dueño se cargan con JOIN en la misma consulta
+      (contains_eager).
+    - Los contadores (cantidadMascotas, cantidadCitas, cantidadHistoriales)
+      se calculan con subconsultas COUNT correlacionadas.
+    Así cada listado se resuelve en UNA sola consulta, sin importar el tamaño.
+"""
+from sqlalchemy.orm import contains_eager
+from models import db
+from models.dueno import Dueno
+from models.mascota import Mascota, calcularEdades
+from models.cita import Cita
+from models.historial import HistorialClinico
+from services.paginacion import Listado
+
+
+# =============================================
+# SUBCONSULTAS DE CONTEO
+# =============================================
+def _conteoMascotas():
+    """Subconsulta correlacionada: número de mascotas de cada dueño."""
+    return (
+        db.select(db.func.count(Mascota.id))
+        .where(Mascota.duenoId == Dueno.id)
+        .correlate(Dueno)
+        .scalar_subquery()
+    )
+
+
+def _conteoCitas():
+    """Subconsulta correlacionada: número de citas de cada mascota."""
+    return (
+        db.select(db.func.count(Cita.id))
+        .where(Cita.mascotaId == Mascota.id)
+        .correlate(Mascota)
+        .scalar_subquery()
+    )
+
+
+def _conteoHistoriales():
+    """Subconsulta correlacionada: número de registros clínicos de cada mascota."""
+    return (
+        db.select(db.func.count(HistorialClinico.id))
+        .where(HistorialClinico.mascotaId == Mascota.id)
+        .correlate(Mascota)
+        .scalar_subquery()
+    )
+
+
+# =============================================
+# CONSULTAS BASE (una sola consulta SQL cada una)
+# =============================================
+def consultarDuenos():
+    """Consulta de dueños con su cantidad de mascotas. Filas: (Dueno, conteo)."""
+    return db.session.query(Dueno, _conteoMascotas().label("cantidadMascotas"))
+
+
+def consultarMascotas():
+    """
+    Consulta de mascotas con su dueño precargado y los conteos de citas
+    e historiales. Filas: (Mascota, cantidadCitas, cantidadHistoriales).
+    Permite filtrar por columnas de Dueno porque el JOIN ya está presente.
+    """
+    return (
+        db.session.query(
+            Mascota,
+            _conteoCitas().label("cantidadCitas"),
+            _conteoHistoriales().label("cantidadHistoriales")
+        )
+        .join(Mascota.dueno)
+        .options(contains_eager(Mascota.dueno))
+    )
+
+
+def consultarCitas():
+    """Consulta de citas con mascota y dueño precargados mediante JOIN."""
+    return (
+        Cita.query
+        .join(Cita.mascota)
+        .join(Mascota.dueno)
+        .options(contains_eager(Cita.mascota).contains_eager(Mascota.dueno))
+    )
+
+
+def consultarHistorial():
+    """Consulta de registros clínicos con mascota y dueño precargados mediante JOIN."""
+    return (
+        HistorialClinico.query
+        .join(HistorialClinico.mascota)
+        .join(Mascota.dueno)
+        .options(
+            contains_eager(HistorialClinico.mascota).contains_eager(Mascota.dueno)
+        )
+    )
+
+
+# =============================================
+# SERIALIZACIÓN DE RESULTADOS
+# =============================================
+def serializarDuenos(filas):
+    """Convierte filas (Dueno, conteo) en diccionarios para la respuesta JSON."""
+    return [
+        dueno.toDict(cantidadMascotas=cantidadMascotas)
+        for dueno, cantidadMascotas in filas
+    ]
+
+
+def serializarMascotas(filas):
+    """
+    Convierte filas (Mascota, citas, historiales) en diccionarios JSON.
+    La edad de todas las mascotas se calcula de una vez (calcularEdades).
+    """
+    edades, edadesAnios = calcularEdades([fila[0].fechaNacimiento for fila in filas])
+    return [
+        mascota.toDict(
+            cantidadCitas=cantidadCitas,
+            cantidadHistoriales=cantidadHistoriales,
+            edad=edad,
+            edadAnios=edadAnios
+        )
+        for (mascota, cantidadCitas, cantidadHistoriales), edad, edadAnios
+        in zip(filas, edades, edadesAnios)
+    ]
+
+
+def serializarCitas(citas):
+    """Convierte citas (con mascota y dueño precargados) en diccionarios JSON."""
+    return [cita.toDict() for cita in citas]
+
+
+def serializarHistorial(registros):
+    """Convierte registros clínicos (con mascota y dueño precargados) en diccionarios JSON."""
+    return [registro.toDict() for registro in registros]
+
+
+# =============================================
+# DEFINICIÓN DE LISTADOS (paginación y proyección)
+# =============================================
+def _nombreDueno():
+    """Expresión SQL equivalente a 'duenoNombre' de toDict()."""
+    return Dueno.nombre + " " + Dueno.apellido
+
+
+def _edadesDelLote(filas):
+    """(edad, edadAnios) de las filas proyectadas: una sola pasada para los dos campos."""
+    return calcularEdades([fila.fechaNacimiento for fila in filas])
+
+
+LISTADO_DUENOS = Listado(
+    consulta=consultarDuenos,
+    serializar=serializarDuenos,
+    entidad=lambda fila: fila[0],
+    orden=[(Dueno.nombre, False), (Dueno.id, False)],
+    campos={
+        "id": Dueno.id,
+        "nombre": Dueno.nombre,
+        "apellido": Dueno.apellido,
+        "documento": Dueno.documento,
+        "telefono": Dueno.telefono,
+        "correo": Dueno.correo,
+        "direccion": Dueno.direccion,
+        "cantidadMascotas": _conteoMascotas(),
+    },
+    desde=lambda consulta: consulta.select_from(Dueno),
+)
+
+LISTADO_MASCOTAS = Listado(
+    consulta=consultarMascotas,
+    serializar=serializarMascotas,
+    entidad=lambda fila: fila[0],
+    orden=[(Mascota.nombre, False), (Mascota.id, False)],
+    campos={
+        "id": Mascota.id,
+        "nombre": Mascota.nombre,
+        "especie": Mascota.especie,
+        "raza": Mascota.raza,
+        "fechaNacimiento": Mascota.fechaNacimiento,
+        "peso": Mascota.peso,
+        "observaciones": Mascota.observaciones,
+        "duenoId": Mascota.duenoId,
+        "duenoNombre": _nombreDueno(),
+        "cantidadCitas": _conteoCitas(),
+        "cantidadHistoriales": _conteoHistoriales(),
+    },
+    calculados={
+        "edad": (["fechaNacimiento"], _edadesDelLote, 0),
+        "edadAnios": (["fechaNacimiento"], _edadesDelLote, 1),
+    },
+    desde=lambda consulta: consulta.select_from(Mascota).join(
+        Dueno, Mascota.duenoId == Dueno.id
+    ),
+)
+
+LISTADO_CITAS = Listado(
+    consulta=consultarCitas,
+    serializar=serializarCitas,
+    entidad=lambda cita: cita,
+    orden=[(Cita.fecha, False), (Cita.hora, False), (Cita.id, False)],
+    campos={
+        "id": Cita.id,
+        "fecha": Cita.fecha,
+        "hora": Cita.hora,
+        "motivo": Cita.motivo,
+        "estado": Cita.estado,
+        "mascotaId": Cita.mascotaId,
+        "mascotaNombre": Mascota.nombre,
+        "duenoNombre": _nombreDueno(),
+    },
+    desde=lambda consulta: consulta.select_from(Cita).join(
+        Mascota, Cita.mascotaId == Mascota.id
+    ).join(Dueno, Mascota.duenoId == Dueno.id),
+)
+
+LISTADO_HISTORIAL = Listado(
+    consulta=consultarHistorial,
+    serializar=serializarHistorial,
+    entidad=lambda registro: registro,
+    orden=[(HistorialClinico.fecha, True), (HistorialClinico.id, True)],
+    campos={
+        "id": HistorialClinico.id,
+        "fecha": HistorialClinico.fecha,
+        "diagnostico": HistorialClinico.diagnostico,
+        "tratamiento": HistorialClinico.tratamiento,
+        "medicamentos": HistorialClinico.medicamentos,
+        "veterinario": HistorialClinico.veterinario,
+        "observaciones": HistorialClinico.observaciones,
+        "pesoEnConsulta": HistorialClinico.pesoEnConsulta,
+        "mascotaId": HistorialClinico.mascotaId,
+        "mascotaNombre": Mascota.nombre,
+        "duenoNombre": _nombreDueno(),
+    },
+    desde=lambda consulta: consulta.select_from(HistorialClinico).join(
+        Mascota, HistorialClinico.mascotaId == Mascota.id
+    ).join(Dueno, Mascota.duenoId == Dueno.id),
+)
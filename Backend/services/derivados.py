@@ -0,0 +1,141 @@
+"""
+Tablas derivadas del historial clínico, recalculadas al escribir.
+
+Algunas tablas guardan datos calculados a partir de historial_clinico para no
+recorrer todos los registros en cada lectura: el resumen clínico
+(services/lineaTiempo.py) y la analítica de peso (services/analitica.py).
+Cada una registra aquí su tabla (con columna mascotaId) y su función de
+recálculo.
+
+Mismo esquema de eventos que services/observador.py:
+    - after_flush anota las mascotas de los registros clínicos agregados,
+      modificados o eliminados (y la mascota anterior si el registro cambió
+      de mascota)
+    - Las sentencias masivas sobre historial_clinico aportan los mascotaId de
+      sus parámetros; si no los traen (DELETE o UPDATE con WHERE) se
+      recalculan todas las mascotas (salvo la purga de services/eliminacion.py)
+    - before_commit recalcula las tablas derivadas de las mascotas anotadas
+      en la misma transacción: si hace rollback, tampoco cambian
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.historial import HistorialClinico
+from services.eliminacion import esPurga
+
+# Clave en session.info: set de mascotaId a recalcular, o TODAS
+_CLAVE_PENDIENTES = "derivadosPendientes"
+TODAS = "todas"
+
+# Mascotas por consulta al recalcular (límite de parámetros del IN)
+LOTE_MASCOTAS = 500
+
+# (tabla, recalcular) de cada tabla derivada, en orden de registro
+_derivados = []
+
+
+def registrarDerivado(tabla, recalcular):
+    """
+    Registra una tabla derivada. 'recalcular(ejecutor, mascotaIds)' reemplaza
+    las filas de esas mascotas (None = todas) usando la sesión o conexión
+    recibida, sin confirmar la transacción, y retorna las filas escritas.
+    """
+    _derivados.append((tabla, recalcular))
+    return recalcular
+
+
+def tablasDerivadas():
+    """Nombres de las tablas derivadas registradas."""
+    return [tabla.name for tabla, _ in _derivados]
+
+
+def lotesDeMascotas(mascotaIds):
+    """
+    Parámetros para las consultas de recálculo: un solo lote sin filtro si
+    mascotaIds es None (todas), o {"ids": [...]} de a LOTE_MASCOTAS.
+    """
+    if mascotaIds is None:
+        return [{}]
+    ids = sorted(mascotaIds)
+    return [
+        {"ids": ids[inicio:inicio + LOTE_MASCOTAS]}
+        for inicio in range(0, len(ids), LOTE_MASCOTAS)
+    ]
+
+
+def completarDerivados(motor):
+    """
+    Calcula las filas que falten (mascotas con historial y sin fila en la
+    tabla derivada), por ejemplo la primera vez que arranca la aplicación con
+    una tabla nueva. Retorna {tabla: filas escritas} de las que tenían faltantes.
+    """
+    completados = {}
+    with motor.begin() as conexion:
+        for tabla, recalcular in _derivados:
+            faltantes = conexion.execute(
+                db.select(HistorialClinico.mascotaId).distinct()
+                .where(~db.exists().where(tabla.c.mascotaId == HistorialClinico.mascotaId))
+            ).scalars().all()
+            if faltantes:
+                completados[tabla.name] = recalcular(conexion, faltantes)
+    return completados
+
+
+# =============================================
+# EVENTOS DE SESIÓN
+# =============================================
+def _marcar(sesion, mascotaIds):
+    pendientes = sesion.info.get(_CLAVE_PENDIENTES)
+    if pendientes == TODAS:
+        return
+    if mascotaIds == TODAS:
+        sesion.info[_CLAVE_PENDIENTES] = TODAS
+        return
+    sesion.info.setdefault(_CLAVE_PENDIENTES, set()).update(
+        mascotaId for mascotaId in mascotaIds if mascotaId is not None
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _capturarCambios(sesion, contextoFlush):
+    """Mascotas de los registros clínicos agregados, modificados o eliminados."""
+    for objeto in list(sesion.new) + list(sesion.dirty) + list(sesion.deleted):
+        if isinstance(objeto, HistorialClinico):
+            # Si el registro cambió de mascota, la anterior también se recalcula
+            anteriores = db.inspect(objeto).attrs.mascotaId.history.deleted
+            _marcar(sesion, [objeto.mascotaId, *anteriores])
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _capturarSentenciaMasiva(estado):
+    """INSERT con parámetros: sus mascotaId. Otro UPDATE/DELETE: todas."""
+    if not (estado.is_insert or estado.is_update or estado.is_delete) or esPurga(estado):
+        return  # la purga borra registros de mascotas que también se borran
+    tabla = getattr(estado.statement, "table", None)
+    if tabla is None or tabla.name != HistorialClinico.__tablename__:
+        return
+    parametros = estado.parameters
+    if isinstance(parametros, dict):
+        parametros = [parametros]
+    if estado.is_insert and parametros and all("mascotaId" in fila for fila in parametros):
+        _marcar(estado.session, [fila["mascotaId"] for fila in parametros])
+    else:
+        _marcar(estado.session, TODAS)
+
+
+@event.listens_for(Session, "before_commit")
+def _recalcularDerivados(sesion):
+    """Recalcula las tablas derivadas pendientes dentro de la transacción que se confirma."""
+    # El flush de commit() ocurre después de este evento: se adelanta para
+    # que los cambios aún no enviados también queden anotados
+    sesion.flush()
+    pendientes = sesion.info.pop(_CLAVE_PENDIENTES, None)
+    if not pendientes:
+        return
+    for _, recalcular in _derivados:
+        recalcular(sesion, None if pendientes == TODAS else pendientes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartarCambios(sesion):
+    sesion.info.pop(_CLAVE_PENDIENTES, None)
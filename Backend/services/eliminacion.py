@@ -0,0 +1,271 @@
+"""
+Eliminación de dueños y mascotas: borrado en la BD y eliminación diferida.
+
+Problema que resuelve:
+    db.session.delete(dueno) cargaba en la sesión cada mascota, cita y
+    registro clínico del dueño y enviaba un DELETE por objeto (el CASCADE lo
+    hacía SQLAlchemy). Además SQLite no aplicaba el ON DELETE CASCADE del
+    esquema, porque PRAGMA foreign_keys nunca se activaba.
+
+Estrategia:
+    - Las relaciones usan passive_deletes y todas las BD aplican las llaves
+      foráneas (Config.pragmasSqlite activa foreign_keys en SQLite): borrar un
+      dueño es un solo DELETE y la BD elimina en cascada lo demás.
+    - Con un historial muy grande (más de ELIMINACION_DIFERIDA_FILAS citas y
+      registros) ni ese DELETE se hace en la solicitud: el registro se marca
+      con eliminadoEn (UPDATE de una fila), se liberan sus citas Programadas
+      y la solicitud responde. Un hilo lo borra después por lotes de
+      ELIMINACION_LOTE filas, una transacción por lote, así la BD atiende
+      otras escrituras entre lote y lote.
+    - Mientras tanto lo oculto no aparece en ninguna consulta del ORM: cada
+      SELECT recibe criterios con with_loader_criteria (dueño oculto; mascota
+      oculta o de un dueño oculto; citas e historial de esas mascotas). Solo
+      si hay algo oculto: el proceso lo recuerda (hayOcultos), se marca al
+      ocultar y se vuelve a consultar una sola vez al terminar la purga.
+    - La BD es la cola: si el proceso termina a mitad de la purga, la
+      retoma el arranque siguiente (reanudarPurga; con gunicorn, purgar.py
+      en un proceso aparte) o la siguiente eliminación diferida.
+
+services/cambios.py, observador, búsqueda y agenda tratan igual una fila
+borrada (con su cascada) que una recién ocultada (filasRetiradas, esOculto).
+Las sentencias de la purga llevan la opción PURGA: sus filas ya estaban
+ocultas, así que no cambian nada visible.
+"""
+import threading
+from datetime import datetime
+from itertools import chain
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+from models import db
+from models.dueno import Dueno
+from models.mascota import Mascota
+from models.cita import Cita
+from models.historial import HistorialClinico
+
+# Opciones de ejecución: consultas que también ven lo oculto y sentencias de
+# la purga (ver esPurga)
+INCLUIR_OCULTOS = {"incluirOcultos": True}
+PURGA = {"incluirOcultos": True, "purgaDiferida": True, "synchronize_session": False}
+
+# Si hay registros ocultos (None = no se sabe: se consulta). 'generacion'
+# cambia al ocultar o purgar: una consulta que empezó antes no se guarda
+_ocultos = {"hay": None, "generacion": 0}
+_bloqueoOcultos = threading.Lock()
+
+_duenos = Dueno.__table__
+_mascotas = Mascota.__table__
+
+# Subconsultas de tabla (sin criterios del ORM) con los ids ocultos. Cada
+# parte usa un índice (eliminadoEn, duenoId): con un OR la BD recorrería toda
+# la tabla de mascotas en cada consulta
+_duenosOcultos = db.select(_duenos.c.id).where(_duenos.c.eliminadoEn.is_not(None))
+_mascotasOcultas = db.union_all(
+    db.select(_mascotas.c.id).where(_mascotas.c.eliminadoEn.is_not(None)),
+    db.select(_mascotas.c.id).where(_mascotas.c.duenoId.in_(_duenosOcultos))
+)
+
+# Todos los criterios son "id NOT IN (ocultos)": la lista se arma una vez por
+# consulta. Con "eliminadoEn IS NULL" SQLite recorría el índice de eliminadoEn
+# (todas las filas) en lugar del índice de la consulta. Son lambdas para que
+# SQLAlchemy los guarde en caché por su ubicación en el código.
+_CRITERIOS = (
+    with_loader_criteria(Dueno, lambda cls: cls.id.not_in(_duenosOcultos), track_closure_variables=False),
+    with_loader_criteria(Mascota, lambda cls: cls.id.not_in(_mascotasOcultas), track_closure_variables=False),
+    with_loader_criteria(Cita, lambda cls: cls.mascotaId.not_in(_mascotasOcultas), track_closure_variables=False),
+    with_loader_criteria(
+        HistorialClinico, lambda cls: cls.mascotaId.not_in(_mascotasOcultas), track_closure_variables=False
+    ),
+)
+
+
+# =============================================
+# FILAS OCULTAS EN LAS CONSULTAS
+# =============================================
+def hayOcultos(sesion):
+    """
+    True si hay dueños o mascotas en espera de la purga. Casi nunca los hay:
+    el proceso consulta una vez (dos búsquedas en los índices de eliminadoEn)
+    y las demás consultas se ahorran los criterios.
+    """
+    hay = _ocultos["hay"]
+    if hay is None:
+        generacion = _ocultos["generacion"]
+        hay = sesion.execute(
+            db.select(db.exists(_duenosOcultos) | db.exists(_mascotasOcultas.selects[0])),
+            execution_options=INCLUIR_OCULTOS
+        ).scalar()
+        with _bloqueoOcultos:
+            if _ocultos["generacion"] == generacion:
+                _ocultos["hay"] = hay
+    return hay
+
+
+def marcarOcultos(hay=True):
+    """Anota que hay registros ocultos (True) o que hay que volver a consultarlo (None)."""
+    with _bloqueoOcultos:
+        _ocultos["hay"] = hay
+        _ocultos["generacion"] += 1
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _excluirOcultos(estado):
+    """Agrega los criterios a cada SELECT del ORM (las cargas de relaciones los heredan)."""
+    if (estado.is_select and estado.is_orm_statement
+            and not estado.is_column_load and not estado.is_relationship_load
+            and not estado.execution_options.get("incluirOcultos", False)
+            and hayOcultos(estado.session)):
+        estado.statement = estado.statement.options(*_CRITERIOS)
+
+
+def esPurga(estado):
+    """True si la sentencia masiva es de la purga (ORMExecuteState)."""
+    return estado.execution_options.get("purgaDiferida", False)
+
+
+def esOculto(objeto):
+    """True si el objeto es un dueño o mascota al que el flush en curso marca eliminadoEn."""
+    if not isinstance(objeto, (Dueno, Mascota)):
+        return False
+    return any(valor is not None for valor in db.inspect(objeto).attrs.eliminadoEn.history.added)
+
+
+def filasRetiradas(sesion):
+    """
+    Dueños y mascotas (tabla -> ids) que el flush en curso borra u oculta,
+    junto con todo lo que depende de ellos. Vale en before_flush y after_flush.
+    """
+    retiradas = {}
+    for objeto in chain(sesion.deleted, sesion.dirty):
+        if isinstance(objeto, (Dueno, Mascota)) and (objeto in sesion.deleted or esOculto(objeto)):
+            retiradas.setdefault(objeto.__tablename__, set()).add(objeto.id)
+    return retiradas
+
+
+# =============================================
+# ELIMINACIÓN
+# =============================================
+def _condicionDependientes(modelo, objeto):
+    """Citas o registros clínicos de la mascota, o de las mascotas del dueño."""
+    if isinstance(objeto, Mascota):
+        return modelo.mascotaId == objeto.id
+    return modelo.mascotaId.in_(db.select(_mascotas.c.id).where(_mascotas.c.duenoId == objeto.id))
+
+
+def filasDependientes(objeto):
+    """Citas y registros clínicos que se eliminan junto con el dueño o la mascota."""
+    return sum(
+        db.session.execute(
+            db.select(db.func.count()).select_from(modelo).where(_condicionDependientes(modelo, objeto)),
+            execution_options=INCLUIR_OCULTOS
+        ).scalar()
+        for modelo in (Cita, HistorialClinico)
+    )
+
+
+def eliminarRegistro(objeto):
+    """
+    Elimina un dueño o una mascota con todo lo que depende de ellos y confirma.
+    Retorna False si se borró en la BD (un DELETE con CASCADE) o True si quedó
+    oculto y la purga en segundo plano lo borrará (historial muy grande).
+    """
+    limite = current_app.config.get("ELIMINACION_DIFERIDA_FILAS", 0)
+    if not limite or filasDependientes(objeto) <= limite:
+        db.session.delete(objeto)
+        db.session.commit()
+        return False
+
+    objeto.eliminadoEn = datetime.now()
+    db.session.flush()
+    marcarOcultos()
+    # Las citas Programadas liberan ya su franja (índice único ux_citas_agenda)
+    db.session.execute(
+        db.delete(Cita).where(Cita.estado == "Programada", _condicionDependientes(Cita, objeto)),
+        execution_options=PURGA
+    )
+    db.session.commit()
+    purgaDiferida.programar(current_app._get_current_object())
+    return True
+
+
+# =============================================
+# PURGA EN SEGUNDO PLANO
+# =============================================
+def purgarOcultos(lote=1000):
+    """
+    Borra lo oculto por lotes, una transacción por lote: citas e historial de
+    las mascotas ocultas, después las mascotas (la BD borra en cascada sus
+    datos derivados) y por último los dueños. Retorna las filas por tabla.
+    """
+    pasos = (
+        (Cita, Cita.mascotaId.in_(_mascotasOcultas)),
+        (HistorialClinico, HistorialClinico.mascotaId.in_(_mascotasOcultas)),
+        (Mascota, Mascota.id.in_(_mascotasOcultas)),
+        (Dueno, Dueno.eliminadoEn.is_not(None)),
+    )
+    borradas = {}
+    for modelo, condicion in pasos:
+        borradas[modelo.__tablename__] = 0
+        while True:
+            ids = db.session.execute(
+                db.select(modelo.id).where(condicion).limit(lote), execution_options=INCLUIR_OCULTOS
+            ).scalars().all()
+            if not ids:
+                break
+            db.session.execute(db.delete(modelo).where(modelo.id.in_(ids)), execution_options=PURGA)
+            db.session.commit()
+            borradas[modelo.__tablename__] += len(ids)
+    # Una eliminación diferida pudo ocultar algo mientras tanto: se consulta de nuevo
+    marcarOcultos(None)
+    return borradas
+
+
+class PurgaDiferida:
+    """Hilo de purga del proceso: uno a la vez; si se pide otra mientras corre, repite."""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._activa = False
+        self._repetir = False
+
+    def programar(self, app):
+        with self._bloqueo:
+            if self._activa:
+                self._repetir = True
+                return
+            self._activa = True
+
+        def tarea():
+            while True:
+                try:
+                    with app.app_context():
+                        purgarOcultos(app.config.get("ELIMINACION_LOTE", 1000))
+                except Exception as error:
+                    # Lo pendiente sigue marcado en la BD: lo retoma la próxima purga
+                    print(f"  Purga diferida interrumpida: {error}")
+                with self._bloqueo:
+                    if not self._repetir:
+                        self._activa = False
+                        return
+                    self._repetir = False
+
+        threading.Thread(target=tarea, name="purgaDiferida", daemon=True).start()
+
+
+# Instancia única por proceso
+purgaDiferida = PurgaDiferida()
+
+
+def purgaPendiente(app):
+    """True si quedaron registros ocultos sin purgar (el proceso anterior terminó antes)."""
+    with app.app_context():
+        return hayOcultos(db.session)
+
+
+def reanudarPurga(app):
+    """Retoma en el hilo de purga lo que quedó pendiente al arrancar (python app.py, waitress)."""
+    if not purgaPendiente(app):
+        return False
+    print("  Eliminación diferida: retomando la purga pendiente")
+    purgaDiferida.programar(app)
+    return True
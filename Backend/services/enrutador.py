@@ -0,0 +1,351 @@
+"""
+Enrutamiento de la sesión entre BD primaria, réplicas de lectura y respaldo.
+
+Extiende la conexión dual de config.py:
+    - Primaria (DATABASE_URL): recibe todas las escrituras.
+    - Réplicas (DATABASE_REPLICA_URLS, opcional): las solicitudes GET/HEAD
+      leen de una de ellas (rotando entre las sanas). Cada solicitud usa
+      una sola réplica de principio a fin.
+    - Respaldo (SQLite local, DATABASE_FALLBACK_URL): si la primaria no
+      responde al arrancar, escrituras y lecturas van al respaldo (la
+      conexión dual de siempre). El cambio en caliente, con la aplicación
+      ya corriendo, solo ocurre con BD_RESPALDO_ESCRITURA=1: por defecto una
+      caída de la primaria hace fallar las escrituras en lugar de repartir
+      los datos entre dos BDs.
+
+Lecturas de las propias escrituras:
+    Una réplica va algo atrasada respecto de la primaria. Tras una escritura
+    exitosa se envía la cookie huellitasEscritura con vigencia de
+    BD_LECTURA_PROPIA_SEGUNDOS: mientras exista, los GET de ese cliente leen
+    de la primaria y ven lo que acaba de guardar. Las respuestas cacheadas
+    que se leyeron de una réplica duran como máximo ese mismo tiempo.
+
+Salud:
+    Un hilo por proceso (se inicia con la primera solicitud, así cada
+    worker de gunicorn tiene el suyo) abre una conexión nueva a cada BD y
+    hace SELECT 1 cada BD_SALUD_SEGUNDOS. Una BD se descarta tras
+    FALLOS_PARA_DESCARTAR fallos seguidos y vuelve con la primera respuesta
+    correcta. Con BD_RESPALDO_ESCRITURA=1, al descartarse la primaria las
+    escrituras pasan al respaldo y regresan cuando vuelve; en cada cambio se
+    sincroniza el esquema del destino y se avisa a los suscriptores (cachés
+    e índices en memoria, que son de la otra BD).
+
+    Los datos guardados en el respaldo mientras la primaria estuvo caída
+    quedan en el archivo SQLite: no se copian a la primaria al volver. Por
+    eso el cambio en caliente es opcional.
+
+Fuera de una solicitud (scripts, hilos en segundo plano) todo va a la BD de
+escritura. Sin réplicas ni respaldo el enrutador queda inactivo y la sesión
+se comporta como la de Flask-SQLAlchemy.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.dml import UpdateBase
+from config import Config
+
+# Nombres de los binds de Flask-SQLAlchemy que crea Config.bindsEnrutamiento
+BIND_RESPALDO = "respaldo"
+PREFIJO_REPLICA = "replica"
+
+COOKIE_ESCRITURA = "huellitasEscritura"
+METODOS_LECTURA = ("GET", "HEAD")
+
+# Fallos seguidos del SELECT 1 para dar una BD por caída
+FALLOS_PARA_DESCARTAR = 2
+
+# Funciones que se ejecutan al cambiar la BD de escritura (primaria <-> respaldo)
+_suscriptores = []
+
+# True dentro de leerDelPrimario()
+_forzarPrimario = contextvars.ContextVar("forzarPrimario", default=False)
+
+
+def suscribirCambioDeBd(funcion):
+    """Registra una función sin argumentos que se ejecuta al cambiar la BD de escritura."""
+    _suscriptores.append(funcion)
+    return funcion
+
+
+@contextmanager
+def leerDelPrimario():
+    """Las consultas dentro del bloque leen de la BD de escritura aunque sea un GET."""
+    token = _forzarPrimario.set(True)
+    try:
+        yield
+    finally:
+        _forzarPrimario.reset(token)
+
+
+class _Backend:
+    """Una BD con su motor y su estado de salud."""
+
+    def __init__(self, nombre, motor, descripcion):
+        self.nombre = nombre
+        self.motor = motor
+        self.descripcion = descripcion
+        self.fallosSeguidos = 0
+        self.ultimoError = None
+        self.latenciaMs = None
+        # La verificación abre siempre una conexión nueva (sin pool): una del
+        # pool puede seguir viva aunque ya no se pueda conectar
+        conectar = Config.opcionesMotor(motor.url.render_as_string(hide_password=False))
+        self._motorSalud = create_engine(
+            motor.url, poolclass=NullPool, connect_args=conectar.get("connect_args", {})
+        )
+
+    @property
+    def sano(self):
+        return self.fallosSeguidos < FALLOS_PARA_DESCARTAR
+
+    def marcarCaido(self, error):
+        self.fallosSeguidos = FALLOS_PARA_DESCARTAR
+        self.ultimoError = str(error)
+
+    def verificar(self):
+        """SELECT 1; actualiza el estado y retorna si respondió."""
+        inicio = time.perf_counter()
+        try:
+            with self._motorSalud.connect() as conexion:
+                conexion.exec_driver_sql("SELECT 1")
+        except Exception as error:
+            self.fallosSeguidos += 1
+            self.ultimoError = str(error).splitlines()[0]
+            if not self.sano:
+                # Conexiones del pool a una BD caída: que no las tome ninguna solicitud
+                self.motor.dispose()
+            return False
+        self.latenciaMs = round((time.perf_counter() - inicio) * 1000, 2)
+        self.fallosSeguidos = 0
+        self.ultimoError = None
+        return True
+
+    def comoDict(self):
+        return {
+            "nombre": self.nombre,
+            "tipo": self.descripcion,
+            "sana": self.sano,
+            "latenciaMs": self.latenciaMs,
+            "ultimoError": self.ultimoError
+        }
+
+
+class EnrutadorBd:
+    """Estado del enrutamiento de una aplicación (app.extensions["enrutadorBd"])."""
+
+    def __init__(self, primario, respaldo, replicas, intervaloSalud, ventanaLecturaPropia,
+                 respaldoEscritura=False):
+        self.primario = primario
+        self.respaldo = respaldo
+        self.replicas = replicas
+        self.intervaloSalud = intervaloSalud
+        self.ventanaLecturaPropia = ventanaLecturaPropia
+        # True: las escrituras pasan al respaldo (y vuelven) con la app corriendo
+        self.respaldoEscritura = respaldoEscritura
+        self.enRespaldo = False
+        self._replicasSanas = list(replicas)
+        self._turno = 0
+        self._bloqueo = threading.Lock()
+        self._pidMonitor = None
+
+    @property
+    def activo(self):
+        return self.respaldo is not None or bool(self.replicas)
+
+    # ----- Elección del motor -----
+    def motorEscritura(self):
+        return self.respaldo.motor if self.enRespaldo else self.primario.motor
+
+    def _replicaDeLaSolicitud(self):
+        """
+        Réplica para las lecturas de la solicitud actual, o None si debe leer
+        de la BD de escritura. Se decide una vez por solicitud.
+        """
+        if "replicaBd" in g:
+            return g.replicaBd
+        replica = None
+        if (self._replicasSanas and not self.enRespaldo
+                and request.method in METODOS_LECTURA and not self._escribioHacePoco()):
+            with self._bloqueo:
+                sanas = self._replicasSanas
+                if sanas:
+                    replica = sanas[self._turno % len(sanas)]
+                    self._turno += 1
+        if replica is not None:
+            # La respuesta puede venir atrasada: que la caché no la conserve más
+            # que la ventana de lectura propia
+            g.vigenciaMaximaCache = self.ventanaLecturaPropia
+        g.replicaBd = replica
+        return replica
+
+    def _escribioHacePoco(self):
+        marca = request.cookies.get(COOKIE_ESCRITURA)
+        try:
+            return time.time() - float(marca) < self.ventanaLecturaPropia
+        except (TypeError, ValueError):
+            return False
+
+    def motorPara(self, sesion, clausula):
+        """Motor para una sentencia de la sesión."""
+        if (not self.replicas or sesion._flushing or isinstance(clausula, UpdateBase)
+                or _forzarPrimario.get() or not has_request_context()):
+            return self.motorEscritura()
+        replica = self._replicaDeLaSolicitud()
+        return replica.motor if replica is not None else self.motorEscritura()
+
+    # ----- Salud y cambio de BD -----
+    def verificarSalud(self):
+        """
+        Revisa cada BD y, con respaldoEscritura, cambia entre primaria y
+        respaldo si corresponde.
+        """
+        self.primario.verificar()
+        for replica in self.replicas:
+            replica.verificar()
+        self._replicasSanas = [replica for replica in self.replicas if replica.sano]
+
+        if self.respaldo is None or not self.respaldoEscritura:
+            return
+        if self.enRespaldo and self.primario.sano:
+            self._cambiarA(self.primario, enRespaldo=False)
+        elif not self.enRespaldo and not self.primario.sano:
+            self._cambiarA(self.respaldo, enRespaldo=True)
+
+    def _cambiarA(self, destino, enRespaldo):
+        """Sincroniza el esquema del destino y lo convierte en la BD de escritura."""
+        from services.migraciones import sincronizarEsquema
+
+        try:
+            sincronizarEsquema(destino.motor)
+        except Exception as error:
+            destino.marcarCaido(error)
+            print(f"  Enrutamiento: no se pudo preparar {destino.nombre}: {destino.ultimoError}")
+            return
+        self.enRespaldo = enRespaldo
+        print(f"  Enrutamiento: escrituras en {destino.nombre} ({destino.descripcion})")
+        for funcion in _suscriptores:
+            funcion()
+
+    def usarRespaldo(self, error):
+        """Arranque con la primaria caída: todo va al respaldo hasta que vuelva."""
+        self.primario.marcarCaido(error)
+        self.enRespaldo = True
+
+    def _monitorear(self, app):
+        while True:
+            time.sleep(self.intervaloSalud)
+            try:
+                with app.app_context():
+                    self.verificarSalud()
+            except Exception as error:  # el monitor no debe morir por un fallo puntual
+                print(f"  Enrutamiento: error al verificar la salud de la BD: {error}")
+
+    def asegurarMonitor(self, app):
+        """Inicia el hilo de salud en este proceso (una vez; de nuevo tras un fork)."""
+        if self._pidMonitor == os.getpid():
+            return
+        with self._bloqueo:
+            if self._pidMonitor == os.getpid():
+                return
+            self._pidMonitor = os.getpid()
+        threading.Thread(
+            target=self._monitorear, args=(app,), name="saludBd", daemon=True
+        ).start()
+
+    # ----- Reporte -----
+    def descripcion(self):
+        if self.enRespaldo:
+            return "SQLite (Local - Fallback)"
+        return self.primario.descripcion
+
+    def estado(self):
+        return {
+            "escritura": self.respaldo.nombre if self.enRespaldo else self.primario.nombre,
+            "primaria": self.primario.comoDict(),
+            "respaldo": self.respaldo.comoDict() if self.respaldo else None,
+            "replicas": [replica.comoDict() for replica in self.replicas],
+            "ventanaLecturaPropiaSegundos": self.ventanaLecturaPropia,
+            "respaldoEscritura": self.respaldoEscritura
+        }
+
+
+def enrutadorActual():
+    """Enrutador de la aplicación activa, o None fuera de contexto o sin configurar."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("enrutadorBd")
+
+
+def lecturaEnReplica():
+    """
+    True si las lecturas de la solicitud actual van a una réplica. Si aún no
+    se eligió, la elige ahora (la misma para el resto de la solicitud).
+    """
+    enrutador = enrutadorActual()
+    if enrutador is None or not enrutador.replicas or not has_request_context():
+        return False
+    return enrutador._replicaDeLaSolicitud() is not None
+
+
+class SesionEnrutada(Session):
+    """Sesión de Flask-SQLAlchemy que elige el motor con el enrutador de la app."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            enrutador = enrutadorActual()
+            if enrutador is not None and enrutador.activo:
+                return enrutador.motorPara(self, clause)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _marcarEscritura(respuesta):
+    """Tras una escritura exitosa, el cliente lee de la BD de escritura por un tiempo."""
+    enrutador = enrutadorActual()
+    if (enrutador is not None and enrutador.replicas
+            and request.method not in METODOS_LECTURA + ("OPTIONS",)
+            and respuesta.status_code < 400):
+        respuesta.set_cookie(
+            COOKIE_ESCRITURA, f"{time.time():.3f}",
+            max_age=enrutador.ventanaLecturaPropia, httponly=True, samesite="Lax"
+        )
+    return respuesta
+
+
+def _iniciarMonitor():
+    enrutador = enrutadorActual()
+    if enrutador is not None and enrutador.activo:
+        enrutador.asegurarMonitor(current_app._get_current_object())
+
+
+def configurarEnrutamiento(app, descripcionPrimario):
+    """
+    Crea el enrutador con los motores de la app: el principal y los binds de
+    respaldo y réplicas (ver Config.bindsEnrutamiento). Requiere contexto de app.
+    """
+    from models import db
+
+    motores = db.engines
+    replicas = [
+        _Backend(nombre, motor, "Réplica de lectura")
+        for nombre, motor in sorted(motores.items(), key=lambda par: str(par[0]))
+        if isinstance(nombre, str) and nombre.startswith(PREFIJO_REPLICA)
+    ]
+    respaldo = None
+    if BIND_RESPALDO in motores:
+        respaldo = _Backend(BIND_RESPALDO, motores[BIND_RESPALDO], "SQLite (Local - Fallback)")
+
+    enrutador = EnrutadorBd(
+        _Backend("primaria", motores[None], descripcionPrimario), respaldo, replicas,
+        app.config.get("BD_SALUD_SEGUNDOS", 10), app.config.get("BD_LECTURA_PROPIA_SEGUNDOS", 5),
+        app.config.get("BD_RESPALDO_ESCRITURA", False)
+    )
+    app.extensions["enrutadorBd"] = enrutador
+    app.before_request(_iniciarMonitor)
+    app.after_request(_marcarEscritura)
+    return enrutador
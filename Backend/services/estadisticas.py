@@ -0,0 +1,199 @@
+"""
+Agregados del dashboard calculados en el servidor.
+
+Antes el Frontend descargaba las tablas completas de dueños, mascotas y citas
+solo para contar filas y mostrar las próximas citas. Aquí todo se resuelve en
+UNA sola consulta SQL (UNION ALL) que devuelve:
+    - Totales por tabla y citas programadas
+    - Cantidad de mascotas por especie
+    - Próximas N citas programadas
+    - Agenda del día
+
+El resultado se guarda en caché y se invalida cuando un commit modifica
+alguna de las tablas involucradas (ver services/observador.py). La vigencia
+máxima acota la desactualización entre procesos distintos del servidor.
+"""
+import threading
+import time
+from datetime import date
+from models import db
+from models.dueno import Dueno
+from models.mascota import Mascota
+from models.cita import Cita
+from models.historial import HistorialClinico
+from services.observador import suscribir
+from services.sincronizacion import suscribirCambiosExternos
+
+# Vigencia máxima de una entrada de caché (segundos)
+SEGUNDOS_VIGENCIA = 30
+
+# Tablas cuyos cambios invalidan el dashboard
+TABLAS_DASHBOARD = {"duenos", "mascotas", "citas", "historial_clinico"}
+
+_cache = {}
+_bloqueo = threading.Lock()
+
+
+@suscribir
+def _invalidarCache(tablas):
+    """Limpia la caché si el commit tocó alguna tabla del dashboard."""
+    if tablas & TABLAS_DASHBOARD:
+        with _bloqueo:
+            _cache.clear()
+
+
+@suscribirCambiosExternos
+def _invalidarPorOtroProceso(cambios):
+    _invalidarCache(cambios["tablas"])
+
+
+# =============================================
+# CONSULTA ÚNICA (UNION ALL)
+# =============================================
+def _columnasCitaNulas():
+    """Columnas de cita en NULL (con tipo) para las filas de conteo."""
+    return [
+        db.cast(db.null(), db.Integer).label("id"),
+        db.cast(db.null(), db.Date).label("fecha"),
+        db.cast(db.null(), db.Time).label("hora"),
+        db.cast(db.null(), db.String).label("motivo"),
+        db.cast(db.null(), db.String).label("estado"),
+        db.cast(db.null(), db.Integer).label("mascotaId"),
+        db.cast(db.null(), db.String).label("mascotaNombre"),
+        db.cast(db.null(), db.String).label("duenoNombre"),
+    ]
+
+
+def _filaConteo(seccion, etiqueta, conteo):
+    """SELECT que produce una fila (seccion, etiqueta, cantidad) sin datos de cita."""
+    return db.select(
+        db.literal(seccion, db.String).label("seccion"),
+        db.literal(etiqueta, db.String).label("etiqueta"),
+        conteo.label("cantidad"),
+        *_columnasCitaNulas()
+    )
+
+
+def _filasCitas(seccion, *condiciones, limite=None):
+    """SELECT de citas con nombres de mascota y dueño, envuelto para poder usar LIMIT."""
+    consulta = (
+        db.select(
+            db.literal(seccion, db.String).label("seccion"),
+            db.cast(db.null(), db.String).label("etiqueta"),
+            db.cast(db.null(), db.Integer).label("cantidad"),
+            Cita.id.label("id"),
+            Cita.fecha.label("fecha"),
+            Cita.hora.label("hora"),
+            Cita.motivo.label("motivo"),
+            Cita.estado.label("estado"),
+            Cita.mascotaId.label("mascotaId"),
+            Mascota.nombre.label("mascotaNombre"),
+            (Dueno.nombre + " " + Dueno.apellido).label("duenoNombre"),
+        )
+        .join(Mascota, Cita.mascotaId == Mascota.id)
+        .join(Dueno, Mascota.duenoId == Dueno.id)
+        .where(*condiciones)
+        .order_by(Cita.fecha.asc(), Cita.hora.asc(), Cita.id.asc())
+    )
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    # Algunos motores no permiten ORDER BY/LIMIT dentro de un UNION sin subconsulta
+    return db.select(consulta.subquery())
+
+
+def _consultaDashboard(hoy, limite):
+    """Construye el UNION ALL con todas las secciones del dashboard."""
+    conteo = db.func.count()
+    partes = [
+        _filaConteo("totales", "duenos", db.select(conteo).select_from(Dueno).scalar_subquery()),
+        _filaConteo("totales", "mascotas", db.select(conteo).select_from(Mascota).scalar_subquery()),
+        _filaConteo("totales", "citas", db.select(conteo).select_from(Cita).scalar_subquery()),
+        _filaConteo(
+            "totales", "citasProgramadas",
+            db.select(conteo).select_from(Cita)
+            .where(Cita.estado == "Programada").scalar_subquery()
+        ),
+        _filaConteo(
+            "totales", "historiales",
+            db.select(conteo).select_from(HistorialClinico).scalar_subquery()
+        ),
+        db.select(
+            db.literal("especies", db.String).label("seccion"),
+            Mascota.especie.label("etiqueta"),
+            db.func.count(Mascota.id).label("cantidad"),
+            *_columnasCitaNulas()
+        ).group_by(Mascota.especie),
+        _filasCitas(
+            "proximas", Cita.estado == "Programada", Cita.fecha >= hoy, limite=limite
+        ),
+        _filasCitas("hoy", Cita.fecha == hoy),
+    ]
+    return db.union_all(*partes)
+
+
+def _citaADict(fila):
+    """Mismo formato que Cita.toDict()."""
+    return {
+        "id": fila.id,
+        "fecha": fila.fecha.isoformat(),
+        "hora": fila.hora.strftime("%H:%M"),
+        "motivo": fila.motivo,
+        "estado": fila.estado,
+        "mascotaId": fila.mascotaId,
+        "mascotaNombre": fila.mascotaNombre,
+        "duenoNombre": fila.duenoNombre,
+    }
+
+
+def _claveCita(fila):
+    """Orden de la agenda: fecha, hora e id."""
+    return (fila.fecha, fila.hora, fila.id)
+
+
+def _calcularDashboard(hoy, limite):
+    """Ejecuta la consulta única y agrupa las filas por sección."""
+    filas = db.session.execute(_consultaDashboard(hoy, limite)).all()
+
+    totales = {}
+    especies = []
+    proximas = []
+    agendaHoy = []
+    for fila in filas:
+        if fila.seccion == "totales":
+            totales[fila.etiqueta] = fila.cantidad
+        elif fila.seccion == "especies":
+            especies.append({"especie": fila.etiqueta, "cantidad": fila.cantidad})
+        elif fila.seccion == "proximas":
+            proximas.append(fila)
+        else:
+            agendaHoy.append(fila)
+
+    # UNION ALL no garantiza el orden de las filas: se ordena aquí
+    especies.sort(key=lambda item: (-item["cantidad"], item["especie"]))
+
+    return {
+        "fecha": hoy.isoformat(),
+        "totales": totales,
+        "especies": especies,
+        "proximasCitas": [_citaADict(fila) for fila in sorted(proximas, key=_claveCita)],
+        "agendaHoy": [_citaADict(fila) for fila in sorted(agendaHoy, key=_claveCita)],
+    }
+
+
+def obtenerDashboard(limite):
+    """
+    Retorna los agregados del dashboard, usando la caché si está vigente.
+    La clave incluye la fecha, así la agenda cambia sola al pasar de día.
+    """
+    hoy = date.today()
+    clave = (hoy, limite)
+
+    with _bloqueo:
+        entrada = _cache.get(clave)
+    if entrada and time.monotonic() - entrada[0] < SEGUNDOS_VIGENCIA:
+        return entrada[1]
+
+    datos = _calcularDashboard(hoy, limite)
+    with _bloqueo:
+        _cache[clave] = (time.monotonic(), datos)
+    return datos
@@ -0,0 +1,193 @@
+"""
+Cambios de estado de citas en bloque y marcado de inasistencias.
+
+Problema que resuelve:
+    Cerrar el día era un PUT por cita (SELECT, validación y COMMIT por cada
+    una) y las citas Programadas a las que nadie asistía quedaban así para
+    siempre: seguían apareciendo como pendientes en los listados.
+
+Estrategia:
+    - La regla de cada transición va en el WHERE de un solo UPDATE: estados
+      de origen de TRANSICIONES_CITA (services/validaciones.py), Completada
+      solo hasta hoy y No asistió solo si la hora de la cita ya pasó. La cita
+      que no la cumple no cambia y se informa como omitida.
+    - UPDATE ... RETURNING id (SQLite 3.35+, PostgreSQL; en MySQL se leen
+      los ids antes): los ids se anotan en la agenda con liberarFranjas, así
+      el índice de franjas no se reconstruye.
+    - Las inasistencias se marcan por lotes de INASISTENCIAS_LOTE citas, una
+      transacción por lote, con una pausa entre lotes: en SQLite el bloqueo
+      de escritura dura lo que un lote y las solicitudes escriben entre medio.
+      Las Programadas vencidas se buscan por el índice parcial ux_citas_agenda.
+    - Un hilo por proceso barre cada INASISTENCIAS_INTERVALO_MINUTOS. Con
+      varios workers de gunicorn cada uno tiene el suyo: el UPDATE solo toma
+      citas que siguen Programadas, así que dos barridos no se pisan.
+
+Endpoint: POST /api/citas/estado (routes/citas.py).
+"""
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from models import db
+from models.cita import Cita
+from services.agenda import FRANJAS_ANOTADAS, liberarFranjas
+from services.validaciones import TRANSICIONES_CITA
+
+# Opciones de ejecución de los UPDATE en bloque (la sesión no sincroniza
+# objetos: las solicitudes no cargan citas antes de cambiarlas)
+_OPCIONES = {**FRANJAS_ANOTADAS, "synchronize_session": False}
+
+# Segundos entre lotes del barrido (otras escrituras toman el bloqueo)
+PAUSA_ENTRE_LOTES = 0.05
+
+
+# =============================================
+# CONDICIONES
+# =============================================
+def _yaEmpezo(momento):
+    """Citas cuya fecha y hora son anteriores o iguales a 'momento'."""
+    return db.or_(
+        Cita.fecha < momento.date(),
+        db.and_(Cita.fecha == momento.date(), Cita.hora <= momento.time())
+    )
+
+
+def condicionTransicion(estado, ahora):
+    """Citas que pueden pasar a 'estado' (ver TRANSICIONES_CITA)."""
+    condicion = Cita.estado.in_(TRANSICIONES_CITA[estado])
+    if estado == "Completada":
+        condicion = db.and_(condicion, Cita.fecha <= ahora.date())
+    elif estado == "No asistió":
+        condicion = db.and_(condicion, _yaEmpezo(ahora))
+    return condicion
+
+
+# =============================================
+# UPDATE EN BLOQUE
+# =============================================
+def _actualizarEstado(condicion, estado, limite=None):
+    """
+    Un UPDATE de las citas que cumplen la condición (las 'limite' más
+    antiguas, si se indica). Retorna sus ids y los anota en la agenda.
+    """
+    sentencia = db.update(Cita).values(estado=estado)
+    seleccion = db.select(Cita.id).where(condicion)
+    if limite is not None:
+        seleccion = seleccion.order_by(Cita.fecha, Cita.hora).limit(limite)
+
+    if db.session.get_bind().dialect.update_returning:
+        objetivo = Cita.id.in_(seleccion) if limite is not None else condicion
+        ids = db.session.execute(
+            sentencia.where(objetivo).returning(Cita.id), execution_options=_OPCIONES
+        ).scalars().all()
+    else:
+        # Sin RETURNING (MySQL): los ids primero; la condición se repite por
+        # si otra transacción cambió alguna cita en medio
+        ids = db.session.execute(seleccion).scalars().all()
+        if ids:
+            db.session.execute(sentencia.where(Cita.id.in_(ids), condicion), execution_options=_OPCIONES)
+
+    liberarFranjas(db.session, ids)
+    return ids
+
+
+def transicionarCitas(valores, ahora=None):
+    """
+    Aplica el cambio de estado validado por validarTransicionCitas y confirma.
+    Retorna cuántas citas coincidieron con el filtro (por estado), cuántas
+    cambiaron y cuántas se omitieron por no admitir la transición.
+    """
+    ahora = ahora or datetime.now()
+    estado = valores["estado"]
+    filtro = []
+    if valores["ids"] is not None:
+        filtro.append(Cita.id.in_(valores["ids"]))
+    if valores["desde"] is not None:
+        filtro.append(Cita.fecha >= valores["desde"])
+    if valores["hasta"] is not None:
+        filtro.append(Cita.fecha <= valores["hasta"])
+    if valores["mascotaId"] is not None:
+        filtro.append(Cita.mascotaId == valores["mascotaId"])
+    if valores["estadoActual"] is not None:
+        filtro.append(Cita.estado == valores["estadoActual"])
+
+    porEstado = dict(db.session.execute(
+        db.select(Cita.estado, db.func.count()).where(*filtro).group_by(Cita.estado)
+    ).all())
+    ids = _actualizarEstado(db.and_(*filtro, condicionTransicion(estado, ahora)), estado)
+    db.session.commit()
+
+    coincidentes = sum(porEstado.values())
+    resumen = {
+        "estado": estado,
+        "coincidentes": coincidentes,
+        "actualizadas": len(ids),
+        "omitidas": max(coincidentes - len(ids), 0),
+        "porEstado": porEstado
+    }
+    if valores["ids"] is not None:
+        resumen["noEncontradas"] = max(len(valores["ids"]) - coincidentes, 0)
+    return resumen
+
+
+# =============================================
+# BARRIDO DE INASISTENCIAS
+# =============================================
+def barrerInasistencias(gracia=60, lote=500, ahora=None):
+    """
+    Marca 'No asistió' las citas Programadas cuya hora pasó hace más de
+    'gracia' minutos, por lotes de 'lote' citas (un COMMIT por lote).
+    Retorna cuántas marcó.
+    """
+    vencimiento = (ahora or datetime.now()) - timedelta(minutes=gracia)
+    condicion = db.and_(Cita.estado == "Programada", _yaEmpezo(vencimiento))
+    total = 0
+    while True:
+        ids = _actualizarEstado(condicion, "No asistió", limite=lote)
+        db.session.commit()
+        total += len(ids)
+        if len(ids) < lote:
+            return total
+        time.sleep(PAUSA_ENTRE_LOTES)
+
+
+class BarredorInasistencias:
+    """Hilo del proceso que barre las inasistencias cada cierto intervalo."""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._hilo = None
+
+    def iniciar(self, app):
+        """Inicia el hilo (una vez por proceso). Retorna None si está desactivado."""
+        intervalo = app.config.get("INASISTENCIAS_INTERVALO_MINUTOS", 0) * 60
+        if intervalo <= 0:
+            return None
+        with self._bloqueo:
+            if self._hilo is not None:
+                return self._hilo
+
+            def tarea():
+                # Primer barrido al minuto de arrancar, escalonado entre workers
+                time.sleep(random.uniform(1, min(intervalo, 60)))
+                while True:
+                    try:
+                        with app.app_context():
+                            marcadas = barrerInasistencias(
+                                app.config.get("INASISTENCIAS_GRACIA_MINUTOS", 60),
+                                app.config.get("INASISTENCIAS_LOTE", 500)
+                            )
+                        if marcadas:
+                            print(f"  Inasistencias: {marcadas} citas marcadas 'No asistió'")
+                    except Exception as error:
+                        # Lo que quedó Programado se marca en el próximo barrido
+                        print(f"  Barrido de inasistencias interrumpido: {error}")
+                    time.sleep(intervalo)
+
+            self._hilo = threading.Thread(target=tarea, name="barredorInasistencias", daemon=True)
+            self._hilo.start()
+            return self._hilo
+
+
+# Instancia única por proceso
+barredorInasistencias = BarredorInasistencias()
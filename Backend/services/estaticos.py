@@ -0,0 +1,104 @@
+"""
+Entrega de los archivos del Frontend.
+
+Con el Frontend empaquetado (python empaquetar.py, que genera Frontend/dist/):
+    - Un solo JS y un solo CSS minificados, con el hash del contenido en el
+      nombre (app.3f2a91c0.js): se sirven con Cache-Control immutable por un
+      año, porque cualquier cambio produce otro nombre.
+    - index.html y admin.html apuntan a esos nombres y se sirven con
+      Cache-Control no-cache (el navegador revalida con ETag y recibe 304).
+    - Cada archivo tiene variantes .br y .gz comprimidas de antemano: se elige
+      la mejor según Accept-Encoding, sin comprimir nada por solicitud.
+
+Sin Frontend/dist (o con FLASK_DEBUG=1) se sirven los archivos fuente tal
+cual, para que los cambios se vean al recargar durante el desarrollo.
+"""
+import json
+import mimetypes
+import os
+from flask import current_app, request, send_file, send_from_directory, abort
+from werkzeug.security import safe_join
+
+DIRECTORIO_FRONTEND = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Frontend")
+)
+DIRECTORIO_DIST = os.path.join(DIRECTORIO_FRONTEND, "dist")
+ARCHIVO_MANIFIESTO = "manifest.json"
+
+# Codificaciones precomprimidas en orden de preferencia: (Content-Encoding, extensión)
+CODIFICACIONES = (("br", ".br"), ("gzip", ".gz"))
+
+# Un año: el nombre cambia con el contenido, así que nunca queda desactualizado
+MAX_AGE_INMUTABLE = 31536000
+
+_manifiesto = {"mtime": None, "datos": None}
+
+
+def leerManifiesto():
+    """
+    Manifiesto del último empaquetado ({"paginas": {...}, "inmutables": {...}})
+    o None si no hay Frontend/dist. Se vuelve a leer si el archivo cambia.
+    """
+    ruta = os.path.join(DIRECTORIO_DIST, ARCHIVO_MANIFIESTO)
+    try:
+        mtime = os.path.getmtime(ruta)
+    except OSError:
+        return None
+    if _manifiesto["mtime"] != mtime:
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        datos["inmutables"] = set(datos["inmutables"])
+        _manifiesto.update(mtime=mtime, datos=datos)
+    return _manifiesto["datos"]
+
+
+def _codificacionAceptada(ruta):
+    """(Content-Encoding, ruta de la variante) que el cliente acepta y existe, o None."""
+    aceptadas = request.accept_encodings
+    for codificacion, extension in CODIFICACIONES:
+        variante = ruta + extension
+        if aceptadas[codificacion] > 0 and os.path.isfile(variante):
+            return codificacion, variante
+    return None
+
+
+def _servirEmpaquetado(nombre, manifiesto):
+    """Sirve un archivo de dist eligiendo la variante comprimida."""
+    ruta = safe_join(DIRECTORIO_DIST, nombre)
+    if ruta is None or not os.path.isfile(ruta):
+        return None
+
+    mimetype = mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+    inmutable = nombre in manifiesto["inmutables"]
+    variante = _codificacionAceptada(ruta)
+
+    respuesta = send_file(
+        variante[1] if variante else ruta,
+        mimetype=mimetype,
+        conditional=True,
+        max_age=MAX_AGE_INMUTABLE if inmutable else 0
+    )
+    if variante:
+        respuesta.headers["Content-Encoding"] = variante[0]
+    respuesta.vary.add("Accept-Encoding")
+    respuesta.cache_control.public = True
+    if inmutable:
+        respuesta.cache_control.immutable = True
+    else:
+        respuesta.cache_control.no_cache = True
+    return respuesta
+
+
+def servirFrontend(nombre):
+    """
+    Respuesta para un archivo del Frontend: la versión empaquetada si existe
+    (y no se está en modo debug) o el archivo fuente.
+    """
+    manifiesto = None if current_app.debug else leerManifiesto()
+    if manifiesto is not None:
+        respuesta = _servirEmpaquetado(nombre, manifiesto)
+        if respuesta is not None:
+            return respuesta
+    if nombre.startswith("dist/"):
+        abort(404)
+    return send_from_directory(DIRECTORIO_FRONTEND, nombre)
@@ -0,0 +1,169 @@
+"""
+Publicación de eventos en vivo (SSE) al confirmar cada transacción.
+
+Problema que resuelve:
+    Con /api/cambios el Frontend sabe qué cambió, pero solo cuando pregunta.
+    Con este módulo cada commit que avanza el contador de cambios (ver
+    services/cambios.py) publica un evento 'cambios' al hub SSE
+    (services/hubEventos.py), que lo reenvía a todos los navegadores abiertos.
+
+Contenido del evento:
+    El mismo JSON que /api/cambios?since=<versión anterior>: las filas
+    nuevas o modificadas con los campos de los listados y los ids eliminados
+    por esa transacción. El cliente lo aplica a sus listados sin pedir nada
+    a la API. Si el cuerpo pasa de DATOS_MAXIMOS (importación masiva) se
+    envía {"token": n, "sincronizar": true} y el cliente llama a /api/cambios.
+
+Cuándo se arma:
+    - before_commit (después del de services/cambios.py, que se importa
+      antes): solo se anotan la versión que tomó la transacción y sus
+      tablas, sin consultas; el commit no espera al evento.
+    - after_commit: la versión pasa a un hilo del proceso que arma el cuerpo
+      (leyendo de la BD de escritura) y envía el datagrama UDP, en el orden
+      de los commits. Si el hub no está corriendo se pierde sin error; el
+      cliente se pone al día con /api/cambios. after_rollback lo descarta.
+    - Con EVENTOS_PUERTO=0 (por defecto) no se hace nada de esto.
+
+Mismo esquema de eventos que services/observador.py y services/cambios.py.
+"""
+import os
+import queue
+import socket
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.cambios import Eliminacion
+from services.cambios import (
+    TABLAS_VERSIONADAS, cambiosDesde, codificarCambios, tablasDeLaVersion, versionTomada
+)
+from services.enrutador import leerDelPrimario
+from services.hubEventos import formatoDatagrama
+from services.serializacion import codificarObjeto
+
+# Nombre del evento SSE
+EVENTO_CAMBIOS = "cambios"
+
+# Datos máximos por datagrama (macOS no envía datagramas UDP de más de 9216
+# bytes; se deja margen para la cabecera) y filas a partir de las cuales ni
+# se intenta armar el cuerpo
+DATOS_MAXIMOS = 8000
+FILAS_MAXIMAS = 50
+
+# Eventos en espera de armarse; si el hilo se atrasa tanto, se descartan
+# (el cliente nota el salto de versión y pide /api/cambios)
+EVENTOS_EN_COLA = 1000
+
+# Clave en session.info: (versión, tablas) del evento por publicar tras el commit
+_CLAVE_EVENTO = "eventoPendiente"
+
+# Dirección del hub (la define configurarEventos al crear la app) y socket
+# UDP del proceso, creado en el primer envío
+_destino = None
+_socket = None
+
+
+def configurarEventos(app):
+    """Activa la publicación hacia el hub en 127.0.0.1:EVENTOS_PUERTO (0 la desactiva)."""
+    global _destino
+    puerto = app.config.get("EVENTOS_PUERTO", 0)
+    _destino = ("127.0.0.1", puerto) if puerto else None
+    return _destino
+
+
+def _enviar(datagrama):
+    global _socket
+    if _socket is None:
+        _socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _socket.setblocking(False)
+    try:
+        _socket.sendto(datagrama, _destino)
+    except OSError:
+        pass  # hub detenido o búfer lleno: el cliente se pone al día con /api/cambios
+
+
+def _filasDeLaVersion(version, tablas):
+    """Filas y marcas escritas con esa versión (conteos por el índice de 'version')."""
+    modelos = [TABLAS_VERSIONADAS[tabla][0] for tabla in tablas if tabla in TABLAS_VERSIONADAS]
+    if Eliminacion.__tablename__ in tablas:
+        modelos.append(Eliminacion)
+    return sum(
+        db.session.execute(
+            db.select(db.func.count()).select_from(modelo).where(modelo.version == version)
+        ).scalar()
+        for modelo in modelos
+    )
+
+
+def datosEvento(version, tablas):
+    """
+    JSON del evento de la versión indicada (solo lee las tablas que escribió).
+    Una transacción grande (importación, seed.py) solo avisa que hay que
+    sincronizar: no se arma un cuerpo que no entraría en el datagrama.
+    """
+    if _filasDeLaVersion(version, tablas) <= FILAS_MAXIMAS:
+        datos = codificarCambios(*cambiosDesde(version - 1, tablas, version))
+        if len(datos) <= DATOS_MAXIMOS:
+            return datos
+    return codificarObjeto({"token": version, "sincronizar": True})
+
+
+class PublicadorEventos:
+    """Hilo del proceso que arma y envía los eventos, uno por commit y en orden."""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self._cola = None
+        self._pid = None
+
+    def publicar(self, app, version, tablas):
+        """Encola el evento (inicia el hilo la primera vez; de nuevo tras un fork)."""
+        if self._pid != os.getpid():
+            with self._bloqueo:
+                if self._pid != os.getpid():
+                    self._cola = queue.Queue(EVENTOS_EN_COLA)
+                    threading.Thread(
+                        target=self._publicar, args=(self._cola,), name="publicadorEventos", daemon=True
+                    ).start()
+                    self._pid = os.getpid()
+        try:
+            self._cola.put_nowait((app, version, tablas))
+        except queue.Full:
+            pass
+
+    def _publicar(self, cola):
+        while True:
+            app, version, tablas = cola.get()
+            try:
+                with app.app_context(), leerDelPrimario():
+                    datos = datosEvento(version, tablas)
+                _enviar(formatoDatagrama(version, EVENTO_CAMBIOS, datos))
+            except Exception as error:  # el hilo no debe morir por un evento
+                print(f"  Eventos: no se pudo publicar la versión {version}: {error}")
+
+
+# Instancia única por proceso
+publicadorEventos = PublicadorEventos()
+
+
+@event.listens_for(Session, "before_commit")
+def _prepararEvento(sesion):
+    """Anota la versión y las tablas de la transacción (ya las tomó services/cambios.py)."""
+    if _destino is None or not has_app_context() or sesion is not db.session():
+        return
+    version = versionTomada(sesion)
+    if version is not None:
+        sesion.info[_CLAVE_EVENTO] = (version, tablasDeLaVersion(sesion))
+
+
+@event.listens_for(Session, "after_commit")
+def _publicarEvento(sesion):
+    evento = sesion.info.pop(_CLAVE_EVENTO, None)
+    if evento is not None and _destino is not None:
+        publicadorEventos.publicar(current_app._get_current_object(), *evento)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartarEvento(sesion):
+    sesion.info.pop(_CLAVE_EVENTO, None)
@@ -0,0 +1,102 @@
+"""
+Exportación en streaming de tablas completas (panel de administración).
+
+En lugar de cargar todos los objetos ORM y armar una lista gigante en memoria,
+se lee la tabla con un cursor del lado del servidor (yield_per / stream_results)
+y cada fila se envía al cliente apenas se lee. La memoria usada es constante
+sin importar cuántos registros tenga la tabla.
+
+Formatos soportados:
+    - ndjson: un objeto JSON por línea (application/x-ndjson)
+    - csv:    encabezado + una fila por registro (text/csv)
+
+Funciona igual con SQLite (el cursor de sqlite3 ya es incremental) y con los
+motores en la nube (PostgreSQL/MySQL/SQL Server usan cursores de servidor).
+
+Se seleccionan los atributos del modelo (no la tabla de Core) para que la
+consulta reciba los criterios del ORM: los registros en eliminación diferida
+no se exportan (services/eliminacion.py).
+"""
+import csv
+import io
+import json
+from flask import Response, stream_with_context
+from models import db
+
+# Filas que se piden al cursor en cada bloque
+TAMANO_BLOQUE = 1000
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _valorTexto(valor):
+    """Mismo criterio que el volcado JSON del panel: todo como texto, NULL como None."""
+    return str(valor) if valor is not None else None
+
+
+def _atributos(modelo):
+    """Atributos del modelo, uno por columna de la tabla y en su orden."""
+    return [getattr(modelo, atributo.key) for atributo in db.inspect(modelo).column_attrs]
+
+
+def _filasEnStreaming(modelo):
+    """Itera las filas del modelo usando un cursor del lado del servidor."""
+    consulta = db.select(*_atributos(modelo)).execution_options(
+        stream_results=True,
+        yield_per=TAMANO_BLOQUE
+    )
+    resultado = db.session.execute(consulta)
+    try:
+        for bloque in resultado.partitions():
+            yield from bloque
+    finally:
+        resultado.close()
+
+
+def _generarNdjson(modelo, columnas):
+    """Genera una línea JSON por registro."""
+    for fila in _filasEnStreaming(modelo):
+        registro = {
+            columna: _valorTexto(valor)
+            for columna, valor in zip(columnas, fila)
+        }
+        yield json.dumps(registro, ensure_ascii=False) + "\n"
+
+
+def _generarCsv(modelo, columnas):
+    """Genera el encabezado y luego las filas en formato CSV, por bloques."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+
+    for indice, fila in enumerate(_filasEnStreaming(modelo), start=1):
+        escritor.writerow(["" if valor is None else valor for valor in fila])
+        # Vaciar el buffer cada bloque para mantener la memoria acotada
+        if indice % TAMANO_BLOQUE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def exportarTabla(modelo, formato):
+    """
+    Retorna una respuesta Flask que transmite la tabla del modelo en el formato indicado.
+    El formato debe ser una de las claves de FORMATOS.
+    """
+    tabla = modelo.__table__
+    columnas = [atributo.columns[0].name for atributo in db.inspect(modelo).column_attrs]
+    generador = _generarNdjson if formato == "ndjson" else _generarCsv
+
+    respuesta = Response(
+        stream_with_context(generador(modelo, columnas)),
+        mimetype=FORMATOS[formato]
+    )
+    respuesta.headers["Content-Disposition"] = (
+        f"attachment; filename={tabla.name}.{formato}"
+    )
+    return respuesta
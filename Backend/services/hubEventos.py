@@ -0,0 +1,309 @@
+"""
+Hub de eventos en vivo (Server-Sent Events).
+
+Problema que resuelve:
+    Las pantallas de recepción y consultorio consultaban la API cada pocos
+    segundos para ver citas y registros nuevos. Con SSE el servidor avisa
+    cuando algo cambia, pero cada conexión queda abierta: servirla desde
+    Flask ocuparía un hilo de gunicorn por pantalla conectada.
+
+Estrategia:
+    - Un solo hilo con un bucle asyncio atiende todas las conexiones SSE
+      (una conexión inactiva es un objeto Protocol y un socket, sin hilo).
+    - Los procesos de la aplicación publican cada evento como un datagrama
+      UDP a 127.0.0.1 en el mismo puerto (services/eventos.py), sin esperar
+      ni bloquearse; el hub lo reenvía a todos los clientes.
+    - Guarda los últimos eventos para reenviarlos a quien se reconecta con
+      Last-Event-ID. Un cliente que no lee (búfer de salida lleno) se
+      desconecta; el navegador se reconecta solo.
+    - Cada LATIDO segundos envía un comentario para que proxies y
+      navegadores no cierren la conexión inactiva.
+
+Endpoints del hub (puerto EVENTOS_PUERTO; la app redirige /api/eventos aquí):
+    GET /api/eventos   - Flujo text/event-stream
+    GET /estado        - Clientes conectados y eventos difundidos (JSON)
+
+Solo usa la biblioteca estándar. Con python app.py o waitress corre en un
+hilo del mismo proceso; con gunicorn, en un proceso aparte que inicia
+gunicorn.conf.py. Ejecución independiente (desde la carpeta Backend):
+    python -m services.hubEventos
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Límites por defecto (ver EVENTOS_* en config.py)
+LATIDO_SEGUNDOS = 15
+MAX_CLIENTES = 2000
+EVENTOS_GUARDADOS = 256
+
+# Bytes pendientes de enviar a un cliente antes de desconectarlo
+BUFFER_MAXIMO = 256 * 1024
+
+# Tamaño máximo de la cabecera HTTP de una solicitud
+CABECERA_MAXIMA = 8192
+
+_RESPUESTA_SSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"X-Accel-Buffering: no\r\n"
+    b"\r\n"
+    b"retry: 3000\n\n"
+)
+
+
+def _respuestaSimple(estado, cuerpo, tipo="application/json"):
+    return (
+        f"HTTP/1.1 {estado}\r\nContent-Type: {tipo}\r\nContent-Length: {len(cuerpo)}\r\n"
+        f"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n"
+    ).encode("ascii") + cuerpo
+
+
+def formatoDatagrama(identificador, nombre, datos):
+    """Datagrama de publicación: '<id> <evento>\\n<datos JSON en una línea>'."""
+    return b"%d %s\n%s" % (identificador, nombre.encode("ascii"), datos)
+
+
+class _ConexionSse(asyncio.Protocol):
+    """Una conexión HTTP: lee la solicitud y, si es SSE, queda suscrita al hub."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.transporte = None
+        self.recibido = b""
+        self.suscrita = False
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def data_received(self, datos):
+        if self.suscrita:
+            return  # el cliente SSE no envía nada más
+        self.recibido += datos
+        if b"\r\n\r\n" in self.recibido:
+            self.hub._atender(self, self.recibido)
+        elif len(self.recibido) > CABECERA_MAXIMA:
+            self.transporte.close()
+
+    def connection_lost(self, error):
+        self.hub._clientes.discard(self)
+
+
+class _ReceptorPublicaciones(asyncio.DatagramProtocol):
+    """Recibe los eventos publicados por los procesos de la aplicación."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def datagram_received(self, datos, direccion):
+        self.hub._recibirPublicacion(datos)
+
+
+class HubEventos:
+    """
+    Difusión de eventos SSE a todas las conexiones abiertas desde un solo hilo.
+
+    Atributos:
+        host, puerto      - Donde escucha (TCP para los clientes, UDP en
+                            127.0.0.1 para las publicaciones)
+        latido            - Segundos entre comentarios de mantenimiento
+        maxClientes       - Conexiones SSE simultáneas admitidas
+    """
+
+    def __init__(self, host="0.0.0.0", puerto=5001, latido=LATIDO_SEGUNDOS,
+                 maxClientes=MAX_CLIENTES, guardados=EVENTOS_GUARDADOS):
+        self.host = host
+        self.puerto = puerto
+        self.latido = latido
+        self.maxClientes = maxClientes
+        self._clientes = set()
+        self._recientes = deque(maxlen=guardados)  # (id, trama)
+        self._bucle = None
+        self._servidor = None
+        self._receptor = None
+        self.difundidos = 0
+        self.descartados = 0
+        self.inicio = time.time()
+
+    # ----- Solicitudes HTTP -----
+    def _atender(self, conexion, solicitud):
+        lineas = solicitud.split(b"\r\n\r\n", 1)[0].decode("latin-1").split("\r\n")
+        partes = lineas[0].split(" ")
+        cabeceras = {}
+        for linea in lineas[1:]:
+            nombre, _, valor = linea.partition(":")
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        metodo = partes[0]
+        ruta = partes[1].split("?", 1)[0] if len(partes) > 1 else ""
+
+        if metodo == "GET" and ruta == "/api/eventos":
+            if len(self._clientes) >= self.maxClientes:
+                conexion.transporte.write(_respuestaSimple(
+                    "503 Service Unavailable", b'{"error":"Demasiados clientes conectados"}'
+                ))
+                conexion.transporte.close()
+                return
+            conexion.suscrita = True
+            conexion.recibido = b""
+            conexion.transporte.write(_RESPUESTA_SSE + self._pendientesDesde(cabeceras.get("last-event-id")))
+            self._clientes.add(conexion)
+        elif metodo == "OPTIONS":
+            # Preflight CORS: el Frontend se sirve desde otro puerto
+            conexion.transporte.write(
+                b"HTTP/1.1 204 No Content\r\nAccess-Control-Allow-Origin: *\r\n"
+                b"Access-Control-Allow-Methods: GET\r\n"
+                b"Access-Control-Allow-Headers: Last-Event-ID, Cache-Control\r\n"
+                b"Access-Control-Max-Age: 86400\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+            )
+            conexion.transporte.close()
+        elif metodo == "GET" and ruta == "/estado":
+            conexion.transporte.write(_respuestaSimple("200 OK", json.dumps(self.estado()).encode("ascii")))
+            conexion.transporte.close()
+        else:
+            conexion.transporte.write(_respuestaSimple("404 Not Found", b'{"error":"Ruta no encontrada"}'))
+            conexion.transporte.close()
+
+    def _pendientesDesde(self, ultimo):
+        """Eventos guardados posteriores a Last-Event-ID (el cliente se reconectó)."""
+        try:
+            ultimo = int(ultimo)
+        except (TypeError, ValueError):
+            return b""
+        return b"".join(trama for identificador, trama in self._recientes if identificador > ultimo)
+
+    # ----- Difusión -----
+    def _recibirPublicacion(self, datos):
+        cabecera, _, cuerpo = datos.partition(b"\n")
+        try:
+            identificador, nombre = cabecera.split(b" ", 1)
+            identificador = int(identificador)
+        except ValueError:
+            return
+        trama = b"id: %d\nevent: %s\ndata: %s\n\n" % (identificador, nombre, cuerpo)
+        self._recientes.append((identificador, trama))
+        self._difundir(trama)
+        self.difundidos += 1
+
+    def _difundir(self, trama):
+        for conexion in list(self._clientes):
+            transporte = conexion.transporte
+            if transporte.get_write_buffer_size() > BUFFER_MAXIMO:
+                # No lee lo que se le envía: se corta y el navegador se reconecta
+                self._clientes.discard(conexion)
+                transporte.abort()
+                self.descartados += 1
+            else:
+                transporte.write(trama)
+
+    def _latir(self):
+        self._difundir(b":\n\n")
+        self._bucle.call_later(self.latido, self._latir)
+
+    def estado(self):
+        """Resumen para diagnóstico y benchmarks."""
+        return {
+            "clientes": len(self._clientes),
+            "difundidos": self.difundidos,
+            "descartados": self.descartados,
+            "ultimoId": self._recientes[-1][0] if self._recientes else None,
+            "segundosActivo": round(time.time() - self.inicio, 1)
+        }
+
+    # ----- Ciclo de vida -----
+    async def _abrir(self):
+        self._bucle = asyncio.get_running_loop()
+        self._servidor = await self._bucle.create_server(
+            lambda: _ConexionSse(self), self.host, self.puerto, reuse_address=True, backlog=1024
+        )
+        self._receptor, _ = await self._bucle.create_datagram_endpoint(
+            lambda: _ReceptorPublicaciones(self), local_addr=("127.0.0.1", self.puerto)
+        )
+        self._bucle.call_later(self.latido, self._latir)
+
+    async def _servir(self):
+        await self._abrir()
+        await asyncio.Event().wait()
+
+    def ejecutar(self):
+        """Atiende en el hilo actual hasta que se interrumpa (proceso dedicado)."""
+        asyncio.run(self._servir())
+
+    def iniciarEnHilo(self):
+        """
+        Atiende en un hilo de fondo del proceso actual. Retorna cuando ya
+        escucha; lanza OSError si el puerto está ocupado.
+        """
+        listo = threading.Event()
+        errores = []
+
+        def correr():
+            bucle = asyncio.new_event_loop()
+            try:
+                bucle.run_until_complete(self._abrir())
+            except OSError as error:
+                errores.append(error)
+                listo.set()
+                bucle.close()
+                return
+            listo.set()
+            bucle.run_forever()
+
+        threading.Thread(target=correr, name="hubEventos", daemon=True).start()
+        listo.wait()
+        if errores:
+            raise errores[0]
+        return self
+
+
+def hubDesdeConfiguracion():
+    """HubEventos con los valores de config.py (EVENTOS_*), o None si está desactivado."""
+    from config import Config
+    if not Config.EVENTOS_PUERTO:
+        return None
+    return HubEventos(
+        host=Config.EVENTOS_HOST, puerto=Config.EVENTOS_PUERTO,
+        latido=Config.EVENTOS_LATIDO_SEGUNDOS, maxClientes=Config.EVENTOS_MAX_CLIENTES
+    )
+
+
+def iniciarHubLocal():
+    """
+    Inicia el hub en un hilo de este proceso (python app.py, waitress).
+    Si el puerto ya está ocupado (otro proceso ya tiene el hub, por ejemplo
+    el recargador de Flask) solo avisa: las publicaciones llegan a ese hub.
+    """
+    hub = hubDesdeConfiguracion()
+    if hub is None:
+        return None
+    try:
+        hub.iniciarEnHilo()
+    except OSError as error:
+        print(f"  Eventos: no se inició el hub en el puerto {hub.puerto} ({error.strerror})")
+        return None
+    print(f"  Eventos en vivo (SSE): puerto {hub.puerto}")
+    return hub
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    hub = hubDesdeConfiguracion()
+    if hub is None:
+        print("  Eventos desactivados (EVENTOS_PUERTO=0)")
+        return 0
+    print(f"  Hub de eventos (SSE) en {hub.host}:{hub.puerto}")
+    try:
+        hub.ejecutar()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Importación masiva de dueños, mascotas, citas e historial clínico.
+
+Pensada para migrar datos heredados (cientos de miles de filas) sin hacer un
+POST y un COMMIT por registro. Los registros se procesan en lotes:
+    1. Cada fila se valida con las mismas reglas del POST (services/validaciones.py)
+    2. Las llaves foráneas se verifican con UNA consulta por lote
+       (SELECT id ... WHERE id IN (...)) en lugar de un Query.get por fila
+    3. El documento único de los dueños se verifica igual, por lote, y también
+       contra las filas anteriores de la misma importación. Las citas
+       Programadas pasan además por las reglas de la agenda (services/agenda.py)
+    4. Las filas válidas se insertan con un único INSERT ejecutado como
+       executemany y se confirma el lote (una transacción por lote)
+
+Un lote confirmado no se deshace si uno posterior falla: la respuesta indica
+qué filas se insertaron y cuáles se rechazaron y por qué. Una línea NDJSON o
+CSV ilegible es un error de su fila. Si la lectura se corta a mitad de la
+entrada (por ejemplo, bytes que no son UTF-8) se responde 400 con el mismo
+resumen: lo que ya se insertó y hasta qué fila se leyó.
+
+Formatos de entrada:
+    json    - Arreglo JSON de objetos
+    ndjson  - Un objeto JSON por línea (se lee en streaming)
+    csv     - Encabezado con los nombres de los campos (se lee en streaming)
+"""
+import csv
+import io
+import json
+from itertools import islice
+from flask import request, jsonify
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.dueno import Dueno
+from models.mascota import Mascota
+from models.cita import Cita
+from models.historial import HistorialClinico
+from services.validaciones import (
+    ErrorValidacion, validarDueno, validarMascota, validarCita, validarRegistro
+)
+from services.agenda import verificarAgendaLote
+from services.eliminacion import INCLUIR_OCULTOS
+
+# Formatos aceptados y su tipo MIME
+FORMATOS_IMPORTACION = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Filas por lote: una transacción y un executemany por lote.
+# 1000 también mantiene el IN (...) por debajo del límite de parámetros de SQL Server.
+TAMANO_LOTE = 1000
+
+# Máximo de errores detallados en la respuesta (el conteo total siempre es exacto)
+MAX_ERRORES = 1000
+
+
+class ImportacionInterrumpida(ValueError):
+    """La entrada dejó de poder leerse a mitad de la importación. Incluye el resumen hasta ahí."""
+
+    def __init__(self, mensaje, resumen):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.resumen = resumen
+
+
+class Importacion:
+    """
+    Describe cómo importar un recurso.
+
+    Atributos:
+        modelo       - Modelo SQLAlchemy destino
+        validar      - Función de services/validaciones.py
+        llaveForanea - (campo, modelo padre, mensaje) o None
+        campoUnico   - (campo, mensaje) del valor que no puede repetirse, o None
+        admiteHistorico - Si acepta fechas pasadas con ?historico=1 (citas)
+        verificarLote   - Reglas adicionales por lote (validas, errores, historico)
+                          -> filas aceptadas, o None
+    """
+
+    def __init__(self, modelo, validar, llaveForanea=None, campoUnico=None,
+                 admiteHistorico=False, verificarLote=None):
+        self.modelo = modelo
+        self.validar = validar
+        self.llaveForanea = llaveForanea
+        self.campoUnico = campoUnico
+        self.admiteHistorico = admiteHistorico
+        self.verificarLote = verificarLote
+
+
+IMPORTACION_DUENOS = Importacion(
+    Dueno, validarDueno,
+    campoUnico=("documento", "Ya existe un dueño con ese documento")
+)
+
+IMPORTACION_MASCOTAS = Importacion(
+    Mascota, validarMascota,
+    llaveForanea=("duenoId", Dueno, "El dueño especificado no existe")
+)
+
+IMPORTACION_CITAS = Importacion(
+    Cita, validarCita,
+    llaveForanea=("mascotaId", Mascota, "La mascota especificada no existe"),
+    admiteHistorico=True,
+    verificarLote=verificarAgendaLote
+)
+
+IMPORTACION_HISTORIAL = Importacion(
+    HistorialClinico, validarRegistro,
+    llaveForanea=("mascotaId", Mascota, "La mascota especificada no existe")
+)
+
+IMPORTACIONES = {
+    "duenos": IMPORTACION_DUENOS,
+    "mascotas": IMPORTACION_MASCOTAS,
+    "citas": IMPORTACION_CITAS,
+    "historial": IMPORTACION_HISTORIAL
+}
+
+
+# =============================================
+# LECTURA DE LA ENTRADA
+# =============================================
+def leerRegistros(flujo, formato):
+    """
+    Genera (numeroFila, datos) desde un flujo binario. La fila 1 es el primer
+    registro (en CSV, la primera línea después del encabezado).
+    Una línea NDJSON o CSV ilegible se entrega como ErrorValidacion para que
+    se reporte en su fila sin detener la importación.
+    Lanza ValueError (o UnicodeDecodeError) si la entrada no se puede leer.
+    """
+    if formato == "json":
+        try:
+            registros = json.load(flujo)
+        except ValueError:
+            raise ValueError("El cuerpo no es un JSON válido")
+        if not isinstance(registros, list):
+            raise ValueError("Se esperaba un arreglo JSON de registros")
+        yield from enumerate(registros, start=1)
+        return
+
+    texto = io.TextIOWrapper(flujo, encoding="utf-8-sig", newline="")
+
+    if formato == "ndjson":
+        numeroFila = 0
+        for linea in texto:
+            if not linea.strip():
+                continue
+            numeroFila += 1
+            try:
+                yield numeroFila, json.loads(linea)
+            except ValueError:
+                yield numeroFila, ErrorValidacion("Línea JSON inválida")
+        return
+
+    lector = csv.DictReader(texto)
+    if not lector.fieldnames:
+        raise ValueError("El CSV no tiene encabezado")
+    numeroFila = 0
+    while True:
+        try:
+            fila = next(lector)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # El lector sigue en la línea siguiente
+            fila = ErrorValidacion(f"Línea CSV inválida: {error}")
+        numeroFila += 1
+        yield numeroFila, fila
+
+
+def _lotes(registros, tamano, interrupcion):
+    """
+    Divide un iterable en listas de 'tamano' elementos. Si la lectura falla,
+    entrega lo leído hasta ahí, anota el error en 'interrupcion' y termina.
+    """
+    iterador = iter(registros)
+    while True:
+        lote = []
+        try:
+            lote.extend(islice(iterador, tamano))
+        except (ValueError, UnicodeDecodeError, csv.Error) as error:
+            interrupcion.append(error)
+        if lote:
+            yield lote
+        if interrupcion or len(lote) < tamano:
+            return
+
+
+# =============================================
+# PROCESAMIENTO POR LOTES
+# =============================================
+def _validarLote(definicion, lote, opciones, errores):
+    """Aplica las reglas del POST a cada fila. Retorna [(fila, valores)] válidas."""
+    validas = []
+    for numeroFila, datos in lote:
+        try:
+            if isinstance(datos, ErrorValidacion):
+                raise datos
+            validas.append((numeroFila, definicion.validar(datos, **opciones)))
+        except ErrorValidacion as error:
+            errores.append((numeroFila, error.mensaje))
+    return validas
+
+
+def _verificarLlaveForanea(definicion, validas, errores):
+    """Descarta las filas cuyo padre no existe: una sola consulta por lote."""
+    if definicion.llaveForanea is None or not validas:
+        return validas
+
+    campo, modeloPadre, mensaje = definicion.llaveForanea
+    ids = {valores[campo] for _, valores in validas}
+    existentes = set(db.session.execute(
+        db.select(modeloPadre.id).where(modeloPadre.id.in_(ids))
+    ).scalars())
+
+    aceptadas = []
+    for numeroFila, valores in validas:
+        if valores[campo] in existentes:
+            aceptadas.append((numeroFila, valores))
+        else:
+            errores.append((numeroFila, mensaje))
+    return aceptadas
+
+
+def _verificarUnicos(definicion, validas, vistos, errores):
+    """
+    Descarta valores repetidos del campo único: contra la BD (una consulta por
+    lote) y contra las filas ya aceptadas en esta importación ('vistos').
+    """
+    if definicion.campoUnico is None or not validas:
+        return validas
+
+    campo, mensaje = definicion.campoUnico
+    columna = getattr(definicion.modelo, campo)
+    valoresLote = {valores[campo] for _, valores in validas}
+    # También los registros ocultos en espera de la purga: su valor sigue en la BD
+    enBaseDeDatos = set(db.session.execute(
+        db.select(columna).where(columna.in_(valoresLote)), execution_options=INCLUIR_OCULTOS
+    ).scalars())
+
+    aceptadas = []
+    for numeroFila, valores in validas:
+        valor = valores[campo]
+        if valor in enBaseDeDatos:
+            errores.append((numeroFila, mensaje))
+        elif valor in vistos:
+            errores.append((numeroFila, f"{campo.capitalize()} repetido en la fila {vistos[valor]}"))
+        else:
+            vistos[valor] = numeroFila
+            aceptadas.append((numeroFila, valores))
+    return aceptadas
+
+
+def _insertarLote(definicion, validas, errores):
+    """INSERT ejecutado como executemany y COMMIT del lote. Retorna las filas insertadas."""
+    if not validas:
+        return 0
+    try:
+        db.session.execute(db.insert(definicion.modelo), [valores for _, valores in validas])
+        db.session.commit()
+    except IntegrityError as error:
+        # Otro proceso insertó un valor en conflicto entre la verificación y el INSERT
+        db.session.rollback()
+        mensaje = f"Lote rechazado por la base de datos: {error.orig}"
+        errores.extend((numeroFila, mensaje) for numeroFila, _ in validas)
+        return 0
+    return len(validas)
+
+
+def importarRegistros(definicion, registros, tamanoLote=TAMANO_LOTE, historico=False):
+    """
+    Importa un iterable de (numeroFila, datos) según la definición.
+
+    Retorna un resumen:
+        {"total", "insertados", "rechazados",
+         "errores": [{"fila", "error"}], "erroresOmitidos"}
+    Lanza ImportacionInterrumpida, con el resumen de lo ya importado, si el
+    iterable falla a mitad de camino.
+    """
+    opciones = {"permitirPasadas": True} if historico and definicion.admiteHistorico else {}
+    resumen = {"total": 0, "insertados": 0, "rechazados": 0, "errores": [], "erroresOmitidos": 0}
+    vistos = {}
+    interrupcion = []
+
+    for lote in _lotes(registros, tamanoLote, interrupcion):
+        errores = []
+        validas = _validarLote(definicion, lote, opciones, errores)
+        validas = _verificarLlaveForanea(definicion, validas, errores)
+        validas = _verificarUnicos(definicion, validas, vistos, errores)
+        if definicion.verificarLote is not None and validas:
+            validas = definicion.verificarLote(validas, errores, historico)
+        resumen["insertados"] += _insertarLote(definicion, validas, errores)
+        resumen["total"] += len(lote)
+        resumen["rechazados"] += len(errores)
+
+        for numeroFila, mensaje in sorted(errores):
+            if len(resumen["errores"]) < MAX_ERRORES:
+                resumen["errores"].append({"fila": numeroFila, "error": mensaje})
+            else:
+                resumen["erroresOmitidos"] += 1
+
+    if interrupcion:
+        if not resumen["total"]:
+            raise interrupcion[0]   # no se leyó ninguna fila: error de la entrada completa
+        raise ImportacionInterrumpida(
+            f"{interrupcion[0]}. La lectura se detuvo después de la fila {resumen['total']}; "
+            "las filas anteriores ya se procesaron",
+            resumen
+        )
+    return resumen
+
+
+# =============================================
+# ENDPOINT
+# =============================================
+def _formatoSolicitud():
+    """Formato pedido con ?formato= o deducido del Content-Type."""
+    formato = request.args.get("formato")
+    if formato:
+        return formato if formato in FORMATOS_IMPORTACION else None
+    tipo = request.mimetype
+    if tipo in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    for nombre, mime in FORMATOS_IMPORTACION.items():
+        if tipo == mime:
+            return nombre
+    return None
+
+
+def responderImportacion(definicion):
+    """
+    Atiende POST /api/<recurso>/bulk: lee el cuerpo en el formato indicado,
+    importa por lotes y responde el resumen con los errores por fila.
+    Con ?historico=1 las citas aceptan fechas pasadas (migración).
+    Si la entrada se corta a mitad de camino responde 400 con el error y el
+    resumen de lo que alcanzó a importarse.
+    """
+    formato = _formatoSolicitud()
+    if formato is None:
+        return jsonify({
+            "error": "Formato no soportado. Use Content-Type o ?formato= con: "
+                     f"{', '.join(FORMATOS_IMPORTACION)}"
+        }), 400
+
+    historico = request.args.get("historico") == "1"
+
+    try:
+        resumen = importarRegistros(
+            definicion, leerRegistros(request.stream, formato),
+            tamanoLote=TAMANO_LOTE, historico=historico
+        )
+    except ImportacionInterrumpida as error:
+        db.session.rollback()
+        return jsonify({"error": error.mensaje, **error.resumen}), 400
+    except (ValueError, UnicodeDecodeError, csv.Error) as error:
+        db.session.rollback()
+        return jsonify({"error": str(error)}), 400
+
+    return jsonify(resumen), 200
@@ -0,0 +1,248 @@
+"""
+Línea de tiempo clínica de una mascota y su resumen precalculado.
+
+Problema que resuelve:
+    GET /api/historial/mascota/<id> devuelve la mascota con sus conteos y
+    TODOS sus registros, cada uno repitiendo el nombre de la mascota y del
+    dueño. Para un paciente con años de consultas la respuesta es grande y
+    casi toda redundante, y los datos que se leen primero (última visita,
+    evolución del peso, medicamentos vigentes) hay que deducirlos del total.
+
+Línea de tiempo:
+    Citas y registros clínicos de la mascota en un solo flujo ordenado por
+    fecha (más reciente primero), paginado por cursor como los listados
+    (services/paginacion.py). Es un UNION ALL de las dos tablas filtradas por
+    mascota; cada evento lleva solo sus propios campos. En un mismo día el
+    registro clínico va antes que la cita.
+
+Resumen (tabla resumen_mascota, models/resumen.py):
+    Cantidad de visitas, primera y última visita, últimos PESOS_EN_RESUMEN
+    pesos con su tendencia y últimas RECETAS_EN_RESUMEN recetas. Se recalcula
+    al escribir, no al leer, en la misma transacción que modifica el
+    historial de la mascota (ver services/derivados.py).
+"""
+from datetime import datetime
+from functools import lru_cache
+from models import db
+from models.cita import Cita
+from models.dueno import Dueno
+from models.historial import HistorialClinico
+from models.mascota import Mascota, calcularEdad
+from models.resumen import ResumenMascota
+from services.derivados import lotesDeMascotas, registrarDerivado
+from services.paginacion import Listado
+
+# Pesos y recetas más recientes que se guardan en el resumen
+PESOS_EN_RESUMEN = 6
+RECETAS_EN_RESUMEN = 3
+
+# Variación porcentual del peso por debajo de la cual la tendencia es "estable"
+UMBRAL_TENDENCIA_PORCENTAJE = 3
+
+
+# =============================================
+# CÁLCULO DEL RESUMEN
+# =============================================
+def _ultimos(columna, cantidad, filtrar):
+    """
+    Consulta de los 'cantidad' registros más recientes de cada mascota con la
+    columna informada, ordenados por mascota y del más reciente al más antiguo.
+    """
+    orden = db.func.row_number().over(
+        partition_by=HistorialClinico.mascotaId,
+        order_by=(HistorialClinico.fecha.desc(), HistorialClinico.id.desc())
+    ).label("orden")
+    recientes = filtrar(
+        db.select(
+            HistorialClinico.mascotaId, HistorialClinico.fecha, columna.label("valor"),
+            HistorialClinico.id, orden
+        ).where(columna.isnot(None))
+    ).subquery()
+    return (
+        db.select(recientes)
+        .where(recientes.c.orden <= cantidad)
+        .order_by(recientes.c.mascotaId, recientes.c.orden)
+    )
+
+
+@lru_cache(maxsize=None)
+def _consultasResumen(porLote):
+    """
+    Sentencias del cálculo (conteos, pesos, recetas y borrado), construidas una
+    sola vez: con porLote la lista de mascotas va en el parámetro 'ids'.
+    """
+    tabla = ResumenMascota.__table__
+    ids = db.bindparam("ids", expanding=True)
+
+    def filtrar(consulta):
+        return consulta.where(HistorialClinico.mascotaId.in_(ids)) if porLote else consulta
+
+    conteos = filtrar(
+        db.select(
+            HistorialClinico.mascotaId,
+            db.func.count(HistorialClinico.id).label("cantidad"),
+            db.func.min(HistorialClinico.fecha).label("primera"),
+            db.func.max(HistorialClinico.fecha).label("ultima")
+        ).group_by(HistorialClinico.mascotaId)
+    )
+    pesos = _ultimos(HistorialClinico.pesoEnConsulta, PESOS_EN_RESUMEN, filtrar)
+    recetas = _ultimos(
+        db.func.nullif(HistorialClinico.medicamentos, ""), RECETAS_EN_RESUMEN, filtrar
+    )
+    borrado = db.delete(tabla).where(tabla.c.mascotaId.in_(ids)) if porLote else db.delete(tabla)
+    return conteos, pesos, recetas, borrado
+
+
+def _porMascota(filas):
+    """{mascotaId: [(fecha, valor, registroId), ...]} en el orden de la consulta."""
+    resultado = {}
+    for fila in filas:
+        resultado.setdefault(fila.mascotaId, []).append((fila.fecha, fila.valor, fila.id))
+    return resultado
+
+
+def _tendencia(pesos):
+    """(variación en kg, tendencia) entre el primer y el último peso, o (None, None)."""
+    if len(pesos) < 2:
+        return None, None
+    primero, ultimo = pesos[0][1], pesos[-1][1]
+    variacion = round(ultimo - primero, 2)
+    if primero and abs(variacion) / primero * 100 < UMBRAL_TENDENCIA_PORCENTAJE:
+        return variacion, "estable"
+    return variacion, "subiendo" if variacion > 0 else "bajando"
+
+
+def recalcularResumenes(ejecutor, mascotaIds=None):
+    """
+    Reemplaza los resúmenes de las mascotas indicadas (None = todas) con los
+    datos actuales del historial. 'ejecutor' es una sesión o una conexión;
+    no confirma la transacción. Las mascotas sin registros quedan sin resumen.
+    Retorna la cantidad de resúmenes escritos.
+    """
+    conteos, consultaPesos, consultaRecetas, borrado = _consultasResumen(mascotaIds is not None)
+    ahora = datetime.now()
+    escritos = 0
+    for parametros in lotesDeMascotas(mascotaIds):
+        pesos = _porMascota(ejecutor.execute(consultaPesos, parametros))
+        recetas = _porMascota(ejecutor.execute(consultaRecetas, parametros))
+        filas = []
+        for mascotaId, cantidad, primera, ultima in ejecutor.execute(conteos, parametros):
+            serie = [[fecha.isoformat(), peso] for fecha, peso, _ in reversed(pesos.get(mascotaId, []))]
+            variacion, tendencia = _tendencia(serie)
+            filas.append({
+                "mascotaId": mascotaId,
+                "cantidadVisitas": cantidad,
+                "primeraVisita": primera,
+                "ultimaVisita": ultima,
+                "pesos": serie,
+                "ultimoPeso": serie[-1][1] if serie else None,
+                "variacionPeso": variacion,
+                "tendenciaPeso": tendencia,
+                "medicamentos": [
+                    {"fecha": fecha.isoformat(), "medicamentos": texto, "registroId": registroId}
+                    for fecha, texto, registroId in recetas.get(mascotaId, [])
+                ],
+                "actualizado": ahora
+            })
+
+        ejecutor.execute(borrado, parametros)
+        if filas:
+            ejecutor.execute(db.insert(ResumenMascota.__table__), filas)
+        escritos += len(filas)
+    return escritos
+
+
+registrarDerivado(ResumenMascota.__table__, recalcularResumenes)
+
+
+def obtenerResumen(mascotaId):
+    """Resumen de la mascota listo para JSON (vacío si no tiene registros)."""
+    resumen = db.session.get(ResumenMascota, mascotaId)
+    return resumen.toDict() if resumen else ResumenMascota.vacio()
+
+
+# =============================================
+# LÍNEA DE TIEMPO
+# =============================================
+# Campos de cada tipo de evento (además de tipo, id y fecha)
+CAMPOS_CITA = ("hora", "motivo", "estado")
+CAMPOS_HISTORIAL = (
+    "diagnostico", "tratamiento", "medicamentos", "veterinario", "observaciones", "pesoEnConsulta"
+)
+
+
+def _nulo(columna, nombre):
+    """NULL con el tipo de la columna, para alinear las dos ramas del UNION."""
+    return db.type_coerce(db.null(), columna.type).label(nombre)
+
+
+def _eventos(mascotaId):
+    """Subconsulta UNION ALL de citas y registros clínicos de la mascota."""
+    citas = db.select(
+        db.literal_column("'cita'", db.String).label("tipo"),
+        db.literal_column("0", db.Integer).label("rango"),
+        Cita.id, Cita.fecha, Cita.hora, Cita.motivo, Cita.estado,
+        *[_nulo(getattr(HistorialClinico, campo), campo) for campo in CAMPOS_HISTORIAL]
+    ).where(Cita.mascotaId == mascotaId)
+    registros = db.select(
+        db.literal_column("'historial'", db.String).label("tipo"),
+        db.literal_column("1", db.Integer).label("rango"),
+        HistorialClinico.id, HistorialClinico.fecha,
+        *[_nulo(getattr(Cita, campo), campo) for campo in CAMPOS_CITA],
+        *[getattr(HistorialClinico, campo) for campo in CAMPOS_HISTORIAL]
+    ).where(HistorialClinico.mascotaId == mascotaId)
+    return db.union_all(citas, registros).subquery("eventos")
+
+
+def serializarEventos(filas):
+    """Cada evento con sus propios campos, en el formato de toDict()."""
+    datos = []
+    for fila in filas:
+        evento = {"tipo": fila.tipo, "id": fila.id, "fecha": fila.fecha.isoformat()}
+        if fila.tipo == "cita":
+            evento.update(hora=fila.hora.strftime("%H:%M"), motivo=fila.motivo, estado=fila.estado)
+        else:
+            evento.update({campo: getattr(fila, campo) for campo in CAMPOS_HISTORIAL})
+        datos.append(evento)
+    return datos
+
+
+def listadoLineaTiempo(mascotaId):
+    """Listado paginable (ver services/paginacion.py) de los eventos de una mascota."""
+    eventos = _eventos(mascotaId)
+    return Listado(
+        consulta=lambda: db.session.query(eventos),
+        serializar=serializarEventos,
+        entidad=lambda fila: fila,
+        orden=[(eventos.c.fecha, True), (eventos.c.rango, True), (eventos.c.id, True)],
+        campos={
+            nombre: eventos.c[nombre]
+            for nombre in ("tipo", "id", "fecha") + CAMPOS_CITA + CAMPOS_HISTORIAL
+        },
+        desde=lambda consulta: consulta.select_from(eventos),
+    )
+
+
+def encabezadoMascota(mascotaId):
+    """Datos básicos de la mascota y su dueño (sin conteos), o None si no existe."""
+    fila = db.session.execute(
+        db.select(
+            Mascota.id, Mascota.nombre, Mascota.especie, Mascota.raza,
+            Mascota.fechaNacimiento, Mascota.peso, Mascota.duenoId,
+            (Dueno.nombre + " " + Dueno.apellido).label("duenoNombre")
+        )
+        .join(Dueno, Mascota.duenoId == Dueno.id)
+        .where(Mascota.id == mascotaId)
+    ).first()
+    if fila is None:
+        return None
+    return {
+        "id": fila.id,
+        "nombre": fila.nombre,
+        "especie": fila.especie,
+        "raza": fila.raza,
+        "edad": calcularEdad(fila.fechaNacimiento),
+        "peso": fila.peso,
+        "duenoId": fila.duenoId,
+        "duenoNombre": fila.duenoNombre
+    }
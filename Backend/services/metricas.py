@@ -0,0 +1,271 @@
+"""
+Instrumentación por solicitud: SQL, tiempos y métricas por ruta.
+
+Por cada solicitud se mide:
+    - Consultas SQL ejecutadas y tiempo total en la BD
+      (eventos before/after_cursor_execute de SQLAlchemy)
+    - Tiempo de serialización JSON (proveedor JSON de Flask medido)
+    - Tiempo de la aplicación (total menos BD y serialización)
+
+Se expone de tres formas:
+    - Encabezado Server-Timing en cada respuesta (visible en las DevTools
+      del navegador, pestaña Network > Timing)
+    - GET /api/admin/metrics: histograma de latencia por ruta, conteos de
+      consultas y las sentencias más lentas (JSON)
+    - GET /api/admin/metrics?formato=prometheus: formato de texto de Prometheus
+
+El costo es de unos pocos perf_counter() y sumas por consulta y por
+solicitud, pensado para dejarlo activo en producción (METRICAS_HABILITADAS=0
+lo desactiva). Las métricas son del proceso: cada worker reporta las suyas.
+"""
+import bisect
+import heapq
+import threading
+import time
+from datetime import datetime
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from services.serializacion import ProveedorJson
+
+# Límites superiores de los buckets del histograma de latencia (ms)
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Sentencias lentas que se conservan (por proceso) y largo máximo del SQL guardado
+MAX_CONSULTAS_LENTAS = 10
+LARGO_SQL = 300
+
+
+class _EstadisticaRuta:
+    """Acumulados de una ruta + método."""
+
+    __slots__ = ("buckets", "solicitudes", "sumaMs", "maximoMs",
+                 "consultas", "bdMs", "serializacionMs", "estados")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.solicitudes = 0
+        self.sumaMs = 0.0
+        self.maximoMs = 0.0
+        self.consultas = 0
+        self.bdMs = 0.0
+        self.serializacionMs = 0.0
+        self.estados = {}
+
+
+class RegistroMetricas:
+    """Métricas acumuladas del proceso (seguro entre hilos)."""
+
+    def __init__(self):
+        self._bloqueo = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta todo lo acumulado."""
+        with self._bloqueo:
+            self.inicio = datetime.now()
+            self._rutas = {}
+            self._lentas = []  # heap de (duracionMs, sql, ruta)
+
+    def registrar(self, ruta, metodo, estado, totalMs, medicion):
+        """Agrega una solicitud terminada."""
+        indice = bisect.bisect_left(BUCKETS_MS, totalMs)
+        with self._bloqueo:
+            estadistica = self._rutas.get((ruta, metodo))
+            if estadistica is None:
+                estadistica = self._rutas[(ruta, metodo)] = _EstadisticaRuta()
+            estadistica.buckets[indice] += 1
+            estadistica.solicitudes += 1
+            estadistica.sumaMs += totalMs
+            estadistica.maximoMs = max(estadistica.maximoMs, totalMs)
+            estadistica.consultas += medicion.consultas
+            estadistica.bdMs += medicion.bdMs
+            estadistica.serializacionMs += medicion.serializacionMs
+            estadistica.estados[estado] = estadistica.estados.get(estado, 0) + 1
+
+            for duracion, sql in medicion.lentas:
+                entrada = (duracion, sql, f"{metodo} {ruta}")
+                if len(self._lentas) < MAX_CONSULTAS_LENTAS:
+                    heapq.heappush(self._lentas, entrada)
+                elif duracion > self._lentas[0][0]:
+                    heapq.heapreplace(self._lentas, entrada)
+
+    def comoDict(self):
+        """Resumen para GET /api/admin/metrics (tiempos en ms)."""
+        with self._bloqueo:
+            rutas = []
+            for (ruta, metodo), estadistica in sorted(self._rutas.items()):
+                cantidad = estadistica.solicitudes
+                limites = [str(limite) for limite in BUCKETS_MS] + ["+Inf"]
+                rutas.append({
+                    "ruta": ruta,
+                    "metodo": metodo,
+                    "solicitudes": cantidad,
+                    "promedioMs": round(estadistica.sumaMs / cantidad, 3),
+                    "maximoMs": round(estadistica.maximoMs, 3),
+                    "consultasPromedio": round(estadistica.consultas / cantidad, 2),
+                    "bdPromedioMs": round(estadistica.bdMs / cantidad, 3),
+                    "serializacionPromedioMs": round(estadistica.serializacionMs / cantidad, 3),
+                    "estados": {str(estado): n for estado, n in sorted(estadistica.estados.items())},
+                    "histograma": dict(zip(limites, estadistica.buckets))
+                })
+            lentas = [
+                {"duracionMs": round(duracion, 3), "ruta": ruta, "sql": sql}
+                for duracion, sql, ruta in sorted(self._lentas, reverse=True)
+            ]
+            return {"desde": self.inicio.isoformat(timespec="seconds"),
+                    "rutas": rutas, "consultasLentas": lentas}
+
+    def comoPrometheus(self):
+        """Formato de texto de Prometheus (tiempos en segundos, buckets acumulados)."""
+        lineas = [
+            "# HELP huellitas_solicitud_duracion_segundos Duración de las solicitudes HTTP.",
+            "# TYPE huellitas_solicitud_duracion_segundos histogram",
+        ]
+        consultas, bd, respuestas = [], [], []
+        with self._bloqueo:
+            for (ruta, metodo), estadistica in sorted(self._rutas.items()):
+                etiquetas = f'ruta="{_escapar(ruta)}",metodo="{metodo}"'
+                acumulado = 0
+                for limite, cantidad in zip(BUCKETS_MS, estadistica.buckets):
+                    acumulado += cantidad
+                    lineas.append(
+                        f'huellitas_solicitud_duracion_segundos_bucket{{{etiquetas},le="{limite / 1000:g}"}} {acumulado}'
+                    )
+                lineas.append(
+                    f'huellitas_solicitud_duracion_segundos_bucket{{{etiquetas},le="+Inf"}} {estadistica.solicitudes}'
+                )
+                lineas.append(f"huellitas_solicitud_duracion_segundos_sum{{{etiquetas}}} {estadistica.sumaMs / 1000:.6f}")
+                lineas.append(f"huellitas_solicitud_duracion_segundos_count{{{etiquetas}}} {estadistica.solicitudes}")
+                consultas.append(f"huellitas_consultas_sql_total{{{etiquetas}}} {estadistica.consultas}")
+                bd.append(f"huellitas_bd_duracion_segundos_total{{{etiquetas}}} {estadistica.bdMs / 1000:.6f}")
+                for estado, cantidad in sorted(estadistica.estados.items()):
+                    respuestas.append(
+                        f'huellitas_respuestas_total{{{etiquetas},estado="{estado}"}} {cantidad}'
+                    )
+
+        lineas += ["# HELP huellitas_consultas_sql_total Sentencias SQL ejecutadas.",
+                   "# TYPE huellitas_consultas_sql_total counter"] + consultas
+        lineas += ["# HELP huellitas_bd_duracion_segundos_total Tiempo acumulado en la BD.",
+                   "# TYPE huellitas_bd_duracion_segundos_total counter"] + bd
+        lineas += ["# HELP huellitas_respuestas_total Respuestas por código de estado.",
+                   "# TYPE huellitas_respuestas_total counter"] + respuestas
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor):
+    """Escapa un valor de etiqueta de Prometheus."""
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Medicion:
+    """Mediciones de la solicitud en curso (vive en flask.g)."""
+
+    __slots__ = ("inicio", "consultas", "bdMs", "serializacionMs", "lentas")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.bdMs = 0.0
+        self.serializacionMs = 0.0
+        self.lentas = []  # las 3 sentencias más lentas de la solicitud
+
+    def agregarConsulta(self, duracionMs, sql):
+        """Suma una sentencia y conserva las más lentas."""
+        self.consultas += 1
+        self.bdMs += duracionMs
+        if len(self.lentas) < 3:
+            self.lentas.append((duracionMs, sql))
+        elif duracionMs > min(self.lentas)[0]:
+            self.lentas.remove(min(self.lentas))
+            self.lentas.append((duracionMs, sql))
+
+
+registroMetricas = RegistroMetricas()
+
+
+def _medicionActual():
+    """Medición de la solicitud en curso o None (fuera de una solicitud o sin métricas)."""
+    if not has_request_context():
+        return None
+    return g.get("_medicion")
+
+
+# =============================================
+# EVENTOS DE SQLALCHEMY (todas las conexiones)
+# =============================================
+@event.listens_for(Engine, "before_cursor_execute")
+def _antesDeConsulta(conexion, cursor, sentencia, parametros, contexto, executemany):
+    """Apila el instante de inicio (la conexión puede anidar sentencias)."""
+    if _medicionActual() is not None:
+        conexion.info.setdefault("_inicioConsultas", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despuesDeConsulta(conexion, cursor, sentencia, parametros, contexto, executemany):
+    """Suma la duración de la sentencia a la solicitud en curso."""
+    medicion = _medicionActual()
+    inicios = conexion.info.get("_inicioConsultas")
+    if medicion is None or not inicios:
+        return
+    duracionMs = (time.perf_counter() - inicios.pop()) * 1000
+    medicion.agregarConsulta(duracionMs, sentencia[:LARGO_SQL])
+
+
+# =============================================
+# SERIALIZACIÓN JSON MEDIDA
+# =============================================
+class ProveedorJsonMedido(ProveedorJson):
+    """Proveedor JSON (services/serializacion.py) que suma el tiempo de codificar a la solicitud."""
+
+    def _medir(self, funcion, *args):
+        medicion = _medicionActual()
+        if medicion is None:
+            return funcion(*args)
+        inicio = time.perf_counter()
+        texto = funcion(*args)
+        medicion.serializacionMs += (time.perf_counter() - inicio) * 1000
+        return texto
+
+    def codificar(self, obj):
+        return self._medir(super().codificar, obj)
+
+    def codificarFilas(self, codificador, filas):
+        return self._medir(super().codificarFilas, codificador, filas)
+
+
+# =============================================
+# HOOKS DE FLASK
+# =============================================
+def _iniciarMedicion():
+    g._medicion = _Medicion()
+
+
+def _cerrarMedicion(respuesta):
+    """Agrega Server-Timing y registra la solicitud en el histograma de su ruta."""
+    medicion = g.pop("_medicion", None)
+    if medicion is None:
+        return respuesta
+
+    totalMs = (time.perf_counter() - medicion.inicio) * 1000
+    appMs = max(0.0, totalMs - medicion.bdMs - medicion.serializacionMs)
+    respuesta.headers.add(
+        "Server-Timing",
+        f'db;dur={medicion.bdMs:.2f};desc="{medicion.consultas} consultas", '
+        f"ser;dur={medicion.serializacionMs:.2f}, "
+        f"app;dur={appMs:.2f}, total;dur={totalMs:.2f}"
+    )
+
+    ruta = request.url_rule.rule if request.url_rule is not None else "<sin ruta>"
+    registroMetricas.registrar(ruta, request.method, respuesta.status_code, totalMs, medicion)
+    return respuesta
+
+
+def configurarMetricas(app):
+    """Activa la instrumentación en la aplicación (METRICAS_HABILITADAS)."""
+    if not app.config.get("METRICAS_HABILITADAS", True):
+        return
+    app.json_provider_class = ProveedorJsonMedido
+    app.json = ProveedorJsonMedido(app)
+    app.before_request(_iniciarMedicion)
+    app.after_request(_cerrarMedicion)
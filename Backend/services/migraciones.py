@@ -0,0 +1,171 @@
+"""
+Migraciones ligeras del esquema.
+
+db.create_all() solo crea tablas que no existen: si la tabla ya estaba creada
+(bases de datos anteriores a los índices), sus índices nuevos nunca se agregan.
+Este módulo completa esa brecha de forma idempotente: revisa cada índice
+declarado en los modelos y crea únicamente los que faltan.
+
+Versión del esquema:
+    create_all y la revisión de índices hacen varias consultas de
+    inspección por tabla; contra una BD en la nube son decenas de viajes de
+    red en cada arranque. La tabla esquema_version guarda la huella
+    (SHA-256 del DDL de los modelos) del último esquema aplicado: si
+    coincide, el arranque hace una sola consulta. Cambiar un modelo cambia la
+    huella y la siguiente ejecución vuelve a sincronizar. Para forzar la
+    revisión (por ejemplo, tras borrar un índice a mano) basta con vaciar
+    esa tabla.
+"""
+import hashlib
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+from models import db
+
+# Metadatos propios: la tabla de control no es un modelo ni entra en la huella
+_metadatosControl = MetaData()
+esquemaVersion = Table(
+    "esquema_version", _metadatosControl,
+    Column("id", Integer, primary_key=True),
+    Column("huella", String(64), nullable=False),
+    Column("actualizado", DateTime, nullable=False)
+)
+
+
+def indicesDeclarados():
+    """Retorna todos los índices declarados en los modelos (__table_args__)."""
+    return [
+        indice
+        for tabla in db.metadata.sorted_tables
+        for indice in sorted(tabla.indexes, key=lambda indice: indice.name)
+    ]
+
+
+def agregarColumnas(motor=None):
+    """
+    Agrega con ALTER TABLE las columnas declaradas que faltan en tablas ya
+    existentes. Las columnas nuevas deben admitir NULL o tener server_default
+    (las filas que ya estaban toman ese valor). Sin 'motor' usa el de la BD
+    principal. Retorna la lista de columnas agregadas ('tabla.columna').
+    """
+    motor = motor or db.engine
+    inspector = db.inspect(motor)
+    preparador = motor.dialect.identifier_preparer
+    agregadas = []
+
+    with motor.begin() as conexion:
+        for tabla in db.metadata.sorted_tables:
+            existentes = {columna["name"] for columna in inspector.get_columns(tabla.name)}
+            for columna in tabla.columns:
+                if columna.name in existentes:
+                    continue
+                definicion = CreateColumn(columna).compile(dialect=motor.dialect)
+                conexion.exec_driver_sql(f"ALTER TABLE {preparador.format_table(tabla)} ADD {definicion}")
+                agregadas.append(f"{tabla.name}.{columna.name}")
+
+    return agregadas
+
+
+def crearIndices(omitidos=None, motor=None):
+    """
+    Crea los índices declarados que aún no existen en la base de datos.
+    Se puede ejecutar en cada arranque: los índices existentes se omiten.
+    Un índice único que choca con datos duplicados ya guardados se omite con
+    un aviso (hay que depurar los datos; se vuelve a intentar en el siguiente
+    arranque; si se pasa la lista 'omitidos', se agregan ahí sus nombres).
+    Los índices que no aplican al motor (ddl_if) no se cuentan.
+    Sin 'motor' usa el de la BD principal.
+    Retorna la lista de nombres de los índices creados.
+    """
+    motor = motor or db.engine
+    inspector = db.inspect(motor)
+    creados = []
+
+    for tabla in db.metadata.sorted_tables:
+        existentes = {indice["name"] for indice in inspector.get_indexes(tabla.name)}
+        faltantes = [
+            indice for indice in sorted(tabla.indexes, key=lambda indice: indice.name)
+            if indice.name not in existentes
+        ]
+        for indice in faltantes:
+            try:
+                indice.create(bind=motor)
+            except IntegrityError as error:
+                print(f"  Aviso: no se creó el índice único {indice.name} "
+                      f"(hay datos duplicados): {error.orig}")
+                if omitidos is not None:
+                    omitidos.append(indice.name)
+        if faltantes:
+            ahora = {indice["name"] for indice in db.inspect(motor).get_indexes(tabla.name)}
+            creados.extend(indice.name for indice in faltantes if indice.name in ahora)
+
+    return creados
+
+
+def eliminarIndices():
+    """
+    Elimina los índices declarados (si existen).
+    Solo se usa en benchmarks para medir el 'antes' de la migración.
+    """
+    for indice in indicesDeclarados():
+        indice.drop(bind=db.engine, checkfirst=True)
+
+
+# =============================================
+# VERSIÓN DEL ESQUEMA
+# =============================================
+def huellaEsquema(dialecto):
+    """SHA-256 del DDL de todas las tablas e índices de los modelos en ese dialecto."""
+    sentencias = []
+    for tabla in db.metadata.sorted_tables:
+        sentencias.append(str(CreateTable(tabla).compile(dialect=dialecto)))
+        sentencias.extend(
+            str(CreateIndex(indice).compile(dialect=dialecto))
+            for indice in sorted(tabla.indexes, key=lambda indice: indice.name)
+        )
+    return hashlib.sha256("\n".join(sentencias).encode("utf-8")).hexdigest()
+
+
+def _huellaGuardada(conexion):
+    """Huella del último esquema aplicado, o None si la tabla de control no existe."""
+    try:
+        return conexion.execute(
+            db.select(esquemaVersion.c.huella).where(esquemaVersion.c.id == 1)
+        ).scalar()
+    except DBAPIError:
+        conexion.rollback()
+        return None
+
+
+def sincronizarEsquema(motor=None):
+    """
+    Arranque rápido: abre una conexión (que también prueba que la BD responde)
+    y compara la huella guardada con la de los modelos. Solo si difiere ejecuta
+    create_all, agregarColumnas y crearIndices, y guarda la huella nueva, salvo que algún índice
+    único se haya omitido por datos duplicados: así se reintenta en el
+    siguiente arranque. Sin 'motor' usa el de la BD principal.
+    Retorna None si el esquema ya estaba al día, o la lista de índices creados.
+    """
+    motor = motor or db.engine
+    huella = huellaEsquema(motor.dialect)
+    with motor.connect() as conexion:
+        if _huellaGuardada(conexion) == huella:
+            return None
+
+    db.metadata.create_all(motor)
+    for columna in agregarColumnas(motor):
+        print(f"  Columna agregada: {columna}")
+    omitidos = []
+    creados = crearIndices(omitidos, motor)
+    if not omitidos:
+        _metadatosControl.create_all(motor)
+        try:
+            with motor.begin() as conexion:
+                conexion.execute(esquemaVersion.delete())
+                conexion.execute(esquemaVersion.insert().values(
+                    id=1, huella=huella, actualizado=datetime.now()
+                ))
+        except IntegrityError:
+            pass  # otro proceso que arrancaba a la vez ya la guardó
+    return creados
@@ -0,0 +1,38 @@
+"""
+Ajustes del motor de base de datos por conexión.
+
+El perfil del pool (tamaño, desborde, reciclaje, pre-ping) lo decide
+Config.opcionesMotor() según el tipo de conexión. Este módulo agrega lo que
+no se puede pasar como opción de create_engine: los PRAGMA de SQLite, que son
+por conexión y se pierden al abrir otra. Se ejecutan en el evento "connect",
+una sola vez por conexión física del pool (no en cada solicitud).
+
+journal_mode=WAL queda guardado en el archivo; el resto se aplica siempre.
+"""
+from sqlalchemy import event
+
+
+def registrarPragmasSqlite(motor, pragmas):
+    """
+    Aplica los PRAGMA (nombre -> valor, en orden) a cada conexión nueva del
+    motor. No hace nada si el motor no es SQLite.
+    """
+    if motor.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(motor, "connect")
+    def _aplicarPragmas(conexionDbapi, registroConexion):
+        cursor = conexionDbapi.cursor()
+        try:
+            for nombre, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nombre}={valor}")
+        finally:
+            cursor.close()
+
+
+def pragmasActuales(conexion, nombres):
+    """Valores vigentes de los PRAGMA en una conexión de SQLAlchemy (diagnóstico)."""
+    return {
+        nombre: conexion.exec_driver_sql(f"PRAGMA {nombre}").scalar()
+        for nombre in nombres
+    }
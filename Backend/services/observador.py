@@ -0,0 +1,89 @@
+"""
+Observador de commits de la base de datos.
+
+Registra qué tablas modificó cada transacción y, solo cuando el COMMIT se
+confirma, avisa a los suscriptores (por ejemplo, las cachés que deben
+invalidarse). Si la transacción hace rollback no se notifica nada.
+
+Cubre tanto los cambios hechos con objetos ORM (add/delete/modificación)
+como las sentencias masivas ejecutadas por la sesión (insert/update/delete).
+Un borrado (o el ocultamiento de services/eliminacion.py) marca también las
+tablas que la BD borra en cascada por ON DELETE CASCADE.
+"""
+from functools import lru_cache
+from itertools import chain
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from services.eliminacion import esOculto
+
+# Clave en session.info donde se acumulan las tablas de la transacción actual
+_CLAVE_TABLAS = "tablasModificadas"
+
+# Funciones que reciben el conjunto de tablas modificadas tras cada commit
+_suscriptores = []
+
+
+def suscribir(funcion):
+    """
+    Registra una función que se ejecuta después de cada commit con cambios.
+    La función recibe un set con los nombres de las tablas modificadas.
+    Puede usarse como decorador.
+    """
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def marcarTablas(sesion, *nombresTablas):
+    """Marca tablas como modificadas en la transacción actual de la sesión."""
+    sesion.info.setdefault(_CLAVE_TABLAS, set()).update(nombresTablas)
+
+
+@lru_cache(maxsize=None)
+def tablasEnCascada(tabla):
+    """Nombres de las tablas que la BD vacía en cascada al borrar filas de 'tabla' (recursivo)."""
+    nombres = set()
+    for otra in tabla.metadata.tables.values():
+        if otra is not tabla and any(
+            llave.ondelete == "CASCADE" and llave.references(tabla) for llave in otra.foreign_keys
+        ):
+            nombres.add(otra.name)
+            nombres |= tablasEnCascada(otra)
+    return frozenset(nombres)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrarFlush(sesion, contextoFlush):
+    """Durante after_flush las listas new/dirty/deleted aún conservan los objetos enviados."""
+    for objeto in chain(sesion.new, sesion.dirty, sesion.deleted):
+        tabla = getattr(objeto, "__tablename__", None)
+        if tabla:
+            marcarTablas(sesion, tabla)
+            if objeto in sesion.deleted or esOculto(objeto):
+                marcarTablas(sesion, *tablasEnCascada(objeto.__table__))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrarSentenciaMasiva(estado):
+    """Sentencias INSERT/UPDATE/DELETE ejecutadas directamente (sin objetos ORM)."""
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabla = getattr(estado.statement, "table", None)
+        if tabla is not None:
+            marcarTablas(estado.session, tabla.name)
+            if estado.is_delete:
+                marcarTablas(estado.session, *tablasEnCascada(tabla))
+
+
+@event.listens_for(Session, "after_commit")
+def _notificarCommit(sesion):
+    """Avisa a los suscriptores qué tablas cambiaron en la transacción confirmada."""
+    tablas = sesion.info.pop(_CLAVE_TABLAS, None)
+    if not tablas:
+        return
+    for funcion in _suscriptores:
+        funcion(tablas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartarCambios(sesion):
+    """Un rollback descarta los cambios: no hay nada que notificar."""
+    sesion.info.pop(_CLAVE_TABLAS, None)
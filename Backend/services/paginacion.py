@@ -0,0 +1,379 @@
+"""
+Paginación por cursor (keyset) y proyección de campos para los listados.
+
+Parámetros de consulta aceptados por los endpoints de listado:
+    ?limit=50          - Tamaño de página (activa la paginación, máximo 500)
+    ?cursor=<token>    - Token 'next' devuelto por la página anterior
+    ?fields=id,nombre  - Proyección: el SELECT solo lee las columnas pedidas
+
+Sin estos parámetros el endpoint responde igual que siempre (arreglo completo),
+para no romper a los clientes existentes. Con 'limit' o 'cursor' la respuesta es:
+    {"datos": [...], "next": "<token>" | null}
+Las búsquedas (responderBusqueda) siguen la misma convención, ordenadas por
+relevancia, y su página incluye además "total" (coincidencias en total).
+
+Por qué keyset y no OFFSET:
+    OFFSET obliga a la BD a recorrer y descartar todas las filas anteriores,
+    así que las últimas páginas son las más lentas. El cursor guarda los valores
+    de ordenamiento de la última fila y la siguiente página se pide con
+    "WHERE (orden) > (último valor)", que usa el índice y cuesta lo mismo
+    en cualquier página.
+"""
+import base64
+import json
+from datetime import date, time
+from flask import request, jsonify
+from models import db
+from services.serializacion import (
+    Codificador, Fragmento, codificarFilas, codificarObjeto, respuestaJson, valoresCalculados
+)
+
+# Límites de tamaño de página
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+
+class Listado:
+    """
+    Describe cómo listar un recurso de la API.
+
+    Atributos:
+        consulta     - Función que retorna la consulta ORM completa (services/consultas.py)
+        serializar   - Función que convierte las filas ORM en diccionarios
+        entidad      - Función que extrae el objeto modelo de una fila ORM
+        orden        - Lista de (columna, descendente). Debe terminar en una columna única (id)
+        campos       - Campos proyectables: nombre -> expresión SQL
+        desde        - Función que agrega FROM/JOIN a una consulta proyectada
+        calculados   - Campos derivados: nombre -> (dependencias, función(filas),
+                       posición). La función se calcula por lote y retorna el
+                       valor de cada fila, o con varios campos una tupla de
+                       columnas (posición, ver serializacion.valoresCalculados)
+
+    responderListado() lee siempre filas de columnas y, sin ?fields=, devuelve
+    todos los campos (campos + calculados): deben ser los mismos de toDict().
+    """
+
+    def __init__(self, consulta, serializar, entidad, orden, campos,
+                 desde, calculados=None):
+        self.consulta = consulta
+        self.serializar = serializar
+        self.entidad = entidad
+        self.orden = orden
+        self.campos = campos
+        self.desde = desde
+        self.calculados = calculados or {}
+        self._codificadores = {}
+
+    @property
+    def camposDisponibles(self):
+        """Nombres de todos los campos que se pueden pedir en ?fields=."""
+        return list(self.campos) + list(self.calculados)
+
+    def codificador(self, campos=None):
+        """Codificador JSON (services/serializacion.py) de los campos pedidos (None = todos)."""
+        clave = tuple(sorted(set(campos or self.camposDisponibles)))
+        codificador = self._codificadores.get(clave)
+        if codificador is None:
+            codificador = Codificador(
+                {campo: self.campos[campo].type for campo in clave if campo in self.campos},
+                {campo: self.calculados[campo][1:] for campo in clave if campo in self.calculados}
+            )
+            self._codificadores[clave] = codificador
+        return codificador
+
+
+# =============================================
+# CODIFICACIÓN DEL CURSOR
+# =============================================
+def codificarCursor(valores):
+    """Convierte los valores de ordenamiento de la última fila en un token opaco."""
+    serializables = [
+        valor.isoformat() if isinstance(valor, (date, time)) else valor
+        for valor in valores
+    ]
+    texto = json.dumps(serializables, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# Tipos JSON admitidos en el cursor según el tipo de Python de la columna
+# (bool es subclase de int: se rechaza aparte)
+_TIPOS_CURSOR = {str: (str,), int: (int,), float: (int, float)}
+
+
+def _leerToken(token):
+    """JSON contenido en un token. Lanza ValueError si está corrupto."""
+    try:
+        relleno = "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(token + relleno).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Cursor inválido")
+
+
+def decodificarCursor(token, orden):
+    """
+    Recupera los valores de ordenamiento desde un token.
+    Lanza ValueError si el token está corrupto o no corresponde al listado
+    (también si un valor no es del tipo de su columna: no llega a la BD).
+    """
+    valores = _leerToken(token)
+    if not isinstance(valores, list) or len(valores) != len(orden):
+        raise ValueError("Cursor inválido")
+
+    convertidos = []
+    for valor, (columna, _) in zip(valores, orden):
+        tipo = columna.type.python_type
+        if valor is None:
+            convertidos.append(valor)
+        elif tipo in (date, time):
+            try:
+                convertidos.append(tipo.fromisoformat(valor))
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+        elif tipo in _TIPOS_CURSOR and isinstance(valor, _TIPOS_CURSOR[tipo]) and not isinstance(valor, bool):
+            convertidos.append(valor)
+        else:
+            raise ValueError("Cursor inválido")
+    return convertidos
+
+
+def decodificarCursorBusqueda(token):
+    """
+    Recupera (puntaje, id) del último resultado de una búsqueda.
+    Lanza ValueError si el token no es de una búsqueda.
+    """
+    valores = _leerToken(token)
+    if (not isinstance(valores, list) or len(valores) != 2
+            or any(isinstance(valor, bool) for valor in valores)
+            or not isinstance(valores[0], (int, float)) or not isinstance(valores[1], int)):
+        raise ValueError("Cursor inválido")
+    return valores[0], valores[1]
+
+
+def _condicionCursor(orden, valores):
+    """
+    Construye la condición keyset expandida:
+        (a > x) OR (a = x AND b > y) OR ...
+    Se usa la forma expandida en lugar de comparar tuplas porque funciona
+    en todos los motores soportados (SQLite, MySQL, PostgreSQL, SQL Server).
+    """
+    condiciones = []
+    for indice, (columna, descendente) in enumerate(orden):
+        iguales = [orden[previo][0] == valores[previo] for previo in range(indice)]
+        comparacion = columna < valores[indice] if descendente else columna > valores[indice]
+        condiciones.append(db.and_(*iguales, comparacion))
+    return db.or_(*condiciones)
+
+
+def _ordenarPor(orden):
+    """Cláusulas ORDER BY equivalentes a la definición del listado."""
+    return [columna.desc() if descendente else columna.asc() for columna, descendente in orden]
+
+
+# =============================================
+# LECTURA DE PARÁMETROS
+# =============================================
+def _leerLimite():
+    """Lee ?limit= y lo acota al rango permitido."""
+    texto = request.args.get("limit")
+    if texto is None:
+        return LIMITE_POR_DEFECTO
+    try:
+        limite = int(texto)
+    except ValueError:
+        raise ValueError("El parámetro 'limit' debe ser un número entero")
+    if limite < 1:
+        raise ValueError("El parámetro 'limit' debe ser mayor que cero")
+    return min(limite, LIMITE_MAXIMO)
+
+
+def _leerCampos(listado):
+    """Lee ?fields= y valida que todos los campos existan."""
+    texto = request.args.get("fields")
+    if texto is None:
+        return None
+    campos = [campo.strip() for campo in texto.split(",") if campo.strip()]
+    if not campos:
+        raise ValueError("El parámetro 'fields' no puede estar vacío")
+    invalidos = [campo for campo in campos if campo not in listado.camposDisponibles]
+    if invalidos:
+        raise ValueError(
+            f"Campos inválidos: {', '.join(invalidos)}. "
+            f"Opciones: {', '.join(listado.camposDisponibles)}"
+        )
+    return campos
+
+
+# =============================================
+# PROYECCIÓN DE CAMPOS
+# =============================================
+def _formatearValor(valor):
+    """Aplica el mismo formato que toDict() a fechas y horas."""
+    if isinstance(valor, time):
+        return valor.strftime("%H:%M")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def _consultaProyectada(listado, campos):
+    """SELECT solo de las columnas pedidas (más sus dependencias y las claves de orden)."""
+    columnas = set()
+    for campo in campos:
+        if campo in listado.campos:
+            columnas.add(campo)
+        else:
+            columnas.update(listado.calculados[campo][0])
+
+    expresiones = [listado.campos[nombre].label(nombre) for nombre in sorted(columnas)]
+    expresiones += [
+        columna.label(f"_orden{indice}")
+        for indice, (columna, _) in enumerate(listado.orden)
+    ]
+    return listado.desde(db.session.query(*expresiones))
+
+
+def _serializarProyeccion(listado, campos, filas):
+    """Convierte filas proyectadas en diccionarios con solo los campos pedidos."""
+    calculados = valoresCalculados(
+        {campo: listado.calculados[campo][1:] for campo in campos if campo in listado.calculados},
+        filas
+    )
+    datos = []
+    for posicion, fila in enumerate(filas):
+        item = {}
+        for campo in campos:
+            if campo in calculados:
+                item[campo] = calculados[campo][posicion]
+            else:
+                item[campo] = _formatearValor(getattr(fila, campo))
+        datos.append(item)
+    return datos
+
+
+def _clavesDeFila(listado, fila, proyectada):
+    """Valores de ordenamiento de una fila, para construir el siguiente cursor."""
+    if proyectada:
+        return [getattr(fila, f"_orden{indice}") for indice in range(len(listado.orden))]
+    entidad = listado.entidad(fila)
+    return [getattr(entidad, columna.key) for columna, _ in listado.orden]
+
+
+# =============================================
+# RESPUESTA DEL LISTADO
+# =============================================
+def _leerPagina(listado, campos, paginado):
+    """
+    Ejecuta la consulta del listado (proyectada si 'campos') aplicando, si
+    'paginado', ?limit= y ?cursor=. Retorna (filas, token de la página
+    siguiente o None). Lanza ValueError si algún parámetro no es válido.
+    """
+    limite = _leerLimite() if paginado else None
+    cursor = request.args.get("cursor")
+    valoresCursor = decodificarCursor(cursor, listado.orden) if cursor else None
+
+    proyectada = campos is not None
+    consulta = _consultaProyectada(listado, campos) if proyectada else listado.consulta()
+    if valoresCursor is not None:
+        consulta = consulta.filter(_condicionCursor(listado.orden, valoresCursor))
+    consulta = consulta.order_by(*_ordenarPor(listado.orden))
+
+    if paginado:
+        # Se pide una fila extra solo para saber si existe una página siguiente
+        filas = consulta.limit(limite + 1).all()
+        haySiguiente = len(filas) > limite
+        filas = filas[:limite]
+    else:
+        filas = consulta.all()
+        haySiguiente = False
+
+    siguiente = (
+        codificarCursor(_clavesDeFila(listado, filas[-1], proyectada))
+        if haySiguiente else None
+    )
+    return filas, siguiente
+
+
+def paginarListado(listado, paginado):
+    """
+    Ejecuta un listado aplicando ?fields= y, si 'paginado', ?limit= y ?cursor=.
+    Retorna (datos, token de la página siguiente o None).
+    Lanza ValueError si algún parámetro no es válido.
+    """
+    campos = _leerCampos(listado)
+    filas, siguiente = _leerPagina(listado, campos, paginado)
+    if campos is not None:
+        datos = _serializarProyeccion(listado, campos, filas)
+    else:
+        datos = listado.serializar(filas)
+    return datos, siguiente
+
+
+def filasListado(listado, *condiciones):
+    """Filas de columnas con todos los campos del listado que cumplan las condiciones, en su orden."""
+    return (
+        _consultaProyectada(listado, listado.camposDisponibles)
+        .filter(*condiciones)
+        .order_by(*_ordenarPor(listado.orden))
+        .all()
+    )
+
+
+def responderListado(listado):
+    """
+    Ejecuta un listado aplicando paginación y proyección según la petición.
+    Retorna la tupla (respuesta, código) lista para devolver desde la ruta.
+    Las filas se leen como columnas y se codifican sin pasar por toDict()
+    (ver services/serializacion.py).
+    """
+    paginado = "limit" in request.args or "cursor" in request.args
+    try:
+        campos = _leerCampos(listado) or listado.camposDisponibles
+        filas, siguiente = _leerPagina(listado, campos, paginado)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    arreglo = codificarFilas(listado.codificador(campos), filas)
+    if not paginado:
+        return respuestaJson(arreglo), 200
+    return respuestaJson(codificarObjeto({"datos": Fragmento(arreglo), "next": siguiente})), 200
+
+
+def responderBusqueda(listado, buscar):
+    """
+    Atiende GET .../buscar?q=: 'buscar(texto, limite, despues)' retorna
+    ([(id, puntaje)] por relevancia, total) y las filas salen del listado
+    en ese orden. Sin ?limit= ni ?cursor= responde todas las coincidencias
+    (arreglo); con ellos, {"datos": [...], "next": <token> | null, "total": n}.
+    """
+    termino = request.args.get("q", "").strip()
+    if not termino:
+        return jsonify({"error": "Debe proporcionar un término de búsqueda"}), 400
+
+    paginado = "limit" in request.args or "cursor" in request.args
+    try:
+        limite = _leerLimite() if paginado else None
+        cursor = request.args.get("cursor")
+        despues = decodificarCursorBusqueda(cursor) if cursor else None
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    # Se pide un resultado extra solo para saber si existe una página siguiente
+    pares, total = buscar(termino, limite + 1 if paginado else None, despues)
+    siguiente = None
+    if paginado and len(pares) > limite:
+        pares = pares[:limite]
+        siguiente = codificarCursor([pares[-1][1], pares[-1][0]])
+
+    filas = []
+    if pares:
+        # Cargar las filas encontradas y respetar el orden de relevancia
+        posicion = {idFila: indice for indice, (idFila, _) in enumerate(pares)}
+        filas = filasListado(listado, listado.campos["id"].in_(posicion))
+        filas.sort(key=lambda fila: posicion[fila.id])
+
+    arreglo = codificarFilas(listado.codificador(), filas)
+    if not paginado:
+        return respuestaJson(arreglo), 200
+    return respuestaJson(codificarObjeto({
+        "datos": Fragmento(arreglo), "next": siguiente, "total": total
+    })), 200
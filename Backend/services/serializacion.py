@@ -0,0 +1,331 @@
+"""
+Serialización JSON de las respuestas.
+
+Problema que resuelve:
+    Los listados cargaban cada fila como objeto del ORM, la convertían a dict
+    con toDict() (isoformat, strftime y f-strings por fila) y después la
+    pasaban por el json de la biblioteca estándar. Con listas grandes
+    serializar costaba más que la consulta.
+
+Estrategia:
+    - Los listados leen filas de columnas (Row), con la misma consulta
+      proyectada de ?fields= (ver services/paginacion.py), sin instanciar
+      modelos.
+    - Cada listado arma una sola vez su Codificador a partir de los tipos de
+      sus columnas. Los valores se convierten por columna y no por fila; las
+      fechas y horas con memoria, porque se repiten mucho.
+    - El texto lo produce un backend intercambiable (JSON_BACKEND):
+        orjson    - extensión compilada opcional (pip install orjson; fuera de
+                    requirements.txt). auto la usa si está instalada
+        estandar  - biblioteca estándar: una plantilla por fila llenada con
+                    los valores ya codificados, sin dicts intermedios. Genera
+                    exactamente el mismo texto que jsonify()
+    - ProveedorJson reemplaza al proveedor JSON de Flask, así jsonify() y
+      request.get_json() también usan el backend elegido.
+
+Diferencias de orjson frente a jsonify(): envía los caracteres no ASCII en
+UTF-8 en lugar de escaparlos (\\u00f1) y los NaN como null. Las claves se
+siguen ordenando y las fechas sueltas mantienen el formato de Flask.
+"""
+import json
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from math import isfinite
+from operator import itemgetter
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import types
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa la biblioteca estándar
+    orjson = None
+
+BACKENDS = ("auto", "orjson", "estandar")
+
+# Formatos de columna que el Codificador distingue
+FECHA = "fecha"
+HORA = "hora"
+TEXTO = "texto"
+NUMERO = "numero"
+BOOLEANO = "booleano"
+OTRO = "otro"
+
+
+def _formatoDeTipo(tipo):
+    """Formato de una columna según su tipo de SQLAlchemy."""
+    if isinstance(tipo, types.Date):
+        return FECHA
+    if isinstance(tipo, types.Time):
+        return HORA
+    if isinstance(tipo, types.String):
+        return TEXTO
+    if isinstance(tipo, (types.Integer, types.Float)):
+        return NUMERO
+    if isinstance(tipo, types.Boolean):
+        return BOOLEANO
+    return OTRO
+
+
+class Codificador:
+    """
+    Convierte filas de columnas (Row) en un arreglo JSON con los mismos campos
+    y formatos que toDict(). Se arma una vez por listado y conjunto de campos.
+
+    Atributos:
+        nombres     - Campos en orden alfabético (el mismo orden de jsonify())
+        formatos    - Formato de cada campo (FECHA, HORA, TEXTO, ...)
+        calculados  - Campos derivados: nombre -> (función(filas), posición).
+                      Ver valoresCalculados
+    """
+
+    def __init__(self, tipos, calculados=None):
+        self.calculados = calculados or {}
+        self.nombres = sorted(list(tipos) + list(self.calculados))
+        self.formatos = [
+            OTRO if nombre in self.calculados else _formatoDeTipo(tipos[nombre])
+            for nombre in self.nombres
+        ]
+        # Plantilla de la biblioteca estándar: '{"clave":%s,...}'
+        self.plantilla = "{" + ",".join(
+            encode_basestring_ascii(nombre).replace("%", "%%") + ":%s" for nombre in self.nombres
+        ) + "}"
+
+    def columnas(self, filas, conversores):
+        """
+        Valores de cada campo (en el orden de 'nombres') para todas las filas,
+        pasados por conversores[formato] si el formato tiene conversor.
+        """
+        posiciones = {nombre: indice for indice, nombre in enumerate(filas[0]._fields)}
+        calculados = valoresCalculados(self.calculados, filas)
+        resultado = []
+        for nombre, formato in zip(self.nombres, self.formatos):
+            if nombre in calculados:
+                valores = calculados[nombre]
+            else:
+                valores = map(itemgetter(posiciones[nombre]), filas)
+            conversor = conversores.get(formato)
+            resultado.append(map(conversor, valores) if conversor else valores)
+        return resultado
+
+
+def valoresCalculados(calculados, filas):
+    """
+    Valores de los campos calculados (nombre -> (función, posición)) para un
+    lote de filas. La función se ejecuta una vez por lote aunque la usen
+    varios campos: con posición None retorna los valores del campo; si no,
+    una tupla de columnas y cada campo toma la suya.
+    """
+    resultados = {}
+    valores = {}
+    for nombre, (funcion, posicion) in calculados.items():
+        if funcion not in resultados:
+            resultados[funcion] = funcion(filas)
+        valores[nombre] = resultados[funcion] if posicion is None else resultados[funcion][posicion]
+    return valores
+
+
+# =============================================
+# CONVERSORES (memorizados los de fechas y horas: se repiten mucho)
+# =============================================
+@lru_cache(maxsize=8192)
+def _fechaJson(fecha):
+    return "null" if fecha is None else f'"{fecha.isoformat()}"'
+
+
+@lru_cache(maxsize=2048)
+def _horaTexto(hora):
+    return None if hora is None else hora.strftime("%H:%M")
+
+
+@lru_cache(maxsize=2048)
+def _horaJson(hora):
+    return "null" if hora is None else f'"{hora.strftime("%H:%M")}"'
+
+
+def _textoJson(texto):
+    return "null" if texto is None else encode_basestring_ascii(texto)
+
+
+def _numeroJson(numero):
+    if numero is None:
+        return "null"
+    if numero.__class__ is float and not isfinite(numero):
+        return json.dumps(numero)  # NaN e Infinity, igual que jsonify()
+    return repr(numero)
+
+
+def _booleanoJson(valor):
+    return "null" if valor is None else ("true" if valor else "false")
+
+
+_codificadorEstandar = json.JSONEncoder(ensure_ascii=True, sort_keys=True, separators=(",", ":"))
+
+
+def _valorJson(valor):
+    if valor is None:
+        return "null"
+    if valor.__class__ is str:
+        return encode_basestring_ascii(valor)
+    return _codificadorEstandar.encode(valor)
+
+
+# =============================================
+# BACKENDS
+# =============================================
+class _BackendEstandar:
+    """Biblioteca estándar: mismo texto que jsonify() (ASCII, claves ordenadas)."""
+
+    nombre = "estandar"
+
+    _CONVERSORES = {
+        FECHA: _fechaJson,
+        HORA: _horaJson,
+        TEXTO: _textoJson,
+        NUMERO: _numeroJson,
+        BOOLEANO: _booleanoJson,
+        OTRO: _valorJson
+    }
+
+    def codificar(self, obj, default):
+        return json.dumps(
+            obj, default=default, ensure_ascii=True, sort_keys=True, separators=(",", ":")
+        ).encode("ascii")
+
+    def decodificar(self, texto):
+        return json.loads(texto)
+
+    def codificarFilas(self, codificador, filas):
+        if not filas:
+            return b"[]"
+        plantilla = codificador.plantilla
+        columnas = codificador.columnas(filas, self._CONVERSORES)
+        return ("[" + ",".join([plantilla % valores for valores in zip(*columnas)]) + "]").encode("ascii")
+
+
+class _BackendOrjson:
+    """
+    orjson. Sus objetos salen de dicts, que se arman directo desde las columnas
+    (las fechas las formatea orjson; solo las horas se convierten antes).
+    """
+
+    nombre = "orjson"
+
+    _CONVERSORES = {HORA: _horaTexto}
+
+    # Las fechas sueltas pasan al 'default' de Flask para conservar su formato
+    _OPCIONES = (
+        (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        if orjson is not None else 0
+    )
+
+    def codificar(self, obj, default):
+        return orjson.dumps(obj, default=default, option=self._OPCIONES)
+
+    def decodificar(self, texto):
+        return orjson.loads(texto)
+
+    def codificarFilas(self, codificador, filas):
+        if not filas:
+            return b"[]"
+        nombres = codificador.nombres
+        columnas = codificador.columnas(filas, self._CONVERSORES)
+        # 'nombres' ya está ordenado: no hace falta OPT_SORT_KEYS
+        return orjson.dumps([dict(zip(nombres, valores)) for valores in zip(*columnas)])
+
+
+def elegirBackend(nombre="auto"):
+    """Backend según JSON_BACKEND: auto usa orjson si está instalado."""
+    if nombre not in BACKENDS:
+        raise ValueError(f"JSON_BACKEND inválido: '{nombre}'. Opciones: {', '.join(BACKENDS)}")
+    if nombre == "estandar" or (nombre == "auto" and orjson is None):
+        return _BackendEstandar()
+    if orjson is None:
+        raise RuntimeError(
+            "JSON_BACKEND=orjson pero el paquete 'orjson' no está instalado (pip install orjson)"
+        )
+    return _BackendOrjson()
+
+
+# =============================================
+# PROVEEDOR JSON DE FLASK
+# =============================================
+class Fragmento:
+    """Valor ya codificado en JSON (bytes) para incluir tal cual en codificarObjeto()."""
+
+    __slots__ = ("json",)
+
+    def __init__(self, texto):
+        self.json = texto
+
+
+class ProveedorJson(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask con el backend de JSON_BACKEND. Además de
+    jsonify() codifica listados de filas y objetos con partes ya codificadas.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.backend = elegirBackend(app.config.get("JSON_BACKEND", "auto"))
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # indent u otras opciones (modo debug): biblioteca estándar
+            return super().dumps(obj, **kwargs)
+        return self.codificar(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.backend.decodificar(s)
+
+    def codificar(self, obj):
+        """obj en JSON compacto (bytes), con las claves ordenadas como jsonify()."""
+        return self.backend.codificar(obj, self.default)
+
+    def codificarFilas(self, codificador, filas):
+        """Arreglo JSON (bytes) con un objeto por fila."""
+        return self.backend.codificarFilas(codificador, filas)
+
+    def codificarObjeto(self, valores):
+        """Objeto JSON (bytes) con claves ordenadas; los Fragmento van tal cual."""
+        return b"{" + b",".join(
+            self.codificar(clave) + b":"
+            + (valor.json if isinstance(valor, Fragmento) else self.codificar(valor))
+            for clave, valor in sorted(valores.items())
+        ) + b"}"
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.codificar(obj) + b"\n", mimetype=self.mimetype)
+
+
+def configurarSerializacion(app):
+    """Instala ProveedorJson en la aplicación (JSON_BACKEND)."""
+    app.json_provider_class = ProveedorJson
+    app.json = ProveedorJson(app)
+
+
+# =============================================
+# AYUDAS PARA LAS RUTAS
+# =============================================
+def codificarFilas(codificador, filas):
+    """Arreglo JSON (bytes) de las filas, con el backend de la aplicación."""
+    return current_app.json.codificarFilas(codificador, filas)
+
+
+def codificarFila(codificador, fila):
+    """Objeto JSON (bytes) de una sola fila."""
+    return current_app.json.codificarFilas(codificador, [fila])[1:-1]
+
+
+def codificarObjeto(valores):
+    """Objeto JSON (bytes) con claves ordenadas; acepta valores Fragmento."""
+    return current_app.json.codificarObjeto(valores)
+
+
+def respuestaJson(cuerpo):
+    """Response con un cuerpo ya codificado, igual que la de jsonify()."""
+    return current_app.response_class(cuerpo + b"\n", mimetype=current_app.json.mimetype)
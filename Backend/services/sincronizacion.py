@@ -0,0 +1,151 @@
+"""
+Coherencia de las cachés en memoria entre procesos del servidor.
+
+Problema que resuelve:
+    Con varios workers de gunicorn cada proceso tiene su caché de respuestas,
+    su índice de búsqueda y su índice de la agenda. Un commit solo los
+    actualiza en el proceso que lo hizo: los demás servían listados y
+    búsquedas viejos hasta el TTL de la caché o la reconstrucción periódica
+    de los índices (minutos).
+
+Estrategia:
+    - secuencia_cambios (services/cambios.py) ya es un contador compartido
+      que avanza con cada transacción que escribe, y cada fila guarda la
+      versión que la escribió. Antes de cada solicitud a la API el proceso
+      lee el contador (una consulta por llave primaria a la BD de escritura).
+    - Si avanzó desde la última vez, lee las filas con versión en ese rango
+      (una consulta de columnas por tabla, por el índice de 'version') y las
+      marcas de eliminaciones, y avisa a los suscriptores: la caché invalida
+      esas tablas y los índices aplican los cambios fila por fila.
+    - Si 'reinicio' avanzó (sentencias masivas sin marcas) o son más de
+      FILAS_MAXIMAS filas, los suscriptores descartan todo (masivo).
+    - Un solo hilo del proceso aplica los cambios; los demás esperan y ven
+      el resultado.
+
+Se activa con SINCRONIZAR_PROCESOS=1 (gunicorn.conf.py lo define cuando hay
+más de un worker). Con un solo proceso no hace nada: cada commit ya avisa
+a sus cachés (services/observador.py).
+"""
+import threading
+from flask import request
+from models import db
+from models.cambios import Eliminacion
+from models.dueno import Dueno
+from models.mascota import Mascota
+from models.cita import Cita
+from models.historial import HistorialClinico
+from services.derivados import tablasDerivadas
+from services.eliminacion import INCLUIR_OCULTOS, marcarOcultos
+from services.enrutador import leerDelPrimario, suscribirCambioDeBd
+
+# Columnas que leen los suscriptores de cada tabla versionada
+COLUMNAS = {
+    Dueno.__tablename__: (Dueno.id, Dueno.nombre, Dueno.apellido, Dueno.documento, Dueno.eliminadoEn),
+    Mascota.__tablename__: (Mascota.id, Mascota.nombre, Mascota.duenoId, Mascota.eliminadoEn),
+    Cita.__tablename__: (Cita.id, Cita.fecha, Cita.hora, Cita.estado),
+    HistorialClinico.__tablename__: (HistorialClinico.id,),
+}
+
+# Filas por tabla a partir de las cuales conviene descartar todo y reconstruir
+FILAS_MAXIMAS = 5000
+
+# Tablas de las que dependen las respuestas de /api/cambios
+_TABLAS_SECUENCIA = ("secuencia_cambios", Eliminacion.__tablename__)
+
+# Última versión del contador aplicada en este proceso (None = ninguna)
+_estado = {"visto": None}
+_bloqueo = threading.Lock()
+
+# Funciones que reciben los cambios hechos por otros procesos
+_suscriptores = []
+
+
+def suscribirCambiosExternos(funcion):
+    """
+    Registra una función que recibe los cambios confirmados por otros
+    procesos: {"tablas": set, "masivo": bool, "filas": tabla -> filas de
+    COLUMNAS (estado actual), "eliminados": tabla -> ids borrados}.
+    Con masivo=True no hay filas: hay que descartar todo. Puede usarse como
+    decorador.
+    """
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def _cambiosMasivos():
+    tablas = set(COLUMNAS) | set(_TABLAS_SECUENCIA) | set(tablasDerivadas())
+    return {"tablas": tablas, "masivo": True, "filas": {}, "eliminados": {}}
+
+
+def _leerCambios(desde, hasta):
+    """Filas y marcas de borrado con versión en (desde, hasta]; masivo si son demasiadas."""
+    filas = {}
+    for tabla, columnas in COLUMNAS.items():
+        version = columnas[0].class_.version
+        filas[tabla] = db.session.execute(
+            db.select(*columnas).where(version > desde, version <= hasta).limit(FILAS_MAXIMAS + 1),
+            execution_options=INCLUIR_OCULTOS
+        ).all()
+        if len(filas[tabla]) > FILAS_MAXIMAS:
+            return _cambiosMasivos()
+
+    eliminados = {}
+    marcas = db.session.execute(
+        db.select(Eliminacion.tabla, Eliminacion.registroId)
+        .where(Eliminacion.version > desde, Eliminacion.version <= hasta)
+    )
+    for tabla, registroId in marcas:
+        eliminados.setdefault(tabla, set()).add(registroId)
+
+    tablas = {tabla for tabla, lista in filas.items() if lista} | set(eliminados)
+    tablas.add("secuencia_cambios")
+    if eliminados:
+        tablas.add(Eliminacion.__tablename__)
+    if tablas & {Mascota.__tablename__, HistorialClinico.__tablename__}:
+        tablas.update(tablasDerivadas())
+    return {"tablas": tablas, "masivo": False, "filas": filas, "eliminados": eliminados}
+
+
+def sincronizar():
+    """Aplica los cambios que confirmaron otros procesos desde la última vez."""
+    # Aquí y no arriba: las cachés importan este módulo y así los eventos de
+    # sesión de services/cambios.py siguen registrándose después de los suyos
+    from services.cambios import estadoSecuencia
+    with leerDelPrimario():
+        valor, reinicio = estadoSecuencia()
+    if _estado["visto"] is not None and valor == _estado["visto"]:
+        return
+    with _bloqueo:
+        visto = _estado["visto"]
+        # Otro hilo ya aplicó hasta una versión igual o posterior
+        if visto is not None and valor <= visto:
+            return
+        if visto is None or reinicio > visto:
+            cambios = _cambiosMasivos()
+        else:
+            with leerDelPrimario():
+                cambios = _leerCambios(visto, valor)
+        if cambios["masivo"] or cambios["eliminados"]:
+            # Otro proceso ocultó o borró registros: se vuelve a consultar
+            marcarOcultos(None)
+        for funcion in _suscriptores:
+            funcion(cambios)
+        _estado["visto"] = valor
+
+
+@suscribirCambioDeBd
+def _olvidarVersion():
+    """Con otra BD (primaria o respaldo) el contador es otro: se empieza de nuevo."""
+    with _bloqueo:
+        _estado["visto"] = None
+
+
+def _sincronizarSolicitud():
+    if request.path.startswith("/api/"):
+        sincronizar()
+
+
+def configurarSincronizacion(app):
+    """Revisa el contador antes de cada solicitud a la API (SINCRONIZAR_PROCESOS)."""
+    if app.config.get("SINCRONIZAR_PROCESOS", False):
+        app.before_request(_sincronizarSolicitud)
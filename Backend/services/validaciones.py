@@ -0,0 +1,247 @@
+"""
+Reglas de validación de los registros que recibe la API.
+
+Las usan los POST de cada recurso y la importación masiva
+(services/importacion.py), así un registro se acepta o rechaza con el mismo
+criterio y el mismo mensaje venga por donde venga.
+
+Cada función recibe el diccionario enviado por el cliente y retorna los
+valores ya limpios, listos para insertar, o lanza ErrorValidacion. Aquí no se
+consulta la BD: la existencia del dueño/mascota y el documento único se
+verifican aparte (uno por uno en el POST, por lotes en la importación).
+"""
+from datetime import date, datetime
+from models.cita import Cita
+
+# Estados válidos de una cita
+ESTADOS_CITA = ["Programada", "Completada", "Cancelada", "No asistió"]
+
+# Cambios de estado en bloque (POST /api/citas/estado): estado nuevo -> estados
+# desde los que se admite. Volver a Programada exige revisar la agenda cita por
+# cita, así que solo se hace con PUT /api/citas/<id>.
+TRANSICIONES_CITA = {
+    "Completada": ("Programada", "No asistió"),
+    "Cancelada": ("Programada",),
+    "No asistió": ("Programada",),
+}
+
+# Ids máximos por cambio de estado en bloque (límite de parámetros del IN)
+MAX_IDS_TRANSICION = 1000
+
+
+class ErrorValidacion(ValueError):
+    """Registro inválido. 'codigo' es el estado HTTP con el que se responde."""
+
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.codigo = codigo
+
+
+# =============================================
+# LECTURA DE CAMPOS
+# =============================================
+def _texto(datos, campo):
+    """Valor del campo como texto sin espacios ("" si no viene)."""
+    valor = datos.get(campo)
+    if valor is None:
+        return ""
+    return valor.strip() if isinstance(valor, str) else str(valor).strip()
+
+
+def _opcional(datos, campo):
+    """Texto opcional: vacío se guarda como NULL."""
+    return _texto(datos, campo) or None
+
+
+def _exigirCampos(datos, camposRequeridos):
+    """Valida que el registro sea un objeto y traiga los campos obligatorios."""
+    if not isinstance(datos, dict):
+        raise ErrorValidacion("Cada registro debe ser un objeto JSON")
+    for campo in camposRequeridos:
+        if not _texto(datos, campo):
+            raise ErrorValidacion(f"El campo '{campo}' es obligatorio")
+
+
+def _entero(datos, campo):
+    """Identificador entero (acepta "12" porque CSV siempre entrega texto)."""
+    valor = datos.get(campo)
+    if isinstance(valor, bool):
+        raise ErrorValidacion(f"El campo '{campo}' debe ser un número entero")
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorValidacion(f"El campo '{campo}' debe ser un número entero")
+
+
+def _decimal(datos, campo):
+    """Número opcional (peso): vacío o ausente se guarda como NULL."""
+    valor = datos.get(campo)
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, bool):
+        raise ErrorValidacion(f"El campo '{campo}' debe ser numérico")
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ErrorValidacion(f"El campo '{campo}' debe ser numérico")
+
+
+def _fecha(valor, mensaje):
+    """Convierte YYYY-MM-DD en date."""
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ErrorValidacion(mensaje)
+
+
+# =============================================
+# REGLAS POR RECURSO
+# =============================================
+def validarDueno(datos):
+    """
+    Campos obligatorios: nombre, apellido, documento, telefono.
+    (El documento único se verifica contra la BD fuera de esta función.)
+    """
+    _exigirCampos(datos, ["nombre", "apellido", "documento", "telefono"])
+    return {
+        "nombre": _texto(datos, "nombre"),
+        "apellido": _texto(datos, "apellido"),
+        "documento": _texto(datos, "documento"),
+        "telefono": _texto(datos, "telefono"),
+        "correo": _opcional(datos, "correo"),
+        "direccion": _opcional(datos, "direccion")
+    }
+
+
+def validarMascota(datos):
+    """
+    Campos obligatorios: nombre, especie, raza, fechaNacimiento, duenoId.
+    La fecha de nacimiento no puede ser futura.
+    """
+    _exigirCampos(datos, ["nombre", "especie", "raza", "fechaNacimiento", "duenoId"])
+    duenoId = _entero(datos, "duenoId")
+
+    fechaNacimiento = _fecha(
+        datos["fechaNacimiento"], "Formato de fecha inválido. Use YYYY-MM-DD"
+    )
+    if fechaNacimiento > date.today():
+        raise ErrorValidacion("La fecha de nacimiento no puede ser una fecha futura")
+
+    return {
+        "nombre": _texto(datos, "nombre"),
+        "especie": _texto(datos, "especie"),
+        "raza": _texto(datos, "raza"),
+        "fechaNacimiento": fechaNacimiento,
+        "peso": _decimal(datos, "peso"),
+        "observaciones": _opcional(datos, "observaciones"),
+        "duenoId": duenoId
+    }
+
+
+def validarCita(datos, permitirPasadas=False):
+    """
+    Campos obligatorios: fecha, hora, motivo, mascotaId.
+    La fecha/hora debe ser futura, salvo permitirPasadas (migración de
+    citas históricas desde la importación masiva).
+    """
+    _exigirCampos(datos, ["fecha", "hora", "motivo", "mascotaId"])
+    mascotaId = _entero(datos, "mascotaId")
+
+    try:
+        fecha = datetime.strptime(datos["fecha"], "%Y-%m-%d").date()
+        hora = datetime.strptime(datos["hora"], "%H:%M").time()
+    except (TypeError, ValueError):
+        raise ErrorValidacion("Formato inválido. Fecha: YYYY-MM-DD, Hora: HH:MM")
+
+    if not permitirPasadas and not Cita.validarFechaFutura(fecha, hora):
+        raise ErrorValidacion("No se permite agendar citas en fechas u horas pasadas")
+
+    estado = _texto(datos, "estado") or "Programada"
+    if estado not in ESTADOS_CITA:
+        raise ErrorValidacion(f"Estado inválido. Opciones: {', '.join(ESTADOS_CITA)}")
+
+    return {
+        "fecha": fecha,
+        "hora": hora,
+        "motivo": _texto(datos, "motivo"),
+        "estado": estado,
+        "mascotaId": mascotaId
+    }
+
+
+def validarTransicionCitas(datos):
+    """
+    Cambio de estado en bloque: 'estado' (ver TRANSICIONES_CITA) y las citas,
+    por lista de 'ids' o por filtro: 'fecha' o 'desde'/'hasta' (YYYY-MM-DD),
+    'mascotaId' y 'estadoActual'. Se exige al menos una lista o un filtro de
+    fecha o mascota, así un cuerpo incompleto no cambia todas las citas.
+    """
+    if not isinstance(datos, dict):
+        raise ErrorValidacion("El cuerpo debe ser un objeto JSON")
+    estado = _texto(datos, "estado")
+    if estado not in TRANSICIONES_CITA:
+        raise ErrorValidacion(
+            f"Estado inválido. Opciones: {', '.join(TRANSICIONES_CITA)} "
+            "(para reactivar una cita use PUT /api/citas/<id>)"
+        )
+
+    ids = datos.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ErrorValidacion("'ids' debe ser una lista de ids de citas")
+        if len(ids) > MAX_IDS_TRANSICION:
+            raise ErrorValidacion(f"Se admiten hasta {MAX_IDS_TRANSICION} ids por solicitud")
+        ids = sorted({_entero({"ids": valor}, "ids") for valor in ids})
+
+    mensajeFecha = "Formato de fecha inválido. Use YYYY-MM-DD"
+    desde = hasta = None
+    if _texto(datos, "fecha"):
+        desde = hasta = _fecha(datos["fecha"], mensajeFecha)
+    if _texto(datos, "desde"):
+        desde = _fecha(datos["desde"], mensajeFecha)
+    if _texto(datos, "hasta"):
+        hasta = _fecha(datos["hasta"], mensajeFecha)
+    if desde and hasta and desde > hasta:
+        raise ErrorValidacion("'desde' no puede ser posterior a 'hasta'")
+
+    mascotaId = _entero(datos, "mascotaId") if _texto(datos, "mascotaId") else None
+    estadoActual = _texto(datos, "estadoActual") or None
+    if estadoActual is not None and estadoActual not in ESTADOS_CITA:
+        raise ErrorValidacion(f"Estado actual inválido. Opciones: {', '.join(ESTADOS_CITA)}")
+
+    if ids is None and desde is None and hasta is None and mascotaId is None:
+        raise ErrorValidacion("Indique 'ids' o un filtro: 'fecha', 'desde'/'hasta' o 'mascotaId'")
+
+    return {
+        "estado": estado,
+        "ids": ids,
+        "desde": desde,
+        "hasta": hasta,
+        "mascotaId": mascotaId,
+        "estadoActual": estadoActual
+    }
+
+
+def validarRegistro(datos):
+    """
+    Campos obligatorios: diagnostico, tratamiento, veterinario, mascotaId.
+    Sin fecha se asume la de hoy.
+    """
+    _exigirCampos(datos, ["diagnostico", "tratamiento", "veterinario", "mascotaId"])
+    mascotaId = _entero(datos, "mascotaId")
+
+    fecha = date.today()
+    if _texto(datos, "fecha"):
+        fecha = _fecha(datos["fecha"], "Formato de fecha inválido. Use YYYY-MM-DD")
+
+    return {
+        "fecha": fecha,
+        "diagnostico": _texto(datos, "diagnostico"),
+        "tratamiento": _texto(datos, "tratamiento"),
+        "medicamentos": _opcional(datos, "medicamentos"),
+        "veterinario": _texto(datos, "veterinario"),
+        "observaciones": _opcional(datos, "observaciones"),
+        "pesoEnConsulta": _decimal(datos, "pesoEnConsulta"),
+        "mascotaId": mascotaId
+    }
@@ -0,0 +1,66 @@
+"""
+Servidor de producción de Huellitas Vet.
+
+A diferencia de 'python app.py' (servidor de desarrollo de Flask: un solo
+proceso, recarga automática y depurador), levanta la aplicación con debug
+desactivado en un servidor WSGI de producción. Antes empaqueta el Frontend
+(empaquetar.py) si algún archivo fuente cambió desde el último empaquetado.
+    - Linux/macOS: gunicorn con varios procesos e hilos (gunicorn.conf.py)
+    - Windows:     waitress, un proceso con varios hilos (gunicorn no funciona
+                   en Windows)
+El hub de eventos en vivo (services/hubEventos.py) corre aparte de los hilos
+WSGI: con gunicorn en su propio proceso, con waitress en un hilo asyncio.
+
+Ejecución:
+    python servidor.py
+    WEB_CONCURRENCY=4 GUNICORN_THREADS=8 PORT=8000 python servidor.py
+"""
+import os
+import sys
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def iniciarGunicorn():
+    """Reemplaza argv y delega en la línea de comandos de gunicorn."""
+    from gunicorn.app.wsgiapp import run
+    sys.argv = ["gunicorn", "-c", os.path.join(DIRECTORIO, "gunicorn.conf.py"), "wsgi:app"]
+    return run()
+
+
+def iniciarWaitress():
+    """Un proceso con WAITRESS_THREADS hilos (por defecto, 4 por CPU)."""
+    from waitress import serve
+    from config import Config
+    from wsgi import app
+    from services.hubEventos import iniciarHubLocal
+    from services.estadosCitas import barredorInasistencias
+    from services.eliminacion import reanudarPurga
+    iniciarHubLocal()
+    barredorInasistencias.iniciar(app)
+    reanudarPurga(app)
+    hilos = int(os.environ.get("WAITRESS_THREADS", 4 * (os.cpu_count() or 1)))
+    print(f"  Servidor de producción (waitress, {hilos} hilos): http://localhost:{Config.PUERTO}")
+    serve(app, host=os.environ.get("HOST", "0.0.0.0"), port=Config.PUERTO, threads=hilos)
+
+
+def main():
+    os.chdir(DIRECTORIO)
+    sys.path.insert(0, DIRECTORIO)
+    try:
+        from empaquetar import empaquetar, frontendDesactualizado
+        if frontendDesactualizado():
+            print("  Empaquetando el Frontend (JS/CSS minificados y comprimidos)...")
+            empaquetar()
+        if os.name == "nt":
+            iniciarWaitress()
+        else:
+            iniciarGunicorn()
+    except ImportError as error:
+        print(f"  Falta el paquete '{error.name}': pip install -r requirements.txt")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
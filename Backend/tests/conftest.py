@@ -0,0 +1,57 @@
+"""
+Configuración común de las pruebas (pytest, desde la carpeta Backend):
+
+    python -m pytest tests
+
+La aplicación usa una BD SQLite temporal con datos sintéticos
+(seed.generarDatosSinteticos). La caché de respuestas, el hub de eventos y
+el barrido de inasistencias se desactivan: las pruebas ven la BD directa.
+"""
+import os
+import sys
+import tempfile
+
+# Deben fijarse antes de importar config/app
+_directorio = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directorio, 'pruebas.db')}"
+os.environ["CACHE_HABILITADA"] = "0"
+os.environ["EVENTOS_PUERTO"] = "0"
+os.environ["INASISTENCIAS_INTERVALO_MINUTOS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from app import crearApp  # noqa: E402
+from models import db  # noqa: E402
+from seed import generarDatosSinteticos  # noqa: E402
+
+# Dueños sintéticos: suficientes para que una consulta por fila (N+1) se note
+DUENOS_PRUEBA = 60
+
+
+@pytest.fixture(scope="session")
+def app():
+    aplicacion = crearApp()
+    with aplicacion.app_context():
+        generarDatosSinteticos(DUENOS_PRUEBA)
+    return aplicacion
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def consultas(app):
+    """Lista de las sentencias SQL enviadas a la BD durante la prueba."""
+    enviadas = []
+
+    def registrar(conexion, cursor, sentencia, parametros, contexto, varias):
+        enviadas.append(sentencia)
+
+    with app.app_context():
+        motor = db.engine
+    event.listen(motor, "before_cursor_execute", registrar)
+    yield enviadas
+    event.remove(motor, "before_cursor_execute", registrar)
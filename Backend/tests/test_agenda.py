@@ -0,0 +1,103 @@
+"""
+Agenda de citas (services/agenda.py): horario de la clínica, franjas,
+choques con alternativas y disponibilidad del día.
+Cada prueba usa un día propio, lejos de las citas sintéticas.
+"""
+from datetime import date, time, timedelta
+import pytest
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.cita import Cita
+
+
+def _lunes(semanas):
+    """Un lunes a más de un año de hoy, 'semanas' después del primero."""
+    base = date.today() + timedelta(days=400)
+    return base + timedelta(days=-base.weekday(), weeks=semanas)
+
+
+def _cita(fecha, hora, mascotaId=1, **extra):
+    return {"fecha": fecha.isoformat(), "hora": hora, "motivo": "Control",
+            "mascotaId": mascotaId, **extra}
+
+
+def test_doble_reserva_responde_409_con_alternativas(cliente):
+    fecha = _lunes(0)
+    assert cliente.post("/api/citas", json=_cita(fecha, "09:00")).status_code == 201
+
+    respuesta = cliente.post("/api/citas", json=_cita(fecha, "09:00", mascotaId=2))
+    assert respuesta.status_code == 409
+    alternativas = respuesta.get_json()["alternativas"]
+    assert alternativas[0] == "08:00"
+    assert "09:00" not in alternativas
+    assert len(alternativas) == 5
+
+
+@pytest.mark.parametrize("hora, dias", [
+    ("07:30", 0),    # antes de la apertura
+    ("18:00", 0),    # al cierre
+    ("09:15", 0),    # fuera de la franja de 30 minutos
+    ("10:00", 6),    # domingo
+])
+def test_fuera_de_horario_o_de_franja_responde_400(cliente, hora, dias):
+    fecha = _lunes(1) + timedelta(days=dias)
+    respuesta = cliente.post("/api/citas", json=_cita(fecha, hora))
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.get_json()
+
+
+def test_cancelar_libera_la_franja(cliente):
+    fecha = _lunes(2)
+    citaId = cliente.post("/api/citas", json=_cita(fecha, "10:00")).get_json()["cita"]["id"]
+    assert cliente.put(f"/api/citas/{citaId}", json={"estado": "Cancelada"}).status_code == 200
+
+    nueva = cliente.post("/api/citas", json=_cita(fecha, "10:00", mascotaId=2))
+    assert nueva.status_code == 201
+
+    # Reactivar la cancelada choca ahora con la nueva
+    reactivar = cliente.put(f"/api/citas/{citaId}", json={"estado": "Programada"})
+    assert reactivar.status_code == 409
+
+
+def test_reagendar_no_choca_consigo_misma(cliente):
+    fecha = _lunes(3)
+    citaId = cliente.post("/api/citas", json=_cita(fecha, "11:00")).get_json()["cita"]["id"]
+    respuesta = cliente.put(f"/api/citas/{citaId}", json={"hora": "11:00", "motivo": "Vacuna"})
+    assert respuesta.status_code == 200
+    assert cliente.put(f"/api/citas/{citaId}", json={"hora": "11:30"}).status_code == 200
+    assert cliente.post("/api/citas", json=_cita(fecha, "11:00", mascotaId=2)).status_code == 201
+
+
+def test_disponibilidad_del_dia(cliente):
+    fecha = _lunes(4)
+    cliente.post("/api/citas", json=_cita(fecha, "14:00"))
+
+    respuesta = cliente.get(f"/api/citas/disponibilidad?fecha={fecha}")
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos["atiende"] is True
+    assert (datos["apertura"], datos["cierre"], datos["duracionMinutos"]) == ("08:00", "18:00", 30)
+    assert len(datos["franjas"]) == 20
+    assert {"hora": "14:00", "disponible": False} in datos["franjas"]
+    assert "14:00" not in datos["disponibles"]
+    assert len(datos["disponibles"]) == 19
+
+
+def test_disponibilidad_de_dia_sin_atencion_y_fecha_invalida(cliente):
+    domingo = _lunes(4) + timedelta(days=6)
+    datos = cliente.get(f"/api/citas/disponibilidad?fecha={domingo}").get_json()
+    assert datos["atiende"] is False
+    assert datos["disponibles"] == []
+
+    assert cliente.get("/api/citas/disponibilidad?fecha=31-12-2030").status_code == 400
+
+
+def test_indice_unico_rechaza_dos_programadas_en_la_misma_franja(app):
+    fecha = _lunes(5)
+    with app.app_context():
+        for mascotaId in (1, 2):
+            db.session.add(Cita(fecha=fecha, hora=time(15, 0), motivo="Control",
+                                estado="Programada", mascotaId=mascotaId))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
@@ -0,0 +1,114 @@
+"""
+Búsqueda de dueños y mascotas (services/busqueda.py, GET .../buscar):
+orden por relevancia, tildes y mayúsculas, errores de escritura, parte del
+documento y páginas con el total. Los apellidos de estas pruebas son
+palabras que no aparecen en los datos sintéticos; los documentos empiezan por 87.
+"""
+import pytest
+from services.paginacion import codificarCursor
+
+
+def _crearDueno(cliente, nombre, apellido, documento):
+    respuesta = cliente.post("/api/duenos", json={
+        "nombre": nombre, "apellido": apellido, "documento": documento, "telefono": "3001234567"
+    })
+    assert respuesta.status_code == 201, respuesta.get_json()
+    return respuesta.get_json()["dueno"]["id"]
+
+
+def _buscar(cliente, url):
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return respuesta.get_json()
+
+
+def _ids(filas):
+    return [fila["id"] for fila in filas]
+
+
+def test_orden_exacto_prefijo_y_error_de_escritura(cliente):
+    difuso = _crearDueno(cliente, "Ana", "Xilofomo", "87000001")
+    prefijo = _crearDueno(cliente, "Ana", "Xilofonos", "87000002")
+    exacto = _crearDueno(cliente, "Ana", "Xilofono", "87000003")
+
+    assert _ids(_buscar(cliente, "/api/duenos/buscar?q=xilofono")) == [exacto, prefijo, difuso]
+
+
+def test_ignora_tildes_y_mayusculas(cliente):
+    duenoId = _crearDueno(cliente, "Íñigo", "Peñalósa", "87000011")
+    for termino in ("penalosa", "PEÑALOSA", "iñigo peñalosa", "Inigo"):
+        assert duenoId in _ids(_buscar(cliente, f"/api/duenos/buscar?q={termino}")), termino
+
+
+def test_tolera_errores_de_escritura(cliente):
+    duenoId = _crearDueno(cliente, "Bruno", "Quintanillo", "87000021")
+    assert _ids(_buscar(cliente, "/api/duenos/buscar?q=quintanilo")) == [duenoId]
+    assert _ids(_buscar(cliente, "/api/duenos/buscar?q=bruno quintanyllo")) == [duenoId]
+    assert _buscar(cliente, "/api/duenos/buscar?q=zzqqxx") == []
+
+
+def test_documento_por_prefijo_o_en_cualquier_parte(cliente):
+    duenoId = _crearDueno(cliente, "Dora", "Documental", "87999123")
+    mascotaId = cliente.post("/api/mascotas", json={
+        "nombre": "Tango", "especie": "Perro", "raza": "Pug",
+        "fechaNacimiento": "2022-01-01", "duenoId": duenoId
+    }).get_json()["mascota"]["id"]
+
+    for termino in ("87999123", "8799", "99912", "9123"):
+        assert duenoId in _ids(_buscar(cliente, f"/api/duenos/buscar?q={termino}")), termino
+    assert mascotaId in _ids(_buscar(cliente, "/api/mascotas/buscar?q=99912"))
+    # El documento completo va antes que una coincidencia parcial
+    assert _ids(_buscar(cliente, "/api/duenos/buscar?q=87999123"))[0] == duenoId
+    # A los números no se les aplica la tolerancia a errores
+    assert duenoId not in _ids(_buscar(cliente, "/api/duenos/buscar?q=87999124"))
+
+
+def _recorrer(cliente, url, limite):
+    """Ids de todas las páginas siguiendo 'next'; comprueba el total de cada una."""
+    ids = []
+    pagina = _buscar(cliente, f"{url}&limit={limite}")
+    total = pagina["total"]
+    while True:
+        assert pagina["total"] == total and len(pagina["datos"]) <= limite
+        ids.extend(_ids(pagina["datos"]))
+        if not pagina["next"]:
+            return ids, total
+        pagina = _buscar(cliente, f"{url}&limit={limite}&cursor={pagina['next']}")
+
+
+def test_paginas_con_total_y_sin_repetir(cliente):
+    for numero in range(7):
+        _crearDueno(cliente, "Sofía", "Zarzamora", f"8700010{numero}")
+
+    # Un término (por niveles de puntaje) y varios (puntaje sumado)
+    for termino in ("zarzamora", "zarzamora sofia", "zarzamoras"):
+        url = f"/api/duenos/buscar?q={termino}"
+        completo = _ids(_buscar(cliente, url))
+        assert len(completo) == 7, termino
+        assert _recorrer(cliente, url, 3) == (completo, 7)
+
+
+def test_pagina_de_mascotas(cliente):
+    duenoId = _crearDueno(cliente, "Rita", "Madriguera", "87000201")
+    for nombre in ("Copo", "Pompón", "Nieve"):
+        cliente.post("/api/mascotas", json={
+            "nombre": nombre, "especie": "Conejo", "raza": "Belier",
+            "fechaNacimiento": "2023-04-04", "duenoId": duenoId
+        })
+    primera = _buscar(cliente, "/api/mascotas/buscar?q=madriguera&limit=2")
+    assert primera["total"] == 3 and len(primera["datos"]) == 2 and primera["next"]
+    segunda = _buscar(cliente, f"/api/mascotas/buscar?q=madriguera&limit=2&cursor={primera['next']}")
+    assert segunda["next"] is None
+    assert {fila["nombre"] for fila in primera["datos"] + segunda["datos"]} == {"Copo", "Pompón", "Nieve"}
+
+
+@pytest.mark.parametrize("parametros", [
+    "q=ana&cursor=no-es-base64!",
+    "q=ana&cursor=" + codificarCursor(["ana", 1]),
+    "q=ana&cursor=" + codificarCursor([1.0, True]),
+    "q=ana&cursor=" + codificarCursor([1.0]),
+    "q=ana&limit=0",
+    "q=",
+])
+def test_parametros_invalidos_responden_400(cliente, parametros):
+    assert cliente.get(f"/api/duenos/buscar?{parametros}").status_code == 400
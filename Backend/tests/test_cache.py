@@ -0,0 +1,82 @@
+"""
+Caché de respuestas GET (services/cache.py). conftest la desactiva para las
+demás pruebas; aquí se activa en memoria solo durante cada prueba.
+"""
+import pytest
+from services import cache
+
+
+@pytest.fixture
+def cacheActiva(app, monkeypatch):
+    monkeypatch.setitem(app.config, "CACHE_HABILITADA", True)
+    monkeypatch.setitem(app.config, "CACHE_URL", "")
+    # Al terminar vuelve el backend anterior (None: caché apagada)
+    monkeypatch.setattr(cache, "_backend", cache._backend)
+    return cache.configurarCache(app)
+
+
+def _crearDuenoConMascota(cliente, documento):
+    duenoId = cliente.post("/api/duenos", json={
+        "nombre": "Carla", "apellido": "Cache", "documento": documento, "telefono": "3001234567"
+    }).get_json()["dueno"]["id"]
+    mascotaId = cliente.post("/api/mascotas", json={
+        "nombre": "Nube", "especie": "Gato", "raza": "Angora",
+        "fechaNacimiento": "2018-07-07", "duenoId": duenoId
+    }).get_json()["mascota"]["id"]
+    return duenoId, mascotaId
+
+
+def test_get_repetido_sale_de_la_cache_con_el_mismo_etag(cliente, cacheActiva):
+    duenoId, _ = _crearDuenoConMascota(cliente, "86000001")
+    url = f"/api/duenos/{duenoId}"
+
+    primera = cliente.get(url)
+    segunda = cliente.get(url)
+    assert (primera.status_code, segunda.status_code) == (200, 200)
+    assert primera.headers["X-Cache"] == "MISS" and segunda.headers["X-Cache"] == "HIT"
+    assert primera.headers["ETag"] and primera.headers["ETag"] == segunda.headers["ETag"]
+    assert primera.get_data() == segunda.get_data()
+
+
+def test_if_none_match_responde_304_sin_cuerpo(cliente, cacheActiva):
+    duenoId, _ = _crearDuenoConMascota(cliente, "86000002")
+    url = f"/api/duenos/{duenoId}"
+    etag = cliente.get(url).headers["ETag"]
+
+    respuesta = cliente.get(url, headers={"If-None-Match": etag})
+    assert respuesta.status_code == 304
+    assert respuesta.get_data() == b""
+    assert respuesta.headers["ETag"] == etag
+
+    # Un ETag distinto recibe la respuesta completa
+    otra = cliente.get(url, headers={"If-None-Match": '"otro"'})
+    assert otra.status_code == 200 and otra.get_data()
+
+
+def test_una_escritura_invalida_la_entrada(cliente, cacheActiva):
+    duenoId, _ = _crearDuenoConMascota(cliente, "86000003")
+    url = f"/api/duenos/{duenoId}"
+    etag = cliente.get(url).headers["ETag"]
+    assert cliente.get(url).headers["X-Cache"] == "HIT"
+
+    assert cliente.put(url, json={"nombre": "Camila"}).status_code == 200
+
+    respuesta = cliente.get(url, headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["X-Cache"] == "MISS"
+    assert respuesta.headers["ETag"] != etag
+    assert respuesta.get_json()["nombre"] == "Camila"
+
+
+def test_un_cambio_en_una_tabla_dependiente_tambien_invalida(cliente, cacheActiva):
+    # El detalle del dueño depende también de la tabla mascotas
+    duenoId, mascotaId = _crearDuenoConMascota(cliente, "86000004")
+    url = f"/api/duenos/{duenoId}"
+    etag = cliente.get(url).headers["ETag"]
+
+    assert cliente.put(f"/api/mascotas/{mascotaId}", json={"nombre": "Luna"}).status_code == 200
+
+    # Se vuelve a consultar; el cuerpo no cambió, así que el ETag sigue sirviendo
+    respuesta = cliente.get(url, headers={"If-None-Match": etag})
+    assert respuesta.headers["X-Cache"] == "MISS"
+    assert respuesta.status_code == 304
@@ -0,0 +1,134 @@
+"""
+Registro de cambios (services/cambios.py, GET /api/cambios): cada
+transacción que escribe toma una versión al confirmar, las filas
+relacionadas y las marcas de borrado llevan esa versión y una sentencia
+masiva sin marcas mueve 'reinicio'.
+"""
+from models import db
+from models.cambios import SecuenciaCambios
+from models.cita import Cita
+from models.dueno import Dueno
+
+
+def _token(cliente):
+    return cliente.get("/api/cambios").get_json()["token"]
+
+
+def _cambios(cliente, desde):
+    respuesta = cliente.get(f"/api/cambios?since={desde}")
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+
+def _dueno(documento, nombre="Lucía"):
+    return {"nombre": nombre, "apellido": "Prueba", "documento": documento, "telefono": "3001234567"}
+
+
+def _ids(filas):
+    return [fila["id"] for fila in filas]
+
+
+def _crearDuenoConMascota(cliente, documento):
+    duenoId = cliente.post("/api/duenos", json=_dueno(documento)).get_json()["dueno"]["id"]
+    mascota = cliente.post("/api/mascotas", json={
+        "nombre": "Toby", "especie": "Perro", "raza": "Criollo",
+        "fechaNacimiento": "2020-01-01", "duenoId": duenoId
+    })
+    assert mascota.status_code == 201, mascota.get_json()
+    return duenoId, mascota.get_json()["mascota"]["id"]
+
+
+def test_alta_avanza_el_token_y_aparece_en_los_cambios(cliente):
+    antes = _token(cliente)
+    duenoId = cliente.post("/api/duenos", json=_dueno("81000001")).get_json()["dueno"]["id"]
+
+    cambios = _cambios(cliente, antes)
+    assert cambios["token"] == antes + 1
+    assert cambios["reiniciar"] is False
+    assert _ids(cambios["duenos"]) == [duenoId]
+    assert cambios["mascotas"] == [] and cambios["citas"] == []
+
+    # Desde el token nuevo no queda nada pendiente
+    vacio = _cambios(cliente, cambios["token"])
+    assert vacio["duenos"] == [] and vacio["token"] == cambios["token"]
+
+
+def test_edicion_sube_la_version_de_las_filas_que_la_muestran(cliente):
+    duenoId, mascotaId = _crearDuenoConMascota(cliente, "81000002")
+    antes = _token(cliente)
+
+    respuesta = cliente.put(f"/api/duenos/{duenoId}", json={"nombre": "Marta"})
+    assert respuesta.status_code == 200
+
+    cambios = _cambios(cliente, antes)
+    assert cambios["token"] == antes + 1
+    assert _ids(cambios["duenos"]) == [duenoId]
+    assert cambios["duenos"][0]["nombre"] == "Marta"
+    # El listado de mascotas muestra el nombre del dueño
+    assert _ids(cambios["mascotas"]) == [mascotaId]
+
+
+def test_borrado_deja_marcas_de_lo_que_se_va_en_cascada(cliente):
+    duenoId, mascotaId = _crearDuenoConMascota(cliente, "81000003")
+    antes = _token(cliente)
+
+    assert cliente.delete(f"/api/duenos/{duenoId}").status_code in (200, 202)
+
+    cambios = _cambios(cliente, antes)
+    assert cambios["reiniciar"] is False
+    assert cambios["eliminados"]["duenos"] == [duenoId]
+    assert cambios["eliminados"]["mascotas"] == [mascotaId]
+    assert duenoId not in _ids(cambios["duenos"])
+
+
+def test_una_version_por_transaccion_aunque_haya_varios_flush(app, cliente):
+    antes = _token(cliente)
+    with app.app_context():
+        primero = Dueno(**_dueno("81000004"))
+        db.session.add(primero)
+        db.session.flush()
+        segundo = Dueno(**_dueno("81000005"))
+        db.session.add(segundo)
+        db.session.commit()
+        versiones = db.session.execute(
+            db.select(Dueno.version).where(Dueno.id.in_([primero.id, segundo.id]))
+        ).scalars().all()
+        ids = [primero.id, segundo.id]
+
+    assert versiones == [antes + 1, antes + 1]
+    assert sorted(_ids(_cambios(cliente, antes)["duenos"])) == sorted(ids)
+
+
+def test_sentencia_masiva_sin_marcas_obliga_a_recargar(app, cliente):
+    _, mascotaId = _crearDuenoConMascota(cliente, "81000006")
+    antes = _token(cliente)
+    with app.app_context():
+        db.session.execute(db.delete(Cita).where(Cita.mascotaId == mascotaId))
+        db.session.commit()
+        reinicio = db.session.get(SecuenciaCambios, 1).reinicio
+
+    despues = _token(cliente)
+    assert reinicio == despues == antes + 1
+    # Un token anterior al DELETE ya no sirve; el de después, sí
+    assert _cambios(cliente, antes)["reiniciar"] is True
+    assert _cambios(cliente, despues)["reiniciar"] is False
+
+
+def test_escritura_fuera_de_la_sesion_avanza_el_contador(app, cliente):
+    antes = _token(cliente)
+    with app.app_context():
+        with db.engine.begin() as conexion:
+            duenoId = conexion.execute(
+                db.insert(Dueno.__table__).values(**_dueno("81000007"))
+                .returning(Dueno.__table__.c.id)
+            ).scalar()
+
+    cambios = _cambios(cliente, antes)
+    assert cambios["token"] == antes + 1
+    assert _ids(cambios["duenos"]) == [duenoId]
+
+
+def test_token_invalido(cliente):
+    assert cliente.get("/api/cambios?since=abc").status_code == 400
+    assert cliente.get("/api/cambios?since=-1").status_code == 400
+    assert _cambios(cliente, _token(cliente) + 100)["reiniciar"] is True
@@ -0,0 +1,41 @@
+"""
+Consultas SQL por endpoint (services/consultas.py): cada listado y cada
+detalle se resuelven en una cantidad fija de sentencias, sin importar
+cuántas filas devuelven ni cuántas mascotas, citas o registros tienen.
+"""
+import pytest
+
+# Endpoint -> sentencias por solicitud (ya cargados índices y catálogos)
+CONSULTAS_POR_ENDPOINT = {
+    "/api/duenos": 1,
+    "/api/duenos/1": 1,
+    "/api/duenos/buscar?q=ar": 1,
+    "/api/mascotas": 1,
+    "/api/mascotas/1": 1,
+    "/api/mascotas/buscar?q=ma": 1,
+    "/api/citas": 1,
+    "/api/citas/1": 1,
+    "/api/historial": 1,
+    "/api/historial/1": 1,
+    "/api/historial/mascota/1": 2,
+}
+
+
+@pytest.mark.parametrize("url, esperadas", CONSULTAS_POR_ENDPOINT.items())
+def test_consultas_por_endpoint(cliente, consultas, url, esperadas):
+    cliente.get(url)  # Primera solicitud: arma índices en memoria
+    consultas.clear()
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200
+    assert len(consultas) == esperadas, consultas
+
+
+@pytest.mark.parametrize("url", ["/api/duenos", "/api/mascotas", "/api/citas", "/api/historial"])
+def test_listado_no_depende_del_tamano_de_pagina(cliente, consultas, url):
+    cantidades = []
+    for limite in (5, 100):
+        cliente.get(f"{url}?limit={limite}")
+        consultas.clear()
+        assert cliente.get(f"{url}?limit={limite}").status_code == 200
+        cantidades.append(len(consultas))
+    assert cantidades[0] == cantidades[1]
@@ -0,0 +1,130 @@
+"""
+Eliminación diferida (services/eliminacion.py): con un historial mayor que
+ELIMINACION_DIFERIDA_FILAS el DELETE responde 202, el dueño y lo suyo dejan
+de verse en listados, detalles, dashboard y exportaciones, y la purga los
+borra de la BD.
+"""
+import csv
+import io
+import json
+from datetime import date, timedelta
+import pytest
+from models import db
+from models.cita import Cita
+from models.dueno import Dueno
+from models.historial import HistorialClinico
+from models.mascota import Mascota
+from services import eliminacion
+from services.eliminacion import INCLUIR_OCULTOS, purgarOcultos
+
+
+@pytest.fixture
+def diferida(app, monkeypatch):
+    """Toda eliminación con historial es diferida; la purga se llama a mano."""
+    monkeypatch.setitem(app.config, "ELIMINACION_DIFERIDA_FILAS", 1)
+    monkeypatch.setattr(eliminacion.purgaDiferida, "programar", lambda aplicacion: None)
+
+
+def _crearDuenoConHistorial(cliente, documento):
+    duenoId = cliente.post("/api/duenos", json={
+        "nombre": "Ramiro", "apellido": "Oculto", "documento": documento, "telefono": "3001234567"
+    }).get_json()["dueno"]["id"]
+    mascotaId = cliente.post("/api/mascotas", json={
+        "nombre": "Sombra", "especie": "Gato", "raza": "Criollo",
+        "fechaNacimiento": "2019-05-01", "duenoId": duenoId
+    }).get_json()["mascota"]["id"]
+    fecha = date.today() + timedelta(days=500)
+    fecha -= timedelta(days=fecha.weekday())
+    citaId = cliente.post("/api/citas", json={
+        "fecha": fecha.isoformat(), "hora": "16:00", "motivo": "Control", "mascotaId": mascotaId
+    }).get_json()["cita"]["id"]
+    registro = cliente.post("/api/historial", json={
+        "diagnostico": "Sano", "tratamiento": "Ninguno", "veterinario": "Dra. Ruiz",
+        "mascotaId": mascotaId
+    })
+    assert registro.status_code == 201, registro.get_json()
+    return duenoId, mascotaId, citaId, registro.get_json()["registro"]["id"]
+
+
+def _idsListado(cliente, url):
+    """Ids de todas las páginas del listado (cada página tiene como máximo 500)."""
+    ids = set()
+    parametros = "?limit=500"
+    while True:
+        pagina = cliente.get(url + parametros).get_json()
+        ids.update(fila["id"] for fila in pagina["datos"])
+        if not pagina.get("next"):
+            return ids
+        parametros = f"?limit=500&cursor={pagina['next']}"
+
+
+def _filasEnLaBd(app, duenoId, mascotaId):
+    with app.app_context():
+        return [
+            db.session.execute(
+                db.select(db.func.count()).select_from(modelo).where(condicion),
+                execution_options=INCLUIR_OCULTOS
+            ).scalar()
+            for modelo, condicion in (
+                (Dueno, Dueno.id == duenoId),
+                (Mascota, Mascota.id == mascotaId),
+                (Cita, Cita.mascotaId == mascotaId),
+                (HistorialClinico, HistorialClinico.mascotaId == mascotaId),
+            )
+        ]
+
+
+def test_eliminacion_diferida_oculta_y_la_purga_borra(app, cliente, diferida):
+    duenoId, mascotaId, citaId, registroId = _crearDuenoConHistorial(cliente, "82000001")
+    totales = cliente.get("/api/dashboard").get_json()["totales"]
+
+    respuesta = cliente.delete(f"/api/duenos/{duenoId}")
+    assert respuesta.status_code == 202
+
+    # Listados y detalles
+    assert duenoId not in _idsListado(cliente, "/api/duenos")
+    assert mascotaId not in _idsListado(cliente, "/api/mascotas")
+    assert registroId not in _idsListado(cliente, "/api/historial")
+    assert cliente.get(f"/api/duenos/{duenoId}").status_code == 404
+    assert cliente.get(f"/api/mascotas/{mascotaId}").status_code == 404
+    assert cliente.get(f"/api/citas/{citaId}").status_code == 404
+    assert cliente.get(f"/api/historial/{registroId}").status_code == 404
+
+    # Dashboard: la cita Programada se borró ya, el resto queda oculto
+    despues = cliente.get("/api/dashboard").get_json()["totales"]
+    assert despues["duenos"] == totales["duenos"] - 1
+    assert despues["mascotas"] == totales["mascotas"] - 1
+    assert despues["citas"] == totales["citas"] - 1
+    assert despues["historiales"] == totales["historiales"] - 1
+
+    # Las filas siguen en la BD hasta la purga
+    assert _filasEnLaBd(app, duenoId, mascotaId) == [1, 1, 0, 1]
+    with app.app_context():
+        borradas = purgarOcultos()
+    assert borradas == {"citas": 0, "historial_clinico": 1, "mascotas": 1, "duenos": 1}
+    assert _filasEnLaBd(app, duenoId, mascotaId) == [0, 0, 0, 0]
+
+
+def test_exportacion_no_incluye_lo_oculto(app, cliente, diferida):
+    duenoId, mascotaId, _, registroId = _crearDuenoConHistorial(cliente, "82000002")
+    assert cliente.delete(f"/api/duenos/{duenoId}").status_code == 202
+
+    exportados = cliente.get("/api/admin/tabla/duenos?formato=ndjson").get_data(as_text=True)
+    ids = {json.loads(linea)["id"] for linea in exportados.splitlines()}
+    assert str(duenoId) not in ids and ids
+
+    exportadas = cliente.get("/api/admin/tabla/mascotas?formato=csv").get_data(as_text=True)
+    filas = list(csv.DictReader(io.StringIO(exportadas)))
+    assert str(mascotaId) not in {fila["id"] for fila in filas} and filas
+
+    historial = cliente.get("/api/admin/tabla/historial_clinico?formato=csv").get_data(as_text=True)
+    assert str(registroId) not in {fila["id"] for fila in csv.DictReader(io.StringIO(historial))}
+
+    with app.app_context():
+        purgarOcultos()
+
+
+def test_eliminacion_pequena_borra_en_la_solicitud(app, cliente):
+    duenoId, mascotaId, _, _ = _crearDuenoConHistorial(cliente, "82000003")
+    assert cliente.delete(f"/api/duenos/{duenoId}").status_code == 200
+    assert _filasEnLaBd(app, duenoId, mascotaId) == [0, 0, 0, 0]
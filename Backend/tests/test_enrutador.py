@@ -0,0 +1,141 @@
+"""
+Enrutamiento entre primaria, réplicas y respaldo (services/enrutador.py).
+Cada prueba instala su propio enrutador sobre el motor de las pruebas: la
+réplica es una copia de la BD tomada al inicio (lo escrito después no está
+en ella) y la primaria caída es un archivo que no existe.
+"""
+import os
+import sqlite3
+import pytest
+from sqlalchemy import create_engine
+from models import db
+from models.dueno import Dueno
+from services.enrutador import COOKIE_ESCRITURA, EnrutadorBd, _Backend
+
+
+def _dueno(documento):
+    return {"nombre": "Rocío", "apellido": "Réplica", "documento": documento, "telefono": "3001234567"}
+
+
+def _instalar(app, monkeypatch, enrutador):
+    # Sin hilo de salud: las pruebas llaman a verificarSalud a mano
+    enrutador._pidMonitor = os.getpid()
+    monkeypatch.setitem(app.extensions, "enrutadorBd", enrutador)
+    return enrutador
+
+
+@pytest.fixture
+def conReplica(app, monkeypatch, tmp_path):
+    """Enrutador con la BD de pruebas como primaria y una copia como réplica."""
+    with app.app_context():
+        primaria = db.engine
+    copia = tmp_path / "replica.db"
+    with sqlite3.connect(primaria.url.database) as origen, sqlite3.connect(copia) as destino:
+        origen.backup(destino)
+    motorReplica = create_engine(f"sqlite:///{copia}")
+    yield _instalar(app, monkeypatch, EnrutadorBd(
+        _Backend("primaria", primaria, "SQLite"), None,
+        [_Backend("replica1", motorReplica, "Réplica de lectura")], 60, 5
+    ))
+    motorReplica.dispose()
+
+
+def _crearEnPrimaria(app, documento):
+    """Alta directa en la primaria (fuera de una solicitud, no marca al cliente)."""
+    with app.app_context():
+        dueno = Dueno(**_dueno(documento))
+        db.session.add(dueno)
+        db.session.commit()
+        return dueno.id
+
+
+def test_get_lee_de_la_replica_y_las_escrituras_van_a_la_primaria(app, cliente, conReplica):
+    duenoId = _crearEnPrimaria(app, "85000001")
+
+    # La réplica no tiene el dueño nuevo: el GET leyó de ella
+    assert cliente.get(f"/api/duenos/{duenoId}").status_code == 404
+    # Un PUT lee y escribe en la primaria
+    respuesta = cliente.put(f"/api/duenos/{duenoId}", json={"nombre": "Irene"})
+    assert respuesta.status_code == 200
+
+
+def test_tras_escribir_el_cliente_lee_lo_suyo_de_la_primaria(app, conReplica):
+    escritor = app.test_client()
+    respuesta = escritor.post("/api/duenos", json=_dueno("85000002"))
+    assert respuesta.status_code == 201
+    assert COOKIE_ESCRITURA in respuesta.headers.get("Set-Cookie", "")
+    duenoId = respuesta.get_json()["dueno"]["id"]
+
+    # Con la cookie, el GET va a la primaria; otro cliente sigue en la réplica
+    assert escritor.get(f"/api/duenos/{duenoId}").status_code == 200
+    assert app.test_client().get(f"/api/duenos/{duenoId}").status_code == 404
+
+    # Pasada la ventana, la cookie ya no obliga a leer de la primaria
+    conReplica.ventanaLecturaPropia = 0
+    assert escritor.get(f"/api/duenos/{duenoId}").status_code == 404
+
+
+def test_sin_replicas_sanas_se_lee_de_la_primaria(app, cliente, conReplica):
+    duenoId = _crearEnPrimaria(app, "85000003")
+    conReplica.replicas[0].marcarCaido(RuntimeError("sin conexión"))
+    conReplica._replicasSanas = []
+    assert cliente.get(f"/api/duenos/{duenoId}").status_code == 200
+
+
+def test_una_escritura_rechazada_no_deja_cookie(cliente, conReplica):
+    respuesta = cliente.post("/api/duenos", json={"nombre": "Incompleto"})
+    assert respuesta.status_code == 400
+    assert COOKIE_ESCRITURA not in respuesta.headers.get("Set-Cookie", "")
+
+
+@pytest.fixture
+def primariaCaida(app, monkeypatch, tmp_path):
+    """Primaria inalcanzable y la BD de pruebas como respaldo."""
+    caida = create_engine(f"sqlite:///file:{tmp_path / 'no-existe.db'}?mode=rw&uri=true")
+    with app.app_context():
+        respaldo = db.engine
+
+    def crear(respaldoEscritura):
+        return _instalar(app, monkeypatch, EnrutadorBd(
+            _Backend("primaria", caida, "Primaria"), _Backend("respaldo", respaldo, "SQLite"),
+            [], 60, 5, respaldoEscritura
+        ))
+    yield crear
+    caida.dispose()
+
+
+def test_por_defecto_no_se_escribe_en_el_respaldo(app, cliente, primariaCaida):
+    enrutador = primariaCaida(respaldoEscritura=False)
+    with app.app_context():
+        enrutador.verificarSalud()
+        enrutador.verificarSalud()
+    assert not enrutador.primario.sano
+    assert enrutador.enRespaldo is False
+    assert enrutador.motorEscritura() is enrutador.primario.motor
+    assert enrutador.estado()["escritura"] == "primaria"
+
+    # La escritura falla en lugar de quedar en el respaldo
+    assert cliente.post("/api/duenos", json=_dueno("85000005")).status_code == 500
+    with enrutador.respaldo.motor.connect() as conexion:
+        assert conexion.execute(
+            db.select(Dueno.id).where(Dueno.documento == "85000005")
+        ).first() is None
+
+
+def test_con_la_opcion_las_escrituras_pasan_al_respaldo_y_vuelven(app, cliente, primariaCaida):
+    enrutador = primariaCaida(respaldoEscritura=True)
+    with app.app_context():
+        enrutador.verificarSalud()
+        assert enrutador.enRespaldo is False   # un solo fallo no basta
+        enrutador.verificarSalud()
+    assert enrutador.enRespaldo is True
+    assert enrutador.estado()["escritura"] == "respaldo"
+
+    respuesta = cliente.post("/api/duenos", json=_dueno("85000004"))
+    assert respuesta.status_code == 201
+
+    # La primaria vuelve: las escrituras regresan a ella
+    enrutador.primario.motor = enrutador.primario._motorSalud = enrutador.respaldo.motor
+    with app.app_context():
+        enrutador.verificarSalud()
+    assert enrutador.enRespaldo is False
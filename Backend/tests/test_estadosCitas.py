@@ -0,0 +1,121 @@
+"""
+Cambios de estado en bloque y barrido de inasistencias
+(services/estadosCitas.py, POST /api/citas/estado).
+Las citas de cada prueba son de una mascota propia; las pasadas se insertan
+directamente en la BD (la API no agenda en el pasado).
+"""
+from datetime import date, datetime, time, timedelta
+import pytest
+from models import db
+from models.cita import Cita
+from services.estadosCitas import barrerInasistencias
+
+
+@pytest.fixture
+def mascotaId(cliente):
+    """Una mascota nueva por prueba."""
+    documento = f"83{datetime.now():%H%M%S%f}"[:12]
+    duenoId = cliente.post("/api/duenos", json={
+        "nombre": "Elena", "apellido": "Estados", "documento": documento, "telefono": "3001234567"
+    }).get_json()["dueno"]["id"]
+    return cliente.post("/api/mascotas", json={
+        "nombre": "Kira", "especie": "Perro", "raza": "Beagle",
+        "fechaNacimiento": "2021-03-01", "duenoId": duenoId
+    }).get_json()["mascota"]["id"]
+
+
+def _insertarCitas(app, mascotaId, citas):
+    """citas: [(fecha, hora, estado)] -> ids en el mismo orden."""
+    with app.app_context():
+        objetos = [
+            Cita(fecha=fecha, hora=hora, estado=estado, motivo="Control", mascotaId=mascotaId)
+            for fecha, hora, estado in citas
+        ]
+        db.session.add_all(objetos)
+        db.session.commit()
+        return [objeto.id for objeto in objetos]
+
+
+def _estados(app, ids):
+    with app.app_context():
+        return dict(db.session.execute(db.select(Cita.id, Cita.estado).where(Cita.id.in_(ids))).all())
+
+
+def test_lote_mixto_cuenta_actualizadas_omitidas_y_no_encontradas(app, cliente, mascotaId):
+    ayer = date.today() - timedelta(days=1)
+    futura = date.today() + timedelta(days=600)
+    pasada, futuraId, cancelada, inasistencia, completada = _insertarCitas(app, mascotaId, [
+        (ayer, time(9, 0), "Programada"),
+        (futura, time(9, 0), "Programada"),     # Completada solo hasta hoy
+        (ayer, time(10, 0), "Cancelada"),       # no admite la transición
+        (ayer, time(11, 0), "No asistió"),
+        (ayer, time(12, 0), "Completada"),      # ya está en el estado pedido
+    ])
+    ids = [pasada, futuraId, cancelada, inasistencia, completada, 99999999]
+
+    respuesta = cliente.post("/api/citas/estado", json={"estado": "Completada", "ids": ids})
+    assert respuesta.status_code == 200
+    resumen = respuesta.get_json()
+    assert resumen["coincidentes"] == 5
+    assert resumen["actualizadas"] == 2
+    assert resumen["omitidas"] == 3
+    assert resumen["noEncontradas"] == 1
+    assert resumen["porEstado"] == {"Programada": 2, "Cancelada": 1, "No asistió": 1, "Completada": 1}
+
+    assert _estados(app, ids) == {
+        pasada: "Completada", futuraId: "Programada", cancelada: "Cancelada",
+        inasistencia: "Completada", completada: "Completada",
+    }
+
+
+def test_cancelar_por_filtro_de_mascota(app, cliente, mascotaId):
+    futura = date.today() + timedelta(days=601)
+    ids = _insertarCitas(app, mascotaId, [
+        (futura, time(8, 0), "Programada"),
+        (futura, time(8, 30), "Programada"),
+        (futura, time(9, 0), "Completada"),
+    ])
+    resumen = cliente.post("/api/citas/estado", json={
+        "estado": "Cancelada", "mascotaId": mascotaId, "estadoActual": "Programada"
+    }).get_json()
+    assert (resumen["coincidentes"], resumen["actualizadas"], resumen["omitidas"]) == (2, 2, 0)
+    assert "noEncontradas" not in resumen
+    assert list(_estados(app, ids).values()).count("Cancelada") == 2
+
+    # La franja queda libre para otra cita
+    disponibles = cliente.get(f"/api/citas/disponibilidad?fecha={futura}").get_json()["disponibles"]
+    assert "08:00" in disponibles and "08:30" in disponibles
+
+
+@pytest.mark.parametrize("cuerpo", [
+    {"estado": "Programada", "ids": [1]},        # no es una transición en bloque
+    {"estado": "Cancelada"},                     # sin ids ni filtro
+    {"estado": "Cancelada", "ids": []},
+    {"estado": "Cancelada", "desde": "2030-02-01", "hasta": "2030-01-01"},
+])
+def test_cuerpo_invalido_responde_400(cliente, cuerpo):
+    assert cliente.post("/api/citas/estado", json=cuerpo).status_code == 400
+
+
+def test_barrido_marca_solo_las_programadas_vencidas(app, mascotaId):
+    # Un día muy anterior a los datos sintéticos: el barrido solo ve estas citas
+    dia = date(2001, 1, 8)
+    ids = _insertarCitas(app, mascotaId, [
+        (dia - timedelta(days=1), time(16, 0), "Programada"),
+        (dia, time(8, 0), "Programada"),
+        (dia, time(10, 30), "Programada"),
+        (dia, time(11, 30), "Programada"),     # dentro de la gracia
+        (dia, time(15, 0), "Programada"),      # todavía no ocurre
+        (dia, time(9, 0), "Cancelada"),
+        (dia, time(9, 30), "Completada"),
+    ])
+    ahora = datetime.combine(dia, time(12, 0))
+
+    with app.app_context():
+        assert barrerInasistencias(gracia=60, lote=2, ahora=ahora) == 3
+        assert barrerInasistencias(gracia=60, lote=2, ahora=ahora) == 0
+
+    estados = _estados(app, ids)
+    assert [estados[citaId] for citaId in ids] == [
+        "No asistió", "No asistió", "No asistió", "Programada", "Programada", "Cancelada", "Completada"
+    ]
@@ -0,0 +1,149 @@
+"""
+Importación masiva (services/importacion.py, POST /api/<recurso>/bulk):
+errores por fila, verificación de llaves foráneas por lote, documento único
+entre lotes y lectura interrumpida a mitad de la entrada.
+Los documentos de estas pruebas empiezan por 84.
+"""
+import csv
+import json
+import pytest
+from models import db
+from models.dueno import Dueno
+from services import importacion
+from services.importacion import IMPORTACION_DUENOS, ImportacionInterrumpida, importarRegistros
+
+
+def _dueno(documento, **extra):
+    return {"nombre": "Sofía", "apellido": "Importada", "documento": documento,
+            "telefono": "3001234567", **extra}
+
+
+def _ndjson(registros):
+    return "".join(json.dumps(registro) + "\n" for registro in registros).encode("utf-8")
+
+
+def _documentosEnLaBd(app, documentos):
+    with app.app_context():
+        return set(db.session.execute(
+            db.select(Dueno.documento).where(Dueno.documento.in_(documentos))
+        ).scalars())
+
+
+def test_errores_por_fila(app, cliente):
+    respuesta = cliente.post("/api/duenos/bulk", json=[
+        _dueno("84000001"),
+        {"nombre": "Sin", "apellido": "Documento", "telefono": "3001234567"},
+        _dueno("84000002"),
+        "no es un objeto",
+    ])
+    assert respuesta.status_code == 200
+    resumen = respuesta.get_json()
+    assert (resumen["total"], resumen["insertados"], resumen["rechazados"]) == (4, 2, 2)
+    assert [error["fila"] for error in resumen["errores"]] == [2, 4]
+    assert _documentosEnLaBd(app, ["84000001", "84000002"]) == {"84000001", "84000002"}
+
+
+def test_linea_ndjson_ilegible_es_error_de_su_fila(cliente):
+    cuerpo = _ndjson([_dueno("84000011")]) + b"{no es json\n" + _ndjson([_dueno("84000012")])
+    respuesta = cliente.post("/api/duenos/bulk?formato=ndjson", data=cuerpo)
+    resumen = respuesta.get_json()
+    assert respuesta.status_code == 200
+    assert resumen["insertados"] == 2
+    assert resumen["errores"] == [{"fila": 2, "error": "Línea JSON inválida"}]
+
+
+def test_llave_foranea_se_verifica_por_lote(cliente, consultas):
+    duenoId = cliente.post("/api/duenos", json=_dueno("84000021")).get_json()["dueno"]["id"]
+    mascota = {"nombre": "Pelusa", "especie": "Gato", "raza": "Persa", "fechaNacimiento": "2020-02-02"}
+    registros = [{**mascota, "duenoId": duenoId} for _ in range(20)]
+    registros[5]["duenoId"] = registros[12]["duenoId"] = 99999999
+
+    del consultas[:]
+    resumen = cliente.post("/api/mascotas/bulk", json=registros).get_json()
+    assert (resumen["insertados"], resumen["rechazados"]) == (18, 2)
+    assert resumen["errores"] == [
+        {"fila": 6, "error": "El dueño especificado no existe"},
+        {"fila": 13, "error": "El dueño especificado no existe"},
+    ]
+    # Una sola consulta a duenos para las 20 filas
+    verificaciones = [sql for sql in consultas if sql.lstrip().upper().startswith("SELECT")
+                      and "FROM duenos" in sql and " IN " in sql]
+    assert len(verificaciones) == 1
+
+
+def test_documento_unico_entre_lotes(app, cliente):
+    cliente.post("/api/duenos", json=_dueno("84000031"))
+    registros = [
+        _dueno("84000032"), _dueno("84000033"),
+        _dueno("84000031"),                      # ya existe en la BD
+        _dueno("84000032"),                      # confirmado en un lote anterior
+        _dueno("84000034"), _dueno("84000034"),  # repetido en el mismo lote
+    ]
+    with app.app_context():
+        resumen = importarRegistros(IMPORTACION_DUENOS, enumerate(registros, start=1), tamanoLote=2)
+
+    assert (resumen["insertados"], resumen["rechazados"]) == (3, 3)
+    assert resumen["errores"] == [
+        {"fila": 3, "error": "Ya existe un dueño con ese documento"},
+        {"fila": 4, "error": "Ya existe un dueño con ese documento"},
+        {"fila": 6, "error": "Documento repetido en la fila 5"},
+    ]
+
+
+def test_linea_csv_invalida_no_detiene_la_importacion(app, cliente):
+    limiteAnterior = csv.field_size_limit(200)
+    cuerpo = (
+        "nombre,apellido,documento,telefono\n"
+        "Ana,Uno,84000041,3001234567\n"
+        f"Ana,Larga,84000042,{'9' * 300}\n"
+        "Ana,Tres,84000043,3001234567\n"
+    ).encode("utf-8")
+    try:
+        respuesta = cliente.post("/api/duenos/bulk?formato=csv", data=cuerpo)
+    finally:
+        csv.field_size_limit(limiteAnterior)
+
+    resumen = respuesta.get_json()
+    assert respuesta.status_code == 200
+    assert (resumen["total"], resumen["insertados"]) == (3, 2)
+    assert resumen["errores"][0]["fila"] == 2
+    assert resumen["errores"][0]["error"].startswith("Línea CSV inválida")
+    assert _documentosEnLaBd(app, ["84000041", "84000043"]) == {"84000041", "84000043"}
+
+
+def test_lectura_interrumpida_responde_400_con_lo_importado(app, cliente, monkeypatch):
+    monkeypatch.setattr(importacion, "TAMANO_LOTE", 10)
+    documentos = [f"8410{numero:04d}" for numero in range(200)]
+    # Más de un bloque de lectura antes de los bytes que no son UTF-8
+    cuerpo = _ndjson(_dueno(documento, direccion="Calle 1 # 2-3") for documento in documentos)
+    cuerpo += b'{"nombre": "\xff\xfe"}\n' + _ndjson([_dueno("84109999")])
+
+    respuesta = cliente.post("/api/duenos/bulk?formato=ndjson", data=cuerpo)
+    assert respuesta.status_code == 400
+    resumen = respuesta.get_json()
+    assert "La lectura se detuvo después de la fila" in resumen["error"]
+    assert 0 < resumen["total"] <= len(documentos)
+    assert resumen["insertados"] == resumen["total"] and resumen["rechazados"] == 0
+
+    # Lo informado como insertado quedó confirmado; lo posterior, no
+    assert _documentosEnLaBd(app, documentos) == set(documentos[:resumen["total"]])
+    assert not _documentosEnLaBd(app, ["84109999"])
+
+
+def test_entrada_ilegible_desde_el_inicio_responde_400_sin_resumen(cliente):
+    respuesta = cliente.post("/api/duenos/bulk?formato=ndjson", data=b"\xff\xfe\n")
+    assert respuesta.status_code == 400
+    assert "total" not in respuesta.get_json()
+
+
+def test_interrupcion_fuera_del_endpoint(app):
+    def registros():
+        yield 1, _dueno("84000051")
+        yield 2, _dueno("84000052")
+        raise ValueError("Entrada cortada")
+
+    with app.app_context():
+        with pytest.raises(ImportacionInterrumpida) as error:
+            importarRegistros(IMPORTACION_DUENOS, registros(), tamanoLote=1)
+    assert error.value.resumen["insertados"] == 2
+    assert str(error.value).startswith("Entrada cortada. La lectura se detuvo después de la fila 2")
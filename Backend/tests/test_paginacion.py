@@ -0,0 +1,51 @@
+"""
+Paginación por cursor de los listados (services/paginacion.py): las
+páginas siguientes recorren todo sin repetir filas y un cursor mal formado
+o ajeno al listado responde 400 sin llegar a la BD.
+"""
+import base64
+import json
+import pytest
+
+
+def _cursor(valores):
+    texto = json.dumps(valores, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(texto).decode("ascii").rstrip("=")
+
+
+def _recorrer(cliente, url, limite):
+    """Ids de todas las páginas del listado siguiendo 'next'."""
+    ids = []
+    siguiente = None
+    while True:
+        parametros = f"?limit={limite}&cursor={siguiente}" if siguiente else f"?limit={limite}"
+        pagina = cliente.get(url + parametros).get_json()
+        ids.extend(fila["id"] for fila in pagina["datos"])
+        siguiente = pagina.get("next")
+        if not siguiente:
+            return ids
+
+
+@pytest.mark.parametrize("url", ["/api/duenos", "/api/mascotas", "/api/citas", "/api/historial"])
+def test_las_paginas_recorren_todo_el_listado(cliente, url):
+    pequenas = _recorrer(cliente, url, 25)
+    assert len(pequenas) == len(set(pequenas)) > 25
+    assert pequenas == _recorrer(cliente, url, 500)
+
+
+@pytest.mark.parametrize("url, cursor", [
+    ("/api/duenos", "no es base64!"),
+    ("/api/duenos", _cursor({"nombre": "Ana"})),          # no es una lista
+    ("/api/duenos", _cursor(["Ana"])),                    # le falta el id
+    ("/api/duenos", _cursor([[1], {"a": 2}])),            # valores que no son de la columna
+    ("/api/duenos", _cursor(["Ana", "uno"])),             # texto en una columna entera
+    ("/api/duenos", _cursor(["Ana", True])),
+    ("/api/mascotas", _cursor([3, 1])),                   # número en una columna de texto
+    ("/api/citas", _cursor(["2030-13-01", "09:00", 1])),  # fecha inválida
+    ("/api/citas", _cursor([20300101, "09:00", 1])),
+    ("/api/historial", _cursor(["2030-01-01", 1.5])),
+])
+def test_cursor_invalido_responde_400(cliente, url, cursor):
+    respuesta = cliente.get(f"{url}?cursor={cursor}")
+    assert respuesta.status_code == 400
+    assert respuesta.get_json() == {"error": "Cursor inválido"}
@@ -0,0 +1,15 @@
+"""
+Punto de entrada WSGI para servidores de producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --port=5000 wsgi:app
+
+La aplicación se crea una sola vez al importar el módulo (con preload_app,
+en el proceso maestro de gunicorn: la conexión y la revisión del esquema
+se resuelven antes de crear los workers). El modo debug queda
+siempre desactivado, aunque FLASK_DEBUG esté definido.
+"""
+from app import crearApp
+
+app = crearApp()
+app.config["DEBUG"] = False
@@ -4,7 +4,13 @@
 -- Normalización: Tercera Forma Normal (3FN)
 -- =============================================
 
+-- SQLite solo aplica las llaves foráneas (y sus ON DELETE CASCADE) con este
+-- PRAGMA, que la aplicación activa en cada conexión (Config.pragmasSqlite)
+PRAGMA foreign_keys = ON;
+
 -- Eliminar tablas si existen (orden inverso por dependencias)
+DROP TABLE IF EXISTS eliminaciones;
+DROP TABLE IF EXISTS secuencia_cambios;
 DROP TABLE IF EXISTS historial_clinico;
 DROP TABLE IF EXISTS citas;
 DROP TABLE IF EXISTS mascotas;
@@ -22,7 +28,9 @@ CREATE TABLE duenos (
     documento VARCHAR(20) NOT NULL UNIQUE,  -- Documento de identidad (único)
     telefono VARCHAR(20) NOT NULL,
     correo VARCHAR(150),
-    direccion VARCHAR(200)
+    direccion VARCHAR(200),
+    version INTEGER NOT NULL DEFAULT 0,   -- Versión del último cambio (sincronización incremental)
+    "eliminadoEn" DATETIME                -- Eliminación diferida: oculto hasta que la purga lo borre
 );
 
 -- =============================================
@@ -41,6 +49,8 @@ CREATE TABLE mascotas (
     peso FLOAT,                          -- Peso en kilogramos
     observaciones TEXT,
     "duenoId" INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,   -- Versión del último cambio (sincronización incremental)
+    "eliminadoEn" DATETIME,               -- Eliminación diferida (ver duenos)
     FOREIGN KEY ("duenoId") REFERENCES duenos(id) ON DELETE CASCADE
 );
 
@@ -56,8 +66,9 @@ CREATE TABLE citas (
     fecha DATE NOT NULL,
     hora TIME NOT NULL,
     motivo VARCHAR(300) NOT NULL,
-    estado VARCHAR(20) NOT NULL DEFAULT 'Programada',  -- Programada, Completada, Cancelada
+    estado VARCHAR(20) NOT NULL DEFAULT 'Programada',  -- Programada, Completada, Cancelada, No asistió
     "mascotaId" INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,   -- Versión del último cambio (sincronización incremental)
     FOREIGN KEY ("mascotaId") REFERENCES mascotas(id) ON DELETE CASCADE
 );
 
@@ -80,9 +91,55 @@ CREATE TABLE historial_clinico (
     observaciones TEXT,
     "pesoEnConsulta" FLOAT,              -- Peso al momento de la consulta
     "mascotaId" INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,   -- Versión del último cambio (sincronización incremental)
     FOREIGN KEY ("mascotaId") REFERENCES mascotas(id) ON DELETE CASCADE
 );
 
+-- =============================================
+-- TABLAS: secuencia_cambios y eliminaciones
+-- Descripción: registro de cambios para /api/cambios?since=<token>.
+-- secuencia_cambios tiene una sola fila (id = 1) con el contador que toma
+-- la columna 'version' de las filas modificadas; eliminaciones guarda una
+-- marca por registro borrado. Las mantiene el Backend (services/cambios.py).
+-- =============================================
+CREATE TABLE secuencia_cambios (
+    id INTEGER PRIMARY KEY,
+    valor INTEGER NOT NULL,
+    reinicio INTEGER NOT NULL            -- Token mínimo que todavía se puede sincronizar
+);
+
+CREATE TABLE eliminaciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabla VARCHAR(30) NOT NULL,
+    "registroId" INTEGER NOT NULL,
+    version INTEGER NOT NULL
+);
+
+-- =============================================
+-- ÍNDICES
+-- Descripción: aceleran las búsquedas por llave foránea (incluidos los
+-- borrados en CASCADE) y los ordenamientos usados por los listados.
+-- Deben coincidir con los declarados en los modelos (__table_args__).
+-- =============================================
+CREATE INDEX ix_duenos_nombre ON duenos (nombre);
+CREATE INDEX ix_mascotas_duenoId ON mascotas ("duenoId");
+CREATE INDEX ix_mascotas_nombre ON mascotas (nombre);
+CREATE INDEX ix_citas_mascotaId ON citas ("mascotaId");
+CREATE INDEX ix_citas_fecha_hora ON citas (fecha, hora);
+-- Una sola cita Programada por fecha y hora (índice parcial; no aplica en MySQL)
+CREATE UNIQUE INDEX ux_citas_agenda ON citas (fecha, hora) WHERE estado = 'Programada';
+CREATE INDEX ix_historial_mascotaId_fecha ON historial_clinico ("mascotaId", fecha DESC);
+CREATE INDEX ix_historial_fecha ON historial_clinico (fecha);
+-- Lectura de cambios por rango de versión (/api/cambios)
+CREATE INDEX ix_duenos_version ON duenos (version);
+CREATE INDEX ix_mascotas_version ON mascotas (version);
+CREATE INDEX ix_citas_version ON citas (version);
+CREATE INDEX ix_historial_version ON historial_clinico (version);
+CREATE INDEX ix_eliminaciones_version ON eliminaciones (version);
+-- Registros pendientes de la purga de la eliminación diferida
+CREATE INDEX "ix_duenos_eliminadoEn" ON duenos ("eliminadoEn");
+CREATE INDEX "ix_mascotas_eliminadoEn" ON mascotas ("eliminadoEn");
+
 -- =============================================
 -- JUSTIFICACIÓN DE NORMALIZACIÓN (3FN):
 --
@@ -31,14 +31,22 @@ async function peticionApi(endpoint, metodo = "GET", datos = null) {
         opciones.body = JSON.stringify(datos);
     }
 
+    // Una escritura propia se ve en la próxima lectura aunque su evento no haya llegado
+    if (metodo !== "GET") {
+        cacheLocal.alDiaHasta = 0;
+    }
+
     try {
         // Realizar la petición con Fetch API
         const respuesta = await fetch(`${API_BASE}${endpoint}`, opciones);
         const json = await respuesta.json();
 
         // Si la respuesta no es exitosa, lanzar error con mensaje del servidor
+        // (el cuerpo completo queda en error.respuesta, ej: alternativas de una cita)
         if (!respuesta.ok) {
-            throw new Error(json.error || "Error en la petición");
+            const errorApi = new Error(json.error || "Error en la petición");
+            errorApi.respuesta = json;
+            throw errorApi;
         }
 
         return json;
@@ -49,13 +57,245 @@ async function peticionApi(endpoint, metodo = "GET", datos = null) {
     }
 }
 
+// =============================================
+// PAGINACIÓN POR CURSOR
+// =============================================
+
+// Tamaño de página usado al recorrer los listados
+const TAMANO_PAGINA = 200;
+
+/**
+ * Obtiene una página de un listado.
+ * El servidor responde { datos: [...], next: "<cursor>" | null }.
+ *
+ * @param {string} endpoint - Ruta del listado (ej: "/citas")
+ * @param {object} opciones - { limit, cursor, fields } (fields: arreglo o texto "a,b")
+ * @returns {Promise<object>} - Página con los datos y el cursor siguiente
+ */
+function obtenerPagina(endpoint, opciones = {}) {
+    const parametros = new URLSearchParams();
+    parametros.set("limit", opciones.limit || TAMANO_PAGINA);
+    if (opciones.cursor) {
+        parametros.set("cursor", opciones.cursor);
+    }
+    if (opciones.fields) {
+        const campos = Array.isArray(opciones.fields) ? opciones.fields.join(",") : opciones.fields;
+        parametros.set("fields", campos);
+    }
+    return peticionApi(`${endpoint}?${parametros.toString()}`);
+}
+
+/**
+ * Recorre todas las páginas de un listado siguiendo el cursor "next".
+ * Cada petición trae un bloque acotado, así el servidor nunca serializa
+ * la tabla completa de una sola vez.
+ *
+ * @param {string} endpoint - Ruta del listado (ej: "/citas")
+ * @param {object} opciones - { limit, fields }
+ * @returns {Promise<Array>} - Todos los registros concatenados
+ */
+async function obtenerTodasLasPaginas(endpoint, opciones = {}) {
+    const registros = [];
+    let cursor = null;
+    do {
+        const pagina = await obtenerPagina(endpoint, { ...opciones, cursor });
+        registros.push(...pagina.datos);
+        cursor = pagina.next;
+    } while (cursor);
+    return registros;
+}
+
+// =============================================
+// SINCRONIZACIÓN INCREMENTAL (caché local)
+// =============================================
+
+/**
+ * Orden de cada listado, el mismo del servidor (Backend/services/consultas.py):
+ * [campo, descendente]. El último campo es el id.
+ */
+const ORDEN_LISTADOS = {
+    duenos: [["nombre", false], ["id", false]],
+    mascotas: [["nombre", false], ["id", false]],
+    citas: [["fecha", false], ["hora", false], ["id", false]],
+    historial: [["fecha", true], ["id", true]]
+};
+
+/**
+ * Copia local de los listados. Cada listado se descarga completo la primera
+ * vez que se pide; después solo se piden los cambios desde el último token
+ * (GET /api/cambios?since=) y se mezclan: se quitan los eliminados y se
+ * agregan o reemplazan por id los modificados.
+ */
+const cacheLocal = {
+    token: null,                 // versión hasta la que están al día los listados cargados
+    dia: null,                   // día de la carga: la edad de las mascotas cambia sin escrituras
+    listados: {},                // recurso -> Map(id -> registro)
+    ordenados: {},               // recurso -> arreglo ordenado (se recalcula al cambiar)
+    alDiaHasta: 0,               // hasta cuándo el token se da por vigente sin preguntar (eventos en vivo)
+    cola: Promise.resolve()      // las sincronizaciones se ejecutan de a una
+};
+
+/** Compara dos registros según el orden del listado. */
+function compararRegistros(orden, a, b) {
+    for (const [campo, descendente] of orden) {
+        if (a[campo] === b[campo]) {
+            continue;
+        }
+        const menor = a[campo] === null || (b[campo] !== null && a[campo] < b[campo]);
+        return (menor ? -1 : 1) * (descendente ? -1 : 1);
+    }
+    return 0;
+}
+
+/** Vacía la caché y toma el token actual (antes de volver a descargar los listados). */
+async function reiniciarCache() {
+    const { token } = await peticionApi("/cambios");
+    cacheLocal.token = token;
+    cacheLocal.dia = new Date().toDateString();
+    cacheLocal.listados = {};
+    cacheLocal.ordenados = {};
+}
+
+/** Pide los cambios desde el token y los mezcla en los listados cargados. */
+async function aplicarCambios() {
+    if (cacheLocal.token === null || cacheLocal.dia !== new Date().toDateString()) {
+        await reiniciarCache();
+        return;
+    }
+    if (Date.now() < cacheLocal.alDiaHasta) {
+        return;  // los eventos en vivo ya trajeron todo hasta el token
+    }
+    const cambios = await peticionApi(`/cambios?since=${cacheLocal.token}`);
+    if (cambios.reiniciar) {
+        await reiniciarCache();
+        return;
+    }
+    mezclarCambios(cambios);
+}
+
+/** Mezcla una respuesta de /api/cambios (o un evento en vivo) en los listados cargados. */
+function mezclarCambios(cambios) {
+    for (const [recurso, registros] of Object.entries(cacheLocal.listados)) {
+        const eliminados = cambios.eliminados[recurso];
+        const modificados = cambios[recurso];
+        if (!eliminados.length && !modificados.length) {
+            continue;
+        }
+        // Primero los eliminados: un id reutilizado vuelve con los modificados
+        eliminados.forEach(id => registros.delete(id));
+        modificados.forEach(registro => registros.set(registro.id, registro));
+        delete cacheLocal.ordenados[recurso];
+    }
+    cacheLocal.token = cambios.token;
+}
+
+/**
+ * Listado completo desde la caché local, al día con el servidor.
+ * Con opciones.fields retorna solo esos campos de cada registro.
+ *
+ * @param {string} recurso - duenos, mascotas, citas o historial
+ * @param {object} opciones - { fields } (arreglo o texto "a,b")
+ * @returns {Promise<Array>} - Registros en el orden del listado
+ */
+function obtenerListadoSincronizado(recurso, opciones = {}) {
+    const tarea = cacheLocal.cola.then(async () => {
+        await aplicarCambios();
+        if (!cacheLocal.listados[recurso]) {
+            // Descargado después de tomar el token: ya incluye todo hasta él
+            const registros = await obtenerTodasLasPaginas(`/${recurso}`);
+            cacheLocal.listados[recurso] = new Map(registros.map(registro => [registro.id, registro]));
+        }
+        if (!cacheLocal.ordenados[recurso]) {
+            const orden = ORDEN_LISTADOS[recurso];
+            cacheLocal.ordenados[recurso] = [...cacheLocal.listados[recurso].values()]
+                .sort((a, b) => compararRegistros(orden, a, b));
+        }
+        return cacheLocal.ordenados[recurso];
+    });
+    // Un error no bloquea las sincronizaciones siguientes
+    cacheLocal.cola = tarea.catch(() => {});
+
+    return tarea.then(registros => {
+        if (!opciones.fields) {
+            return registros.slice();
+        }
+        const campos = Array.isArray(opciones.fields) ? opciones.fields : opciones.fields.split(",");
+        return registros.map(registro => Object.fromEntries(campos.map(campo => [campo, registro[campo]])));
+    });
+}
+
+// =============================================
+// EVENTOS EN VIVO (SSE)
+// =============================================
+
+// Segundos que el token se da por vigente sin recibir eventos: la conexión
+// puede haberse cortado sin aviso (el servidor envía un latido cada 15 s)
+const VIGENCIA_EVENTOS_MS = 60000;
+
+/**
+ * Se suscribe a /api/eventos (Server-Sent Events). Cada evento 'cambios'
+ * trae las filas de una transacción confirmada: si es la versión siguiente
+ * al token local se mezcla en los listados sin pedir nada a la API; si falta
+ * alguna, la próxima lectura se pone al día con /api/cambios.
+ *
+ * @param {function} alCambiar - Recibe los recursos que cambiaron (arreglo)
+ * @returns {EventSource|null} - null si el navegador no soporta SSE
+ */
+function conectarEventos(alCambiar) {
+    if (typeof EventSource === "undefined") {
+        return null;
+    }
+    const fuente = new EventSource(`${API_BASE}/eventos`);
+
+    fuente.addEventListener("cambios", evento => {
+        const cambios = JSON.parse(evento.data);
+        cacheLocal.cola = cacheLocal.cola.then(() => {
+            if (cacheLocal.token !== null && cambios.token <= cacheLocal.token) {
+                return null;  // ya incluido (por ejemplo, al escribir desde esta pestaña)
+            }
+            if (cacheLocal.token === cambios.token - 1 && !cambios.reiniciar && !cambios.sincronizar) {
+                mezclarCambios(cambios);
+                cacheLocal.alDiaHasta = Date.now() + VIGENCIA_EVENTOS_MS;
+            } else {
+                cacheLocal.alDiaHasta = 0;
+            }
+            return cambios.sincronizar || cambios.reiniciar
+                ? Object.keys(ORDEN_LISTADOS)
+                : Object.keys(ORDEN_LISTADOS).filter(recurso =>
+                    cambios[recurso].length || cambios.eliminados[recurso].length);
+        }).then(recursos => {
+            if (recursos && recursos.length && alCambiar) {
+                alCambiar(recursos);
+            }
+        }).catch(() => {});
+    });
+
+    // Al abrir o reabrir la conexión pudo perderse algún evento
+    fuente.addEventListener("open", () => {
+        cacheLocal.alDiaHasta = 0;
+    });
+    fuente.addEventListener("error", () => {
+        cacheLocal.alDiaHasta = 0;
+    });
+    return fuente;
+}
+
+// =============================================
+// DASHBOARD
+// =============================================
+
+/** Obtiene totales, especies, próximas citas y agenda del día en una sola petición. */
+function obtenerDashboard() {
+    return peticionApi("/dashboard");
+}
+
 // =============================================
 // ENDPOINTS DE DUEÑOS
 // =============================================
 
-/** Obtiene la lista completa de dueños. */
-function obtenerDuenos() {
-    return peticionApi("/duenos");
+/** Obtiene la lista completa de dueños (caché local sincronizada con /api/cambios). */
+function obtenerDuenos(opciones = {}) {
+    return obtenerListadoSincronizado("duenos", opciones);
 }
 
 /** Obtiene un dueño por su ID. */
@@ -78,18 +318,21 @@ function eliminarDueno(id) {
     return peticionApi(`/duenos/${id}`, "DELETE");
 }
 
-/** Busca dueños por nombre o documento. */
+// Resultados por búsqueda: la respuesta trae además el total de coincidencias
+const LIMITE_BUSQUEDA = 50;
+
+/** Busca dueños por nombre o documento: {datos, next, total}. */
 function buscarDuenos(termino) {
-    return peticionApi(`/duenos/buscar?q=${encodeURIComponent(termino)}`);
+    return peticionApi(`/duenos/buscar?q=${encodeURIComponent(termino)}&limit=${LIMITE_BUSQUEDA}`);
 }
 
 // =============================================
 // ENDPOINTS DE MASCOTAS
 // =============================================
 
-/** Obtiene la lista completa de mascotas. */
-function obtenerMascotas() {
-    return peticionApi("/mascotas");
+/** Obtiene la lista completa de mascotas (caché local sincronizada con /api/cambios). */
+function obtenerMascotas(opciones = {}) {
+    return obtenerListadoSincronizado("mascotas", opciones);
 }
 
 /** Obtiene una mascota por su ID. */
@@ -112,18 +355,18 @@ function eliminarMascota(id) {
     return peticionApi(`/mascotas/${id}`, "DELETE");
 }
 
-/** Busca mascotas por nombre o documento del dueño. */
+/** Busca mascotas por nombre o documento del dueño: {datos, next, total}. */
 function buscarMascotas(termino) {
-    return peticionApi(`/mascotas/buscar?q=${encodeURIComponent(termino)}`);
+    return peticionApi(`/mascotas/buscar?q=${encodeURIComponent(termino)}&limit=${LIMITE_BUSQUEDA}`);
 }
 
 // =============================================
 // ENDPOINTS DE CITAS
 // =============================================
 
-/** Obtiene la lista completa de citas. */
-function obtenerCitas() {
-    return peticionApi("/citas");
+/** Obtiene la lista completa de citas (caché local sincronizada con /api/cambios). */
+function obtenerCitas(opciones = {}) {
+    return obtenerListadoSincronizado("citas", opciones);
 }
 
 /** Obtiene una cita por su ID. */
@@ -131,6 +374,11 @@ function obtenerCitaPorId(id) {
     return peticionApi(`/citas/${id}`);
 }
 
+/** Franjas del día con su disponibilidad según el horario de la clínica. */
+function obtenerDisponibilidad(fecha) {
+    return peticionApi(`/citas/disponibilidad?fecha=${encodeURIComponent(fecha)}`);
+}
+
 /** Agenda una nueva cita. */
 function crearCita(datos) {
     return peticionApi("/citas", "POST", datos);
@@ -150,9 +398,9 @@ function eliminarCita(id) {
 // ENDPOINTS DE HISTORIAL CLÍNICO
 // =============================================
 
-/** Obtiene todos los registros clínicos. */
-function obtenerHistorial() {
-    return peticionApi("/historial");
+/** Obtiene todos los registros clínicos (caché local sincronizada con /api/cambios). */
+function obtenerHistorial(opciones = {}) {
+    return obtenerListadoSincronizado("historial", opciones);
 }
 
 /** Obtiene un registro clínico por su ID. */
@@ -165,6 +413,18 @@ function obtenerHistorialPorMascota(mascotaId) {
     return peticionApi(`/historial/mascota/${mascotaId}`);
 }
 
+/**
+ * Obtiene una página de la línea de tiempo de una mascota (citas e historial).
+ * La primera página (sin cursor) incluye el resumen clínico.
+ */
+function obtenerLineaTiempoMascota(mascotaId, cursor = null, limite = 50) {
+    const parametros = new URLSearchParams({ limit: limite });
+    if (cursor) {
+        parametros.set("cursor", cursor);
+    }
+    return peticionApi(`/historial/mascota/${mascotaId}/linea-tiempo?${parametros}`);
+}
+
 /** Crea un nuevo registro clínico. */
 function crearRegistroClinico(datos) {
     return peticionApi("/historial", "POST", datos);
@@ -60,6 +60,37 @@ function navegarA(seccion) {
     document.getElementById("navbarMenu").classList.remove("open");
 }
 
+// =============================================
+// EVENTOS EN VIVO
+// =============================================
+
+// Recursos que muestra cada sección y cómo recargarla
+const RECURSOS_POR_SECCION = {
+    sectionDashboard: [["duenos", "mascotas", "citas", "historial"], () => {
+        actualizarEstadisticas();
+        cargarCitasDashboard();
+    }],
+    sectionDuenos: [["duenos"], () => cargarDuenos()],
+    sectionMascotas: [["mascotas"], () => cargarMascotas()],
+    sectionCitas: [["citas"], () => cargarCitas()],
+    sectionHistorial: [["historial"], () => cargarHistorial()]
+};
+
+/**
+ * Recarga la sección visible si cambió alguno de sus recursos (eventos
+ * en vivo de otra pestaña o de otro equipo de la clínica). Los listados
+ * salen de la caché local, que el evento ya dejó al día.
+ *
+ * @param {Array} recursos - Recursos que cambiaron (duenos, mascotas, citas, historial)
+ */
+function refrescarSeccionVisible(recursos) {
+    const visible = document.querySelector(".section:not(.hidden)");
+    const entrada = visible && RECURSOS_POR_SECCION[visible.id];
+    if (entrada && entrada[0].some(recurso => recursos.includes(recurso))) {
+        entrada[1]();
+    }
+}
+
 // =============================================
 // NOTIFICACIONES TOAST
 // =============================================
@@ -123,23 +154,15 @@ function cerrarModal() {
 
 /**
  * Actualiza los contadores del dashboard.
- * Hace peticiones paralelas para obtener los totales.
+ * Los totales se calculan en el servidor (/api/dashboard), sin descargar las tablas.
  */
 async function actualizarEstadisticas() {
     try {
-        // Peticiones en paralelo con Promise.all (más eficiente)
-        const [duenos, mascotas, citas] = await Promise.all([
-            obtenerDuenos(),
-            obtenerMascotas(),
-            obtenerCitas()
-        ]);
-
-        document.getElementById("statDuenos").textContent = duenos.length;
-        document.getElementById("statMascotas").textContent = mascotas.length;
-
-        // Contar solo citas programadas
-        const citasProgramadas = citas.filter(c => c.estado === "Programada");
-        document.getElementById("statCitas").textContent = citasProgramadas.length;
+        const { totales } = await obtenerDashboard();
+
+        document.getElementById("statDuenos").textContent = totales.duenos;
+        document.getElementById("statMascotas").textContent = totales.mascotas;
+        document.getElementById("statCitas").textContent = totales.citasProgramadas;
     } catch (error) {
         console.error("Error al actualizar estadísticas:", error);
     }
@@ -164,7 +187,7 @@ async function buscarMascotaGlobal() {
     }
 
     try {
-        const resultados = await buscarMascotas(termino);
+        const { datos: resultados, total } = await buscarMascotas(termino);
 
         if (resultados.length === 0) {
             contenedor.innerHTML = `
@@ -185,6 +208,14 @@ async function buscarMascotaGlobal() {
                 </div>
             </div>
         `).join("");
+
+        // Los más relevantes primero: si hay más, se invita a precisar el término
+        if (total > resultados.length) {
+            contenedor.innerHTML += `
+                <p class="search-total">
+                    Mostrando ${resultados.length} de ${total} resultados. Precise la búsqueda para ver otros.
+                </p>`;
+        }
     } catch (error) {
         mostrarToast("Error en la búsqueda: " + error.message, "error");
     }
@@ -230,5 +261,8 @@ document.addEventListener("DOMContentLoaded", function () {
     actualizarEstadisticas();
     cargarCitasDashboard();
 
+    // --- Cambios en vivo: citas y registros nuevos sin recargar ---
+    conectarEventos(refrescarSeccionVisible);
+
     console.log("🐾 Huellitas Vet - Aplicación inicializada correctamente");
 });
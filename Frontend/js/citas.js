@@ -20,7 +20,8 @@ function claseBadgeEstado(estado) {
     const clases = {
         "Programada": "badge-programada",
         "Completada": "badge-completada",
-        "Cancelada": "badge-cancelada"
+        "Cancelada": "badge-cancelada",
+        "No asistió": "badge-noasistio"
     };
     return clases[estado] || "badge-programada";
 }
@@ -70,7 +71,7 @@ async function cargarCitas() {
  */
 async function cargarSelectorMascotas() {
     try {
-        const mascotas = await obtenerMascotas();
+        const mascotas = await obtenerMascotas({ fields: ["id", "nombre", "especie", "duenoNombre"] });
         const selector = document.getElementById("citaMascota");
 
         selector.innerHTML = '<option value="">Seleccionar mascota...</option>';
@@ -97,6 +98,35 @@ function mostrarFormularioCita() {
     document.getElementById("citaFecha").min = new Date().toISOString().split("T")[0];
 }
 
+/**
+ * Sugiere en el campo de hora las franjas libres de la fecha elegida
+ * (GET /api/citas/disponibilidad). El campo sigue aceptando cualquier hora:
+ * el servidor valida el horario y los choques al guardar.
+ */
+async function cargarHorasDisponibles() {
+    const fecha = document.getElementById("citaFecha").value;
+    const lista = document.getElementById("citaHorasDisponibles");
+    lista.innerHTML = "";
+    if (!fecha) return;
+
+    try {
+        const disponibilidad = await obtenerDisponibilidad(fecha);
+        if (!disponibilidad.atiende) {
+            mostrarToast("La clínica no atiende ese día", "warning");
+            return;
+        }
+        if (disponibilidad.disponibles.length === 0) {
+            mostrarToast("No quedan horarios libres ese día", "warning");
+            return;
+        }
+        lista.innerHTML = disponibilidad.disponibles
+            .map(hora => `<option value="${hora}"></option>`)
+            .join("");
+    } catch (error) {
+        console.error("Error al cargar horarios disponibles:", error);
+    }
+}
+
 /** Oculta y limpia el formulario de cita. */
 function cancelarFormularioCita() {
     document.getElementById("formCita").classList.add("hidden");
@@ -108,6 +138,7 @@ function limpiarFormularioCita() {
     document.getElementById("citaMascota").value = "";
     document.getElementById("citaFecha").value = "";
     document.getElementById("citaHora").value = "";
+    document.getElementById("citaHorasDisponibles").innerHTML = "";
     document.getElementById("citaMotivo").value = "";
     document.getElementById("citaEstado").value = "Programada";
 }
@@ -138,7 +169,14 @@ async function guardarCita(evento) {
         cargarCitas();
         actualizarEstadisticas();
     } catch (error) {
-        mostrarToast(error.message, "error");
+        // Franja ocupada: el servidor sugiere otros horarios del mismo día
+        const alternativas = error.respuesta && error.respuesta.alternativas;
+        if (alternativas && alternativas.length) {
+            mostrarToast(`${error.message}. Libres: ${alternativas.join(", ")}`, "error");
+            cargarHorasDisponibles();
+        } else {
+            mostrarToast(error.message, "error");
+        }
     }
 }
 
@@ -157,6 +195,7 @@ async function editarCita(id) {
         document.getElementById("citaHora").value = cita.hora;
         document.getElementById("citaMotivo").value = cita.motivo;
         document.getElementById("citaEstado").value = cita.estado;
+        cargarHorasDisponibles();
 
         document.getElementById("formCita").scrollIntoView({ behavior: "smooth" });
     } catch (error) {
@@ -191,19 +230,16 @@ async function ejecutarEliminarCita(id) {
  */
 async function cargarCitasDashboard() {
     try {
-        const citas = await obtenerCitas();
+        // El servidor ya entrega las próximas citas programadas (máximo 5)
+        const { proximasCitas: citasProgramadas } = await obtenerDashboard();
         const contenedor = document.getElementById("listaCitasDashboard");
 
-        // Filtrar solo citas programadas
-        const citasProgramadas = citas.filter(cita => cita.estado === "Programada");
-
         if (citasProgramadas.length === 0) {
             contenedor.innerHTML = '<div class="empty-state">No hay citas próximas</div>';
             return;
         }
 
-        // Mostrar máximo 5 próximas citas
-        contenedor.innerHTML = citasProgramadas.slice(0, 5).map(cita => `
+        contenedor.innerHTML = citasProgramadas.map(cita => `
             <div class="cita-preview-item">
                 <div class="cita-preview-info">
                     <span class="cita-preview-date">${formatearFecha(cita.fecha)} - ${cita.hora}</span>
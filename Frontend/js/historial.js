@@ -83,7 +83,7 @@ function renderizarTimeline(registros, contenedor) {
  */
 async function cargarSelectorFiltroMascotas() {
     try {
-        const mascotas = await obtenerMascotas();
+        const mascotas = await obtenerMascotas({ fields: ["id", "nombre", "especie", "duenoNombre"] });
         const selector = document.getElementById("historialFiltroMascota");
 
         selector.innerHTML = '<option value="">Todas las mascotas</option>';
@@ -132,7 +132,7 @@ async function filtrarHistorialPorMascota() {
  */
 async function cargarSelectorMascotasHistorial() {
     try {
-        const mascotas = await obtenerMascotas();
+        const mascotas = await obtenerMascotas({ fields: ["id", "nombre", "especie", "duenoNombre"] });
         const selector = document.getElementById("historialMascota");
 
         selector.innerHTML = '<option value="">Seleccionar mascota...</option>';
@@ -82,7 +82,7 @@ async function cargarMascotas() {
  */
 async function cargarSelectorDuenos() {
     try {
-        const duenos = await obtenerDuenos();
+        const duenos = await obtenerDuenos({ fields: ["id", "nombre", "apellido", "documento"] });
         const selector = document.getElementById("mascotaDueno");
 
         // Mantener la primera opción (placeholder) y agregar dueños